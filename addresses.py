@@ -0,0 +1,210 @@
+import hashlib
+import logging
+import unicodedata
+import pyodbc
+import db_connection # Funções de acesso ao banco de dados.
+
+# Separador usado ao concatenar os campos do endereço para o hash (não aparece em texto digitado).
+_FIELD_SEPARATOR = "\x1f"
+
+# Quantidade de endereços lidos por vez pelo job de deduplicação.
+MERGE_CHUNK_SIZE = 5000
+
+def normalize_text(value):
+    """Normaliza um campo de endereço para comparação: remove acentos, ignora maiúsculas/minúsculas e espaços extras."""
+    if value is None:
+        return ""
+    value = unicodedata.normalize("NFKD", str(value)) # Separa letras e acentos (ex: 'ã' -> 'a' + '~').
+    value = "".join(ch for ch in value if not unicodedata.combining(ch)) # Descarta os acentos.
+    return " ".join(value.casefold().split()) # Minúsculas e espaços colapsados.
+
+def normalize_cep(cep):
+    """Retorna apenas os dígitos do CEP (ex: '01310-100' e '01310100' ficam iguais)."""
+    return "".join(ch for ch in str(cep or "") if ch.isdigit())
+
+def format_cep(cep):
+    """Formata o CEP como 00000-000 quando possui 8 dígitos; caso contrário, devolve o valor sem espaços."""
+    digits = normalize_cep(cep)
+    if len(digits) == 8:
+        return f"{digits[:5]}-{digits[5:]}"
+    return str(cep or "").strip()
+
+def clean_address(cep, estado, cidade, bairro, rua, numero, complemento):
+    """
+    Prepara os valores de exibição de um endereço: CEP formatado e espaços extras removidos.
+    Maiúsculas e acentos são preservados (só são ignorados no hash).
+
+    Returns:
+        tuple: (cep, estado, cidade, bairro, rua, numero, complemento), com complemento vazio convertido em None.
+    """
+    def clean(value):
+        return " ".join(str(value).split()) if value is not None else None
+    complemento = clean(complemento) or None
+    return (format_cep(cep), clean(estado), clean(cidade), clean(bairro), clean(rua), clean(numero), complemento)
+
+def address_hash(cep, estado, cidade, bairro, rua, numero, complemento):
+    """
+    Calcula a chave de deduplicação (SHA-256 em hexadecimal) de um endereço.
+
+    Dois endereços que diferem apenas em acentos, maiúsculas/minúsculas, espaços ou formatação
+    do CEP produzem o mesmo hash.
+    """
+    parts = [normalize_cep(cep)] + [normalize_text(v) for v in (estado, cidade, bairro, rua, numero, complemento)]
+    return hashlib.sha256(_FIELD_SEPARATOR.join(parts).encode("utf-8")).hexdigest()
+
+def get_or_create_address(conn, cep, estado, cidade, bairro, rua, numero, complemento=None):
+    """
+    Retorna o ID_Endereco de um endereço, reutilizando o registro existente se o endereço
+    normalizado já estiver cadastrado (upsert pelo índice único de Hash_Endereco).
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        cep, estado, cidade, bairro, rua, numero, complemento: Campos do endereço.
+
+    Returns:
+        int or None: O ID_Endereco (novo ou existente), ou None em caso de erro.
+    """
+    values = clean_address(cep, estado, cidade, bairro, rua, numero, complemento)
+    key = address_hash(*values)
+    # O UPDLOCK/HOLDLOCK impede que duas sessões insiram o mesmo endereço ao mesmo tempo.
+    sql = """
+    SET NOCOUNT ON;
+    INSERT INTO Endereco (CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento, Hash_Endereco)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM Endereco WITH (UPDLOCK, HOLDLOCK) WHERE Hash_Endereco = ?);
+    SELECT ID_Endereco FROM Endereco WHERE Hash_Endereco = ?;
+    """
+    rows = db_connection.execute_and_fetch(conn, sql, values + (key, key, key))
+    if not rows:
+        logging.error("Não foi possível obter o ID do endereço após o upsert.")
+        return None
+    return int(rows[0][0])
+
+def delete_address_if_unused(conn, address_id):
+    """
+    Deleta um Endereço que não seja mais referenciado por Pessoa, Sede ou Dados_Rastreamento.
+
+    Returns:
+        bool or None: True se o endereço foi deletado, False se ainda está em uso, None em caso de erro.
+    """
+    rowcounts = db_connection.execute_transaction(conn, [("""
+        DELETE FROM Endereco
+        WHERE ID_Endereco = ?
+          AND NOT EXISTS (SELECT 1 FROM Pessoa P WHERE P.ID_Endereco = Endereco.ID_Endereco)
+          AND NOT EXISTS (SELECT 1 FROM Sede S WHERE S.ID_Endereco = Endereco.ID_Endereco)
+          AND NOT EXISTS (SELECT 1 FROM Dados_Rastreamento DR WHERE DR.ID_Endereco = Endereco.ID_Endereco);
+        """, (address_id,))])
+    if rowcounts is None:
+        return None
+    return rowcounts[0] > 0
+
+def merge_duplicate_addresses(conn, chunk_size=MERGE_CHUNK_SIZE):
+    """
+    Job único de deduplicação: calcula o hash de todos os endereços, redireciona as referências de
+    Pessoa, Sede e Dados_Rastreamento para um endereço canônico por hash e deleta as duplicatas.
+
+    Os endereços são lidos em blocos (paginação por ID), e o hash de cada um é gravado em uma tabela
+    temporária; a fusão em si é feita com comandos set-based em uma única transação.
+    Grupos em que mais de uma Sede usa o mesmo endereço são ignorados (Sede.ID_Endereco é UNIQUE).
+
+    Returns:
+        dict or None: Contadores do job ('enderecos', 'duplicados', 'pessoas', 'sedes', 'rastreamentos',
+                      'duplicados_ignorados'), ou None em caso de erro.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        IF OBJECT_ID('tempdb..#Endereco_Hash') IS NOT NULL DROP TABLE #Endereco_Hash;
+        CREATE TABLE #Endereco_Hash (ID_Endereco INT PRIMARY KEY, Hash_Endereco CHAR(64) NOT NULL);
+        """)
+        cursor.fast_executemany = True # Envia os lotes de hashes em poucas idas ao servidor.
+
+        # 1. Calcula os hashes em blocos, paginando por ID_Endereco (memória constante).
+        total, last_id = 0, 0
+        while True:
+            cursor.execute("""
+            SELECT TOP (?) ID_Endereco, CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento
+            FROM Endereco WHERE ID_Endereco > ? ORDER BY ID_Endereco;
+            """, (chunk_size, last_id))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany("INSERT INTO #Endereco_Hash (ID_Endereco, Hash_Endereco) VALUES (?, ?);",
+                               [(row[0], address_hash(*row[1:])) for row in rows])
+            total += len(rows)
+            last_id = rows[-1][0]
+            logging.info("Hashes calculados para %d endereços...", total)
+
+        cursor.execute("CREATE INDEX IX_Endereco_Hash_Tmp ON #Endereco_Hash (Hash_Endereco);")
+
+        # 2. Mapeia cada duplicata para o endereço canônico do grupo (preferindo o usado por uma Sede, depois o menor ID).
+        cursor.execute("""
+        SET NOCOUNT ON;
+        IF OBJECT_ID('tempdb..#Mapa_Endereco') IS NOT NULL DROP TABLE #Mapa_Endereco;
+        WITH Base AS (
+            SELECT H.ID_Endereco, H.Hash_Endereco, CASE WHEN S.ID_Sede IS NULL THEN 1 ELSE 0 END AS Sem_Sede
+            FROM #Endereco_Hash H
+            LEFT JOIN Sede S ON S.ID_Endereco = H.ID_Endereco
+        ), Ranked AS (
+            SELECT ID_Endereco, Hash_Endereco,
+                   FIRST_VALUE(ID_Endereco) OVER (PARTITION BY Hash_Endereco ORDER BY Sem_Sede, ID_Endereco) AS ID_Canonico
+            FROM Base
+        )
+        SELECT ID_Endereco, Hash_Endereco, ID_Canonico
+        INTO #Mapa_Endereco
+        FROM Ranked
+        WHERE ID_Endereco <> ID_Canonico;
+
+        -- Ignora grupos em que mais de uma sede usa o endereço (a fusão violaria a restrição UNIQUE de Sede).
+        DELETE M FROM #Mapa_Endereco M
+        WHERE (SELECT COUNT(*) FROM Sede S JOIN #Endereco_Hash H ON S.ID_Endereco = H.ID_Endereco
+               WHERE H.Hash_Endereco = M.Hash_Endereco) > 1;
+        SELECT @@ROWCOUNT;
+        """)
+        ignored_duplicates = cursor.fetchone()[0]
+
+        # 3. Redireciona as referências e deleta as duplicatas em uma única transação.
+        counters = {"enderecos": total, "duplicados_ignorados": ignored_duplicates}
+        steps = [
+            ("pessoas", "UPDATE P SET P.ID_Endereco = M.ID_Canonico FROM Pessoa P JOIN #Mapa_Endereco M ON P.ID_Endereco = M.ID_Endereco;"),
+            ("sedes", "UPDATE S SET S.ID_Endereco = M.ID_Canonico FROM Sede S JOIN #Mapa_Endereco M ON S.ID_Endereco = M.ID_Endereco;"),
+            ("rastreamentos", "UPDATE DR SET DR.ID_Endereco = M.ID_Canonico FROM Dados_Rastreamento DR JOIN #Mapa_Endereco M ON DR.ID_Endereco = M.ID_Endereco;"),
+            ("duplicados", "DELETE E FROM Endereco E JOIN #Mapa_Endereco M ON E.ID_Endereco = M.ID_Endereco;"),
+            # Grava o hash no endereço sobrevivente de cada grupo que ainda não o possui (endereços antigos).
+            (None, """
+            UPDATE E SET E.Hash_Endereco = H.Hash_Endereco
+            FROM Endereco E JOIN #Endereco_Hash H ON E.ID_Endereco = H.ID_Endereco
+            WHERE E.Hash_Endereco IS NULL
+              AND E.ID_Endereco = (SELECT MIN(E2.ID_Endereco) FROM Endereco E2 JOIN #Endereco_Hash H2 ON E2.ID_Endereco = H2.ID_Endereco
+                                   WHERE H2.Hash_Endereco = H.Hash_Endereco)
+              AND NOT EXISTS (SELECT 1 FROM Endereco E3 WHERE E3.Hash_Endereco = H.Hash_Endereco);
+            """)
+        ]
+        for name, sql in steps:
+            cursor.execute(sql)
+            if name:
+                counters[name] = cursor.rowcount
+        conn.commit()
+        logging.info("Deduplicação de endereços concluída: %s", counters)
+        return counters
+    except pyodbc.Error as e:
+        conn.rollback()
+        logging.error(f"Erro durante a deduplicação de endereços: {e}")
+        return None
+    finally:
+        cursor.close()
+
+if __name__ == "__main__":
+    # Execução do job de deduplicação: python addresses.py
+    conexao_db = db_connection.conectar_banco()
+    if conexao_db:
+        try:
+            resultado = merge_duplicate_addresses(conexao_db)
+            if resultado:
+                print("Deduplicação concluída:")
+                for chave, valor in resultado.items():
+                    print(f"  {chave}: {valor}")
+            else:
+                print("A deduplicação falhou. Consulte o log para detalhes.")
+        finally:
+            db_connection.desconectar_banco(conexao_db)
@@ -0,0 +1,161 @@
+import argparse
+import logging
+import sys
+import pyodbc
+import db_connection # Funções de acesso ao banco de dados.
+
+try: # numpy/pandas são opcionais: só este módulo depende deles (pip install numpy pandas).
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None
+
+# Linhas lidas do cursor por vez ao montar o DataFrame.
+FETCH_SIZE = 100000
+PERCENTILES = (0.5, 0.9, 0.95)
+
+# Agrupamentos disponíveis para os percentis.
+GROUPS = {
+    "cidade": ["Estado_Destino", "Cidade_Destino"],
+    "tipo": ["Tipo_Produto"],
+    "motorista": ["Codigo_Funcionario_Motorista"],
+}
+
+# Faixas da distribuição de atraso (dias entre a entrega realizada e a prevista).
+LATENESS_BINS = [-float("inf"), -1, 0, 1, 3, 7, float("inf")]
+LATENESS_LABELS = ["Adiantado", "No dia", "1 dia", "2-3 dias", "4-7 dias", "> 7 dias"]
+
+COLUMNS = [
+    "ID_Produto", "Tipo_Produto", "Estado_Destino", "Cidade_Destino", "Codigo_Funcionario_Motorista",
+    "Data_Chegada_CD", "Data_Prevista_Entrega", "Data_Entrega_Realizada", "Primeiro_Carregamento",
+]
+DATE_COLUMNS = ["Data_Chegada_CD", "Data_Prevista_Entrega", "Data_Entrega_Realizada", "Primeiro_Carregamento"]
+
+def _require_pandas():
+    if pd is None:
+        raise ImportError("O módulo de análises requer numpy e pandas (pip install numpy pandas).")
+
+def load_delivery_frame(conn, start=None, end=None):
+    """
+    Carrega as datas de produtos e carregamentos em um DataFrame (uma linha por produto).
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        start, end (date, optional): Filtra por Data_Chegada_CD.
+
+    Returns:
+        pandas.DataFrame or None: Colunas de COLUMNS (datas como datetime64), ou None em caso de erro.
+    """
+    _require_pandas()
+    sql = """
+    SELECT P.ID_Produto, P.Tipo_Produto, DR.Estado, DR.Cidade, P.Codigo_Funcionario_Motorista,
+           P.Data_Chegada_CD, P.Data_Prevista_Entrega, P.Data_Entrega_Realizada, C.Primeiro_Carregamento
+    FROM Produto_A_Ser_Entregue P
+    INNER JOIN Dados_Rastreamento DR ON DR.ID_Rastreamento = P.ID_Rastreamento
+    LEFT JOIN (SELECT ID_Produto, MIN(Data_Carregamento) AS Primeiro_Carregamento
+               FROM Carregamento GROUP BY ID_Produto) C ON C.ID_Produto = P.ID_Produto
+    WHERE (? IS NULL OR P.Data_Chegada_CD >= ?) AND (? IS NULL OR P.Data_Chegada_CD <= ?);
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, (start, start, end, end))
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            chunks.append(pd.DataFrame.from_records([tuple(r) for r in rows], columns=COLUMNS))
+    except pyodbc.Error as e:
+        logging.error(f"Erro ao carregar os dados de entregas: {e}")
+        return None
+    finally:
+        cursor.close()
+
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=COLUMNS)
+    for column in DATE_COLUMNS:
+        frame[column] = pd.to_datetime(frame[column])
+    frame["Tipo_Produto"] = frame["Tipo_Produto"].astype("category") # Poucos valores distintos: agrupa mais rápido.
+    frame["Estado_Destino"] = frame["Estado_Destino"].astype("category")
+    return frame
+
+def add_derived_columns(frame):
+    """
+    Acrescenta as métricas por produto, calculadas sobre colunas inteiras (sem laço por linha):
+      - Permanencia_CD_Dias: dias entre a chegada ao CD e o primeiro carregamento (NaN se não carregado).
+      - Atraso_Dias: dias entre a entrega realizada e a prevista (negativo = adiantado; NaN se não aplicável).
+    """
+    _require_pandas()
+    one_day = np.timedelta64(1, "D")
+    frame["Permanencia_CD_Dias"] = (frame["Primeiro_Carregamento"] - frame["Data_Chegada_CD"]) / one_day
+    frame["Atraso_Dias"] = (frame["Data_Entrega_Realizada"] - frame["Data_Prevista_Entrega"]) / one_day
+    return frame
+
+def percentiles_by(frame, metric, group):
+    """
+    Quantidade, média e percentis (PERCENTILES) de uma métrica por grupo.
+
+    Args:
+        frame (DataFrame): Resultado de add_derived_columns.
+        metric (str): 'Permanencia_CD_Dias' ou 'Atraso_Dias'.
+        group (str): Chave de GROUPS ('cidade', 'tipo' ou 'motorista').
+
+    Returns:
+        DataFrame: Uma linha por grupo, com as colunas n, media, p50, p90, p95.
+    """
+    _require_pandas()
+    data = frame[GROUPS[group] + [metric]].dropna(subset=[metric])
+    grouped = data.groupby(GROUPS[group], observed=True)[metric]
+    result = grouped.quantile(list(PERCENTILES)).unstack()
+    result.columns = [f"p{int(q * 100)}" for q in PERCENTILES]
+    result.insert(0, "media", grouped.mean())
+    result.insert(0, "n", grouped.size())
+    return result.sort_values("n", ascending=False)
+
+def lateness_distribution(frame):
+    """
+    Distribuição das entregas realizadas por faixa de atraso (LATENESS_LABELS).
+
+    Returns:
+        DataFrame: Colunas quantidade e percentual, uma linha por faixa.
+    """
+    _require_pandas()
+    lateness = frame["Atraso_Dias"].dropna()
+    counts = pd.cut(lateness, LATENESS_BINS, labels=LATENESS_LABELS).value_counts(sort=False)
+    total = counts.sum()
+    return pd.DataFrame({"quantidade": counts, "percentual": (100.0 * counts / total).round(1) if total else 0.0})
+
+def summarize(frame):
+    """Calcula todas as análises de um DataFrame de entregas. Retorna um dicionário de DataFrames."""
+    add_derived_columns(frame)
+    summary = {"distribuicao_atraso": lateness_distribution(frame)}
+    for metric, name in (("Permanencia_CD_Dias", "permanencia"), ("Atraso_Dias", "atraso")):
+        for group in GROUPS:
+            summary[f"{name}_por_{group}"] = percentiles_by(frame, metric, group)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análises de prazo e permanência no CD (requer numpy e pandas).")
+    parser.add_argument("--inicio", help="data inicial de chegada ao CD (AAAA-MM-DD)")
+    parser.add_argument("--fim", help="data final de chegada ao CD (AAAA-MM-DD)")
+    parser.add_argument("--linhas", type=int, default=15, help="grupos exibidos por tabela (padrão: 15)")
+    args = parser.parse_args(argv)
+    _require_pandas()
+
+    conn = db_connection.conectar_banco()
+    if not conn:
+        return 1
+    try:
+        frame = load_delivery_frame(conn, args.inicio, args.fim)
+    finally:
+        db_connection.desconectar_banco(conn)
+    if frame is None:
+        return 1
+
+    print(f"{len(frame)} produtos analisados.")
+    for name, table in summarize(frame).items():
+        print(f"\n--- {name} ---")
+        print(table.head(args.linhas).round(2).to_string())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
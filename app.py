@@ -1,28 +1,62 @@
 import sys # Importa o módulo sys, que fornece acesso a variáveis e funções mantidas ou usadas pelo interpretador Python.
-import hashlib # Importa o módulo hashlib para algoritmos de hash seguros, usado aqui para senhas.
 import getpass # Importa o módulo getpass para obter a senha do usuário sem exibi-la na tela.
 import os # Importa o módulo os, que fornece uma maneira de usar funcionalidades dependentes do sistema operacional, como limpar a tela.
 from datetime import datetime, date # Importa as classes datetime e date do módulo datetime para trabalhar com datas e horas.
 import db_connection # Importa o seu arquivo db_connection.py, que deve conter as funções para conectar e interagir com o banco de dados.
+import addresses # Normalização e deduplicação de endereços (reutiliza o ID_Endereco de endereços já cadastrados).
+import cep_database # Base local de CEPs (arquivo mapeado em memória) para preencher endereços automaticamente.
+import client_import # Importação de clientes em lote a partir de planilhas CSV.
+import passwords # Hash de senhas com KDF configurável (PBKDF2/scrypt) e formato versionado.
+import sessions # Tokens de sessão assinados e cache de perfis de usuário.
+import reference_cache # Cache em memória de veículos, sedes, motoristas e listas de valores válidos.
+import reports # Relatórios do Gerente (lidos das tabelas de resumo mantidas por triggers).
+import driver_queue # Fila de entregas do motorista com envio de status em lote.
+import driver_sync # Modo offline do motorista: manifesto e diário locais (SQLite) com sincronização em lote.
+import proof_of_delivery # Comprovantes de entrega (fotos e assinaturas) em repositório local endereçado por hash.
+import arrival_scan # Leitura em lote da chegada de produtos na sede (auxiliar de logística).
+import profiling # Perfilamento opcional por ação de menu (tempo total, banco e Python).
+import n_plus_one # Detector de consultas repetidas (N+1) nos fluxos do terminal.
+import metrics # Métricas da aplicação (exportação opcional no formato do Prometheus).
+import table_view # Tabelas de texto com colunas de largura fixa, saída em blocos e paginação.
+import tui # Modo tela cheia (curses) opcional: menus e listagens navegáveis pelo teclado.
+import services # Regras de negócio sem entrada/saída de terminal (também usadas por cli.py).
 from decimal import Decimal # Importa Decimal para operações precisas com números decimais.
 
 # ------------------- UTILS ----------------------
 # Esta seção contém funções utilitárias usadas em várias partes do aplicativo.
 
 def hash_password(password):
-    """Gera o hash SHA256 de uma senha."""
-    # Codifica a senha para bytes, calcula o hash SHA256 e retorna a representação hexadecimal.
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Gera o hash de uma senha com o KDF configurado (ver passwords.py)."""
+    # Usa salt aleatório e o formato versionado (ex: pbkdf2_sha256$iteracoes$salt$hash).
+    return passwords.hash_password(password)
 
 def verify_password(stored_hash, provided_password):
     """Verifica se a senha fornecida corresponde ao hash armazenado."""
-    # Compara o hash armazenado com o hash da senha fornecida.
-    return stored_hash == hash_password(provided_password)
+    # Aceita os formatos atuais e o SHA-256 legado; a comparação é feita em tempo constante.
+    return passwords.verify_password(stored_hash, provided_password)
+
+def upgrade_password_hash(conn, login, stored_hash, password):
+    """
+    Regrava o hash da senha com o KDF e custo atuais, se o hash armazenado estiver desatualizado
+    (ex: SHA-256 legado). Chamado logo após um login bem-sucedido, quando a senha em texto é conhecida.
+    """
+    if not passwords.needs_rehash(stored_hash):
+        return
+    # A condição em Senha_Hash evita sobrescrever uma senha alterada por outra sessão nesse meio tempo.
+    sql = "UPDATE Usuario SET Senha_Hash = ? WHERE Login = ? AND Senha_Hash = ?"
+    new_hash = passwords.hash_passwords([password])[0] # No pool de threads do KDF, como a importação de clientes.
+    db_connection.execute_query(conn, sql, (new_hash, login, stored_hash))
 
 def clear_screen():
     """Limpa a tela do terminal."""
-    # Executa o comando 'cls' no Windows ou 'clear' em outros sistemas (Linux, macOS) para limpar a tela.
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if tui.is_active(): # No modo tela cheia, cada menu redesenha a tela.
+        return
+    if os.name == 'nt':
+        os.system('cls') # Executa o comando 'cls' no Windows.
+    else:
+        # Sequência ANSI (cursor no início + limpar tela): sem criar um processo 'clear' a cada menu.
+        sys.stdout.write("\033[H\033[2J")
+        sys.stdout.flush()
 
 def press_enter_to_continue():
     """Pausa a execução até que o usuário pressione Enter."""
@@ -41,16 +75,25 @@ def display_menu(title, options, show_exit_option=True):
     Returns:
         int: A escolha do usuário.
     """
-    print(f"\n--- {title} ---") # Exibe o título do menu.
-    for i, option in enumerate(options, 1): # Itera sobre as opções, começando a numeração em 1.
-        print(f"{i}. {option}") # Exibe cada opção numerada.
-
+    exit_label = None
     if show_exit_option: # Verifica se a opção de sair/voltar deve ser mostrada.
         # Determina se a opção 0 deve ser "Voltar" ou "Sair" com base no título.
         if "Principal" in title or "Login" in title or "Bem-vindo" in title or not any(s in title.lower() for s in ["gerenciar", "menu d", "funções de"]):
-            print("0. Sair")
+            exit_label = "Sair"
         else:
-            print("0. Voltar")
+            exit_label = "Voltar"
+
+    if tui.is_active(): # Modo tela cheia: menu navegável pelo teclado, com redesenho incremental.
+        choice = tui.menu(title, options, exit_label)
+        if show_exit_option:
+            profiling.menu_choice(title, options, choice) # Marca o início/fim da ação (só com o perfilamento ligado).
+        return choice
+
+    print(f"\n--- {title} ---") # Exibe o título do menu.
+    for i, option in enumerate(options, 1): # Itera sobre as opções, começando a numeração em 1.
+        print(f"{i}. {option}") # Exibe cada opção numerada.
+    if exit_label:
+        print(f"0. {exit_label}")
 
     while True: # Loop até que uma entrada válida seja fornecida.
         try:
@@ -66,6 +109,7 @@ def display_menu(title, options, show_exit_option=True):
                     print(f"Opção inválida. Escolha entre 1 e {len(options)}.")
             else: # Se há opção 0 (menu normal).
                 if 0 <= choice <= len(options): # Valida se a escolha está dentro do intervalo, incluindo 0.
+                    profiling.menu_choice(title, options, choice) # Marca o início/fim da ação (só com o perfilamento ligado).
                     return choice # Retorna a escolha válida.
                 else:
                     print(f"Opção inválida. Escolha entre 0 e {len(options)}.")
@@ -119,13 +163,39 @@ def get_valid_input(prompt, input_type=str, optional=False, choices=None):
             else:
                 print(f"Entrada inválida. Esperado um {'número inteiro' if input_type == int else 'número decimal' if input_type == float else 'texto'}.")
 
+def prompt_with_default(prompt, default):
+    """Solicita um campo obrigatório sugerindo um valor padrão (Enter mantém o valor sugerido)."""
+    if not default:
+        return get_valid_input(f"{prompt}: ")
+    return input(f"{prompt} [{default}]: ").strip() or default
+
+def prompt_address_terminal(state_label="Estado", street_label="Rua", complement_label="Complemento (opcional)"):
+    """
+    Coleta um endereço a partir do CEP, preenchendo Estado, Cidade, Bairro e Rua pela base local de CEPs
+    (cep_database) quando o CEP é encontrado. O usuário pode confirmar com Enter ou corrigir cada campo.
+
+    Returns:
+        tuple: (cep, estado, cidade, bairro, rua, numero, complemento).
+    """
+    cep = get_valid_input("CEP: ")
+    found = cep_database.lookup_cep(cep) or {} # Consulta local (sem rede); vazio se a base não existir ou o CEP não for encontrado.
+    if found:
+        print(f"CEP encontrado: {found['rua']}, {found['bairro']} - {found['cidade']}/{found['estado']}. Pressione Enter para confirmar cada campo.")
+    state = prompt_with_default(state_label, found.get('estado'))
+    city = prompt_with_default("Cidade", found.get('cidade'))
+    neighborhood = prompt_with_default("Bairro", found.get('bairro'))
+    street = prompt_with_default(street_label, found.get('rua'))
+    number = get_valid_input("Número: ")
+    complement = get_valid_input(f"{complement_label}: ", optional=True)
+    return cep, state, city, neighborhood, street, number, complement
+
 # --- Lógicas de CRUD para as Entidades (Administrador) ---
 # CRUD: Create, Read, Update, Delete (Criar, Ler, Atualizar, Deletar)
 
 # Gerenciar Pessoas (Conforme já implementado e levemente ajustado)
 def manage_people_terminal(conn):
     """Menu para gerenciar Pessoas (Adicionar, Listar, Atualizar, Deletar)."""
-    options = ["Adicionar Pessoa", "Listar Pessoas", "Atualizar Pessoa", "Deletar Pessoa"]
+    options = ["Adicionar Pessoa", "Listar Pessoas", "Atualizar Pessoa", "Deletar Pessoa", "Deletar Pessoas em Lote (LGPD)", "Buscar Pessoa"]
     while True:
         clear_screen() # Limpa a tela.
         choice = display_menu("Gerenciar Pessoas", options) # Exibe o menu e obtém a escolha.
@@ -134,6 +204,8 @@ def manage_people_terminal(conn):
         elif choice == 2: list_people_terminal(conn) # Chama a função para listar pessoas.
         elif choice == 3: update_person_terminal(conn) # Chama a função para atualizar pessoa.
         elif choice == 4: delete_person_terminal(conn) # Chama a função para deletar pessoa.
+        elif choice == 5: delete_people_bulk_terminal(conn) # Chama a exclusão em lote.
+        elif choice == 6: search_people_terminal(conn) # Chama a busca de pessoas.
         elif choice == 0: break # Sai do menu de gerenciamento de pessoas.
         press_enter_to_continue() # Pausa antes de limpar a tela e mostrar o menu novamente.
 
@@ -147,21 +219,12 @@ def add_person_terminal(conn, return_id=False):
     email = get_valid_input("Email: ")
 
     print("\n--- Dados do Endereço ---")
-    # Coleta dados do endereço.
-    cep = get_valid_input("CEP: ")
-    state = get_valid_input("Estado: ")
-    city = get_valid_input("Cidade: ")
-    neighborhood = get_valid_input("Bairro: ")
-    street = get_valid_input("Rua: ")
-    number = get_valid_input("Número: ")
-    complement = get_valid_input("Complemento (opcional): ", optional=True)
+    # Coleta dados do endereço (preenchidos automaticamente a partir do CEP, quando possível).
+    cep, state, city, neighborhood, street, number, complement = prompt_address_terminal()
 
     try:
-        # Define a query SQL para inserir um novo endereço.
-        sql_insert_address = "INSERT INTO Endereco (CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento) VALUES (?, ?, ?, ?, ?, ?, ?);"
-        address_params = (cep, state, city, neighborhood, street, number, complement) # Parâmetros para a query.
-        # Executa a inserção e obtém o ID do último endereço inserido.
-        new_address_id = db_connection.execute_insert_and_get_last_id(conn, sql_insert_address, address_params)
+        # Obtém o ID do endereço, reutilizando o registro existente se o mesmo endereço já estiver cadastrado.
+        new_address_id = addresses.get_or_create_address(conn, cep, state, city, neighborhood, street, number, complement)
 
         if new_address_id is not None: # Se o endereço foi inserido com sucesso.
             # Define a query SQL para inserir uma nova pessoa, usando o ID do endereço recém-criado.
@@ -200,21 +263,59 @@ def list_people_terminal(conn):
     INNER JOIN Endereco E ON P.ID_Endereco = E.ID_Endereco
     ORDER BY P.Nome;
     """
-    people_data = db_connection.execute_query(conn, sql, fetch_results=True) # Executa a query e busca os resultados.
-
-    if people_data: # Se houver dados.
-        headers = ["Cód.", "Nome", "RG", "Telefone", "Email", "CEP", "Rua", "Nº", "Bairro", "Cidade", "UF"]
-        col_widths = [5, 25, 12, 15, 25, 10, 20, 8, 15, 15, 5] # Define larguras das colunas para formatação.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths]) # Cria o formato da string para o cabeçalho.
-        print(header_format.format(*headers)) # Exibe o cabeçalho.
-        print("-" * sum(col_widths)) # Exibe uma linha divisória.
-        for person in people_data: # Itera sobre cada pessoa.
-            # Formata cada campo da pessoa (converte None para string vazia).
-            person_formatted = [str(x) if x is not None else "" for x in person]
-            print(header_format.format(*person_formatted)) # Exibe os dados formatados da pessoa.
+    headers = ["Cód.", "Nome", "RG", "Telefone", "Email", "CEP", "Rua", "Nº", "Bairro", "Cidade", "UF"]
+    col_widths = [5, 25, 12, 15, 25, 10, 20, 8, 15, 15, 5] # Define larguras das colunas para formatação.
+    # As linhas são lidas do cursor conforme o usuário avança as páginas.
+    if not table_view.page(table_view.Table(headers, col_widths), db_connection.iterate_query(conn, sql)):
+        print("Nenhuma pessoa encontrada.")
+
+def print_people_search_results(people):
+    """Exibe o resultado de uma busca de pessoas em formato de tabela."""
+    headers = ["Cód.", "Nome", "CPF/CNPJ", "Telefone", "Email", "ID End.", "Cidade", "UF"]
+    col_widths = [8, 25, 20, 15, 25, 8, 15, 5]
+    table_view.print_table(table_view.Table(headers, col_widths), people)
+
+def search_people_terminal(conn):
+    """Busca interativa de pessoas (nome, CPF/CNPJ, telefone ou email)."""
+    print("\n--- Buscar Pessoa ---")
+    term = get_valid_input("Nome (início), CPF/CNPJ, telefone ou email: ")
+    people = services.search_people(conn, term)
+    if people:
+        print_people_search_results(people)
+        if len(people) == services.PERSON_SEARCH_LIMIT:
+            print(f"Mostrando as primeiras {services.PERSON_SEARCH_LIMIT} pessoas. Refine a busca para resultados mais precisos.")
     else:
         print("Nenhuma pessoa encontrada.")
 
+def select_person_terminal(conn, prompt):
+    """
+    Seletor de pessoa com busca incremental: o operador busca por nome/documento/contato até
+    encontrar a pessoa desejada e então informa o código.
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        prompt (str): Mensagem exibida ao pedir o Código Pessoa.
+
+    Returns:
+        int: O Código Pessoa escolhido.
+    """
+    while True:
+        term = get_valid_input("Buscar pessoa por nome, CPF/CNPJ, telefone ou email (Enter para informar o código diretamente): ", optional=True)
+        if not term: # Operador já sabe o código.
+            return get_valid_input(prompt, int)
+
+        people = services.search_people(conn, term)
+        if not people:
+            print("Nenhuma pessoa encontrada. Tente outro termo.")
+            continue
+        print_people_search_results(people)
+        if len(people) == services.PERSON_SEARCH_LIMIT:
+            print(f"Mostrando as primeiras {services.PERSON_SEARCH_LIMIT} pessoas. Refine a busca se necessário.")
+
+        person_code = get_valid_input(prompt.rstrip(': ') + " (Enter para buscar novamente): ", int, optional=True)
+        if person_code is not None:
+            return person_code
+
 def update_person_terminal(conn):
     """Atualiza os dados de uma Pessoa e seu Endereço."""
     print("\n--- Atualizar Pessoa ---")
@@ -252,69 +353,149 @@ def update_person_terminal(conn):
     new_complement = input(f"Complemento [{p_data[11] or ''}]: ").strip() or p_data[11]
 
     try:
-        # Query para atualizar o endereço.
-        sql_update_address = "UPDATE Endereco SET CEP=?, Estado=?, Cidade=?, Bairro=?, Rua=?, Numero=?, Complemento=? WHERE ID_Endereco=?;"
-        db_connection.execute_query(conn, sql_update_address, (new_cep, new_state, new_city, new_neighborhood, new_street, new_number, new_complement, address_id))
+        # Endereços são compartilhados entre entidades: em vez de alterar o registro atual (o que mudaria o
+        # endereço de outras pessoas/sedes), a pessoa passa a apontar para o endereço novo (ou já existente).
+        new_address_id = addresses.get_or_create_address(conn, new_cep, new_state, new_city, new_neighborhood, new_street, new_number, new_complement)
+        if new_address_id is None:
+            print("Erro: Falha ao salvar o endereço.")
+            return
 
         # Query para atualizar a pessoa.
-        sql_update_person = "UPDATE Pessoa SET Nome=?, RG=?, Telefone=?, Email=? WHERE Codigo_Pessoa=?;"
-        db_connection.execute_query(conn, sql_update_person, (new_name, new_rg, new_phone, new_email, person_id))
+        sql_update_person = "UPDATE Pessoa SET Nome=?, RG=?, Telefone=?, Email=?, ID_Endereco=? WHERE Codigo_Pessoa=?;"
+        db_connection.execute_query(conn, sql_update_person, (new_name, new_rg, new_phone, new_email, new_address_id, person_id))
+        reference_cache.invalidate(reference_cache.MOTORISTAS) # O nome exibido na lista de motoristas pode ter mudado.
+        if new_address_id != address_id:
+            addresses.delete_address_if_unused(conn, address_id) # Remove o endereço antigo se ninguém mais o usa.
         print("Pessoa e Endereço atualizados com sucesso!")
     except Exception as e:
         print(f"Erro inesperado ao atualizar pessoa: {e}")
 
+@n_plus_one.operation("Deletar Pessoa")
 def delete_person_terminal(conn):
     """Deleta uma Pessoa e seu Endereço (se não estiver em uso por outra entidade)."""
     print("\n--- Deletar Pessoa ---")
     person_id = get_valid_input("Digite o Código Pessoa a ser deletada: ", int) # Pede o ID da pessoa.
     if person_id is None: return
 
-    # Dicionário de dependências: verifica se a pessoa está sendo usada em outras tabelas.
-    dependencies = {
-        "Usuario": "SELECT 1 FROM Usuario WHERE Codigo_Pessoa = ?",
-        "Cliente": "SELECT 1 FROM Cliente WHERE Codigo_Pessoa = ?",
-        "Funcionario": "SELECT 1 FROM Funcionario WHERE Codigo_Funcionario = ?", # Assumindo Codigo_Funcionario = Codigo_Pessoa
-        "Produto (Remetente)": "SELECT 1 FROM Produto_A_Ser_Entregue WHERE ID_Remetente = ?",
-        "Produto (Destinatário)": "SELECT 1 FROM Produto_A_Ser_Entregue WHERE ID_Destinatario = ?"
-    }
-    for table, sql_check in dependencies.items(): # Itera sobre as dependências.
-        if db_connection.execute_query(conn, sql_check, (person_id,), fetch_results=True): # Se encontrar dependência.
-            print(f"Erro: Não é possível deletar. Pessoa está referenciada na tabela {table}.")
-            return
+    # Uma única consulta retorna o endereço da pessoa e todas as dependências que bloqueiam a exclusão.
+    check = services.check_deletes(conn, "pessoa", [person_id])
+    if check is None:
+        print("Erro: Falha ao verificar as dependências da pessoa.")
+        return
+    if person_id not in check:
+        print("Pessoa não encontrada.")
+        return
+
+    (address_id,), blockers = check[person_id]
+    if blockers: # Se encontrar dependências.
+        print(f"Erro: Não é possível deletar. Pessoa está referenciada na(s) tabela(s): {', '.join(b.nome for b in blockers)}.")
+        return
 
-    # Busca o ID do endereço associado à pessoa para possível exclusão.
-    address_id_data = db_connection.execute_query(conn, "SELECT ID_Endereco FROM Pessoa WHERE Codigo_Pessoa = ?", (person_id,), fetch_results=True)
-    
     confirm = input(f"Tem certeza que deseja deletar a pessoa com Cód. {person_id} e seu endereço? (s/n): ").strip().lower()
     if confirm != 's': # Se o usuário não confirmar.
         print("Exclusão cancelada.")
         return
 
     try:
-        # Deleta a pessoa.
-        if db_connection.execute_query(conn, "DELETE FROM Pessoa WHERE Codigo_Pessoa = ?", (person_id,)):
-            print("Pessoa deletada.")
-            if address_id_data: # Se a pessoa tinha um endereço associado.
-                address_id = address_id_data[0][0]
-                # Verifica se o endereço é usado por outra Pessoa ou Sede antes de deletá-lo.
-                sql_check_addr_pessoa = "SELECT 1 FROM Pessoa WHERE ID_Endereco = ? AND Codigo_Pessoa != ?"
-                sql_check_addr_sede = "SELECT 1 FROM Sede WHERE ID_Endereco = ?"
-                if not db_connection.execute_query(conn, sql_check_addr_pessoa, (address_id, person_id), fetch_results=True) and \
-                   not db_connection.execute_query(conn, sql_check_addr_sede, (address_id,), fetch_results=True):
-                    # Se o endereço não estiver em uso, deleta-o.
-                    if db_connection.execute_query(conn, "DELETE FROM Endereco WHERE ID_Endereco = ?", (address_id,)):
-                        print("Endereço associado deletado com sucesso.")
-                    else:
-                        print("Aviso: Pessoa deletada, mas falha ao deletar endereço (pode ainda estar em uso ou erro).")
-                else:
-                    print("Aviso: Pessoa deletada, mas o endereço não foi removido pois está em uso por outra entidade.")
-            else:
-                print("Aviso: Pessoa deletada, mas não foi possível encontrar/deletar o endereço associado.")
-        else:
+        # Deleta a pessoa e o endereço (se não estiver em uso) em uma única transação.
+        result = services.delete_people_and_orphan_addresses(conn, [person_id], [address_id])
+        if result is None:
             print("Erro: Falha ao deletar pessoa.")
+        elif result[1]:
+            print("Pessoa e endereço associado deletados com sucesso.")
+        else:
+            print("Pessoa deletada. O endereço não foi removido pois está em uso por outra entidade.")
     except Exception as e:
         print(f"Erro inesperado ao deletar pessoa: {e}")
 
+def parse_id_list(text):
+    """
+    Converte uma lista de IDs digitada (separada por vírgulas, espaços ou quebras de linha) em inteiros.
+
+    Returns:
+        tuple: (lista de IDs válidos sem repetição, lista de entradas inválidas).
+    """
+    ids, invalid = [], []
+    for token in text.replace(",", " ").split():
+        if token.isdigit():
+            ids.append(int(token))
+        else:
+            invalid.append(token)
+    return list(dict.fromkeys(ids)), invalid # dict.fromkeys remove repetidos mantendo a ordem.
+
+@n_plus_one.operation("Deletar Pessoas em Lote")
+def delete_people_bulk_terminal(conn):
+    """Deleta várias Pessoas de uma vez (ex: lotes de anonimização/LGPD), com verificação de dependências em bloco."""
+    print("\n--- Deletar Pessoas em Lote (LGPD) ---")
+    source = get_valid_input("Códigos Pessoa separados por vírgula, ou caminho de um arquivo com um código por linha: ")
+    if os.path.isfile(source): # Se for um arquivo, lê os códigos dele.
+        with open(source, encoding='utf-8') as f:
+            source = f.read()
+    person_ids, invalid = parse_id_list(source)
+    if invalid:
+        print(f"Aviso: {len(invalid)} entrada(s) ignorada(s) por não serem códigos válidos: {', '.join(invalid[:10])}")
+    if not person_ids:
+        print("Nenhum código válido informado.")
+        return
+
+    check = services.check_deletes(conn, "pessoa", person_ids) # Uma consulta de dependências por bloco de IDs.
+    if check is None:
+        print("Erro: Falha ao verificar as dependências. Nenhuma pessoa foi deletada.")
+        return
+    deletable, address_ids, blocked, not_found = [], [], {}, []
+    for person_id in person_ids:
+        if person_id not in check:
+            not_found.append(person_id)
+            continue
+        (address_id,), blockers = check[person_id]
+        if blockers:
+            blocked[person_id] = [blocker.nome for blocker in blockers]
+        else:
+            deletable.append(person_id)
+            address_ids.append(address_id)
+
+    print(f"\nPodem ser deletadas: {len(deletable)} | Bloqueadas por dependências: {len(blocked)} | Não encontradas: {len(not_found)}")
+    for person_id, blockers in list(blocked.items())[:20]: # Mostra apenas as primeiras para não inundar a tela.
+        print(f"  Cód. {person_id}: referenciada em {', '.join(blockers)}")
+    if len(blocked) > 20:
+        print(f"  ... e mais {len(blocked) - 20} pessoa(s) bloqueada(s).")
+    if not deletable:
+        return
+
+    confirm = input(f"Tem certeza que deseja deletar {len(deletable)} pessoa(s) e seus endereços sem uso? (s/n): ").strip().lower()
+    if confirm != 's':
+        print("Exclusão cancelada.")
+        return
+
+    total_people, total_addresses = 0, 0
+    for i in range(0, len(deletable), services.MAX_IDS_PER_BATCH): # Uma transação por bloco.
+        result = services.delete_people_and_orphan_addresses(conn, deletable[i:i + services.MAX_IDS_PER_BATCH], address_ids[i:i + services.MAX_IDS_PER_BATCH])
+        if result is None:
+            print(f"Erro: Falha ao deletar o bloco iniciado na posição {i + 1}. Blocos anteriores já foram gravados.")
+            break
+        total_people += result[0]
+        total_addresses += result[1]
+    print(f"{total_people} pessoa(s) e {total_addresses} endereço(s) deletados.")
+
+def check_delete_terminal(conn, entity, key, not_found_message):
+    """
+    Verifica se um registro pode ser deletado (regras em services.DELETE_RULES) e exibe o motivo quando não pode.
+
+    Returns:
+        tuple or None: Os dados da regra para o registro (ex: nome, ID_Endereco) se ele pode ser deletado, senão None.
+    """
+    check = services.check_deletes(conn, entity, [key])
+    if check is None:
+        print("Erro: Falha ao verificar as dependências.")
+        return None
+    if key not in check:
+        print(not_found_message)
+        return None
+    if check[key].bloqueios: # Exibe a primeira dependência encontrada.
+        print(f"Erro: {check[key].bloqueios[0].mensagem}")
+        return None
+    return check[key].dados
+
 # Gerenciar Usuários
 def manage_users_terminal(conn):
     """Menu para gerenciar Usuários (Adicionar, Listar, Atualizar, Deletar)."""
@@ -351,7 +532,7 @@ def add_user_terminal(conn):
         print("Erro: Já existe um usuário associado a este Código Pessoa.")
         return
 
-    valid_user_types = ['Cliente', 'Motorista', 'Auxiliar de Logistica', 'Atendente', 'Gerente', 'Admin']
+    valid_user_types = reference_cache.TIPOS_USUARIO
     user_type = get_valid_input(f"Tipo de Usuário ({', '.join(valid_user_types)}): ", choices=valid_user_types) # Coleta o tipo de usuário.
     if user_type is None: return
 
@@ -398,16 +579,9 @@ def list_users_terminal(conn):
     print("\n--- Lista de Usuários ---")
     # Query para selecionar dados dos usuários e o nome da pessoa associada.
     sql = "SELECT U.Login, U.Codigo_Pessoa, P.Nome, U.Tipo_Usuario FROM Usuario U JOIN Pessoa P ON U.Codigo_Pessoa = P.Codigo_Pessoa ORDER BY U.Login"
-    users = db_connection.execute_query(conn, sql, fetch_results=True)
-    if users:
-        headers = ["Login", "Cód. Pessoa", "Nome Pessoa", "Tipo Usuário"]
-        col_widths = [20, 12, 30, 25] # Define larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths]) # Formato do cabeçalho.
-        print(header_format.format(*headers)) # Exibe o cabeçalho.
-        print("-" * sum(col_widths)) # Linha divisória.
-        for user in users: # Itera sobre os usuários.
-            print(header_format.format(*user)) # Exibe dados do usuário.
-    else:
+    headers = ["Login", "Cód. Pessoa", "Nome Pessoa", "Tipo Usuário"]
+    col_widths = [20, 12, 30, 25] # Define larguras das colunas.
+    if not table_view.page(table_view.Table(headers, col_widths), db_connection.iterate_query(conn, sql)):
         print("Nenhum usuário encontrado.")
 
 def update_user_terminal(conn):
@@ -436,13 +610,15 @@ def update_user_terminal(conn):
 
     if new_password: # Se uma nova senha foi fornecida.
         hashed_password = hash_password(new_password) # Gera hash da nova senha.
-        sql = "UPDATE Usuario SET Senha_Hash = ? WHERE Login = ?" # Query para atualizar a senha.
+        # A nova versão da credencial invalida os tokens de sessão emitidos antes da troca (inclusive em outros processos).
+        sql = "UPDATE Usuario SET Senha_Hash = ?, Versao_Credencial = Versao_Credencial + 1 WHERE Login = ?"
         params = (hashed_password, login_to_update)
     else: # Nenhuma alteração se apenas a senha não foi mudada.
         print("Nenhuma alteração na senha. Nada a atualizar.")
         return
 
     if db_connection.execute_query(conn, sql, params): # Executa a atualização.
+        sessions.revoke_user_sessions(login_to_update) # Encerra as sessões abertas com a senha antiga.
         print("Usuário atualizado com sucesso!")
     else:
         print("Erro: Falha ao atualizar usuário.")
@@ -464,6 +640,7 @@ def delete_user_terminal(conn):
         return
 
     if db_connection.execute_query(conn, "DELETE FROM Usuario WHERE Login = ?", (login_to_delete,)): # Deleta o usuário.
+        sessions.revoke_user_sessions(login_to_delete) # Encerra as sessões abertas do usuário deletado.
         print("Usuário deletado com sucesso!")
     else:
         print("Erro: Falha ao deletar usuário.")
@@ -471,7 +648,7 @@ def delete_user_terminal(conn):
 # Gerenciar Clientes
 def manage_clients_terminal(conn):
     """Menu para gerenciar Clientes."""
-    options = ["Adicionar Cliente", "Listar Clientes", "Atualizar Cliente", "Deletar Cliente"]
+    options = ["Adicionar Cliente", "Listar Clientes", "Atualizar Cliente", "Deletar Cliente", "Importar Clientes em Lote (CSV)"]
     while True:
         clear_screen()
         choice = display_menu("Gerenciar Clientes", options)
@@ -479,6 +656,7 @@ def manage_clients_terminal(conn):
         elif choice == 2: list_clients_terminal(conn)
         elif choice == 3: update_client_terminal(conn)
         elif choice == 4: delete_client_terminal(conn)
+        elif choice == 5: import_clients_terminal(conn)
         elif choice == 0: break
         press_enter_to_continue()
 
@@ -528,6 +706,24 @@ def add_client_terminal(conn, person_code_param=None, client_type_param=None, cp
         print("Erro: Falha ao adicionar cliente. Verifique os dados e as constraints da tabela (CHK_Cliente_PF_PJ).")
         return False # Retorna False em caso de falha.
 
+@n_plus_one.operation("Importar Clientes")
+def import_clients_terminal(conn):
+    """Importa clientes PF/PJ em lote a partir de um arquivo CSV (onboarding B2B)."""
+    print("\n--- Importar Clientes em Lote (CSV) ---")
+    print(f"Colunas esperadas no cabeçalho: {', '.join(client_import.COLUMNS)}")
+    csv_path = get_valid_input("Caminho do arquivo CSV: ")
+    if not os.path.isfile(csv_path):
+        print("Erro: Arquivo não encontrado.")
+        return
+    try:
+        result = client_import.import_clients(conn, csv_path, hash_password)
+    except (OSError, ValueError) as e: # Arquivo ilegível ou cabeçalho incompleto.
+        print(f"Erro ao ler o arquivo: {e}")
+        return
+    print(f"Linhas lidas: {result['lidas']} | Importadas: {result['importadas']} | Rejeitadas: {result['rejeitadas']}")
+    if result['rejeitadas']:
+        print(f"Relatório das linhas rejeitadas: {result['relatorio']}")
+
 def list_clients_terminal(conn):
     """Lista todos os Clientes cadastrados."""
     print("\n--- Lista de Clientes ---")
@@ -540,17 +736,9 @@ def list_clients_terminal(conn):
     INNER JOIN Pessoa P ON C.Codigo_Pessoa = P.Codigo_Pessoa
     ORDER BY P.Nome;
     """
-    clients_data = db_connection.execute_query(conn, sql, fetch_results=True)
-    if clients_data:
-        headers = ["Cód. Pessoa", "Nome", "Tipo", "CPF", "Data Nasc.", "CNPJ", "Nome Empresa"]
-        col_widths = [12, 25, 8, 15, 12, 20, 30] # Larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for client in clients_data: # Itera sobre os clientes.
-            client_formatted = [str(x) if x is not None else "" for x in client] # Formata dados.
-            print(header_format.format(*client_formatted)) # Exibe dados do cliente.
-    else:
+    headers = ["Cód. Pessoa", "Nome", "Tipo", "CPF", "Data Nasc.", "CNPJ", "Nome Empresa"]
+    col_widths = [12, 25, 8, 15, 12, 20, 30] # Larguras das colunas.
+    if not table_view.page(table_view.Table(headers, col_widths), db_connection.iterate_query(conn, sql)):
         print("Nenhum cliente encontrado.")
 
 def update_client_terminal(conn, person_code_logged_in=None):
@@ -613,17 +801,10 @@ def delete_client_terminal(conn):
     person_code = get_valid_input("Digite o Código Pessoa do cliente a ser deletado: ", int) # Pede o código da pessoa.
     if person_code is None: return
 
-    # Verifica dependências em Produto_A_Ser_Entregue e Usuario.
-    if db_connection.execute_query(conn, "SELECT 1 FROM Produto_A_Ser_Entregue WHERE ID_Remetente = ? OR ID_Destinatario = ?", (person_code, person_code), fetch_results=True):
-        print("Erro: Cliente está associado a produtos. Não pode ser deletado.")
-        return
-    if db_connection.execute_query(conn, "SELECT 1 FROM Usuario WHERE Codigo_Pessoa = ? AND Tipo_Usuario = 'Cliente'", (person_code,), fetch_results=True):
-        print("Erro: Cliente possui um usuário associado. Delete o usuário primeiro ou altere seu tipo.")
-        return
-    
-    # Busca o nome do cliente para a mensagem de confirmação.
-    client_name_data = db_connection.execute_query(conn, "SELECT P.Nome FROM Cliente C INNER JOIN Pessoa P ON C.Codigo_Pessoa = P.Codigo_Pessoa WHERE C.Codigo_Pessoa = ?", (person_code,), fetch_results=True)
-    client_name = client_name_data[0][0] if client_name_data else f"Cód: {person_code}"
+    # Uma consulta verifica as dependências (produtos e usuário do cliente) e traz o nome para a confirmação.
+    check = check_delete_terminal(conn, "cliente", person_code, "Cliente não encontrado.")
+    if check is None: return
+    client_name = check[0] or f"Cód: {person_code}"
 
     confirm = input(f"Tem certeza que deseja deletar o cliente '{client_name}'? (s/n): ").strip().lower()
     if confirm != 's': # Confirmação da exclusão.
@@ -673,7 +854,7 @@ def add_employee_terminal(conn):
     
     departamento = get_valid_input("Departamento (ex: Entregas, Atendimento, Administrativo): ")
     
-    cargos_validos = ['Motorista', 'Auxiliar de Logistica', 'Atendente', 'Gerente', 'Admin']
+    cargos_validos = reference_cache.CARGOS
     cargo = get_valid_input(f"Cargo ({', '.join(cargos_validos)}): ", choices=cargos_validos) # Coleta o cargo.
     if cargo is None: return
 
@@ -689,7 +870,7 @@ def add_employee_terminal(conn):
     elif cargo in ['Auxiliar de Logistica', 'Atendente', 'Gerente']: # Se for outros cargos que exigem sede.
         list_headquarters_terminal(conn, simple_list=True) # Lista sedes.
         id_sede = get_valid_input("ID da Sede: ", int)
-        if not db_connection.execute_query(conn, "SELECT 1 FROM Sede WHERE ID_Sede = ?", (id_sede,), fetch_results=True):
+        if not reference_cache.headquarters_exists(conn, id_sede):
             print("Erro: Sede não encontrada.")
             return
     # Admin não requer placa nem sede por padrão.
@@ -701,6 +882,7 @@ def add_employee_terminal(conn):
     """
     params = (person_code, cpf, departamento, cargo, placa_veiculo, id_sede)
     if db_connection.execute_query(conn, sql, params):
+        reference_cache.invalidate(reference_cache.MOTORISTAS) # A lista de motoristas pode ter mudado.
         print("Funcionário adicionado com sucesso!")
     else:
         print("Erro: Falha ao adicionar funcionário. Verifique os dados e as constraints (CHK_Funcionario_Cargo).")
@@ -718,17 +900,9 @@ def list_employees_terminal(conn):
     LEFT JOIN Endereco E ON S.ID_Endereco = E.ID_Endereco
     ORDER BY P.Nome;
     """
-    employees = db_connection.execute_query(conn, sql, fetch_results=True)
-    if employees:
-        headers = ["Cód. Func", "Nome", "CPF", "Depto", "Cargo", "Placa Veíc.", "ID Sede", "Tipo Sede", "Cidade Sede"]
-        col_widths = [10, 25, 15, 20, 20, 12, 8, 10, 15] # Larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for emp in employees: # Itera sobre os funcionários.
-            emp_formatted = [str(x) if x is not None else "" for x in emp] # Formata dados.
-            print(header_format.format(*emp_formatted)) # Exibe dados do funcionário.
-    else:
+    headers = ["Cód. Func", "Nome", "CPF", "Depto", "Cargo", "Placa Veíc.", "ID Sede", "Tipo Sede", "Cidade Sede"]
+    col_widths = [10, 25, 15, 20, 20, 12, 8, 10, 15] # Larguras das colunas.
+    if not table_view.page(table_view.Table(headers, col_widths), db_connection.iterate_query(conn, sql)):
         print("Nenhum funcionário encontrado.")
 
 def update_employee_terminal(conn):
@@ -761,7 +935,7 @@ def update_employee_terminal(conn):
         
     new_departamento = input(f"Departamento [{e_data[2]}]: ").strip() or e_data[2]
     
-    cargos_validos = ['Motorista', 'Auxiliar de Logistica', 'Atendente', 'Gerente', 'Admin']
+    cargos_validos = reference_cache.CARGOS
     new_cargo = input(f"Cargo [{e_data[3]}] ({', '.join(cargos_validos)}): ").strip() or e_data[3]
     if new_cargo not in cargos_validos: # Valida o novo cargo.
         print("Cargo inválido. Mantendo cargo anterior.")
@@ -772,7 +946,7 @@ def update_employee_terminal(conn):
         list_available_vehicles(conn) # Lista veículos.
         new_placa_veiculo_input = input(f"Placa do Veículo [{e_data[4] or ''}]: ").strip()
         if new_placa_veiculo_input: # Se uma nova placa foi digitada.
-            if db_connection.execute_query(conn, "SELECT 1 FROM Veiculo WHERE Placa_Veiculo = ?", (new_placa_veiculo_input,), fetch_results=True):
+            if reference_cache.vehicle_exists(conn, new_placa_veiculo_input):
                 new_placa_veiculo = new_placa_veiculo_input # Atribui nova placa.
             else:
                 print("Placa de veículo inválida. Mantendo anterior (ou nenhuma).")
@@ -783,7 +957,7 @@ def update_employee_terminal(conn):
         if new_id_sede_input: # Se um novo ID de sede foi digitado.
             try:
                 new_id_sede_val = int(new_id_sede_input) # Converte para int.
-                if db_connection.execute_query(conn, "SELECT 1 FROM Sede WHERE ID_Sede = ?", (new_id_sede_val,), fetch_results=True):
+                if reference_cache.headquarters_exists(conn, new_id_sede_val):
                     new_id_sede = new_id_sede_val # Atribui novo ID da sede.
                 else:
                     print("ID de sede inválido. Mantendo anterior (ou nenhuma).")
@@ -797,6 +971,7 @@ def update_employee_terminal(conn):
     sql_update = "UPDATE Funcionario SET CPF=?, Departamento=?, Cargo=?, Placa_Veiculo=?, ID_Sede=? WHERE Codigo_Funcionario=?;"
     params = (new_cpf, new_departamento, new_cargo, new_placa_veiculo, new_id_sede, person_code)
     if db_connection.execute_query(conn, sql_update, params):
+        reference_cache.invalidate(reference_cache.MOTORISTAS) # O cargo pode ter mudado.
         print("Funcionário atualizado com sucesso!")
     else:
         print("Erro: Falha ao atualizar funcionário. Verifique os dados e as constraints (CHK_Funcionario_Cargo).")
@@ -807,17 +982,10 @@ def delete_employee_terminal(conn):
     person_code = get_valid_input("Digite o Código do Funcionário (Pessoa) a ser deletado: ", int)
     if person_code is None: return
 
-    # Verifica dependências (motorista de produtos, usuário funcionário).
-    if db_connection.execute_query(conn, "SELECT 1 FROM Produto_A_Ser_Entregue WHERE Codigo_Funcionario_Motorista = ?", (person_code,), fetch_results=True):
-        print("Erro: Funcionário é motorista de produtos. Não pode ser deletado.")
-        return
-    if db_connection.execute_query(conn, "SELECT 1 FROM Usuario WHERE Codigo_Pessoa = ? AND Tipo_Usuario != 'Cliente'", (person_code,), fetch_results=True):
-        print("Erro: Funcionário possui um usuário associado. Delete o usuário primeiro ou altere seu tipo.")
-        return
-        
-    # Busca nome do funcionário para mensagem de confirmação.
-    emp_name_data = db_connection.execute_query(conn, "SELECT P.Nome FROM Funcionario F INNER JOIN Pessoa P ON F.Codigo_Funcionario = P.Codigo_Pessoa WHERE F.Codigo_Funcionario = ?", (person_code,), fetch_results=True)
-    emp_name = emp_name_data[0][0] if emp_name_data else f"Cód: {person_code}"
+    # Uma consulta verifica as dependências (motorista de produtos, usuário funcionário) e traz o nome.
+    check = check_delete_terminal(conn, "funcionario", person_code, "Funcionário não encontrado.")
+    if check is None: return
+    emp_name = check[0] or f"Cód: {person_code}"
 
     confirm = input(f"Tem certeza que deseja deletar o funcionário '{emp_name}'? (s/n): ").strip().lower()
     if confirm != 's': # Confirmação da exclusão.
@@ -825,6 +993,7 @@ def delete_employee_terminal(conn):
         return
 
     if db_connection.execute_query(conn, "DELETE FROM Funcionario WHERE Codigo_Funcionario = ?", (person_code,)): # Deleta o funcionário.
+        reference_cache.invalidate(reference_cache.MOTORISTAS)
         print(f"Funcionário '{emp_name}' deletado com sucesso!")
         print("Lembre-se: A Pessoa associada e seu Endereço NÃO foram deletados. Use 'Gerenciar Pessoas' para isso, se necessário.")
     else:
@@ -854,13 +1023,14 @@ def add_vehicle_terminal(conn):
         return
     
     carga_suportada = get_valid_input("Carga Suportada (kg): ", float) # Pede a carga suportada.
-    tipos_validos = ['Carro', 'Moto', 'Van', 'Caminhão']
+    tipos_validos = reference_cache.TIPOS_VEICULO
     tipo = get_valid_input(f"Tipo ({', '.join(tipos_validos)}): ", choices=tipos_validos) # Pede o tipo.
-    status_validos = ['Disponivel', 'Indisponivel']
+    status_validos = reference_cache.STATUS_VEICULO
     status = get_valid_input(f"Status Inicial ({', '.join(status_validos)}): ", choices=status_validos) # Pede o status.
 
     sql = "INSERT INTO Veiculo (Placa_Veiculo, Carga_Suportada, Tipo, Status) VALUES (?, ?, ?, ?);"
     if db_connection.execute_query(conn, sql, (placa, carga_suportada, tipo, status)): # Insere o veículo.
+        reference_cache.invalidate(reference_cache.VEICULOS)
         print("Veículo adicionado com sucesso!")
     else:
         print("Erro: Falha ao adicionar veículo.")
@@ -868,34 +1038,15 @@ def add_vehicle_terminal(conn):
 def list_available_vehicles(conn):
     """Lista veículos com status 'Disponivel'."""
     print("\n--- Veículos Disponíveis ---")
-    sql = "SELECT Placa_Veiculo, Tipo, Carga_Suportada FROM Veiculo WHERE Status = 'Disponivel' ORDER BY Placa_Veiculo;"
-    vehicles = db_connection.execute_query(conn, sql, fetch_results=True)
-    if vehicles:
-        headers = ["Placa", "Tipo", "Carga (kg)"]
-        col_widths = [10, 15, 10]
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for v in vehicles: # Itera sobre os veículos disponíveis.
-            print(header_format.format(*v)) # Exibe dados do veículo.
-    else:
+    vehicles = reference_cache.get_available_vehicles(conn) # Lido do cache de referência (sem consulta se válido).
+    if not table_view.print_table(table_view.Table(["Placa", "Tipo", "Carga (kg)"], [10, 15, 10]), vehicles):
         print("Nenhum veículo disponível encontrado.")
 
 def list_vehicles_terminal(conn):
     """Lista todos os Veículos."""
     print("\n--- Lista de Veículos ---")
-    sql = "SELECT Placa_Veiculo, Carga_Suportada, Tipo, Status FROM Veiculo ORDER BY Placa_Veiculo;"
-    vehicles = db_connection.execute_query(conn, sql, fetch_results=True)
-    if vehicles:
-        headers = ["Placa", "Carga (kg)", "Tipo", "Status"]
-        col_widths = [10, 12, 15, 15]
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for v in vehicles: # Itera sobre os veículos.
-            v_formatted = [str(x) if x is not None else "" for x in v] # Formata dados.
-            print(header_format.format(*v_formatted)) # Exibe dados do veículo.
-    else:
+    vehicles = reference_cache.get_vehicles(conn) # Lido do cache de referência (sem consulta se válido).
+    if not table_view.page(table_view.Table(["Placa", "Carga (kg)", "Tipo", "Status"], [10, 12, 15, 15]), vehicles):
         print("Nenhum veículo encontrado.")
 
 def update_vehicle_terminal(conn):
@@ -918,13 +1069,13 @@ def update_vehicle_terminal(conn):
     new_carga_str = input(f"Carga Suportada (kg) [{v_data[0]}]: ").strip()
     new_carga = float(new_carga_str) if new_carga_str else v_data[0] # Converte para float se digitado.
 
-    tipos_validos = ['Carro', 'Moto', 'Van', 'Caminhão']
+    tipos_validos = reference_cache.TIPOS_VEICULO
     new_tipo = input(f"Tipo [{v_data[1]}] ({', '.join(tipos_validos)}): ").strip() or v_data[1]
     if new_tipo not in tipos_validos: # Valida o novo tipo.
         print("Tipo inválido. Mantendo anterior.")
         new_tipo = v_data[1]
 
-    status_validos = ['Disponivel', 'Indisponivel']
+    status_validos = reference_cache.STATUS_VEICULO
     new_status = input(f"Status [{v_data[2]}] ({', '.join(status_validos)}): ").strip() or v_data[2]
     if new_status not in status_validos: # Valida o novo status.
         print("Status inválido. Mantendo anterior.")
@@ -932,6 +1083,7 @@ def update_vehicle_terminal(conn):
 
     sql = "UPDATE Veiculo SET Carga_Suportada=?, Tipo=?, Status=? WHERE Placa_Veiculo=?;"
     if db_connection.execute_query(conn, sql, (new_carga, new_tipo, new_status, placa)): # Atualiza o veículo.
+        reference_cache.invalidate(reference_cache.VEICULOS)
         print("Veículo atualizado com sucesso!")
     else:
         print("Erro: Falha ao atualizar veículo.")
@@ -942,17 +1094,8 @@ def delete_vehicle_terminal(conn):
     placa = get_valid_input("Digite a Placa do veículo a ser deletado: ", str.upper) # Pede a placa.
     if placa is None: return
 
-    # Verifica dependências (Funcionario, Carregamento).
-    if db_connection.execute_query(conn, "SELECT 1 FROM Funcionario WHERE Placa_Veiculo = ?", (placa,), fetch_results=True):
-        print("Erro: Veículo está associado a um funcionário (Motorista). Desvincule-o primeiro.")
-        return
-    if db_connection.execute_query(conn, "SELECT 1 FROM Carregamento WHERE Placa_Veiculo = ?", (placa,), fetch_results=True):
-        print("Erro: Veículo possui carregamentos associados. Não pode ser deletado.")
-        return
-
-    if not db_connection.execute_query(conn, "SELECT 1 FROM Veiculo WHERE Placa_Veiculo = ?", (placa,), fetch_results=True):
-        print("Veículo não encontrado.")
-        return
+    # Verifica existência e dependências (Funcionario, Carregamento) em uma consulta.
+    if check_delete_terminal(conn, "veiculo", placa, "Veículo não encontrado.") is None: return
 
     confirm = input(f"Tem certeza que deseja deletar o veículo de placa '{placa}'? (s/n): ").strip().lower()
     if confirm != 's': # Confirmação da exclusão.
@@ -960,6 +1103,7 @@ def delete_vehicle_terminal(conn):
         return
 
     if db_connection.execute_query(conn, "DELETE FROM Veiculo WHERE Placa_Veiculo = ?", (placa,)): # Deleta o veículo.
+        reference_cache.invalidate(reference_cache.VEICULOS)
         print("Veículo deletado com sucesso!")
     else:
         print("Erro: Falha ao deletar veículo.")
@@ -981,7 +1125,7 @@ def manage_headquarters_terminal(conn):
 def add_headquarters_terminal(conn):
     """Adiciona uma nova Sede e seu Endereço."""
     print("\n--- Adicionar Nova Sede ---")
-    tipos_sede = {1: "Distribuição", 2: "Loja", 3: "Ambos"} # Dicionário de tipos de sede.
+    tipos_sede = reference_cache.TIPOS_SEDE # Dicionário de tipos de sede.
     print("Tipos de Sede:")
     for k,v in tipos_sede.items(): print(f"  {k} - {v}") # Exibe os tipos.
     tipo_id = get_valid_input("Tipo da Sede (ID): ", int, choices=tipos_sede.keys()) # Pede o ID do tipo.
@@ -990,20 +1134,12 @@ def add_headquarters_terminal(conn):
     telefone = get_valid_input("Telefone da Sede (opcional): ", optional=True) # Pede o telefone.
 
     print("\n--- Endereço da Sede ---")
-    # Coleta dados do endereço da sede.
-    cep = get_valid_input("CEP: ")
-    estado = get_valid_input("Estado: ")
-    cidade = get_valid_input("Cidade: ")
-    bairro = get_valid_input("Bairro: ")
-    rua = get_valid_input("Rua: ")
-    numero = get_valid_input("Número: ")
-    complemento = get_valid_input("Complemento (opcional): ", optional=True)
+    # Coleta dados do endereço da sede (preenchidos automaticamente a partir do CEP, quando possível).
+    cep, estado, cidade, bairro, rua, numero, complemento = prompt_address_terminal()
 
     try:
-        # Insere o endereço e obtém o ID.
-        sql_insert_address = "INSERT INTO Endereco (CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento) VALUES (?, ?, ?, ?, ?, ?, ?);"
-        address_params = (cep, estado, cidade, bairro, rua, numero, complemento)
-        new_address_id = db_connection.execute_insert_and_get_last_id(conn, sql_insert_address, address_params)
+        # Obtém o ID do endereço (reutiliza o registro existente se o endereço já estiver cadastrado).
+        new_address_id = addresses.get_or_create_address(conn, cep, estado, cidade, bairro, rua, numero, complemento)
 
         if new_address_id is not None: # Se o endereço foi inserido.
             # Verifica se o endereço já está em uso por outra sede.
@@ -1030,6 +1166,7 @@ def add_headquarters_terminal(conn):
             sede_params = (tipo_id, new_address_id, telefone)
 
             if db_connection.execute_query(conn, sql_insert_sede, sede_params):
+                reference_cache.invalidate(reference_cache.SEDES)
                 print("Sede e Endereço adicionados com sucesso!")
             else:
                 print("Erro: Falha ao adicionar sede.")
@@ -1041,38 +1178,16 @@ def add_headquarters_terminal(conn):
 def list_headquarters_terminal(conn, simple_list=False):
     """Lista todas as Sedes."""
     print("\n--- Lista de Sedes ---")
-    # Query para selecionar dados das sedes e seus endereços.
-    sql = """
-    SELECT S.ID_Sede, 
-           CASE S.Tipo -- Converte o ID do tipo para sua descrição.
-               WHEN 1 THEN 'Distribuição' 
-               WHEN 2 THEN 'Loja' 
-               WHEN 3 THEN 'Ambos' 
-               ELSE 'Desconhecido' 
-           END AS Tipo_Descricao,
-           S.Telefone, E.Rua, E.Numero, E.Bairro, E.Cidade, E.Estado, E.CEP
-    FROM Sede S
-    INNER JOIN Endereco E ON S.ID_Endereco = E.ID_Endereco
-    ORDER BY S.ID_Sede;
-    """
-    sedes = db_connection.execute_query(conn, sql, fetch_results=True)
+    sedes = reference_cache.get_headquarters(conn) # Lido do cache de referência (sem consulta se válido).
     if sedes:
         if simple_list: # Se for uma listagem simplificada (ex: para seleção em outro menu).
-            print("{:<5} {:<15} {:<20}".format("ID", "Tipo", "Cidade"))
-            print("-" * 40)
-            for s in sedes:
-                print("{:<5} {:<15} {:<20}".format(s[0], s[1], s[6])) # ID, Tipo, Cidade
+            table_view.print_table(table_view.Table(["ID", "Tipo", "Cidade"], [6, 16, 20]), ((s[0], s[1], s[6]) for s in sedes)) # ID, Tipo, Cidade
             return
 
         # Listagem completa.
         headers = ["ID Sede", "Tipo", "Telefone", "Rua", "Nº", "Bairro", "Cidade", "UF", "CEP"]
         col_widths = [8, 15, 15, 20, 8, 15, 15, 5, 10]
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for s in sedes: # Itera sobre as sedes.
-            s_formatted = [str(x) if x is not None else "" for x in s] # Formata dados.
-            print(header_format.format(*s_formatted)) # Exibe dados da sede.
+        table_view.page(table_view.Table(headers, col_widths), sedes)
     else:
         print("Nenhuma sede encontrada.")
 
@@ -1097,7 +1212,7 @@ def update_headquarters_terminal(conn):
     print(f"Atualizando Sede ID: {sede_id}")
     print("Deixe em branco para manter o valor atual.")
 
-    tipos_sede = {1: "Distribuição", 2: "Loja", 3: "Ambos"}
+    tipos_sede = reference_cache.TIPOS_SEDE
     print(f"Tipo atual: {s_data[0]} - {tipos_sede.get(s_data[0], 'Desconhecido')}") # Exibe tipo atual.
     for k,v in tipos_sede.items(): print(f"  {k} - {v}") # Exibe opções de tipo.
     new_tipo_id_str = input(f"Novo Tipo da Sede (ID) [{s_data[0]}]: ").strip()
@@ -1118,14 +1233,24 @@ def update_headquarters_terminal(conn):
     new_complement = input(f"Complemento [{s_data[9] or ''}]: ").strip() or s_data[9]
 
     try:
-        # Atualiza o endereço.
-        sql_update_address = "UPDATE Endereco SET CEP=?, Estado=?, Cidade=?, Bairro=?, Rua=?, Numero=?, Complemento=? WHERE ID_Endereco=?;"
-        db_connection.execute_query(conn, sql_update_address, (new_cep, new_state, new_city, new_neighborhood, new_street, new_number, new_complement, address_id))
+        # Aponta a sede para o endereço novo (ou já existente) em vez de alterar um endereço que pode ser compartilhado.
+        new_address_id = addresses.get_or_create_address(conn, new_cep, new_state, new_city, new_neighborhood, new_street, new_number, new_complement)
+        if new_address_id is None:
+            print("Erro: Falha ao salvar o endereço da sede.")
+            return
+        if new_address_id != address_id and db_connection.execute_query(conn, "SELECT 1 FROM Sede WHERE ID_Endereco = ? AND ID_Sede != ?", (new_address_id, sede_id), fetch_results=True):
+            print("Erro: Este endereço já está cadastrado para outra sede.")
+            return
 
         # Atualiza a sede.
-        sql_update_sede = "UPDATE Sede SET Tipo=?, Telefone=? WHERE ID_Sede=?;"
-        db_connection.execute_query(conn, sql_update_sede, (new_tipo_id, new_telefone, sede_id))
-        print("Sede e Endereço atualizados com sucesso!")
+        sql_update_sede = "UPDATE Sede SET Tipo=?, Telefone=?, ID_Endereco=? WHERE ID_Sede=?;"
+        if db_connection.execute_query(conn, sql_update_sede, (new_tipo_id, new_telefone, new_address_id, sede_id)):
+            reference_cache.invalidate(reference_cache.SEDES)
+            if new_address_id != address_id:
+                addresses.delete_address_if_unused(conn, address_id) # Remove o endereço antigo se ninguém mais o usa.
+            print("Sede e Endereço atualizados com sucesso!")
+        else:
+            print("Erro: Falha ao atualizar sede.")
     except Exception as e:
         print(f"Erro inesperado ao atualizar sede: {e}")
 
@@ -1135,17 +1260,10 @@ def delete_headquarters_terminal(conn):
     sede_id = get_valid_input("Digite o ID da Sede a ser deletada: ", int) # Pede o ID da sede.
     if sede_id is None: return
 
-    # Verifica dependências (Funcionario).
-    if db_connection.execute_query(conn, "SELECT 1 FROM Funcionario WHERE ID_Sede = ?", (sede_id,), fetch_results=True):
-        print("Erro: Sede está associada a funcionários. Desvincule-os primeiro.")
-        return
+    # Verifica dependências (Funcionario) e busca o ID do endereço da sede.
+    check = check_delete_terminal(conn, "sede", sede_id, "Sede não encontrada.")
+    if check is None: return
 
-    # Busca ID do endereço da sede.
-    address_id_data = db_connection.execute_query(conn, "SELECT ID_Endereco FROM Sede WHERE ID_Sede = ?", (sede_id,), fetch_results=True)
-    if not address_id_data:
-        print("Sede não encontrada.")
-        return
-    
     confirm = input(f"Tem certeza que deseja deletar a sede ID {sede_id} e seu endereço? (s/n): ").strip().lower()
     if confirm != 's': # Confirmação da exclusão.
         print("Exclusão cancelada.")
@@ -1153,16 +1271,17 @@ def delete_headquarters_terminal(conn):
 
     try:
         if db_connection.execute_query(conn, "DELETE FROM Sede WHERE ID_Sede = ?", (sede_id,)): # Deleta a sede.
+            reference_cache.invalidate(reference_cache.SEDES)
             print("Sede deletada.")
-            address_id = address_id_data[0][0]
-            # Verifica se o endereço é usado por alguma Pessoa antes de deletá-lo.
-            if not db_connection.execute_query(conn, "SELECT 1 FROM Pessoa WHERE ID_Endereco = ?", (address_id,), fetch_results=True):
-                if db_connection.execute_query(conn, "DELETE FROM Endereco WHERE ID_Endereco = ?", (address_id,)): # Deleta o endereço.
-                    print("Endereço associado à sede deletado com sucesso.")
-                else:
-                    print("Aviso: Sede deletada, mas falha ao deletar endereço.")
+            address_id = check[0]
+            # Deleta o endereço somente se não for usado por Pessoas ou Dados de Rastreamento (endereços são compartilhados).
+            deleted = addresses.delete_address_if_unused(conn, address_id)
+            if deleted:
+                print("Endereço associado à sede deletado com sucesso.")
+            elif deleted is None:
+                print("Aviso: Sede deletada, mas falha ao deletar endereço.")
             else:
-                print("Aviso: Sede deletada, mas o endereço não foi removido pois está em uso por Pessoas.")
+                print("Aviso: Sede deletada, mas o endereço não foi removido pois está em uso por outra entidade.")
         else:
             print("Erro: Falha ao deletar sede.")
     except Exception as e:
@@ -1182,12 +1301,13 @@ def manage_products_terminal(conn):
         elif choice == 0: break
         press_enter_to_continue()
 
+@n_plus_one.operation("Adicionar Produto")
 def add_product_terminal(conn):
     """Adiciona um novo Produto a Ser Entregue e seus Dados de Rastreamento."""
     print("\n--- Adicionar Novo Produto a Ser Entregue ---")
     peso = get_valid_input("Peso do produto (kg): ", float) # Peso do produto.
     
-    status_entrega_validos = ['Em Processamento', 'Aguardando Coleta', 'Em Transito', 'Entregue', 'Cancelado', 'Falha na Entrega']
+    status_entrega_validos = reference_cache.STATUS_ENTREGA
     status_entrega = get_valid_input(f"Status Inicial ({', '.join(status_entrega_validos)}): ", choices=status_entrega_validos) # Status inicial.
     
     data_chegada_cd_str = get_valid_input("Data de Chegada no Centro de Distribuição (AAAA-MM-DD): ")
@@ -1205,28 +1325,25 @@ def add_product_terminal(conn):
         except ValueError:
             print("Data prevista inválida. Deixando em branco.")
 
-    tipos_produto_validos = ['Fragil', 'Perecivel', 'Comum']
+    tipos_produto_validos = reference_cache.TIPOS_PRODUTO
     tipo_produto = get_valid_input(f"Tipo de Produto ({', '.join(tipos_produto_validos)}): ", choices=tipos_produto_validos) # Tipo do produto.
 
     print("\n--- Remetente ---")
-    list_people_terminal(conn) # Lista pessoas para ajudar a escolher o remetente.
-    id_remetente = get_valid_input("Código Pessoa do Remetente (deve ser um Cliente existente): ", int)
+    id_remetente = select_person_terminal(conn, "Código Pessoa do Remetente (deve ser um Cliente existente): ") # Busca para escolher o remetente.
     # Verifica se o remetente é um cliente.
-    if not db_connection.execute_query(conn, "SELECT 1 FROM Cliente WHERE Codigo_Pessoa = ?", (id_remetente,), fetch_results=True):
+    if id_remetente not in (services.existing_clients(conn, [id_remetente]) or ()):
         print("Erro: Remetente não encontrado como Cliente.")
         return
 
     print("\n--- Destinatário ---")
-    list_people_terminal(conn) # Lista pessoas para ajudar a escolher o destinatário.
-    id_destinatario = get_valid_input("Código Pessoa do Destinatário (Pessoa existente): ", int)
-    # Busca dados da pessoa destinatária.
-    dest_pessoa_data = db_connection.execute_query(conn, "SELECT P.Nome, P.ID_Endereco, P.Telefone, C.CPF FROM Pessoa P LEFT JOIN Cliente C ON P.Codigo_Pessoa = C.Codigo_Pessoa WHERE P.Codigo_Pessoa = ?", (id_destinatario,), fetch_results=True)
-    if not dest_pessoa_data:
+    id_destinatario = select_person_terminal(conn, "Código Pessoa do Destinatário (Pessoa existente): ") # Busca para escolher o destinatário.
+    # Busca dados da pessoa destinatária (com a cidade e o estado do endereço principal).
+    destinatario = (services.get_recipients(conn, [id_destinatario]) or {}).get(id_destinatario)
+    if destinatario is None:
         print("Erro: Destinatário (Pessoa) não encontrado.")
         return
-    
-    dest_nome, dest_id_endereco, dest_telefone, dest_cpf = dest_pessoa_data[0] # Dados do destinatário.
-    
+    dest_nome, dest_cpf, dest_telefone = destinatario.nome, destinatario.cpf, destinatario.telefone # Dados do destinatário.
+
     # Coleta dados para a tabela Dados_Rastreamento (snapshot no momento da criação do produto).
     print("\n--- Dados para Rastreamento (Destinatário) ---")
     dr_nome_dest = input(f"Nome do Destinatário para rastreamento [{dest_nome}]: ").strip() or dest_nome
@@ -1235,71 +1352,33 @@ def add_product_terminal(conn):
     # Endereço de entrega para o rastreamento (usa o endereço principal do destinatário por padrão).
     print("O endereço de entrega para o rastreamento será o endereço principal do destinatário.")
     print("Se for um endereço diferente, você precisará cadastrá-lo e associá-lo ao Dados_Rastreamento manualmente após a criação do produto (via Gerenciar Rastreamento).")
-    dr_id_endereco = dest_id_endereco # ID do endereço do destinatário.
-    
-    # Busca cidade e estado do endereço do destinatário.
-    endereco_dest_data = db_connection.execute_query(conn, "SELECT Cidade, Estado FROM Endereco WHERE ID_Endereco = ?", (dr_id_endereco,), fetch_results=True)
-    if not endereco_dest_data:
-        print("Erro: Endereço do destinatário não encontrado.")
-        return
-    dr_cidade, dr_estado = endereco_dest_data[0] # Cidade e estado do destinatário.
     dr_telefone_dest = input(f"Telefone do Destinatário para rastreamento [{dest_telefone or ''}]: ").strip() or dest_telefone # Telefone para rastreamento.
     
-    # Gera código de rastreamento único (simplificado).
-    cod_rastreamento = f"SRL{datetime.now().strftime('%Y%m%d%H%M%S%f')}" 
-
     # Motorista (opcional neste momento).
     cod_motorista = None
     if input("Deseja atribuir um motorista agora? (s/n): ").lower() == 's':
-        # Lista motoristas disponíveis.
-        sql_motoristas = """
-        SELECT F.Codigo_Funcionario, P.Nome 
-        FROM Funcionario F JOIN Pessoa P ON F.Codigo_Funcionario = P.Codigo_Pessoa
-        WHERE F.Cargo = 'Motorista'
-        ORDER BY P.Nome;
-        """
-        motoristas = db_connection.execute_query(conn, sql_motoristas, fetch_results=True)
+        # Lista motoristas disponíveis (cache de referência).
+        motoristas = reference_cache.get_drivers(conn)
         if motoristas:
             print("\n--- Motoristas Disponíveis ---")
             for m_cod, m_nome in motoristas:
                 print(f"{m_cod} - {m_nome}")
             cod_motorista = get_valid_input("Código do Motorista (opcional): ", int, optional=True)
             # Valida se o motorista existe e tem o cargo correto.
-            if cod_motorista and not db_connection.execute_query(conn, "SELECT 1 FROM Funcionario WHERE Codigo_Funcionario = ? AND Cargo = 'Motorista'", (cod_motorista,), fetch_results=True):
+            if cod_motorista and not reference_cache.is_driver(conn, cod_motorista):
                 print("Motorista inválido. Deixando sem motorista.")
                 cod_motorista = None
         else:
             print("Nenhum motorista cadastrado.")
 
-    try:
-        # 1. Insere Dados_Rastreamento e obtém o ID.
-        sql_insert_rastreamento = """
-        INSERT INTO Dados_Rastreamento (Codigo_Rastreamento, Nome_Destinatario, CPF_Destinatario, ID_Endereco, Cidade, Estado, Telefone_Destinatario)
-        VALUES (?, ?, ?, ?, ?, ?, ?);
-        """
-        params_rastreamento = (cod_rastreamento, dr_nome_dest, dr_cpf_dest, dr_id_endereco, dr_cidade, dr_estado, dr_telefone_dest)
-        new_rastreamento_id = db_connection.execute_insert_and_get_last_id(conn, sql_insert_rastreamento, params_rastreamento)
-
-        if new_rastreamento_id: # Se os dados de rastreamento foram inseridos.
-            # 2. Insere Produto_A_Ser_Entregue.
-            sql_insert_produto = """
-            INSERT INTO Produto_A_Ser_Entregue 
-            (Peso, Status_Entrega, Data_Chegada_CD, Data_Prevista_Entrega, Tipo_Produto, ID_Remetente, ID_Destinatario, Codigo_Funcionario_Motorista, ID_Rastreamento)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-            """
-            params_produto = (peso, status_entrega, data_chegada_cd, data_prevista_entrega, tipo_produto, 
-                              id_remetente, id_destinatario, cod_motorista, new_rastreamento_id)
-            
-            if db_connection.execute_query(conn, sql_insert_produto, params_produto): # Insere o produto.
-                print(f"Produto adicionado com sucesso! Código de Rastreamento: {cod_rastreamento}")
-            else:
-                print("Erro: Falha ao adicionar produto.")
-                # Idealmente, deletar os Dados_Rastreamento recém-criados em caso de falha aqui.
-        else:
-            print("Erro: Falha ao criar dados de rastreamento.")
-
-    except Exception as e:
-        print(f"Erro inesperado ao adicionar produto: {e}")
+    # Rastreamento e produto são gravados na mesma transação; o código de rastreamento é gerado no serviço.
+    produto = services.NewProduct(Decimal(str(peso)), status_entrega, data_chegada_cd, data_prevista_entrega, tipo_produto,
+                                  id_remetente, id_destinatario, cod_motorista, dr_nome_dest, dr_cpf_dest, dr_telefone_dest)
+    outcome = services.add_products(conn, [produto])[0]
+    if outcome.ok:
+        print(f"Produto adicionado com sucesso! Código de Rastreamento: {outcome.dados['codigo_rastreamento']}")
+    else:
+        print(f"Erro: Falha ao adicionar produto. {outcome.erro}")
 
 def list_products_terminal(conn, for_client_person_code=None):
     """Lista Produtos a Serem Entregues. Pode ser filtrado por cliente."""
@@ -1327,19 +1406,16 @@ def list_products_terminal(conn, for_client_person_code=None):
     
     base_sql += " ORDER BY PROD.ID_Produto DESC;" # Ordena por ID do produto.
 
-    products = db_connection.execute_query(conn, base_sql, tuple(params) if params else None, fetch_results=True)
-
-    if products:
-        headers = ["ID Prod", "Peso(kg)", "Status", "Tipo Prod", "Chegada CD", "Prev. Entrega", "Remetente", "Destinatário (Rastr.)", "Cód. Rastr.", "Motorista"]
-        col_widths = [8, 8, 18, 12, 12, 15, 20, 20, 20, 20] # Larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for p in products: # Itera sobre os produtos.
-            # Ajuste nos índices para pegar Destinatario_Rastr (p[8]) e outros campos corretos.
-            p_formatted = [str(x) if x is not None else "" for x in (p[0], p[1], p[2], p[3], p[4], p[5], p[6], p[8], p[9], p[10])]
-            print(header_format.format(*p_formatted)) # Exibe dados do produto.
-    else:
+    products = db_connection.iterate_query(conn, base_sql, tuple(params) if params else None)
+    headers = ["ID Prod", "Peso(kg)", "Status", "Tipo Prod", "Chegada CD", "Prev. Entrega", "Remetente", "Destinatário (Rastr.)", "Cód. Rastr.", "Motorista"]
+    col_widths = [8, 8, 18, 12, 12, 15, 20, 20, 20, 20] # Larguras das colunas.
+    # Ajuste nos índices para pegar Destinatario_Rastr (p[8]) e outros campos corretos.
+    rows = ((p[0], p[1], p[2], p[3], p[4], p[5], p[6], p[8], p[9], p[10]) for p in products)
+    try:
+        shown = table_view.page(table_view.Table(headers, col_widths), rows)
+    finally:
+        products.close() # Libera o cursor mesmo se a listagem for interrompida.
+    if not shown:
         if for_client_person_code:
             print("Nenhum produto encontrado para você (como remetente ou destinatário).")
         else:
@@ -1370,7 +1446,7 @@ def update_product_terminal(conn):
     new_peso_str = input(f"Peso (kg) [{p_data[0]}]: ").strip()
     new_peso = float(new_peso_str) if new_peso_str else p_data[0] # Converte para float se digitado.
 
-    status_entrega_validos = ['Em Processamento', 'Aguardando Coleta', 'Em Transito', 'Entregue', 'Cancelado', 'Falha na Entrega']
+    status_entrega_validos = reference_cache.STATUS_ENTREGA
     new_status = input(f"Status [{p_data[1]}] ({', '.join(status_entrega_validos)}): ").strip() or p_data[1]
     if new_status not in status_entrega_validos: # Valida novo status.
         print("Status inválido. Mantendo anterior.")
@@ -1382,7 +1458,7 @@ def update_product_terminal(conn):
     new_data_prev_ent_str = input(f"Data Prev. Entrega [{p_data[3] or ''}] (AAAA-MM-DD): ").strip()
     new_data_prev_ent = datetime.strptime(new_data_prev_ent_str, '%Y-%m-%d').date() if new_data_prev_ent_str else p_data[3] # Converte para date se digitado.
 
-    tipos_produto_validos = ['Fragil', 'Perecivel', 'Comum']
+    tipos_produto_validos = reference_cache.TIPOS_PRODUTO
     new_tipo_prod = input(f"Tipo Produto [{p_data[4]}] ({', '.join(tipos_produto_validos)}): ").strip() or p_data[4]
     if new_tipo_prod not in tipos_produto_validos: # Valida novo tipo de produto.
         print("Tipo de produto inválido. Mantendo anterior.")
@@ -1393,8 +1469,7 @@ def update_product_terminal(conn):
     new_id_remetente, new_id_destinatario = p_data[5], p_data[6] # Mantém os atuais.
 
     # Atualização do Motorista.
-    sql_motoristas = "SELECT F.Codigo_Funcionario, P.Nome FROM Funcionario F JOIN Pessoa P ON F.Codigo_Funcionario = P.Codigo_Pessoa WHERE F.Cargo = 'Motorista' ORDER BY P.Nome;"
-    motoristas = db_connection.execute_query(conn, sql_motoristas, fetch_results=True)
+    motoristas = reference_cache.get_drivers(conn) # Cache de referência.
     if motoristas:
         print("\n--- Motoristas Disponíveis ---")
         for m_cod, m_nome in motoristas: print(f"{m_cod} - {m_nome}") # Lista motoristas.
@@ -1406,7 +1481,7 @@ def update_product_terminal(conn):
             if val == 0: # Se digitou 0, remove o motorista.
                 new_cod_motorista = None
             # Valida se o motorista existe e tem o cargo correto.
-            elif db_connection.execute_query(conn, "SELECT 1 FROM Funcionario WHERE Codigo_Funcionario = ? AND Cargo = 'Motorista'", (val,), fetch_results=True):
+            elif reference_cache.is_driver(conn, val):
                 new_cod_motorista = val
             else:
                 print("Motorista inválido. Mantendo anterior.")
@@ -1419,40 +1494,38 @@ def update_product_terminal(conn):
 
     print(f"ID de Rastreamento ({p_data[8]}) não é alterado aqui.")
 
-    # Query para atualizar o produto.
+    # A troca de status passa pelas regras de services.update_product_statuses (produtos entregues/cancelados não mudam).
+    if new_status != p_data[1]:
+        outcome = services.update_product_statuses(conn, [services.StatusChange(product_id, None, new_status)])[0]
+        if not outcome.ok:
+            print(f"Status não alterado: {outcome.erro}")
+
+    # Query para atualizar os demais dados do produto.
     sql_update_prod = """
     UPDATE Produto_A_Ser_Entregue 
-    SET Peso=?, Status_Entrega=?, Data_Chegada_CD=?, Data_Prevista_Entrega=?, Tipo_Produto=?, Codigo_Funcionario_Motorista=?
+    SET Peso=?, Data_Chegada_CD=?, Data_Prevista_Entrega=?, Tipo_Produto=?, Codigo_Funcionario_Motorista=?
     WHERE ID_Produto=?;
     """
-    params = (new_peso, new_status, new_data_chegada_cd, new_data_prev_ent, new_tipo_prod, new_cod_motorista, product_id)
+    params = (new_peso, new_data_chegada_cd, new_data_prev_ent, new_tipo_prod, new_cod_motorista, product_id)
     if db_connection.execute_query(conn, sql_update_prod, params):
         print("Produto atualizado com sucesso!")
     else:
         print("Erro: Falha ao atualizar produto.")
 
+@n_plus_one.operation("Deletar Produto")
 def delete_product_terminal(conn):
     """Deleta um Produto a Ser Entregue e seus Dados de Rastreamento associados."""
     print("\n--- Deletar Produto a Ser Entregue ---")
     product_id = get_valid_input("Digite o ID do Produto a ser deletado: ", int) # Pede o ID do produto.
     if product_id is None: return
 
-    # Verifica dependências (Carregamento).
-    if db_connection.execute_query(conn, "SELECT 1 FROM Carregamento WHERE ID_Produto = ?", (product_id,), fetch_results=True):
-        print("Erro: Produto está associado a um carregamento. Remova-o do carregamento primeiro.")
-        return
+    # Verifica dependências (Carregamento) e busca o status atual do produto.
+    check = check_delete_terminal(conn, "produto", product_id, "Produto não encontrado.")
+    if check is None: return
+    status_atual = check[1] # Status atual.
 
-    # Busca ID de rastreamento e status atual do produto.
-    prod_data = db_connection.execute_query(conn, "SELECT ID_Rastreamento, Status_Entrega FROM Produto_A_Ser_Entregue WHERE ID_Produto = ?", (product_id,), fetch_results=True)
-    if not prod_data:
-        print("Produto não encontrado.")
-        return
-    
-    id_rastreamento = prod_data[0][0] # ID de rastreamento.
-    status_atual = prod_data[0][1] # Status atual.
-
-    # Regra de negócio exemplo: aviso se o status não for 'Cancelado' ou 'Em Processamento'.
-    if status_atual not in ['Cancelado', 'Em Processamento']:
+    # Aviso se o status não for 'Cancelado' ou 'Em Processamento'.
+    if status_atual not in services.PRODUCT_DELETE_SAFE_STATUSES:
         print(f"Aviso: O produto está com status '{status_atual}'. A exclusão pode não ser permitida dependendo das regras de negócio.")
         if input("Continuar com a exclusão? (s/n): ").lower() != 's':
             print("Exclusão cancelada.")
@@ -1463,19 +1536,12 @@ def delete_product_terminal(conn):
         print("Exclusão cancelada.")
         return
 
-    try:
-        # 1. Deleta o Produto.
-        if db_connection.execute_query(conn, "DELETE FROM Produto_A_Ser_Entregue WHERE ID_Produto = ?", (product_id,)):
-            print("Produto deletado.")
-            # 2. Deleta os Dados_Rastreamento associados.
-            if db_connection.execute_query(conn, "DELETE FROM Dados_Rastreamento WHERE ID_Rastreamento = ?", (id_rastreamento,)):
-                print("Dados de rastreamento associados deletados com sucesso.")
-            else:
-                print("Aviso: Produto deletado, mas falha ao deletar dados de rastreamento.")
-        else:
-            print("Erro: Falha ao deletar produto.")
-    except Exception as e:
-        print(f"Erro inesperado ao deletar produto: {e}")
+    # Produto e Dados_Rastreamento são deletados na mesma transação (o aviso de status já foi confirmado).
+    outcome = services.delete_products(conn, [product_id], force=True)[0]
+    if outcome.ok:
+        print("Produto e dados de rastreamento associados deletados com sucesso.")
+    else:
+        print(f"Erro: Falha ao deletar produto. {outcome.erro}")
 
 # --- Gerenciar Dados de Rastreamento (CRUD mais para fins administrativos) ---
 def manage_tracking_terminal(conn):
@@ -1507,8 +1573,16 @@ def add_tracking_data_terminal(conn):
     cpf_dest = get_valid_input("CPF do Destinatário (opcional): ", optional=True) # CPF (opcional).
     
     print("\n--- Endereço de Entrega (para o rastreamento) ---")
-    list_people_terminal(conn) # Lista pessoas para ajudar a encontrar um endereço existente.
-    print("Você pode selecionar um ID de Endereço existente ou cadastrar um novo.")
+    print("Busque a pessoa destinatária para ver o ID do seu endereço (coluna 'ID End.'), ou informe um ID de Endereço existente.")
+    while True: # Busca pessoas para ajudar a encontrar um endereço existente.
+        term = get_valid_input("Buscar pessoa por nome, CPF/CNPJ, telefone ou email (Enter para informar o ID do endereço): ", optional=True)
+        if not term:
+            break
+        people = services.search_people(conn, term)
+        if people:
+            print_people_search_results(people)
+        else:
+            print("Nenhuma pessoa encontrada.")
     id_endereco = get_valid_input("ID do Endereço de entrega (de um endereço já cadastrado): ", int) # Pede ID do endereço.
     # Busca cidade e estado do endereço.
     addr_data = db_connection.execute_query(conn, "SELECT Cidade, Estado FROM Endereco WHERE ID_Endereco = ?", (id_endereco,), fetch_results=True)
@@ -1543,17 +1617,9 @@ def list_tracking_data_terminal(conn):
     LEFT JOIN Produto_A_Ser_Entregue P ON DR.ID_Rastreamento = P.ID_Rastreamento /* Para ver se está associado */
     ORDER BY DR.ID_Rastreamento DESC;
     """
-    tracking_data = db_connection.execute_query(conn, sql, fetch_results=True)
-    if tracking_data:
-        headers = ["ID Rastr.", "Cód. Rastr.", "Nome Dest.", "CPF Dest.", "ID End.", "Rua Entrega", "Nº", "Cidade Entr.", "UF", "Tel. Dest.", "ID Produto Assoc."]
-        col_widths = [10, 18, 20, 15, 8, 20, 8, 15, 5, 15, 15] # Larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for td in tracking_data: # Itera sobre os dados de rastreamento.
-            td_formatted = [str(x) if x is not None else "" for x in td] # Formata dados.
-            print(header_format.format(*td_formatted)) # Exibe dados.
-    else:
+    headers = ["ID Rastr.", "Cód. Rastr.", "Nome Dest.", "CPF Dest.", "ID End.", "Rua Entrega", "Nº", "Cidade Entr.", "UF", "Tel. Dest.", "ID Produto Assoc."]
+    col_widths = [10, 18, 20, 15, 8, 20, 8, 15, 5, 15, 15] # Larguras das colunas.
+    if not table_view.page(table_view.Table(headers, col_widths), db_connection.iterate_query(conn, sql)):
         print("Nenhum dado de rastreamento encontrado.")
 
 def update_tracking_data_terminal(conn):
@@ -1619,15 +1685,8 @@ def delete_tracking_data_terminal(conn):
     tracking_id = get_valid_input("Digite o ID de Rastreamento a ser deletado: ", int) # Pede ID do rastreamento.
     if tracking_id is None: return
 
-    # Verifica se está associado a um Produto_A_Ser_Entregue.
-    if db_connection.execute_query(conn, "SELECT 1 FROM Produto_A_Ser_Entregue WHERE ID_Rastreamento = ?", (tracking_id,), fetch_results=True):
-        print("Erro: Estes dados de rastreamento estão vinculados a um produto.")
-        print("Delete o produto associado primeiro (isso também deveria deletar os dados de rastreamento), ou desvincule-os.")
-        return
-    
-    if not db_connection.execute_query(conn, "SELECT 1 FROM Dados_Rastreamento WHERE ID_Rastreamento = ?", (tracking_id,), fetch_results=True):
-        print("Dados de rastreamento não encontrados.")
-        return
+    # Verifica existência e se está associado a um Produto_A_Ser_Entregue.
+    if check_delete_terminal(conn, "rastreamento", tracking_id, "Dados de rastreamento não encontrados.") is None: return
 
     confirm = input(f"Tem certeza que deseja deletar os Dados de Rastreamento ID {tracking_id}? (s/n): ").strip().lower()
     if confirm != 's': # Confirmação da exclusão.
@@ -1654,6 +1713,7 @@ def manage_shipments_terminal(conn):
         elif choice == 0: break
         press_enter_to_continue()
 
+@n_plus_one.operation("Adicionar Carregamento")
 def add_shipment_terminal(conn):
     """Adiciona um novo Carregamento, associando Produtos a um Veículo e Data."""
     print("\n--- Adicionar Novo Carregamento ---")
@@ -1702,15 +1762,10 @@ def add_shipment_terminal(conn):
             break # Sai do loop de adicionar produtos.
         
         print("\nProdutos disponíveis para este carregamento:")
-        headers = ["ID Prod", "Peso(kg)", "Status", "Tipo", "Cód. Rastr."]
-        col_widths = [8, 10, 18, 12, 20]
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
+        table_view.print_table(table_view.Table(["ID Prod", "Peso(kg)", "Status", "Tipo", "Cód. Rastr."], [8, 10, 18, 12, 20]), available_products)
         prod_dict = {} # Dicionário para fácil acesso aos detalhes do produto pelo ID.
         for p_id, p_peso, p_status, p_tipo, p_rastr in available_products:
             prod_dict[p_id] = {'peso': p_peso, 'status': p_status, 'tipo': p_tipo, 'rastr': p_rastr}
-            print(header_format.format(p_id, p_peso, p_status, p_tipo, p_rastr))
 
         id_produto_str = input("Digite o ID do Produto para adicionar (ou 0 para finalizar): ").strip()
         if not id_produto_str.isdigit(): # Valida se a entrada é um dígito.
@@ -1730,9 +1785,8 @@ def add_shipment_terminal(conn):
         
         produto_selecionado = prod_dict[id_produto] # Detalhes do produto selecionado.
         peso_total_carregamento = Decimal(str(peso_total_carregamento))
-        result = peso_total_carregamento + produto_selecionado['peso']
         # Verifica se adicionar o produto excede a carga máxima do veículo.
-        if result > carga_max_veiculo:
+        if not services.fits_in_vehicle(carga_max_veiculo, peso_total_carregamento, produto_selecionado['peso']):
             print(f"Erro: Adicionar este produto ({produto_selecionado['peso']}kg) excederia a carga suportada do veículo ({carga_max_veiculo}kg).")
             print(f"Espaço restante: {carga_max_veiculo - peso_total_carregamento:.2f}kg")
             continue
@@ -1746,27 +1800,13 @@ def add_shipment_terminal(conn):
         print("Nenhum produto selecionado para o carregamento.")
         return
 
-    try:
-        num_sucessos = 0 # Contador de produtos inseridos com sucesso no carregamento.
-        for prod_id in produtos_no_carregamento: # Itera sobre os produtos selecionados.
-            # Insere cada produto na tabela Carregamento.
-            # ID_Carregamento é auto-incremental, identificando cada item do carregamento.
-            # A constraint UNIQUE (Placa_Veiculo, ID_Produto, Data_Carregamento) garante que um produto não seja adicionado duas vezes ao mesmo "evento" de carregamento.
-            sql_insert_carreg = "INSERT INTO Carregamento (Placa_Veiculo, ID_Produto, Data_Carregamento) VALUES (?, ?, ?);"
-            if db_connection.execute_query(conn, sql_insert_carreg, (placa_veiculo, prod_id, data_carregamento)):
-                num_sucessos += 1
-                # Opcional: Atualizar status do produto para 'Em Transito'.
-            else:
-                print(f"Aviso: Falha ao adicionar produto ID {prod_id} ao carregamento (pode já existir para esta data/veículo).")
-        
-        if num_sucessos > 0:
-            print(f"{num_sucessos} produto(s) registrados no carregamento para o veículo {placa_veiculo} em {data_carregamento.strftime('%d/%m/%Y %H:%M')}.")
-            # Opcional: Atualizar status do veículo.
-        else:
-            print("Nenhum produto foi efetivamente adicionado ao carregamento.")
-
-    except Exception as e:
-        print(f"Erro inesperado ao adicionar carregamento: {e}")
+    # Os produtos são registrados em uma transação; as regras (status, peso total, produto repetido no mesmo
+    # veículo e data) são verificadas de novo no serviço, pois outro operador pode ter usado os produtos.
+    outcome = services.create_shipments(conn, [services.Shipment(placa_veiculo, produtos_no_carregamento, data_carregamento)])[0]
+    if outcome.ok:
+        print(f"{outcome.dados['produtos']} produto(s) registrados no carregamento para o veículo {placa_veiculo} em {data_carregamento.strftime('%d/%m/%Y %H:%M')}.")
+    else:
+        print(f"Erro: Nenhum produto foi adicionado ao carregamento. {outcome.erro}")
 
 def list_shipments_terminal(conn):
     """Lista todos os itens de Carregamentos."""
@@ -1782,22 +1822,15 @@ def list_shipments_terminal(conn):
     JOIN Dados_Rastreamento DR ON P.ID_Rastreamento = DR.ID_Rastreamento
     ORDER BY C.Data_Carregamento DESC, C.Placa_Veiculo, C.ID_Carregamento;
     """
-    shipments = db_connection.execute_query(conn, sql_simple, fetch_results=True)
-
-    if shipments:
-        print("Cada linha representa um produto em um carregamento.")
-        headers = ["ID Carreg.", "Placa Veíc.", "Data/Hora Carreg.", "ID Prod.", "Tipo Prod.", "Peso Prod.", "Cód. Rastr."]
-        col_widths = [10, 12, 18, 8, 15, 10, 20] # Larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        for s in shipments: # Itera sobre os itens de carregamento.
-            s_formatted = [str(x) if x is not None else "" for x in s] # Formata dados.
-            print(header_format.format(*s_formatted)) # Exibe dados.
+    print("Cada linha representa um produto em um carregamento.")
+    headers = ["ID Carreg.", "Placa Veíc.", "Data/Hora Carreg.", "ID Prod.", "Tipo Prod.", "Peso Prod.", "Cód. Rastr."]
+    col_widths = [10, 12, 18, 8, 15, 10, 20] # Larguras das colunas.
+    if table_view.page(table_view.Table(headers, col_widths), db_connection.iterate_query(conn, sql_simple)):
         print("\nUse 'Detalhes do Carregamento' para ver agrupado por veículo e data.")
     else:
         print("Nenhum carregamento encontrado.")
 
+@n_plus_one.operation("Detalhes do Carregamento")
 def shipment_details_terminal(conn):
     """Exibe os detalhes de um Carregamento específico (produtos contidos)."""
     print("\n--- Detalhes do Carregamento ---")
@@ -1824,13 +1857,8 @@ def shipment_details_terminal(conn):
         print(f"\nDetalhes do Carregamento - Veículo: {placa}, Data: {data_carreg.strftime('%d/%m/%Y %H:%M')}")
         headers = ["ID Carreg. (Item)", "ID Prod.", "Tipo Prod.", "Peso Prod.", "Status Prod.", "Cód. Rastr."]
         col_widths = [18, 8, 15, 10, 18, 20] # Larguras das colunas.
-        header_format = "".join([f"{{:<{w}}}" for w in col_widths])
-        print(header_format.format(*headers))
-        print("-" * sum(col_widths))
-        total_peso = 0
-        for d_id_carr, d_id_prod, d_tipo, d_peso, d_status, d_rastr in details: # Itera sobre os detalhes.
-            print(header_format.format(d_id_carr, d_id_prod, d_tipo, d_peso, d_status, d_rastr)) # Exibe dados.
-            total_peso += d_peso # Soma o peso.
+        table_view.print_table(table_view.Table(headers, col_widths), details)
+        total_peso = sum(d_peso for _, _, _, d_peso, _, _ in details) # Soma o peso.
         print("-" * sum(col_widths))
         print(f"Total de Produtos: {len(details)}, Peso Total Estimado: {total_peso:.2f} kg") # Exibe totais.
     else:
@@ -1861,6 +1889,7 @@ def remove_product_from_shipment_terminal(conn):
     else:
         print("Erro ao remover produto do carregamento.")
 
+@n_plus_one.operation("Deletar Carregamento")
 def delete_shipment_terminal(conn):
     """Deleta um Carregamento completo (todos os produtos de um veículo em uma data específica)."""
     print("\n--- Deletar Carregamento Completo (Todos os Produtos) ---")
@@ -1906,13 +1935,8 @@ def cadastro_cliente_self_service(conn):
 
     # Coleta dados do Endereço.
     print("\n--- Seu Endereço Principal ---")
-    cep = get_valid_input("CEP: ")
-    estado = get_valid_input("Estado (UF): ")
-    cidade = get_valid_input("Cidade: ")
-    bairro = get_valid_input("Bairro: ")
-    rua = get_valid_input("Rua/Avenida: ")
-    numero = get_valid_input("Número: ")
-    complemento = get_valid_input("Complemento (ex: Apt, Bloco, Casa): ", optional=True)
+    cep, estado, cidade, bairro, rua, numero, complemento = prompt_address_terminal(
+        state_label="Estado (UF)", street_label="Rua/Avenida", complement_label="Complemento (ex: Apt, Bloco, Casa)")
 
     # 2. Coleta dados específicos do Cliente (PF/PJ).
     print("\n--- Tipo de Cliente ---")
@@ -1935,7 +1959,7 @@ def cadastro_cliente_self_service(conn):
     print("\n--- Dados de Acesso ao Sistema ---")
     login = get_valid_input("Escolha um Login (nome de usuário): ")
     # Verifica se o login já existe.
-    if db_connection.execute_query(conn, "SELECT 1 FROM Usuario WHERE Login = ?", (login,), fetch_results=True):
+    if services.existing_logins(conn, [login]):
         print("Erro: Este login já está em uso. Por favor, escolha outro. Cadastro cancelado.")
         return
     
@@ -1948,52 +1972,17 @@ def cadastro_cliente_self_service(conn):
         print("As senhas não coincidem. Cadastro cancelado.")
         return
 
-    try:
-        # Conceitualmente, aqui começaria uma transação.
-        # O pyodbc por padrão tem autocommit=True para cada execute.
-        # Para uma transação real, seria conn.autocommit = False no início da conexão
-        # e conn.commit() aqui, com conn.rollback() nos blocos de erro.
-        
-        # Insere Endereço e obtém ID.
-        sql_endereco = "INSERT INTO Endereco (CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento) VALUES (?, ?, ?, ?, ?, ?, ?)"
-        endereco_id = db_connection.execute_insert_and_get_last_id(conn, sql_endereco, (cep, estado, cidade, bairro, rua, numero, complemento))
-        if not endereco_id: # Se falhar ao inserir endereço.
-            print("Erro crítico ao salvar endereço. Cadastro cancelado.")
-            # conn.rollback() # Se estivesse em transação explícita.
-            return
-
-        # Insere Pessoa e obtém ID.
-        sql_pessoa = "INSERT INTO Pessoa (Nome, RG, Telefone, Email, ID_Endereco) VALUES (?, ?, ?, ?, ?)"
-        pessoa_id = db_connection.execute_insert_and_get_last_id(conn, sql_pessoa, (nome, rg, telefone, email, endereco_id))
-        if not pessoa_id: # Se falhar ao inserir pessoa.
-            print("Erro crítico ao salvar dados pessoais. Cadastro cancelado.")
-            # conn.rollback()
-            return
-            
-        # Insere Cliente.
-        sql_cliente = "INSERT INTO Cliente (Codigo_Pessoa, Tipo_Cliente, CPF, Data_Nascimento, CNPJ, Nome_Empresa) VALUES (?, ?, ?, ?, ?, ?)"
-        if not db_connection.execute_query(conn, sql_cliente, (pessoa_id, tipo_cliente, cpf, data_nasc_obj, cnpj, nome_empresa)):
-            print("Erro crítico ao salvar dados de cliente. Verifique os campos e tente novamente. Cadastro cancelado.")
-            # conn.rollback()
-            return
-
-        # Insere Usuário.
-        hashed_senha = hash_password(senha) # Gera hash da senha.
-        sql_usuario = "INSERT INTO Usuario (Login, Senha_Hash, Codigo_Pessoa, Tipo_Usuario) VALUES (?, ?, ?, ?)"
-        if not db_connection.execute_query(conn, sql_usuario, (login, hashed_senha, pessoa_id, 'Cliente')): # Define tipo como 'Cliente'.
-            print("Erro crítico ao criar seu usuário de acesso. Cadastro cancelado.")
-            # conn.rollback()
-            return
-
-        # conn.commit() # Se tudo deu certo e estivesse em transação explícita.
+    # Endereço, Pessoa, Cliente e Usuário são gravados em uma transação, com as regras de PF/PJ do serviço.
+    outcome = services.register_clients(conn, [{
+        "nome": nome, "rg": rg, "telefone": telefone, "email": email,
+        "cep": cep, "estado": estado, "cidade": cidade, "bairro": bairro, "rua": rua, "numero": numero, "complemento": complemento,
+        "tipo_cliente": tipo_cliente, "cpf": cpf, "data_nascimento": data_nasc_obj and data_nasc_obj.isoformat(),
+        "cnpj": cnpj, "nome_empresa": nome_empresa, "login": login, "senha": senha,
+    }])[0]
+    if outcome.ok:
         print("\nCadastro realizado com sucesso! Você já pode fazer login com seu novo usuário e senha.")
-
-    except Exception as e:
-        print(f"Ocorreu um erro inesperado durante o cadastro: {e}")
-        # try:
-        #     conn.rollback() # Tenta reverter em caso de erro inesperado.
-        # except Exception as rb_e:
-        #     print(f"Erro adicional ao tentar reverter transação: {rb_e}")
+    else:
+        print(f"Erro: {outcome.erro} Cadastro cancelado.")
 
 
 # ------------------- MENUS DE USUÁRIOS ----------------------
@@ -2041,7 +2030,8 @@ def menu_cliente(conn, user_login, person_code):
 
                 # Executa a query de rastreio. Usa -1 se não tiver CPF para evitar match errado.
                 pedido = db_connection.execute_query(conn, sql_rastreio, (cod_rastreio, person_code, person_code, person_code if cpf_cliente_logado else -1 ), fetch_results=True)
-                
+                metrics.TRACKING_LOOKUPS.labels("encontrado" if pedido else "erro" if pedido is None else "nao_encontrado").inc()
+
                 if pedido: # Se o pedido for encontrado.
                     p_data = pedido[0]
                     print("\n--- Detalhes do Pedido ---")
@@ -2155,19 +2145,95 @@ def menu_admin(conn, user_login, person_code):
         elif choice == 0: # Sair do menu do admin.
             break
 
-# Placeholder para menus de outros tipos de funcionários.
-# Estas funções apenas exibem mensagens indicando funcionalidades futuras.
+# --- Relatórios do Gerente ---
+def prompt_report_period():
+    """Pede o período do relatório (padrão: últimos 30 dias). Retorna (início, fim) ou None se inválido."""
+    default_start, default_end = reports.default_period()
+    start_str = input(f"Data inicial (AAAA-MM-DD) [{default_start}]: ").strip()
+    end_str = input(f"Data final (AAAA-MM-DD) [{default_end}]: ").strip()
+    try:
+        start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else default_start
+        end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else default_end
+    except ValueError:
+        print("Data inválida. Use o formato AAAA-MM-DD.")
+        return None
+    if start > end:
+        print("A data inicial deve ser anterior ou igual à data final.")
+        return None
+    return start, end
+
+def report_status_per_day_terminal(conn):
+    """Relatório: produtos por status, por dia de chegada ao CD."""
+    print("\n--- Produtos por Status por Dia ---")
+    period = prompt_report_period()
+    if period is None: return
+    rows = reports.products_by_status_per_day(conn, *period)
+    if rows:
+        table = table_view.Table(["Dia", "Status", "Qtd.", "Peso (kg)"], [12, 20, 8, 12])
+        table_view.page(table, ((dia.strftime('%d/%m/%Y'), status, quantidade, peso) for dia, status, quantidade, peso in rows))
+    else:
+        print("Nenhum produto no período.")
+
+def report_on_time_terminal(conn):
+    """Relatório: taxa de entregas no prazo."""
+    print("\n--- Entregas no Prazo ---")
+    period = prompt_report_period()
+    if period is None: return
+    result = reports.on_time_rate(conn, *period)
+    if result is None:
+        print("Erro ao gerar o relatório.")
+        return
+    print(f"Entregas realizadas: {result['entregues']}")
+    print(f"  No prazo: {result['no_prazo']}")
+    print(f"  Atrasadas: {result['atrasados']}")
+    print(f"  Sem data prevista: {result['sem_previsao']}")
+    if result['taxa'] is None:
+        print("Taxa de entregas no prazo: sem entregas com data prevista no período.")
+    else:
+        print(f"Taxa de entregas no prazo: {result['taxa']}%")
+
+def report_volume_by_city_terminal(conn):
+    """Relatório: volume por cidade de destino."""
+    print("\n--- Volume por Cidade de Destino ---")
+    period = prompt_report_period()
+    if period is None: return
+    rows = reports.volume_by_city(conn, *period)
+    if rows:
+        table_view.page(table_view.Table(["UF", "Cidade", "Qtd.", "Peso (kg)"], [6, 30, 8, 12]), rows)
+    else:
+        print("Nenhum produto no período.")
+
+def report_vehicle_load_terminal(conn):
+    """Relatório: carga por veículo."""
+    print("\n--- Carga por Veículo ---")
+    period = prompt_report_period()
+    if period is None: return
+    rows = reports.load_by_vehicle(conn, *period)
+    if rows:
+        headers = ["Placa", "Tipo", "Cap. (kg)", "Dias", "Itens", "Peso (kg)", "Média/Dia", "Uso %"]
+        col_widths = [10, 12, 11, 6, 7, 12, 12, 7]
+        table_view.page(table_view.Table(headers, col_widths), rows)
+    else:
+        print("Nenhum veículo cadastrado.")
+
 def menu_gerente(conn, user_login, person_code):
-    """Menu placeholder para o Gerente."""
-    print(f"\n--- Menu do Gerente: {user_login} (Cód. Pessoa: {person_code}) ---")
-    print("Funcionalidades do Gerente a serem implementadas:")
-    print("- Visualizar/Gerenciar Funcionários da Sede")
-    print("- Visualizar/Gerenciar Veículos (da Sede ou todos)")
-    print("- Visualizar Produtos na Sede")
-    print("- Aprovar/Iniciar Carregamentos")
-    print("- Gerar Relatórios (Entregas, Desempenho, etc.)")
-    press_enter_to_continue()
+    """Menu do Gerente: relatórios operacionais."""
+    options = [
+        "Relatório: Produtos por Status por Dia", "Relatório: Entregas no Prazo",
+        "Relatório: Volume por Cidade de Destino", "Relatório: Carga por Veículo"
+    ]
+    while True:
+        clear_screen()
+        choice = display_menu(f"Menu Principal do Gerente - {user_login}", options)
+        if choice == 1: report_status_per_day_terminal(conn)
+        elif choice == 2: report_on_time_terminal(conn)
+        elif choice == 3: report_volume_by_city_terminal(conn)
+        elif choice == 4: report_vehicle_load_terminal(conn)
+        elif choice == 0: break
+        press_enter_to_continue()
 
+# Placeholder para menus de outros tipos de funcionários.
+# Estas funções apenas exibem mensagens indicando funcionalidades futuras.
 def menu_atendente(conn, user_login, person_code):
     """Menu placeholder para o Atendente."""
     print(f"\n--- Menu do Atendente: {user_login} (Cód. Pessoa: {person_code}) ---")
@@ -2178,37 +2244,191 @@ def menu_atendente(conn, user_login, person_code):
     print("- Interagir com Clientes (Telefone, Email - simulado)")
     press_enter_to_continue()
 
+# --- Motorista ---
+def print_work_queue(queue, pending):
+    """Exibe a fila de entregas do motorista, numerada na ordem de rota, com as marcações ainda não enviadas."""
+    if not queue:
+        print("Nenhuma entrega pendente atribuída a você.")
+        return
+    headers = ["Nº", "Cód. Rastr.", "Destinatário", "Endereço", "Cidade", "CEP", "Status"]
+    col_widths = [5, 26, 22, 40, 18, 11, 22]
+    rows = ((position, item.codigo_rastreamento, item.destinatario, item.endereco, item.cidade, item.cep,
+             f"{item.status} -> {pending[item.id_produto]}" if item.id_produto in pending else item.status)
+            for position, item in enumerate(queue, 1))
+    table_view.print_table(table_view.Table(headers, col_widths), rows) # A tabela corta os textos longos na largura de cada coluna.
+
+def mark_work_queue_terminal(queue, updates, status):
+    """Pede os números da fila (ex: 1 2 5) e registra o status localmente, sem acessar o banco."""
+    if not queue:
+        print("Nenhuma entrega na fila.")
+        return
+    positions, invalid = parse_id_list(input(f"Números da fila a marcar como '{status}' (ex: 1 2 5): "))
+    invalid += [str(p) for p in positions if not 1 <= p <= len(queue)]
+    if invalid:
+        print(f"Aviso: entradas ignoradas: {', '.join(invalid[:10])}")
+    product_ids = [queue[p - 1].id_produto for p in positions if 1 <= p <= len(queue)]
+    updates.mark(product_ids, status)
+    print(f"{len(product_ids)} entrega(s) marcada(s) como '{status}'. Pendentes de envio: {len(updates)}.")
+
+def register_proof_terminal(queue, store):
+    """Pede a entrega e o arquivo (foto ou assinatura) e guarda o comprovante no aparelho; o envio ocorre na sincronização."""
+    if not queue:
+        print("Nenhuma entrega na fila.")
+        return
+    position = get_valid_input("Número da fila da entrega: ", int)
+    if not 1 <= position <= len(queue):
+        print("Número da fila inválido.")
+        return
+    path = input("Caminho do arquivo do comprovante: ").strip().strip('"')
+    if not os.path.isfile(path):
+        print("Arquivo não encontrado.")
+        return
+    kind_choice = get_valid_input("Tipo (1 - Foto, 2 - Assinatura): ", int, choices=[1, 2])
+    kind = proof_of_delivery.KINDS[kind_choice - 1]
+    content_hash = store.add_proof(queue[position - 1].id_produto, path, kind)
+    proof_of_delivery.generate_thumbnails([content_hash])
+    print(f"Comprovante ({kind}) salvo para a entrega {position}. Será enviado na próxima sincronização.")
+
+def sync_driver_store_terminal(conn, store):
+    """Sincroniza o diário local do motorista com o servidor e exibe o resultado. Retorna True se concluiu."""
+    pending = len(store) + len(store.pending_proofs())
+    counts = driver_sync.sync(conn, store)
+    if counts is None:
+        print("Erro: a sincronização não foi concluída. As marcações continuam salvas no aparelho; tente novamente.")
+        return False
+    if pending:
+        print(f"Sincronização concluída: {', '.join(f'{n} {r}' for r, n in counts.items()) or 'nada a enviar'}.")
+        if counts.get(driver_sync.CONFLICT) or counts.get(driver_sync.NOT_ASSIGNED):
+            print("Algumas marcações foram recusadas (produto alterado no servidor ou não atribuído a você). Veja 'Marcações Recusadas'.")
+        if counts.get("comprovantes_recusados"):
+            print("Alguns comprovantes foram recusados (produto não atribuído a você). Os arquivos continuam guardados no aparelho.")
+    return True
+
+def print_driver_conflicts(store):
+    """Exibe as marcações recusadas na sincronização."""
+    conflicts = store.last_conflicts()
+    if not conflicts:
+        print("Nenhuma marcação recusada.")
+        return
+    print("{:<12} {:<20} {:<15}".format("ID Produto", "Status marcado", "Motivo"))
+    for product_id, status, result in conflicts:
+        print("{:<12} {:<20} {:<15}".format(product_id, status, result))
+
 def menu_motorista(conn, user_login, person_code):
-    """Menu placeholder para o Motorista."""
-    print(f"\n--- Menu do Motorista: {user_login} (Cód. Pessoa: {person_code}) ---")
-    # Busca a placa do veículo do motorista.
-    motorista_data = db_connection.execute_query(conn, "SELECT Placa_Veiculo FROM Funcionario WHERE Codigo_Funcionario = ?", (person_code,), fetch_results=True)
-    placa_veiculo_motorista = motorista_data[0][0] if motorista_data and motorista_data[0][0] else "N/A"
-    print(f"Veículo associado: {placa_veiculo_motorista}")
-
-    print("\nFuncionalidades do Motorista a serem implementadas:")
-    print("- Visualizar Entregas Atribuídas")
-    print("- Atualizar Status da Entrega (Ex: 'Em trânsito para entrega', 'Entregue', 'Tentativa falhou')")
-    print("- Registrar Comprovante de Entrega (simplificado)")
-    print("- Visualizar Rota (simulado)")
-    print("- Registrar Ocorrências na Rota")
-    press_enter_to_continue()
+    """
+    Menu do Motorista: fila de entregas atribuídas e atualização de status em lote.
+
+    A fila e as marcações ficam em um arquivo local (driver_sync.OfflineStore), então o menu também
+    funciona sem conexão (conn=None): as marcações são sincronizadas quando a conexão voltar.
+    """
+    store = driver_sync.OfflineStore(person_code)
+    own_conn = None # Conexão aberta por este menu ao voltar do modo offline.
+    try:
+        if conn: # Envia o que ficou pendente de um uso offline anterior e baixa a fila atualizada.
+            sync_driver_store_terminal(conn, store)
+        if store.manifest_downloaded_at() is None:
+            print("Sem fila salva neste aparelho. Conecte-se ao banco ao menos uma vez para baixar a fila.")
+            press_enter_to_continue()
+            return
+
+        while True:
+            clear_screen()
+            queue = store.manifest() # Leitura local, sem acesso ao banco.
+            downloaded = datetime.fromtimestamp(store.manifest_downloaded_at()).strftime('%d/%m %H:%M')
+            print(f"{'Online' if conn else 'OFFLINE'} | Fila baixada em {downloaded} | Entregas: {len(queue)} | Marcações pendentes: {len(store)}")
+            options = [
+                "Ver Minha Fila de Entregas", "Marcar como Entregue", "Marcar como Falha na Entrega",
+                f"Sincronizar Agora ({len(store)} pendentes)", "Descartar Marcações Pendentes", "Marcações Recusadas",
+                "Registrar Comprovante de Entrega"
+            ]
+            choice = display_menu(f"Menu Principal do Motorista - {user_login}", options)
+            if choice == 1: print_work_queue(queue, dict(store.pending()))
+            elif choice == 2: mark_work_queue_terminal(queue, store, driver_queue.DELIVERED)
+            elif choice == 3: mark_work_queue_terminal(queue, store, driver_queue.FAILED)
+            elif choice == 4:
+                if conn is None: # Tenta reconectar apenas quando o motorista pede.
+                    conn = own_conn = db_connection.conectar_banco()
+                if conn:
+                    sync_driver_store_terminal(conn, store)
+                else:
+                    print("Ainda sem conexão. As marcações continuam salvas no aparelho.")
+            elif choice == 5:
+                store.discard_pending()
+                print("Marcações pendentes descartadas.")
+            elif choice == 6: print_driver_conflicts(store)
+            elif choice == 7: register_proof_terminal(queue, store)
+            elif choice == 0:
+                if len(store) and conn and input(f"Há {len(store)} marcação(ões) não sincronizada(s). Sincronizar antes de sair? (s/n): ").strip().lower() == 's':
+                    sync_driver_store_terminal(conn, store) # Se falhar, as marcações continuam salvas no aparelho.
+                break
+            press_enter_to_continue()
+    finally:
+        store.close()
+        if own_conn:
+            db_connection.desconectar_banco(own_conn)
+
+def menu_motorista_offline():
+    """
+    Entrada do motorista sem conexão com o banco: a identidade vem do token de sessão salvo
+    (SRL_SESSION_TOKEN), validado apenas pela assinatura. Retorna False se não houver sessão de motorista válida.
+    """
+    token = sessions.token_from_env()
+    session = sessions.decode_token(token) if token else None
+    if not session or session.user_type != 'Motorista':
+        return False
+    menu_motorista(None, session.login, session.person_code)
+    return True
+
+def arrival_scan_terminal(conn, id_sede):
+    """Modo de leitura contínua na doca: registra a chegada dos produtos na sede em lotes."""
+    print(f"\n--- Registrar Chegada de Produtos na Sede {id_sede} ---")
+    print(f"Leia os códigos de rastreamento (um por linha). Linha vazia ou '{arrival_scan.END_MARKER}' encerra.")
+    print(f"Os códigos são enviados a cada {arrival_scan.FLUSH_SIZE} leituras ou {arrival_scan.FLUSH_SECONDS:g} segundos.")
+    problems = [] # Códigos desconhecidos, duplicados ou finalizados, exibidos ao final.
+
+    def on_results(results):
+        received = sum(1 for r in results if r.resultado == arrival_scan.RECEIVED)
+        issues = [r for r in results if r.resultado != arrival_scan.RECEIVED]
+        problems.extend(issues)
+        if received:
+            print(f"  [lote enviado] {received} produto(s) recebido(s).")
+        for r in issues:
+            print(f"  [aviso] {r.codigo_rastreamento}: {r.resultado}")
+
+    counts = arrival_scan.scan_session(conn, arrival_scan.ArrivalBatch(id_sede), on_results=on_results)
+    if counts is None:
+        print("Erro: o último lote não foi registrado. Leia esses códigos novamente.")
+        return
+    print(f"\nLeitura encerrada: {', '.join(f'{n} {r}' for r, n in counts.items()) or 'nenhum código lido'}.")
+    if problems:
+        print("\nCódigos não registrados:")
+        print("{:<30} {:<15}".format("Código", "Motivo"))
+        for r in problems:
+            print("{:<30} {:<15}".format(r.codigo_rastreamento, r.resultado))
 
 def menu_auxiliar_logistica(conn, user_login, person_code):
-    """Menu placeholder para o Auxiliar de Logística."""
-    print(f"\n--- Menu do Auxiliar de Logística: {user_login} (Cód. Pessoa: {person_code}) ---")
+    """Menu do Auxiliar de Logística: recebimento de produtos na sede."""
     # Busca a sede do auxiliar.
     aux_data = db_connection.execute_query(conn, "SELECT ID_Sede FROM Funcionario WHERE Codigo_Funcionario = ?", (person_code,), fetch_results=True)
-    id_sede_aux = aux_data[0][0] if aux_data and aux_data[0][0] else "N/A"
-    print(f"Sede associada: {id_sede_aux}")
-
-    print("\nFuncionalidades do Auxiliar de Logística a serem implementadas:")
-    print("- Registrar Chegada de Produtos na Sede/CD")
-    print("- Organizar Produtos para Carregamento")
-    print("- Atribuir Produtos a Veículos/Carregamentos (em conjunto com Gerente/Sistema)")
-    print("- Atualizar Status de Produtos na Sede (Localização Interna, etc.)")
-    print("- Gerenciar Estoque na Sede (simplificado)")
-    press_enter_to_continue()
+    id_sede_aux = aux_data[0][0] if aux_data and aux_data[0][0] else None
+    options = ["Registrar Chegada de Produtos na Sede/CD (Leitura em Lote)", "Funcionalidades Futuras"]
+    while True:
+        clear_screen()
+        print(f"Sede associada: {id_sede_aux or 'N/A'}")
+        choice = display_menu(f"Menu Principal do Auxiliar de Logística - {user_login}", options)
+        if choice == 1:
+            if id_sede_aux:
+                arrival_scan_terminal(conn, id_sede_aux)
+            else:
+                print("Seu cadastro de funcionário não tem sede associada. Procure o administrador.")
+        elif choice == 2:
+            print("\nFuncionalidades do Auxiliar de Logística a serem implementadas:")
+            print("- Organizar Produtos para Carregamento")
+            print("- Atribuir Produtos a Veículos/Carregamentos (em conjunto com Gerente/Sistema)")
+            print("- Atualizar Status de Produtos na Sede (Localização Interna, etc.)")
+            print("- Gerenciar Estoque na Sede (simplificado)")
+        elif choice == 0: break
+        press_enter_to_continue()
 
 # ------------------- TELA DE LOGIN ----------------------
 def login_tela(conn):
@@ -2216,8 +2436,19 @@ def login_tela(conn):
     logged_in_user = None # Inicializa usuário logado como None.
     user_type = None # Inicializa tipo de usuário como None.
     user_person_code = None # Inicializa código da pessoa do usuário como None.
+    session_token = None # Token da sessão (criada após o login ou restaurada do ambiente), encerrado no logout.
+
+    # Reaproveita uma sessão já aberta (SRL_SESSION_TOKEN, gerado por 'python sessions.py login'), sem pedir senha.
+    env_token = sessions.token_from_env()
+    session = sessions.validate_token(env_token, conn) if env_token else None
+    if env_token:
+        metrics.LOGIN_ATTEMPTS.labels("token", "sucesso" if session else "token_invalido").inc()
+    if session:
+        logged_in_user, user_type, user_person_code = session.login, session.user_type, session.person_code
+        session_token = env_token
+        print(f"Sessão restaurada. Bem-vindo, {logged_in_user} ({user_type}).")
     
-    while True: # Loop até que o login seja bem-sucedido ou o usuário decida sair (implicitamente).
+    while not logged_in_user: # Loop até que o login seja bem-sucedido ou o usuário decida sair (implicitamente).
         clear_screen()
         print("--- Tela de Login ---")
         username = input("Login: ").strip() # Pede o login.
@@ -2229,41 +2460,51 @@ def login_tela(conn):
             continue # Volta para o início do loop.
         
         # Busca dados do usuário no banco de dados.
-        sql = "SELECT Senha_Hash, Tipo_Usuario, Codigo_Pessoa FROM Usuario WHERE Login = ?"
+        sql = "SELECT Senha_Hash, Tipo_Usuario, Codigo_Pessoa, Versao_Credencial FROM Usuario WHERE Login = ?"
         user_data = db_connection.execute_query(conn, sql, (username,), fetch_results=True)
 
         if user_data: # Se o usuário for encontrado.
-            stored_hash, retrieved_user_type, retrieve_person_code = user_data[0] # Pega hash, tipo e código da pessoa.
-            if verify_password(stored_hash, password): # Verifica a senha.
+            stored_hash, retrieved_user_type, retrieve_person_code, credential_version = user_data[0] # Pega hash, tipo, código da pessoa e versão da credencial.
+            # A verificação (KDF) roda no pool de threads compartilhado de passwords.py.
+            if passwords.verify_password_async(stored_hash, password).result(): # Verifica a senha.
+                metrics.LOGIN_ATTEMPTS.labels("terminal", "sucesso").inc()
+                upgrade_password_hash(conn, username, stored_hash, password) # Atualiza hashes legados/de custo antigo.
                 logged_in_user = username
                 user_type = retrieved_user_type
                 user_person_code = retrieve_person_code
+                session_token = sessions.create_session(logged_in_user, user_type, user_person_code, credential_version) # Registra a sessão.
                 print(f"Login bem-sucedido! Bem-vindo, {logged_in_user} ({user_type}).")
                 press_enter_to_continue()
                 break # Sai do loop de login.
             else: # Senha incorreta.
+                metrics.LOGIN_ATTEMPTS.labels("terminal", "senha_invalida").inc()
                 print("Usuário ou senha inválidos. Tente novamente.")
         else: # Usuário não encontrado.
+            metrics.LOGIN_ATTEMPTS.labels("terminal", "usuario_inexistente" if user_data is not None else "erro").inc()
             print("Usuário não encontrado. Tente novamente.")
         press_enter_to_continue()
 
     # Direcionamento pós-login para o menu apropriado.
     if logged_in_user:
-        if user_type == 'Admin':
-            menu_admin(conn, logged_in_user, user_person_code)
-        elif user_type == 'Cliente':
-            menu_cliente(conn, logged_in_user, user_person_code)
-        elif user_type == 'Gerente':
-            menu_gerente(conn, logged_in_user, user_person_code)
-        elif user_type == 'Atendente':
-            menu_atendente(conn, logged_in_user, user_person_code)
-        elif user_type == 'Motorista':
-            menu_motorista(conn, logged_in_user, user_person_code)
-        elif user_type == 'Auxiliar de Logistica': # Corrigido para corresponder à grafia no BD/add_user_terminal
-            menu_auxiliar_logistica(conn, logged_in_user, user_person_code)
-        else:
-            print(f"Tipo de usuário '{user_type}' não possui um menu definido. Contate o administrador.")
-            press_enter_to_continue()
+        try:
+            if user_type == 'Admin':
+                menu_admin(conn, logged_in_user, user_person_code)
+            elif user_type == 'Cliente':
+                menu_cliente(conn, logged_in_user, user_person_code)
+            elif user_type == 'Gerente':
+                menu_gerente(conn, logged_in_user, user_person_code)
+            elif user_type == 'Atendente':
+                menu_atendente(conn, logged_in_user, user_person_code)
+            elif user_type == 'Motorista':
+                menu_motorista(conn, logged_in_user, user_person_code)
+            elif user_type == 'Auxiliar de Logistica': # Corrigido para corresponder à grafia no BD/add_user_terminal
+                menu_auxiliar_logistica(conn, logged_in_user, user_person_code)
+            else:
+                print(f"Tipo de usuário '{user_type}' não possui um menu definido. Contate o administrador.")
+                press_enter_to_continue()
+        finally:
+            if session_token: # Logout: o token deste login (ou o restaurado do ambiente) deixa de valer ao sair do menu.
+                sessions.revoke_token(session_token)
 
 
 # ------------------- MENU INICIAL ----------------------
@@ -2288,10 +2529,14 @@ def run_app_terminal():
     conn = db_connection.conectar_banco() # Tenta conectar ao banco de dados.
     try:
         if not conn: # Se a conexão falhar.
+            if menu_motorista_offline(): # Motorista com sessão salva pode continuar trabalhando offline.
+                return
             print("Erro crítico: Não foi possível conectar ao banco de dados.")
             print("Verifique as configurações em db_connection.py, o driver ODBC e a acessibilidade do servidor Azure SQL.")
             return # Encerra a aplicação.
 
+        reference_cache.start_background_warm_up() # Carrega veículos, sedes e motoristas em segundo plano.
+
         while True: # Loop principal da aplicação.
             acao = menu_inicial_principal() # Obtém a ação do menu inicial.
             if acao == 'cadastro_cliente':
@@ -2315,4 +2560,9 @@ def run_app_terminal():
 
 if __name__ == "__main__":
     # Este bloco é executado apenas quando o script é rodado diretamente (não importado como módulo).
-    run_app_terminal() # Inicia a aplicação.
\ No newline at end of file
+    profiling.enable_from_args(sys.argv[1:]) # Perfilamento opcional por ação de menu (--perfil, --cprofile ou SRL_PROFILE=1).
+    metrics.start_from_env() # Exportação opcional das métricas (METRICS_PORT e/ou METRICS_TEXTFILE).
+    if tui.requested(sys.argv[1:]): # Modo tela cheia (--tui ou SRL_UI=tui); o modo de linha continua sendo o padrão.
+        tui.run(run_app_terminal)
+    else:
+        run_app_terminal() # Inicia a aplicação.
\ No newline at end of file
@@ -0,0 +1,194 @@
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+import pyodbc
+import driver_queue # Status finais (produtos que não voltam ao CD).
+
+# Status registrado quando o produto é lido na doca da sede/CD.
+ARRIVED_STATUS = 'Aguardando Coleta'
+# Envio do lote ao atingir esta quantidade de códigos ou após este tempo desde a primeira leitura pendente.
+FLUSH_SIZE = 500
+FLUSH_SECONDS = 5.0
+# Linha que encerra a leitura (além de uma linha vazia ou fim da entrada).
+END_MARKER = "FIM"
+
+# Resultados de cada código lido.
+RECEIVED = "recebido"
+UNKNOWN = "desconhecido" # Código de rastreamento não cadastrado.
+DUPLICATE = "duplicado" # Lido de novo nesta sessão ou já recebido nesta sede.
+FINALIZED = "finalizado" # Produto já entregue ou cancelado.
+
+ScanResult = namedtuple("ScanResult", ["codigo_rastreamento", "resultado"])
+
+# Resolve o lote inteiro (#Lote_Chegada) com uma consulta e atualiza os produtos recebidos na mesma transação.
+# #Resultado_Chegada é criada no lote sem parâmetros: uma tabela temporária criada dentro deste comando
+# (executado via sp_executesql por ter parâmetros) deixaria de existir ao fim da chamada.
+_ARRIVAL_SQL = f"""
+SET NOCOUNT ON;
+INSERT INTO #Resultado_Chegada (Codigo, ID_Produto, Resultado)
+SELECT L.Codigo, P.ID_Produto,
+       CASE
+           WHEN P.ID_Produto IS NULL THEN '{UNKNOWN}'
+           WHEN P.Status_Entrega IN ({', '.join('?' * len(driver_queue.FINAL_STATUSES))}) THEN '{FINALIZED}'
+           WHEN P.ID_Sede_Recebimento = ? AND P.Status_Entrega = ? THEN '{DUPLICATE}'
+           ELSE '{RECEIVED}'
+       END AS Resultado
+FROM #Lote_Chegada L
+LEFT JOIN Dados_Rastreamento DR ON DR.Codigo_Rastreamento = L.Codigo
+LEFT JOIN Produto_A_Ser_Entregue P WITH (UPDLOCK) ON P.ID_Rastreamento = DR.ID_Rastreamento;
+
+UPDATE P SET P.Data_Chegada_CD = CAST(SYSDATETIME() AS DATE), P.Status_Entrega = ?, P.ID_Sede_Recebimento = ?
+FROM Produto_A_Ser_Entregue P
+INNER JOIN #Resultado_Chegada R ON R.ID_Produto = P.ID_Produto
+WHERE R.Resultado = '{RECEIVED}';
+
+SELECT Codigo, Resultado FROM #Resultado_Chegada;
+"""
+
+def normalize_code(raw):
+    """Normaliza um código lido (leitores de código de barras podem enviar espaços ou minúsculas)."""
+    return raw.strip().upper()
+
+class ArrivalBatch:
+    """
+    Buffer das leituras de chegada de uma sede.
+
+    Os códigos lidos ficam em memória e são enviados em lote por flush(): uma consulta resolve todos os
+    códigos e uma transação atualiza os produtos. Códigos repetidos na mesma sessão não são reenviados.
+    """
+
+    def __init__(self, headquarters_id, flush_size=FLUSH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.headquarters_id = headquarters_id
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._buffer = [] # Códigos aguardando envio, na ordem de leitura.
+        self._seen = set() # Códigos já lidos nesta sessão (enviados ou no buffer).
+        self._first_scan = None # Instante da leitura mais antiga ainda no buffer.
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def add(self, raw_code):
+        """
+        Registra uma leitura. Retorna None se o código foi para o buffer, ou um ScanResult DUPLICATE
+        se já foi lido nesta sessão. Códigos vazios são ignorados (retorna None).
+        """
+        code = normalize_code(raw_code)
+        if not code:
+            return None
+        if code in self._seen:
+            return ScanResult(code, DUPLICATE)
+        self._seen.add(code)
+        if not self._buffer:
+            self._first_scan = time.monotonic()
+        self._buffer.append(code)
+        return None
+
+    def seconds_until_due(self):
+        """Segundos até o envio por tempo (None se o buffer estiver vazio)."""
+        if not self._buffer:
+            return None
+        return max(0.0, self.flush_seconds - (time.monotonic() - self._first_scan))
+
+    def is_due(self):
+        """True se o buffer atingiu o tamanho ou o tempo máximo de espera."""
+        return len(self._buffer) >= self.flush_size or (bool(self._buffer) and self.seconds_until_due() == 0.0)
+
+    def flush(self, conn):
+        """
+        Envia os códigos do buffer em uma transação.
+
+        Returns:
+            list or None: Lista de ScanResult (um por código), ou None em caso de erro (o buffer é mantido).
+        """
+        if not self._buffer:
+            return []
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+            IF OBJECT_ID('tempdb..#Lote_Chegada') IS NOT NULL DROP TABLE #Lote_Chegada;
+            IF OBJECT_ID('tempdb..#Resultado_Chegada') IS NOT NULL DROP TABLE #Resultado_Chegada;
+            CREATE TABLE #Lote_Chegada (Codigo VARCHAR(50) PRIMARY KEY);
+            CREATE TABLE #Resultado_Chegada (Codigo VARCHAR(50) PRIMARY KEY, ID_Produto INT, Resultado VARCHAR(20));
+            """)
+            cursor.fast_executemany = True # O lote vai ao servidor em poucas idas.
+            cursor.executemany("INSERT INTO #Lote_Chegada (Codigo) VALUES (?);", [(code,) for code in self._buffer])
+            params = driver_queue.FINAL_STATUSES + (self.headquarters_id, ARRIVED_STATUS, ARRIVED_STATUS, self.headquarters_id)
+            cursor.execute(_ARRIVAL_SQL, params)
+            results = {row[0]: row[1] for row in cursor.fetchall()}
+            cursor.execute("DROP TABLE #Lote_Chegada; DROP TABLE #Resultado_Chegada;")
+            conn.commit()
+        except pyodbc.Error as e:
+            conn.rollback()
+            logging.error(f"Erro ao registrar a chegada de {len(self._buffer)} produto(s) na sede {self.headquarters_id}: {e}")
+            self._first_scan = time.monotonic() # Nova tentativa só após outro intervalo de espera.
+            return None
+        finally:
+            cursor.close()
+        batch = [ScanResult(code, results.get(code, UNKNOWN)) for code in self._buffer]
+        self._buffer = []
+        self._first_scan = None
+        return batch
+
+def _read_lines(read_line, lines):
+    """Lê linhas (ex: input) até o marcador de fim, linha vazia ou EOF; cada linha vai para a fila `lines`."""
+    try:
+        while True:
+            line = read_line()
+            if not line.strip() or normalize_code(line) == END_MARKER:
+                break
+            lines.put(line)
+    except EOFError:
+        pass
+    finally:
+        lines.put(None) # Sinaliza o fim da leitura.
+
+def scan_session(conn, batch, read_line=input, on_results=None):
+    """
+    Lê códigos continuamente (um por linha) e envia os lotes por tamanho ou por tempo.
+
+    A leitura roda em uma thread, para que o lote pendente seja enviado após FLUSH_SECONDS mesmo
+    enquanto o leitor está parado. A thread termina sozinha no marcador de fim, então nenhuma leitura
+    do terminal fica pendente depois da sessão. Se um envio falhar, os códigos continuam no buffer e o
+    envio é tentado de novo no próximo intervalo.
+
+    Args:
+        batch (ArrivalBatch): Buffer da sede que está recebendo.
+        read_line (callable): Função que retorna a próxima linha lida (padrão: input).
+        on_results (callable, optional): Chamada com a lista de ScanResult de cada envio e de cada duplicado.
+
+    Returns:
+        dict or None: Contagem por resultado, ou None se o envio final falhou (os códigos desse lote
+                      não foram registrados e devem ser lidos de novo).
+    """
+    lines = queue.Queue()
+    threading.Thread(target=_read_lines, args=(read_line, lines), daemon=True).start()
+    counts = {}
+    notify = on_results or (lambda results: None)
+
+    def record(results):
+        for result in results:
+            counts[result.resultado] = counts.get(result.resultado, 0) + 1
+        notify(results)
+
+    finished = False
+    while not finished:
+        try:
+            line = lines.get(timeout=batch.seconds_until_due())
+        except queue.Empty: # Tempo máximo de espera do lote atingido.
+            line = ""
+        if line is None:
+            finished = True
+        elif line:
+            duplicate = batch.add(line)
+            if duplicate:
+                record([duplicate])
+        if batch.is_due() or (finished and len(batch)):
+            results = batch.flush(conn)
+            if results is not None:
+                record(results)
+            elif finished:
+                return None
+    return counts
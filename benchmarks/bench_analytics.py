@@ -0,0 +1,128 @@
+"""
+Benchmark das análises de prazo (analytics.py): versão vetorizada (pandas) contra a versão ingênua
+linha a linha em Python puro, sobre dados sintéticos de vários tamanhos.
+
+Não acessa o banco de dados. Os resultados das duas versões são comparados antes de exibir os tempos.
+
+Uso:
+    python benchmarks/bench_analytics.py [--tamanhos 100000 1000000] [--seed 42]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Permite importar os módulos da raiz.
+import analytics
+from analytics import np, pd
+
+CIDADES = [("SP", "São Paulo"), ("RJ", "Rio de Janeiro"), ("MG", "Belo Horizonte"), ("PR", "Curitiba"),
+           ("RS", "Porto Alegre"), ("BA", "Salvador"), ("PE", "Recife"), ("CE", "Fortaleza")]
+TIPOS = ["Fragil", "Perecivel", "Comum"]
+
+def synthetic_frame(rows, seed):
+    """Gera um DataFrame com as mesmas colunas de analytics.load_delivery_frame."""
+    rng = np.random.default_rng(seed)
+    chegada = np.datetime64("2022-01-01") + rng.integers(0, 3 * 365, rows).astype("timedelta64[D]")
+    prevista = chegada + rng.integers(2, 10, rows).astype("timedelta64[D]")
+    # Permanência no CD com cauda longa (em horas); cerca de 10% dos produtos ainda não foram carregados.
+    carregamento = chegada.astype("datetime64[h]") + rng.gamma(2.0, 20.0, rows).astype("timedelta64[h]")
+    carregamento = np.where(rng.random(rows) < 0.1, np.datetime64("NaT"), carregamento)
+    entrega = prevista + rng.normal(0, 2.5, rows).round().astype("timedelta64[D]")
+    entrega = np.where(rng.random(rows) < 0.2, np.datetime64("NaT"), entrega)
+    cidades = rng.integers(0, len(CIDADES), rows)
+    return pd.DataFrame({
+        "ID_Produto": np.arange(1, rows + 1),
+        "Tipo_Produto": pd.Categorical(np.array(TIPOS)[rng.integers(0, len(TIPOS), rows)]),
+        "Estado_Destino": pd.Categorical(np.array([c[0] for c in CIDADES])[cidades]),
+        "Cidade_Destino": np.array([c[1] for c in CIDADES])[cidades],
+        "Codigo_Funcionario_Motorista": rng.integers(1, 200, rows),
+        "Data_Chegada_CD": pd.to_datetime(chegada),
+        "Data_Prevista_Entrega": pd.to_datetime(prevista),
+        "Data_Entrega_Realizada": pd.to_datetime(entrega),
+        "Primeiro_Carregamento": pd.to_datetime(carregamento),
+    })
+
+def naive_quantile(ordered, q):
+    """Percentil com interpolação linear (mesmo método padrão do pandas)."""
+    position = (len(ordered) - 1) * q
+    low, high = math.floor(position), math.ceil(position)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def naive_summary(records):
+    """Mesmo cálculo de analytics.summarize, linha a linha (registros como tuplas de datetime/None)."""
+    groups = {"cidade": lambda r: (r[2], r[3]), "tipo": lambda r: (r[1],), "motorista": lambda r: (r[4],)}
+    values = {name: defaultdict(list) for name in ("permanencia", "atraso")}
+    buckets = defaultdict(int)
+    for r in records:
+        chegada, prevista, entrega, carregamento = r[5], r[6], r[7], r[8]
+        if carregamento is not None:
+            dwell = (carregamento - chegada).total_seconds() / 86400
+            for group, key in groups.items():
+                values["permanencia"][(group, key(r))].append(dwell)
+        if entrega is not None and prevista is not None:
+            late = (entrega - prevista).total_seconds() / 86400
+            for group, key in groups.items():
+                values["atraso"][(group, key(r))].append(late)
+            for upper, label in zip(analytics.LATENESS_BINS[1:], analytics.LATENESS_LABELS):
+                if late <= upper:
+                    buckets[label] += 1
+                    break
+    result = {"distribuicao_atraso": dict(buckets)}
+    for metric, by_group in values.items():
+        for (group, key), items in by_group.items():
+            items.sort()
+            stats = [len(items), sum(items) / len(items)] + [naive_quantile(items, q) for q in analytics.PERCENTILES]
+            result.setdefault(f"{metric}_por_{group}", {})[key] = stats
+    return result
+
+def to_records(frame):
+    """Converte o DataFrame em tuplas Python (datas como datetime ou None), como viriam do cursor."""
+    columns = []
+    for name in analytics.COLUMNS:
+        series = frame[name]
+        if name in analytics.DATE_COLUMNS:
+            columns.append([None if pd.isna(v) else v.to_pydatetime() for v in series])
+        else:
+            columns.append(series.tolist())
+    return list(zip(*columns))
+
+def check_equal(vectorized, naive):
+    """Confere contagens e percentis das duas versões (tolerância numérica)."""
+    dist = vectorized["distribuicao_atraso"]["quantidade"].to_dict()
+    assert all(dist[label] == naive["distribuicao_atraso"].get(label, 0) for label in analytics.LATENESS_LABELS)
+    for name, table in vectorized.items():
+        if name == "distribuicao_atraso":
+            continue
+        for key, row in table.iterrows():
+            key = key if isinstance(key, tuple) else (key,)
+            expected = naive[name][key]
+            assert all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9) for a, b in zip(row.tolist(), expected)), (name, key)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das análises vetorizadas contra a versão linha a linha.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100_000, 1_000_000], help="Quantidades de produtos.")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados sintéticos.")
+    args = parser.parse_args()
+    analytics._require_pandas()
+
+    print(f"{'Produtos':>10} {'Vetorizado (s)':>15} {'Linha a linha (s)':>18} {'Ganho':>8}")
+    for rows in args.tamanhos:
+        frame = synthetic_frame(rows, args.seed)
+        records = to_records(frame) # Conversão fora da medição.
+
+        start = time.perf_counter()
+        vectorized = analytics.summarize(frame)
+        vectorized_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        naive = naive_summary(records)
+        naive_time = time.perf_counter() - start
+
+        check_equal(vectorized, naive)
+        print(f"{rows:>10} {vectorized_time:>15.3f} {naive_time:>18.3f} {naive_time / vectorized_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark dos caminhos de dados do app.py contra o banco configurado (config.env).
+
+Cada caso executa a função real do terminal com um roteiro de entradas (input/getpass substituídos),
+com a saída descartada e a limpeza de tela desligada, de modo que o tempo medido é o de consultas,
+processamento e formatação do próprio app. Os casos de escrita criam e depois removem seus dados
+(produto -> carregamento -> exclusão do carregamento -> exclusão do produto).
+
+Os tamanhos são atingidos com data_generator.py: antes de cada tamanho, o banco é completado até a
+quantidade de produtos pedida. Use um banco descartável criado com sql/script.sql.
+
+Os resultados são gravados em JSON (--saida) e podem ser comparados com uma linha de base (--base):
+um caso é regressão se a mediana passar da linha de base em mais de --limite (padrão 20%), e o
+programa termina com código 1.
+
+Com --n-mais-1, cada caso roda dentro de um escopo estrito do detector de N+1 (n_plus_one.py): uma
+consulta repetida mais vezes que o limite (SRL_NPLUS1_LIMIT) é listada com o ponto de chamada e o
+programa também termina com código 1.
+
+Uso:
+    python benchmarks/bench_app_paths.py [--tamanhos 10000 100000] [--repeticoes 5] [--saida resultado.json]
+                                         [--base linha_de_base.json] [--limite 0.2] [--sem-carga] [--n-mais-1]
+"""
+import argparse
+import builtins
+import contextlib
+import getpass
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Permite importar os módulos da raiz.
+import app
+import data_generator
+import db_connection
+import n_plus_one
+import services
+
+class ScriptedInput:
+    """Substitui input()/getpass() devolvendo as respostas do roteiro, na ordem."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+    def __call__(self, prompt=""):
+        if not self.answers: # O fluxo pediu mais entradas do que o roteiro prevê (o app mudou).
+            raise RuntimeError(f"Roteiro de entradas esgotado no prompt: {prompt!r}")
+        return self.answers.pop(0)
+
+@contextlib.contextmanager
+def scripted_terminal(answers, password=""):
+    """Executa um fluxo do terminal sem interação: entradas do roteiro, saída descartada, sem limpar a tela."""
+    script = ScriptedInput(answers)
+    saved = builtins.input, getpass.getpass, app.clear_screen
+    builtins.input, getpass.getpass, app.clear_screen = script, (lambda prompt="": password), (lambda: None)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        builtins.input, getpass.getpass, app.clear_screen = saved
+    if script.answers:
+        raise RuntimeError(f"O fluxo terminou sem usar as entradas: {script.answers}")
+
+def load_context(conn):
+    """Dados de exemplo usados nos roteiros: um cliente remetente com login, um código de rastreamento, um veículo e pessoas."""
+    client = db_connection.execute_query(conn, """
+    SELECT TOP 1 U.Login, U.Codigo_Pessoa, DR.Codigo_Rastreamento
+    FROM Usuario U
+    INNER JOIN Produto_A_Ser_Entregue P ON P.ID_Remetente = U.Codigo_Pessoa
+    INNER JOIN Dados_Rastreamento DR ON DR.ID_Rastreamento = P.ID_Rastreamento
+    WHERE U.Tipo_Usuario = 'Cliente'
+    ORDER BY P.ID_Produto;
+    """, fetch_results=True)
+    vehicle = db_connection.execute_query(conn, "SELECT TOP 1 Placa_Veiculo FROM Veiculo WHERE Status = 'Disponivel' ORDER BY Carga_Suportada DESC;", fetch_results=True)
+    people = db_connection.execute_query(conn, "SELECT TOP 100 Codigo_Pessoa, Nome FROM Pessoa ORDER BY Codigo_Pessoa;", fetch_results=True)
+    if not client or not vehicle or not people:
+        raise RuntimeError("O banco não tem dados suficientes (rode sem --sem-carga para gerar dados sintéticos).")
+    login, person_code, tracking_code = client[0]
+    return {
+        "login": login, "pessoa": person_code, "rastreamento": tracking_code, "placa": vehicle[0][0],
+        "pessoas": [row[0] for row in people], "termo_busca": people[0][1].split()[0],
+    }
+
+def build_cases(conn, ctx, password):
+    """
+    Casos do benchmark, na ordem de execução: (nome, função sem argumentos).
+    Os casos de escrita dependem dos anteriores da mesma repetição (o produto criado é carregado e depois excluído).
+    """
+    state = {}
+
+    def run(function, answers, *args):
+        with scripted_terminal(answers, password):
+            function(conn, *args)
+
+    def create_product():
+        run(app.add_product_terminal, [
+            "1.5", "Em Processamento", date.today().isoformat(), "", "Comum",
+            "", str(ctx["pessoa"]), # Remetente: código informado diretamente.
+            "", str(ctx["pessoas"][-1]), # Destinatário.
+            "", "", "", "n", # Nome, CPF e telefone do rastreamento (padrões) e sem motorista.
+        ])
+        state["produto"] = db_connection.execute_query(conn, "SELECT MAX(ID_Produto) FROM Produto_A_Ser_Entregue;", fetch_results=True)[0][0]
+
+    def create_shipment():
+        state["data_carregamento"] = datetime.now().replace(second=0, microsecond=0).strftime("%Y-%m-%d %H:%M")
+        run(app.add_shipment_terminal, [ctx["placa"], state["data_carregamento"], str(state["produto"]), "0"])
+
+    def delete_shipment():
+        run(app.delete_shipment_terminal, [ctx["placa"], state["data_carregamento"], "s"])
+
+    def delete_product():
+        run(app.delete_product_terminal, [str(state["produto"]), "s"])
+
+    return [
+        ("login", lambda: run(app.login_tela, [ctx["login"], "", "0"])),
+        ("rastrear_pedido", lambda: run(app.menu_cliente, ["1", ctx["rastreamento"], "", "0"], ctx["login"], ctx["pessoa"])),
+        ("listar_produtos", lambda: run(app.list_products_terminal, [])),
+        ("listar_pessoas", lambda: run(app.list_people_terminal, [])),
+        ("listar_rastreamento", lambda: run(app.list_tracking_data_terminal, [])),
+        ("listar_carregamentos", lambda: run(app.list_shipments_terminal, [])),
+        ("buscar_pessoas", lambda: services.search_people(conn, ctx["termo_busca"])),
+        ("verificar_exclusao_pessoas", lambda: services.check_deletes(conn, "pessoa", ctx["pessoas"])),
+        ("criar_produto", create_product),
+        ("criar_carregamento", create_shipment),
+        ("excluir_carregamento", delete_shipment),
+        ("excluir_produto", delete_product),
+    ]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def bench_size(conn, repetitions, password, detect=False, findings=None):
+    """
+    Executa todos os casos `repetitions` vezes. Retorna {caso: estatísticas em segundos}.
+    Com `detect`, a primeira repetição de cada caso roda em um escopo estrito do detector de N+1 e os
+    relatórios são acrescentados à lista `findings`.
+    """
+    ctx = load_context(conn)
+    cases = build_cases(conn, ctx, password)
+    timings = {name: [] for name, _ in cases}
+    for repetition in range(repetitions):
+        for name, case in cases:
+            start = time.perf_counter()
+            try:
+                with n_plus_one.scope(name, strict=True) if detect and repetition == 0 else contextlib.nullcontext():
+                    case()
+            except n_plus_one.NPlusOneError as e: # O caso terminou; só o relatório do detector é registrado.
+                findings.append(str(e))
+            timings[name].append(time.perf_counter() - start)
+    return {name: {"mediana_s": statistics.median(values), "p95_s": percentile(values, 0.95), "min_s": min(values),
+                   "amostras": len(values)} for name, values in timings.items()}
+
+def ensure_size(conn, products, seed):
+    """Completa o banco com dados sintéticos até `products` produtos. Retorna a quantidade final."""
+    current = db_connection.execute_query(conn, "SELECT COUNT(*) FROM Produto_A_Ser_Entregue;", fetch_results=True)[0][0]
+    if current < products:
+        with contextlib.redirect_stdout(sys.stderr): # Progresso da carga fora da saída do benchmark.
+            data_generator.generate(conn, products - current, seed=seed + current)
+        current = products
+    return current
+
+def compare(results, baseline, threshold):
+    """Compara as medianas com a linha de base. Retorna a lista de regressões (tamanho, caso, razão)."""
+    regressions = []
+    print(f"\n{'Tamanho':>10} {'Caso':<28} {'Base (s)':>10} {'Atual (s)':>10} {'Razão':>7}")
+    for size, cases in results.items():
+        for name, stats in cases.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = stats["mediana_s"] / base["mediana_s"] if base["mediana_s"] else float("inf")
+            flag = " REGRESSÃO" if ratio > 1 + threshold else ""
+            print(f"{size:>10} {name:<28} {base['mediana_s']:>10.4f} {stats['mediana_s']:>10.4f} {ratio:>6.2f}x{flag}")
+            if flag:
+                regressions.append((size, name, ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos de dados do app.py no banco configurado.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000], help="Quantidades de produtos no banco.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções de cada caso por tamanho.")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    parser.add_argument("--base", help="Arquivo JSON de uma execução anterior para comparação.")
+    parser.add_argument("--limite", type=float, default=0.2, help="Aumento máximo tolerado da mediana (0.2 = 20%%).")
+    parser.add_argument("--sem-carga", action="store_true", help="Não gera dados: mede apenas o banco como está.")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados sintéticos.")
+    parser.add_argument("--n-mais-1", action="store_true", help="Falha se algum caso repetir a mesma consulta além do limite (N+1).")
+    parser.add_argument("--senha", default=data_generator.DEFAULT_PASSWORD, help="Senha dos usuários (a dos dados sintéticos).")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING) # O log INFO de cada consulta distorceria os tempos.
+    os.environ.pop(app.sessions.TOKEN_ENV_VAR, None) # O login deve passar pela verificação de senha.
+    conn = db_connection.conectar_banco()
+    if not conn:
+        return 1
+    results = {}
+    findings = []
+    try:
+        sizes = [None] if args.sem_carga else sorted(args.tamanhos)
+        for size in sizes:
+            products = ensure_size(conn, size, args.seed) if size else \
+                db_connection.execute_query(conn, "SELECT COUNT(*) FROM Produto_A_Ser_Entregue;", fetch_results=True)[0][0]
+            results[str(products)] = bench_size(conn, args.repeticoes, args.senha, args.n_mais_1, findings)
+            print(f"\nProdutos no banco: {products}")
+            print(f"{'Caso':<28} {'Mediana (s)':>12} {'p95 (s)':>10} {'Mín (s)':>10}")
+            for name, stats in results[str(products)].items():
+                print(f"{name:<28} {stats['mediana_s']:>12.4f} {stats['p95_s']:>10.4f} {stats['min_s']:>10.4f}")
+    finally:
+        db_connection.desconectar_banco(conn)
+
+    if args.saida:
+        report = {"executado_em": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                  "repeticoes": args.repeticoes, "resultados": results}
+        with open(args.saida, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    for finding in findings:
+        print(f"\n{finding}")
+    status = 1 if findings else 0
+    if args.base:
+        with open(args.base, encoding="utf-8") as source:
+            regressions = compare(results, json.load(source)["resultados"], args.limite)
+        if regressions:
+            print(f"\n{len(regressions)} regressão(ões) acima de {args.limite:.0%}.")
+            return 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Benchmark do custo de login (verificação de senha) por configuração de KDF.
+
+Para cada configuração mede a latência de uma verificação isolada (p50/p95) e a vazão
+(logins/s) verificando uma rajada de logins no pool de threads de passwords.py.
+Não acessa o banco de dados: mede apenas o custo de CPU do hash, que domina o login.
+
+Uso:
+    python benchmarks/bench_login.py [--logins 64] [--workers 8] [--samples 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Permite importar os módulos da raiz.
+import passwords
+
+# Configurações avaliadas: (rótulo, parâmetros de passwords.hash_password).
+COST_SETTINGS = [
+    ("legado sha256 (sem salt)", None),
+    ("pbkdf2_sha256 100k", {"scheme": passwords.PBKDF2, "iterations": 100_000}),
+    ("pbkdf2_sha256 310k", {"scheme": passwords.PBKDF2, "iterations": 310_000}),
+    ("pbkdf2_sha256 600k", {"scheme": passwords.PBKDF2, "iterations": 600_000}),
+    ("scrypt n=2^14 r=8", {"scheme": passwords.SCRYPT, "n": 2 ** 14, "r": 8, "p": 1}),
+    ("scrypt n=2^15 r=8", {"scheme": passwords.SCRYPT, "n": 2 ** 15, "r": 8, "p": 1}),
+]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def bench_setting(params, samples, logins, workers):
+    password = "senha-de-teste-123"
+    if params is None:
+        import hashlib
+        stored = hashlib.sha256(password.encode()).hexdigest()
+    else:
+        stored = passwords.hash_password(password, **params)
+
+    latencies = []
+    for _ in range(samples): # Latência de uma verificação isolada.
+        start = time.perf_counter()
+        assert passwords.verify_password(stored, password)
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool: # Vazão com uma rajada de logins simultâneos.
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: passwords.verify_password(stored, password), range(logins)))
+        elapsed = time.perf_counter() - start
+    assert all(results)
+    return statistics.median(latencies), percentile(latencies, 0.95), logins / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latência e vazão de login por custo de KDF.")
+    parser.add_argument("--logins", type=int, default=64, help="Logins simultâneos na medição de vazão.")
+    parser.add_argument("--workers", type=int, default=passwords.WORKERS, help="Threads de verificação.")
+    parser.add_argument("--samples", type=int, default=10, help="Verificações isoladas para a latência.")
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()} | threads de verificação: {args.workers} | rajada: {args.logins} logins")
+    print(f"{'Configuração':<28}{'p50 (ms)':>10}{'p95 (ms)':>10}{'logins/s':>12}")
+    print("-" * 60)
+    for label, params in COST_SETTINGS:
+        p50, p95, throughput = bench_setting(params, args.samples, args.logins, args.workers)
+        print(f"{label:<28}{p50 * 1000:>10.2f}{p95 * 1000:>10.2f}{throughput:>12.1f}")
+    print("\nEscolha o maior custo cuja vazão supere o pico de logins esperado e ajuste PASSWORD_KDF/PASSWORD_PBKDF2_ITERATIONS.")
+
+if __name__ == "__main__":
+    main()
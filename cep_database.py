@@ -0,0 +1,186 @@
+import csv
+import mmap
+import os
+import struct
+import sys
+
+# Formato do arquivo binário de CEPs (little-endian):
+#   Cabeçalho (16 bytes): MAGIC (8 bytes) | quantidade de registros (uint32) | início da área de textos (uint32)
+#   Índice: um registro de 8 bytes por CEP, ordenado por CEP: CEP como inteiro (uint32) | deslocamento do texto (uint32)
+#   Textos: tamanho (uint16) + "Estado\x1fCidade\x1fBairro\x1fRua" em UTF-8. Textos idênticos são gravados uma única vez.
+MAGIC = b"SRLCEP1\x00"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<II")
+TEXT_LENGTH = struct.Struct("<H")
+FIELD_SEPARATOR = "\x1f"
+FIELDS = ("estado", "cidade", "bairro", "rua")
+
+# Caminho padrão do arquivo compilado (pode ser alterado pela variável de ambiente CEP_DATABASE_PATH).
+DEFAULT_PATH = os.path.join("data", "ceps.bin")
+
+def cep_to_int(cep):
+    """Converte um CEP (com ou sem hífen) para inteiro, ou None se não tiver exatamente 8 dígitos."""
+    digits = "".join(ch for ch in str(cep or "") if ch.isdigit())
+    return int(digits) if len(digits) == 8 else None
+
+def build_cep_database(csv_path, output_path, delimiter=None):
+    """
+    Compila um CSV de CEPs no arquivo binário ordenado usado por CepDatabase.
+
+    O CSV deve ter cabeçalho com as colunas cep, estado, cidade, bairro e rua (nomes sem distinção
+    de maiúsculas/minúsculas). O separador (',' ou ';') é detectado automaticamente se não for informado.
+    CEPs repetidos mantêm a última ocorrência; linhas com CEP inválido são ignoradas.
+
+    Args:
+        csv_path (str): Caminho do CSV de origem.
+        output_path (str): Caminho do arquivo binário a ser gerado.
+        delimiter (str, optional): Separador do CSV.
+
+    Returns:
+        tuple: (registros gravados, linhas ignoradas).
+    """
+    entries = {} # CEP (int) -> texto codificado.
+    skipped = 0
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        if delimiter is None:
+            delimiter = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t").delimiter
+            f.seek(0)
+        reader = csv.DictReader(f, delimiter=delimiter)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        missing = [name for name in ("cep",) + FIELDS if name not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"Colunas ausentes no CSV: {', '.join(missing)}")
+        for row in reader:
+            cep = cep_to_int(row["cep"])
+            if cep is None:
+                skipped += 1
+                continue
+            text = FIELD_SEPARATOR.join(" ".join((row[name] or "").split()) for name in FIELDS)
+            entries[cep] = text.encode("utf-8")
+
+    text_offsets = {} # Texto -> deslocamento, para gravar textos repetidos uma única vez.
+    text_area = bytearray()
+    index = bytearray()
+    for cep in sorted(entries):
+        text = entries[cep]
+        offset = text_offsets.get(text)
+        if offset is None:
+            offset = len(text_area)
+            text_offsets[text] = offset
+            text_area += TEXT_LENGTH.pack(len(text)) + text
+        index += RECORD.pack(cep, offset)
+
+    text_start = HEADER.size + len(index)
+    tmp_path = output_path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(tmp_path, "wb") as out: # Grava em arquivo temporário e renomeia, para nunca deixar um arquivo pela metade.
+        out.write(HEADER.pack(MAGIC, len(entries), text_start))
+        out.write(index)
+        out.write(text_area)
+    os.replace(tmp_path, output_path)
+    return len(entries), skipped
+
+class CepDatabase:
+    """
+    Consulta de CEPs em um arquivo binário mapeado em memória (mmap).
+
+    A abertura não lê o arquivo (o sistema operacional carrega as páginas sob demanda) e cada
+    consulta é uma busca binária no índice ordenado, sem acesso à rede ou ao banco de dados.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Arquivo vazio não pode ser mapeado.
+            self._file.close()
+            raise ValueError(f"Arquivo de CEPs inválido: {path}")
+        magic, self._count, self._text_start = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo de CEPs inválido: {path}")
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Libera o mapeamento e o arquivo."""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def lookup(self, cep):
+        """
+        Busca um CEP.
+
+        Args:
+            cep (str or int): CEP com ou sem hífen.
+
+        Returns:
+            dict or None: {'estado', 'cidade', 'bairro', 'rua'} se o CEP existir, caso contrário None.
+        """
+        key = cep if isinstance(cep, int) else cep_to_int(cep)
+        if key is None:
+            return None
+        mm, unpack_from = self._mm, RECORD.unpack_from
+        low, high = 0, self._count - 1
+        while low <= high: # Busca binária no índice ordenado.
+            mid = (low + high) // 2
+            mid_cep, offset = unpack_from(mm, HEADER.size + mid * RECORD.size)
+            if mid_cep < key:
+                low = mid + 1
+            elif mid_cep > key:
+                high = mid - 1
+            else:
+                start = self._text_start + offset
+                (length,) = TEXT_LENGTH.unpack_from(mm, start)
+                text_start = start + TEXT_LENGTH.size
+                values = mm[text_start:text_start + length].decode("utf-8").split(FIELD_SEPARATOR)
+                return dict(zip(FIELDS, values))
+        return None
+
+_default_database = None
+
+def get_default_database():
+    """
+    Retorna a base de CEPs padrão (aberta uma única vez por processo), ou None se o arquivo não existir.
+    O caminho vem da variável de ambiente CEP_DATABASE_PATH ou de DEFAULT_PATH.
+    """
+    global _default_database
+    if _default_database is None:
+        path = os.getenv("CEP_DATABASE_PATH", DEFAULT_PATH)
+        if not os.path.isfile(path):
+            return None
+        try:
+            _default_database = CepDatabase(path)
+        except (OSError, ValueError):
+            return None
+    return _default_database
+
+def lookup_cep(cep):
+    """Atalho para consultar um CEP na base padrão. Retorna None se a base não estiver disponível ou o CEP não existir."""
+    database = get_default_database()
+    return database.lookup(cep) if database else None
+
+if __name__ == "__main__":
+    # Uso:
+    #   python cep_database.py build ceps.csv [data/ceps.bin]
+    #   python cep_database.py lookup 01310-100 [data/ceps.bin]
+    if len(sys.argv) >= 3 and sys.argv[1] == "build":
+        destino = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_PATH
+        gravados, ignorados = build_cep_database(sys.argv[2], destino)
+        print(f"{gravados} CEPs gravados em {destino} ({ignorados} linhas ignoradas).")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "lookup":
+        with CepDatabase(sys.argv[3] if len(sys.argv) > 3 else DEFAULT_PATH) as base:
+            print(base.lookup(sys.argv[2]) or "CEP não encontrado.")
+    else:
+        print("Uso: python cep_database.py build <arquivo.csv> [saida.bin] | lookup <cep> [arquivo.bin]")
@@ -0,0 +1,317 @@
+import argparse
+import contextlib
+import csv
+import functools
+import itertools
+import json
+import re
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+import db_connection # Funções de acesso ao banco de dados.
+import reference_cache # Listas de valores válidos e cache de veículos/motoristas.
+import client_import # Conversão de datas (AAAA-MM-DD ou DD/MM/AAAA).
+import arrival_scan # Normalização de códigos de rastreamento.
+import data_export # Exportação de produtos (subcomando exportar).
+import services # Regras de negócio e gravação em lote (sem entrada/saída de terminal).
+
+# Uso (sem terminal interativo; entrada em JSON, JSON Lines ou CSV, saída em JSON Lines):
+#   python cli.py produto adicionar < produtos.jsonl > resultado.jsonl
+#   python cli.py produto status --entrada status.csv
+#   python cli.py carregamento criar < carregamentos.json
+#   python cli.py rastrear SRL2024... SRL2024...
+#   python cli.py pessoa buscar "Maria" 123.456
+#   python cli.py exportar --incremental
+# Cada registro de entrada gera uma linha de saída {"registro": n, "ok": true/false, ...}, na ordem da entrada.
+# O código de saída é 0 se todos os registros foram processados, 1 se algum falhou.
+
+# Registros processados por vez: uma ida ao banco (ou uma transação) e uma escrita na saída por lote.
+BATCH_SIZE = 500
+# ------------------- ENTRADA E SAÍDA ----------------------
+
+def read_records(stream, input_format=None):
+    """
+    Lê os registros de entrada como dicionários, sob demanda (a entrada não é carregada inteira, exceto em JSON).
+
+    Formatos: 'jsonl' (um objeto por linha), 'json' (uma lista de objetos) ou 'csv' (com cabeçalho,
+    separador detectado). Sem `input_format`, o formato é deduzido do primeiro caractere da entrada.
+    Uma linha JSON inválida vira um ValueError no lugar do registro (o lote continua).
+    """
+    first = ""
+    for first in stream:
+        if first.strip():
+            break
+    if not first.strip():
+        return
+    if input_format is None:
+        input_format = {"[": "json", "{": "jsonl"}.get(first.lstrip()[0], "csv")
+    lines = itertools.chain([first], stream)
+
+    if input_format == "json":
+        data = json.loads("".join(lines))
+        yield from (data if isinstance(data, list) else [data])
+    elif input_format == "jsonl":
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"JSON inválido: {e}")
+    else:
+        try:
+            delimiter = csv.Sniffer().sniff(first, delimiters=",;\t").delimiter
+        except csv.Error: # Cabeçalho sem separador reconhecível (ex: uma única coluna): usa vírgula.
+            delimiter = ","
+        reader = csv.DictReader(lines, delimiter=delimiter)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row in reader:
+            yield {name: (value.strip() or None) if isinstance(value, str) else value for name, value in row.items() if name}
+
+def _batches(records, size):
+    """Agrupa os registros, numerados a partir de 1, em listas de até `size` pares (número, registro)."""
+    numbered = enumerate(records, start=1)
+    while True:
+        batch = list(itertools.islice(numbered, size))
+        if not batch:
+            return
+        yield batch
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+def write_results(out, results):
+    """Escreve os resultados de um lote (uma linha JSON cada) com uma única escrita, e descarrega a saída."""
+    if results:
+        out.write("".join(json.dumps(result, ensure_ascii=False, default=_json_value) + "\n" for result in results))
+        out.flush() # Quem lê a saída (ex: outro processo no pipe) recebe o lote assim que ele termina.
+
+def _success(number, **fields):
+    return dict(registro=number, ok=True, **fields)
+
+def _failure(number, message):
+    return {"registro": number, "ok": False, "erro": message}
+
+# ------------------- VALIDAÇÃO ----------------------
+
+def _field(record, name, convert=str, required=True, default=None):
+    """Lê um campo do registro (texto vazio equivale a ausente), convertendo o valor. Erros viram ValueError."""
+    value = record.get(name)
+    if isinstance(value, str):
+        value = value.strip() or None
+    if value is None:
+        if required:
+            raise ValueError(f"Campo obrigatório vazio: {name}")
+        return default
+    try:
+        return convert(value)
+    except (ValueError, TypeError, ArithmeticError):
+        raise ValueError(f"Valor inválido para {name}: {value}")
+
+def _date(value):
+    if isinstance(value, date):
+        return value
+    parsed = client_import.parse_date(str(value))
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+def _decimal(value):
+    return Decimal(str(value))
+
+def _choice(options):
+    def convert(value):
+        if value not in options:
+            raise ValueError(value)
+        return value
+    return convert
+
+def _id_list(value):
+    """Lista de IDs: lista JSON ou texto separado por vírgula, ponto e vírgula ou espaço (ex: coluna de CSV)."""
+    items = value if isinstance(value, list) else re.split(r"[,;\s]+", str(value).strip())
+    return [int(item) for item in items if str(item).strip()]
+
+def _validated(batch, validate):
+    """Aplica `validate` a cada registro. Retorna (lista de (número, dados válidos), {número: resultado de erro})."""
+    valid, failures = [], {}
+    for number, record in batch:
+        try:
+            if isinstance(record, Exception): # Linha ilegível na entrada.
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("Registro deve ser um objeto.")
+            valid.append((number, validate(record)))
+        except ValueError as e:
+            failures[number] = _failure(number, str(e))
+    return valid, failures
+
+def _run_service(conn, batch, validate, service):
+    """
+    Valida os registros do lote e chama a função de services.py com os válidos, em uma chamada.
+    Cada Outcome vira a linha de resultado do registro correspondente.
+    """
+    valid, results = _validated(batch, validate)
+    if valid:
+        for (number, _), outcome in zip(valid, service(conn, [item for _, item in valid])):
+            results[number] = _success(number, **outcome.dados) if outcome.ok else _failure(number, outcome.erro)
+    return [results[number] for number, _ in batch]
+
+# ------------------- PRODUTOS ----------------------
+
+def _validate_product(record):
+    return services.NewProduct(
+        peso=_field(record, "peso", _decimal),
+        status=_field(record, "status", _choice(reference_cache.STATUS_ENTREGA), required=False, default='Em Processamento'),
+        data_chegada_cd=_field(record, "data_chegada_cd", _date),
+        data_prevista_entrega=_field(record, "data_prevista_entrega", _date, required=False),
+        tipo=_field(record, "tipo", _choice(reference_cache.TIPOS_PRODUTO)),
+        remetente=_field(record, "remetente", int),
+        destinatario=_field(record, "destinatario", int),
+        motorista=_field(record, "motorista", int, required=False),
+        # Dados do destinatário no rastreamento (padrão: os do cadastro da pessoa).
+        nome_destinatario=_field(record, "nome_destinatario", required=False),
+        cpf_destinatario=_field(record, "cpf_destinatario", required=False),
+        telefone_destinatario=_field(record, "telefone_destinatario", required=False),
+    )
+
+def add_products(conn, batch):
+    """Cadastra os produtos do lote (regras e gravação em services.add_products)."""
+    return _run_service(conn, batch, _validate_product, services.add_products)
+
+def _validate_status_update(record):
+    change = services.StatusChange(
+        id_produto=_field(record, "id_produto", int, required=False),
+        codigo_rastreamento=_field(record, "codigo_rastreamento", arrival_scan.normalize_code, required=False),
+        status=_field(record, "status", _choice(reference_cache.STATUS_ENTREGA)),
+    )
+    if change.id_produto is None and change.codigo_rastreamento is None:
+        raise ValueError("Informe id_produto ou codigo_rastreamento.")
+    return change
+
+def update_product_statuses(conn, batch):
+    """Altera o status dos produtos do lote (por ID ou código de rastreamento) em uma transação."""
+    return _run_service(conn, batch, _validate_status_update, services.update_product_statuses)
+
+# ------------------- CARREGAMENTOS ----------------------
+
+def _validate_shipment(record):
+    return services.Shipment(
+        placa=_field(record, "placa", str.upper),
+        produtos=_field(record, "produtos", _id_list),
+        data_carregamento=_field(record, "data", datetime.fromisoformat, required=False),
+    )
+
+def create_shipments(conn, batch):
+    """Registra os carregamentos do lote (um veículo, uma data e uma lista de produtos por registro)."""
+    return _run_service(conn, batch, _validate_shipment, services.create_shipments)
+
+# ------------------- CONSULTAS ----------------------
+
+def track(conn, batch):
+    """Rastreia os códigos do lote em uma consulta (visão interna: sem a restrição ao cliente do menu do Cliente)."""
+    return _run_service(conn, batch, lambda record: _field(record, "codigo_rastreamento", arrival_scan.normalize_code), services.track)
+
+_PERSON_FIELDS = ("codigo_pessoa", "nome", "documento", "telefone", "email", "id_endereco", "cidade", "estado")
+
+def search_people(conn, batch, limit=services.PERSON_SEARCH_LIMIT):
+    """Busca pessoas para todos os termos do lote em uma consulta (mesmos ramos indexados dos seletores do terminal)."""
+    valid, results = _validated(batch, lambda record: _field(record, "termo"))
+    found = services.search_people_batch(conn, [term for _, term in valid], limit)
+    for index, (number, term) in enumerate(valid):
+        if found is None:
+            results[number] = _failure(number, services.DB_ERROR)
+        else:
+            results[number] = _success(number, termo=term, pessoas=[dict(zip(_PERSON_FIELDS, person)) for person in found[index]])
+    return [results[number] for number, _ in batch]
+
+# ------------------- LINHA DE COMANDO ----------------------
+
+def _process(conn, records, operation, batch_size, out):
+    """Processa os registros em lotes, escrevendo os resultados de cada lote. Retorna (total, falhas)."""
+    total = failures = 0
+    for batch in _batches(records, batch_size):
+        results = operation(conn, batch)
+        total += len(results)
+        failures += sum(1 for result in results if not result["ok"])
+        write_results(out, results)
+    return total, failures
+
+
+def build_parser():
+    input_options = argparse.ArgumentParser(add_help=False)
+    input_options.add_argument("--entrada", default="-", help="arquivo de entrada (padrão: stdin)")
+    input_options.add_argument("--formato-entrada", choices=["json", "jsonl", "csv"], help="padrão: deduzido do conteúdo")
+    input_options.add_argument("--lote", type=int, default=BATCH_SIZE, help=f"registros por lote (padrão: {BATCH_SIZE})")
+
+    parser = argparse.ArgumentParser(description="Operações em lote sem terminal interativo (entrada JSON/CSV, saída JSON Lines).")
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    product = commands.add_parser("produto", aliases=["product"], help="cadastro e status de produtos")
+    product_commands = product.add_subparsers(dest="acao", required=True)
+    add = product_commands.add_parser("adicionar", aliases=["add"], parents=[input_options],
+                                      help="campos: peso, tipo, data_chegada_cd, remetente, destinatario; opcionais: status, "
+                                           "data_prevista_entrega, motorista, nome_destinatario, cpf_destinatario, telefone_destinatario")
+    add.set_defaults(operation=add_products)
+    status = product_commands.add_parser("status", parents=[input_options], help="campos: id_produto ou codigo_rastreamento, status")
+    status.set_defaults(operation=update_product_statuses)
+
+    shipment = commands.add_parser("carregamento", aliases=["shipment"], help="carregamentos de veículos")
+    shipment_commands = shipment.add_subparsers(dest="acao", required=True)
+    create = shipment_commands.add_parser("criar", aliases=["create"], parents=[input_options],
+                                          help="campos: placa, produtos (lista de IDs); opcional: data (AAAA-MM-DD HH:MM)")
+    create.set_defaults(operation=create_shipments)
+
+    tracking = commands.add_parser("rastrear", aliases=["track"], parents=[input_options], help="campo: codigo_rastreamento")
+    tracking.add_argument("valores", nargs="*", metavar="codigo", help="códigos (em vez da entrada)")
+    tracking.set_defaults(operation=track, key="codigo_rastreamento")
+
+    person = commands.add_parser("pessoa", aliases=["person"], help="consultas de pessoas")
+    person_commands = person.add_subparsers(dest="acao", required=True)
+    search = person_commands.add_parser("buscar", aliases=["search"], parents=[input_options],
+                                        help="campo: termo (nome, CPF/CNPJ, telefone ou email)")
+    search.add_argument("valores", nargs="*", metavar="termo", help="termos (em vez da entrada)")
+    search.add_argument("--limite", type=int, default=services.PERSON_SEARCH_LIMIT, help=f"pessoas por termo (padrão: {services.PERSON_SEARCH_LIMIT})")
+    search.set_defaults(operation=search_people, key="termo")
+
+    export = commands.add_parser("exportar", aliases=["export"], help="exporta produtos (ver data_export.py)")
+    export.add_argument("--incremental", action="store_true", help="exporta apenas o que mudou desde a última exportação incremental")
+    export.add_argument("--formato", choices=["parquet", "csv"], help="padrão: parquet se o pyarrow estiver instalado")
+    export.add_argument("--saida", default=data_export.DEFAULT_OUTPUT_DIR, help=f"pasta de destino (padrão: {data_export.DEFAULT_OUTPUT_DIR})")
+    export.add_argument("--bloco", type=int, default=data_export.CHUNK_SIZE, help=f"produtos por bloco (padrão: {data_export.CHUNK_SIZE})")
+    export.set_defaults(operation=None)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+
+    conn = db_connection.conectar_banco() # Uma conexão para toda a execução, reutilizada por todos os lotes.
+    if not conn:
+        return 1
+    try:
+        if args.operation is None: # exportar
+            result = data_export.export_products(conn, args.saida, args.incremental, args.formato, args.bloco)
+            write_results(out, [_success(1, **result) if result else _failure(1, "A exportação falhou (ver log).")])
+            return 0 if result else 1
+        operation = functools.partial(args.operation, limit=args.limite) if hasattr(args, "limite") else args.operation
+        with contextlib.ExitStack() as stack:
+            if getattr(args, "valores", None): # Valores na linha de comando (ex: códigos em 'rastrear') em vez da entrada.
+                records = ({args.key: value} for value in args.valores)
+            else:
+                source = sys.stdin if args.entrada == "-" else stack.enter_context(open(args.entrada, encoding="utf-8-sig", newline=""))
+                records = read_records(source, args.formato_entrada)
+            total, failures = _process(conn, records, operation, max(1, args.lote), out)
+    except (ValueError, OSError, csv.Error) as e: # Entrada ilegível (ex: JSON inválido em uma lista, CSV malformado, arquivo inexistente).
+        print(f"Erro na entrada: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db_connection.desconectar_banco(conn)
+    print(f"{total} registro(s) processado(s), {failures} com erro.", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
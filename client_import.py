@@ -0,0 +1,272 @@
+import csv
+import logging
+import sys
+from datetime import datetime
+import pyodbc
+import db_connection # Funções de acesso ao banco de dados.
+import addresses # Normalização e hash de endereços (reutiliza endereços já cadastrados).
+import passwords # Hash de senhas (KDF) em paralelo no pool de threads.
+import services # Regras de Pessoa Física/Jurídica (CHK_Cliente_PF_PJ).
+
+# Linhas gravadas por transação. Com 8 parâmetros por endereço, o lote fica abaixo do limite de 2100 parâmetros do SQL Server.
+BATCH_SIZE = 200
+
+# Colunas esperadas no arquivo de importação (cabeçalho obrigatório, sem distinção de maiúsculas/minúsculas).
+COLUMNS = ["nome", "rg", "telefone", "email", "cep", "estado", "cidade", "bairro", "rua", "numero", "complemento",
+           "tipo_cliente", "cpf", "data_nascimento", "cnpj", "nome_empresa", "login", "senha"]
+REQUIRED = ["nome", "telefone", "email", "cep", "estado", "cidade", "bairro", "rua", "numero", "tipo_cliente", "login", "senha"]
+
+def only_digits(value):
+    """Retorna apenas os dígitos de um documento (CPF/CNPJ), para comparar valores com e sem pontuação."""
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+def parse_date(value):
+    """Converte uma data nos formatos AAAA-MM-DD ou DD/MM/AAAA. Retorna None se inválida."""
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def load_existing_keys(conn):
+    """
+    Carrega os CPFs/CNPJs de clientes e os logins já cadastrados, para validar unicidade sem consultar o banco a cada linha.
+
+    Returns:
+        tuple: (conjunto de CPFs, conjunto de CNPJs, conjunto de logins), com documentos apenas em dígitos.
+    """
+    cpfs, cnpjs, logins = set(), set(), set()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT CPF, CNPJ FROM Cliente;")
+        while True:
+            rows = cursor.fetchmany(10000) # Lê em blocos para não materializar a tabela inteira de uma vez.
+            if not rows:
+                break
+            for cpf, cnpj in rows:
+                if cpf: cpfs.add(only_digits(cpf))
+                if cnpj: cnpjs.add(only_digits(cnpj))
+        cursor.execute("SELECT Login FROM Usuario;")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            logins.update(row[0].lower() for row in rows)
+    finally:
+        cursor.close()
+    return cpfs, cnpjs, logins
+
+def validate_row(row, cpfs, cnpjs, logins):
+    """
+    Valida uma linha do arquivo com as mesmas regras da restrição CHK_Cliente_PF_PJ e de unicidade.
+
+    Args:
+        row (dict): Linha do CSV (já com os valores sem espaços nas pontas).
+        cpfs, cnpjs, logins (set): Chaves já existentes (no banco ou em linhas anteriores do arquivo).
+
+    Returns:
+        tuple: (dados normalizados ou None, lista de mensagens de erro).
+    """
+    errors = [f"Campo obrigatório vazio: {name}" for name in REQUIRED if not row.get(name)]
+    tipo = (row.get("tipo_cliente") or "").upper()
+    cpf, cnpj, company = row.get("cpf") or None, row.get("cnpj") or None, row.get("nome_empresa") or None
+    raw_dob = row.get("data_nascimento") or ""
+    dob = parse_date(raw_dob)
+    errors.extend(services.client_type_errors(tipo, cpf, dob or raw_dob or None, cnpj, company))
+    if tipo == "PF" and cpf and only_digits(cpf) in cpfs:
+        errors.append("CPF já cadastrado.")
+    if tipo == "PJ" and cnpj and only_digits(cnpj) in cnpjs:
+        errors.append("CNPJ já cadastrado.")
+
+    login = row.get("login") or ""
+    if login and login.lower() in logins:
+        errors.append("Login já em uso.")
+
+    if errors:
+        return None, errors
+
+    address = addresses.clean_address(row["cep"], row["estado"], row["cidade"], row["bairro"], row["rua"], row["numero"], row.get("complemento"))
+    data = {
+        "nome": row["nome"], "rg": row.get("rg") or None, "telefone": row["telefone"], "email": row["email"],
+        "endereco": address, "hash_endereco": addresses.address_hash(*address),
+        "tipo": tipo, "cpf": cpf, "data_nascimento": dob, "cnpj": cnpj, "nome_empresa": company,
+        "login": login, "senha": row["senha"]
+    }
+    # Reserva as chaves para que linhas seguintes do mesmo arquivo não as repitam.
+    if cpf: cpfs.add(only_digits(cpf))
+    if cnpj: cnpjs.add(only_digits(cnpj))
+    logins.add(login.lower())
+    return data, []
+
+def hash_batch_passwords(batch, hash_password):
+    """
+    Gera, fora de qualquer transação, os hashes das senhas do lote que ainda não têm hash (data['senha_hash']).
+
+    O KDF é propositalmente caro: os hashes são gerados em paralelo no pool de passwords.py e guardados nos
+    próprios dados da linha, de modo que a regravação linha a linha de um lote que falhou não os recalcula.
+    """
+    pending = [data for _, data in batch if "senha_hash" not in data]
+    for data, password_hash in zip(pending, passwords.get_executor().map(hash_password, [data["senha"] for data in pending])):
+        data["senha_hash"] = password_hash
+        del data["senha"] # A senha em texto puro não é mais necessária.
+
+def insert_batch(conn, batch, hash_password):
+    """
+    Grava um lote de clientes válidos (Endereco, Pessoa, Cliente e Usuario) em uma única transação,
+    com um comando set-based por tabela.
+
+    Os hashes das senhas são gerados antes de abrir a transação (hash_batch_passwords), para que os
+    bloqueios dos INSERTs não fiquem retidos durante o KDF.
+
+    O mapeamento linha -> Codigo_Pessoa é obtido com MERGE ... OUTPUT, que (ao contrário do INSERT ... OUTPUT)
+    permite devolver colunas da origem junto com a identidade gerada.
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        batch (list): Lista de tuplas (número da linha, dados validados).
+        hash_password (callable): Função que gera o hash armazenado em Usuario.Senha_Hash.
+    """
+    hash_batch_passwords(batch, hash_password)
+    cursor = conn.cursor()
+    try:
+        # 1. Endereços: insere apenas os hashes ainda inexistentes e busca o ID de todos.
+        unique_addresses = {}
+        for _, data in batch:
+            unique_addresses.setdefault(data["hash_endereco"], data["endereco"])
+        values_sql = ",".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(unique_addresses))
+        params = [value for key, address in unique_addresses.items() for value in address + (key,)]
+        cursor.execute(f"""
+        INSERT INTO Endereco (CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento, Hash_Endereco)
+        SELECT V.CEP, V.Estado, V.Cidade, V.Bairro, V.Rua, V.Numero, V.Complemento, V.Hash_Endereco
+        FROM (VALUES {values_sql}) AS V(CEP, Estado, Cidade, Bairro, Rua, Numero, Complemento, Hash_Endereco)
+        WHERE NOT EXISTS (SELECT 1 FROM Endereco E WITH (UPDLOCK, HOLDLOCK) WHERE E.Hash_Endereco = V.Hash_Endereco);
+        """, params)
+        hash_placeholders = ",".join("?" * len(unique_addresses))
+        cursor.execute(f"SELECT Hash_Endereco, ID_Endereco FROM Endereco WHERE Hash_Endereco IN ({hash_placeholders});", list(unique_addresses))
+        address_ids = {key: address_id for key, address_id in cursor.fetchall()}
+
+        # 2. Pessoas: MERGE com condição sempre falsa insere todas as linhas e devolve (linha, Codigo_Pessoa).
+        values_sql = ",".join(["(?, ?, ?, ?, ?, ?)"] * len(batch))
+        params = [value for line, data in batch
+                  for value in (line, data["nome"], data["rg"], data["telefone"], data["email"], address_ids[data["hash_endereco"]])]
+        cursor.execute(f"""
+        SET NOCOUNT ON;
+        MERGE INTO Pessoa AS T
+        USING (VALUES {values_sql}) AS S(Linha, Nome, RG, Telefone, Email, ID_Endereco)
+        ON 1 = 0
+        WHEN NOT MATCHED THEN
+            INSERT (Nome, RG, Telefone, Email, ID_Endereco) VALUES (S.Nome, S.RG, S.Telefone, S.Email, S.ID_Endereco)
+        OUTPUT S.Linha, INSERTED.Codigo_Pessoa;
+        """, params)
+        person_ids = {line: person_id for line, person_id in cursor.fetchall()}
+
+        # 3. Clientes e 4. Usuários, um INSERT com várias linhas cada.
+        values_sql = ",".join(["(?, ?, ?, ?, ?, ?)"] * len(batch))
+        params = [value for line, data in batch
+                  for value in (person_ids[line], data["tipo"], data["cpf"], data["data_nascimento"], data["cnpj"], data["nome_empresa"])]
+        cursor.execute(f"INSERT INTO Cliente (Codigo_Pessoa, Tipo_Cliente, CPF, Data_Nascimento, CNPJ, Nome_Empresa) VALUES {values_sql};", params)
+
+        values_sql = ",".join(["(?, ?, ?, 'Cliente')"] * len(batch))
+        params = [value for line, data in batch for value in (data["login"], data["senha_hash"], person_ids[line])]
+        cursor.execute(f"INSERT INTO Usuario (Login, Senha_Hash, Codigo_Pessoa, Tipo_Usuario) VALUES {values_sql};", params)
+
+        conn.commit()
+    except pyodbc.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def import_clients(conn, csv_path, hash_password, error_report_path=None, batch_size=BATCH_SIZE, delimiter=None):
+    """
+    Importa clientes PF/PJ de um arquivo CSV, lendo-o em fluxo (memória constante em relação ao tamanho do arquivo).
+
+    As linhas são validadas em Python (regras de CHK_Cliente_PF_PJ, campos obrigatórios e unicidade de
+    CPF/CNPJ/login contra conjuntos pré-carregados) e as válidas são gravadas em lotes transacionais.
+    Se um lote falhar no banco, suas linhas são regravadas uma a uma para isolar as problemáticas.
+    As linhas rejeitadas são gravadas em um relatório CSV com o motivo.
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        csv_path (str): Caminho do arquivo de importação (cabeçalho com as colunas de COLUMNS).
+        hash_password (callable): Função que gera o hash da senha de cada usuário.
+        error_report_path (str, optional): Caminho do relatório de erros. Padrão: <arquivo>.erros.csv.
+        batch_size (int): Linhas por transação.
+        delimiter (str, optional): Separador do CSV (detectado automaticamente se omitido).
+
+    Returns:
+        dict: {'lidas', 'importadas', 'rejeitadas', 'relatorio'}.
+    """
+    error_report_path = error_report_path or csv_path + ".erros.csv"
+    cpfs, cnpjs, logins = load_existing_keys(conn)
+    stats = {"lidas": 0, "importadas": 0, "rejeitadas": 0, "relatorio": error_report_path}
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as source, \
+         open(error_report_path, "w", newline="", encoding="utf-8") as report_file:
+        if delimiter is None:
+            delimiter = csv.Sniffer().sniff(source.read(4096), delimiters=",;\t").delimiter
+            source.seek(0)
+        reader = csv.DictReader(source, delimiter=delimiter)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        missing = [name for name in COLUMNS if name not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"Colunas ausentes no arquivo: {', '.join(missing)}")
+
+        # O relatório repete as colunas do arquivo (exceto a senha) e acrescenta a linha e o motivo.
+        report_columns = ["linha"] + [name for name in COLUMNS if name != "senha"] + ["erro"]
+        report = csv.DictWriter(report_file, fieldnames=report_columns, delimiter=delimiter, extrasaction="ignore")
+        report.writeheader()
+
+        def reject(line, row, message):
+            report.writerow(dict(row, linha=line, erro=message))
+            stats["rejeitadas"] += 1
+
+        def flush(batch):
+            try:
+                insert_batch(conn, batch, hash_password)
+                stats["importadas"] += len(batch)
+            except pyodbc.Error as e:
+                if len(batch) == 1:
+                    line, data = batch[0]
+                    reject(line, rows_by_line.get(line, {}), f"Erro no banco de dados: {e}")
+                    return
+                logging.warning(f"Lote de {len(batch)} linhas falhou ({e}); regravando linha a linha.")
+                for item in batch:
+                    flush([item])
+
+        batch, rows_by_line = [], {}
+        for line, raw in enumerate(reader, start=2): # Linha 1 é o cabeçalho.
+            stats["lidas"] += 1
+            row = {name: (value or "").strip() for name, value in raw.items() if name}
+            data, errors = validate_row(row, cpfs, cnpjs, logins)
+            if errors:
+                reject(line, row, "; ".join(errors))
+                continue
+            batch.append((line, data))
+            rows_by_line[line] = row
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch, rows_by_line = [], {}
+        if batch:
+            flush(batch)
+
+    logging.info("Importação de clientes concluída: %s", stats)
+    return stats
+
+if __name__ == "__main__":
+    # Uso: python client_import.py clientes.csv [relatorio_erros.csv]
+    if len(sys.argv) < 2:
+        print("Uso: python client_import.py <clientes.csv> [relatorio_erros.csv]")
+        sys.exit(1)
+    import app # Importado aqui para reutilizar a mesma função de hash de senha da aplicação.
+    conexao_db = db_connection.conectar_banco()
+    if not conexao_db:
+        sys.exit(1)
+    try:
+        resultado = import_clients(conexao_db, sys.argv[1], app.hash_password, sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"Linhas lidas: {resultado['lidas']}, importadas: {resultado['importadas']}, rejeitadas: {resultado['rejeitadas']}")
+        if resultado["rejeitadas"]:
+            print(f"Relatório de erros: {resultado['relatorio']}")
+    finally:
+        db_connection.desconectar_banco(conexao_db)
@@ -0,0 +1,208 @@
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+import db_connection # Funções de acesso ao banco de dados.
+
+try: # pyarrow é opcional: sem ele, a exportação é feita em CSV compactado (gzip).
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Quantidade de produtos lidos e gravados por vez (memória limitada a um bloco).
+CHUNK_SIZE = 50000
+DEFAULT_OUTPUT_DIR = "exports"
+WATERMARK_FILE = "watermark.json"
+
+# Colunas exportadas (uma linha por produto; o carregamento é o mais recente do produto).
+COLUMNS = [
+    "ID_Produto", "Codigo_Rastreamento", "Status_Entrega", "Tipo_Produto", "Peso",
+    "Data_Chegada_CD", "Data_Prevista_Entrega", "Data_Entrega_Realizada",
+    "ID_Remetente", "Nome_Remetente", "ID_Destinatario", "Nome_Destinatario",
+    "Cidade_Destino", "Estado_Destino", "Codigo_Funcionario_Motorista",
+    "Placa_Veiculo", "Data_Carregamento", "Total_Carregamentos",
+]
+
+_SELECT = """
+SELECT TOP (?)
+    P.ID_Produto, DR.Codigo_Rastreamento, P.Status_Entrega, P.Tipo_Produto, P.Peso,
+    P.Data_Chegada_CD, P.Data_Prevista_Entrega, P.Data_Entrega_Realizada,
+    P.ID_Remetente, REM.Nome, P.ID_Destinatario, DEST.Nome,
+    DR.Cidade, DR.Estado, P.Codigo_Funcionario_Motorista,
+    UC.Placa_Veiculo, UC.Data_Carregamento, ISNULL(UC.Total, 0)
+FROM Produto_A_Ser_Entregue P
+INNER JOIN Dados_Rastreamento DR ON DR.ID_Rastreamento = P.ID_Rastreamento
+INNER JOIN Pessoa REM ON REM.Codigo_Pessoa = P.ID_Remetente
+INNER JOIN Pessoa DEST ON DEST.Codigo_Pessoa = P.ID_Destinatario
+OUTER APPLY (
+    SELECT TOP 1 C.Placa_Veiculo, C.Data_Carregamento, COUNT(*) OVER () AS Total
+    FROM Carregamento C WHERE C.ID_Produto = P.ID_Produto
+    ORDER BY C.Data_Carregamento DESC
+) AS UC
+WHERE P.ID_Produto > ?
+"""
+
+# Modo incremental: produtos cuja linha, rastreamento ou carregamentos mudaram desde a marca d'água.
+# Versao_Linha é ROWVERSION (contador único do banco), então uma única marca vale para as três tabelas.
+_CHANGED_FILTER = """
+  AND P.ID_Produto IN (
+    SELECT ID_Produto FROM Produto_A_Ser_Entregue WHERE Versao_Linha > CONVERT(BINARY(8), CAST(? AS BIGINT))
+    UNION
+    SELECT P2.ID_Produto FROM Dados_Rastreamento DR2
+    INNER JOIN Produto_A_Ser_Entregue P2 ON P2.ID_Rastreamento = DR2.ID_Rastreamento
+    WHERE DR2.Versao_Linha > CONVERT(BINARY(8), CAST(? AS BIGINT))
+    UNION
+    SELECT ID_Produto FROM Carregamento WHERE Versao_Linha > CONVERT(BINARY(8), CAST(? AS BIGINT))
+  )
+"""
+
+def _arrow_schema():
+    return pa.schema([
+        ("ID_Produto", pa.int32()), ("Codigo_Rastreamento", pa.string()), ("Status_Entrega", pa.string()),
+        ("Tipo_Produto", pa.string()), ("Peso", pa.decimal128(10, 2)),
+        ("Data_Chegada_CD", pa.date32()), ("Data_Prevista_Entrega", pa.date32()), ("Data_Entrega_Realizada", pa.date32()),
+        ("ID_Remetente", pa.int32()), ("Nome_Remetente", pa.string()),
+        ("ID_Destinatario", pa.int32()), ("Nome_Destinatario", pa.string()),
+        ("Cidade_Destino", pa.string()), ("Estado_Destino", pa.string()), ("Codigo_Funcionario_Motorista", pa.int32()),
+        ("Placa_Veiculo", pa.string()), ("Data_Carregamento", pa.timestamp("ms")), ("Total_Carregamentos", pa.int32()),
+    ])
+
+class _ParquetSink:
+    """Grava cada bloco como um row group de um arquivo Parquet."""
+    extension = ".parquet"
+
+    def __init__(self, path):
+        self._schema = _arrow_schema()
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, self._schema)],
+                                     schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+class _CsvGzipSink:
+    """Grava os blocos em um CSV compactado com gzip (usado quando o pyarrow não está instalado)."""
+    extension = ".csv.gz"
+
+    def __init__(self, path):
+        self._file = gzip.open(path, "wt", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+def load_watermark(output_dir):
+    """Lê a marca d'água da última exportação incremental (ou None se ainda não houve)."""
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("versao")
+
+def save_watermark(output_dir, version, exported_file):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"versao": version, "arquivo": os.path.basename(exported_file),
+                   "data": datetime.now().isoformat(timespec="seconds")}, f)
+    os.replace(path + ".tmp", path)
+
+def export_products(conn, output_dir=DEFAULT_OUTPUT_DIR, incremental=False, file_format=None, chunk_size=CHUNK_SIZE):
+    """
+    Exporta os produtos (com rastreamento, remetente/destinatário e último carregamento) em blocos.
+
+    Os dados são lidos com paginação por chave (ID_Produto > último ID do bloco anterior), de modo que
+    cada consulta é curta e a memória usada fica limitada a um bloco. No modo incremental, apenas os
+    produtos alterados desde a última exportação incremental são exportados; exclusões não são capturadas,
+    nem alterações apenas no nome de remetente/destinatário.
+
+    Args:
+        conn: Objeto de conexão pyodbc (de preferência uma conexão dedicada).
+        output_dir (str): Pasta de destino (guarda também a marca d'água).
+        incremental (bool): Exporta só o que mudou desde a marca d'água anterior.
+        file_format (str, optional): 'parquet' ou 'csv'. Padrão: parquet se o pyarrow estiver instalado.
+        chunk_size (int): Produtos por bloco.
+
+    Returns:
+        dict or None: {'arquivo', 'linhas', 'versao'}, ou None em caso de erro.
+    """
+    file_format = file_format or ("parquet" if pa is not None else "csv")
+    if file_format == "parquet" and pa is None:
+        logging.error("Formato Parquet requer o pacote pyarrow (pip install pyarrow).")
+        return None
+    sink_class = _ParquetSink if file_format == "parquet" else _CsvGzipSink
+
+    # Marca d'água superior: toda alteração já confirmada tem versão <= este valor.
+    rows = db_connection.execute_query(conn, "SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1;", fetch_results=True)
+    if not rows:
+        return None
+    new_version = rows[0][0]
+    since = load_watermark(output_dir) if incremental else None
+
+    sql = _SELECT + (_CHANGED_FILTER if since is not None else "") + " ORDER BY P.ID_Produto;"
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = "incremental" if since is not None else "completo"
+    path = os.path.join(output_dir, f"produtos_{suffix}_{datetime.now():%Y%m%d_%H%M%S}{sink_class.extension}")
+    tmp_path = path + ".tmp"
+
+    sink = sink_class(tmp_path)
+    total, last_id = 0, 0
+    try:
+        while True:
+            params = (chunk_size, last_id) + ((since, since, since) if since is not None else ())
+            chunk = db_connection.execute_query(conn, sql, params, fetch_results=True)
+            if chunk is None: # Erro de banco (já registrado no log).
+                raise RuntimeError("Falha ao ler um bloco de produtos.")
+            if not chunk:
+                break
+            sink.write([tuple(row) for row in chunk])
+            total += len(chunk)
+            last_id = chunk[-1][0]
+            logging.info("%d produtos exportados...", total)
+    except Exception as e:
+        sink.close()
+        os.remove(tmp_path)
+        logging.error(f"Exportação interrompida: {e}")
+        return None
+    sink.close()
+    os.replace(tmp_path, path) # O arquivo só aparece completo.
+
+    if incremental:
+        save_watermark(output_dir, new_version, path) # Só avança a marca depois de gravar o arquivo.
+    return {"arquivo": path, "linhas": total, "versao": new_version}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta produtos e carregamentos para análise (Parquet ou CSV gzip).")
+    parser.add_argument("--incremental", action="store_true", help="exporta apenas o que mudou desde a última exportação incremental")
+    parser.add_argument("--formato", choices=["parquet", "csv"], help="padrão: parquet se o pyarrow estiver instalado")
+    parser.add_argument("--saida", default=DEFAULT_OUTPUT_DIR, help=f"pasta de destino (padrão: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--bloco", type=int, default=CHUNK_SIZE, help=f"produtos por bloco (padrão: {CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+
+    conn = db_connection.conectar_banco() # Conexão própria: não bloqueia a sessão do administrador.
+    if not conn:
+        return 1
+    try:
+        result = export_products(conn, args.saida, args.incremental, args.formato, args.bloco)
+    finally:
+        db_connection.desconectar_banco(conn)
+    if not result:
+        print("A exportação falhou. Consulte o log para detalhes.")
+        return 1
+    print(f"{result['linhas']} produtos exportados para {result['arquivo']}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+import argparse
+import logging
+import random
+import sys
+import time
+from array import array
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import pyodbc
+import db_connection # Funções de acesso ao banco de dados.
+import addresses # Hash de deduplicação de endereços (Endereco.Hash_Endereco).
+import passwords # Hash das senhas dos usuários gerados.
+
+# Gerador de dados sintéticos em escala para o esquema de sql/script.sql, com semente determinística e
+# distribuição realista (poucas cidades concentram os destinatários; poucos remetentes enviam a maior parte).
+# Os dados são gerados em fluxo e gravados em lotes: a memória não cresce com a quantidade de produtos.
+BATCH_SIZE = 10000 # Linhas da tabela principal de cada fase por transação.
+DEFAULT_PASSWORD = "senha123" # Senha de todos os usuários gerados.
+# Concentração dos remetentes: com expoente 4, 1% dos clientes envia cerca de 30% dos produtos.
+SENDER_SKEW = 4.0
+# Concentração das cidades (lei de Zipf): peso da cidade de posição k = 1 / k ** CITY_SKEW.
+CITY_SKEW = 1.1
+
+# Cidades em ordem de volume: (Estado, Cidade, prefixo do CEP, DDD, bairros).
+CIDADES = [
+    ("SP", "São Paulo", "01", "11", ("Centro", "Pinheiros", "Moema", "Tatuapé", "Santana", "Itaquera")),
+    ("RJ", "Rio de Janeiro", "20", "21", ("Centro", "Copacabana", "Tijuca", "Barra da Tijuca", "Méier")),
+    ("MG", "Belo Horizonte", "30", "31", ("Centro", "Savassi", "Pampulha", "Barreiro")),
+    ("DF", "Brasília", "70", "61", ("Asa Sul", "Asa Norte", "Taguatinga", "Águas Claras")),
+    ("BA", "Salvador", "40", "71", ("Barra", "Pituba", "Itapuã", "Liberdade")),
+    ("CE", "Fortaleza", "60", "85", ("Aldeota", "Meireles", "Messejana")),
+    ("PR", "Curitiba", "80", "41", ("Batel", "Água Verde", "Boqueirão", "Portão")),
+    ("PE", "Recife", "50", "81", ("Boa Viagem", "Casa Forte", "Espinheiro")),
+    ("RS", "Porto Alegre", "90", "51", ("Moinhos de Vento", "Menino Deus", "Sarandi")),
+    ("AM", "Manaus", "69", "92", ("Adrianópolis", "Cidade Nova", "Ponta Negra")),
+    ("GO", "Goiânia", "74", "62", ("Setor Bueno", "Setor Oeste", "Campinas")),
+    ("PA", "Belém", "66", "91", ("Nazaré", "Umarizal", "Marco")),
+    ("SP", "Campinas", "13", "19", ("Cambuí", "Taquaral", "Barão Geraldo")),
+    ("SE", "Aracaju", "49", "79", ("Atalaia", "Jardins", "Farolândia")),
+    ("SC", "Florianópolis", "88", "48", ("Centro", "Trindade", "Ingleses")),
+    ("ES", "Vitória", "29", "27", ("Praia do Canto", "Jardim Camburi")),
+    ("MA", "São Luís", "65", "98", ("Renascença", "Cohama")),
+    ("AL", "Maceió", "57", "82", ("Ponta Verde", "Pajuçara")),
+    ("RN", "Natal", "59", "84", ("Ponta Negra", "Tirol")),
+    ("PB", "João Pessoa", "58", "83", ("Manaíra", "Tambaú")),
+]
+RUAS = ("Rua das Flores", "Avenida Brasil", "Rua São João", "Rua XV de Novembro", "Avenida Paulista", "Rua Sete de Setembro",
+        "Rua Tiradentes", "Avenida Getúlio Vargas", "Rua Dom Pedro II", "Rua da Paz", "Rua Santos Dumont", "Avenida Atlântica")
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João", "Larissa", "Marcos",
+         "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago", "Vitória", "Lucas")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa")
+EMPRESAS = ("Comércio", "Distribuidora", "Indústria", "Atacado", "Logística", "Importadora", "Varejo", "Serviços")
+VEICULOS = (("Moto", 30), ("Carro", 400), ("Van", 1500), ("Caminhão", 8000)) # (Tipo, Carga_Suportada em kg)
+PESOS_VEICULO = (30, 25, 35, 10) # Distribuição dos tipos de veículo da frota.
+TIPOS_PRODUTO = (("Comum", 75), ("Fragil", 15), ("Perecivel", 10))
+# Funcionários de cada sede (Cargo, Departamento), além dos motoristas.
+STAFF_PER_SEDE = (("Gerente", "Administrativo"), ("Auxiliar de Logistica", "Logística"),
+                  ("Auxiliar de Logistica", "Logística"), ("Atendente", "Atendimento"))
+
+Plan = namedtuple("Plan", ["produtos", "clientes", "motoristas", "sedes"])
+
+def plan_for(products):
+    """Quantidades de cada entidade para uma escala de produtos (10 mil a 50 milhões)."""
+    return Plan(
+        produtos=products,
+        clientes=max(100, products // 5),
+        motoristas=min(50_000, max(5, products // 500)),
+        sedes=min(300, max(3, products // 50_000)),
+    )
+
+# ----------------------- Valores derivados do código (sem estado) -----------------------
+# Nome, documentos e telefone de uma pessoa são funções do Codigo_Pessoa, para que as fases de
+# rastreamento não precisem guardar os dados de milhões de pessoas.
+
+def _mix(value):
+    return (value * 2654435761) & 0xFFFFFFFF # Hash multiplicativo de Knuth (espalha códigos sequenciais).
+
+def person_name(code):
+    h = _mix(code)
+    return f"{NOMES[h % len(NOMES)]} {SOBRENOMES[(h >> 8) % len(SOBRENOMES)]} {SOBRENOMES[(h >> 16) % len(SOBRENOMES)]}"
+
+def company_name(code):
+    h = _mix(code)
+    return f"{EMPRESAS[h % len(EMPRESAS)]} {SOBRENOMES[(h >> 8) % len(SOBRENOMES)]} Ltda"
+
+def _check_digit(digits, weights):
+    remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+def cpf_for(code):
+    """CPF válido (com dígitos verificadores) e único por código, formatado 000.000.000-00."""
+    digits = [int(c) for c in f"{(code * 7919) % 10 ** 9:09d}"] # 7919 é primo: códigos distintos -> bases distintas.
+    digits.append(_check_digit(digits, range(10, 1, -1)))
+    digits.append(_check_digit(digits, range(11, 1, -1)))
+    s = "".join(map(str, digits))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+def cnpj_for(code):
+    """CNPJ válido e único por código, formatado 00.000.000/0001-00."""
+    digits = [int(c) for c in f"{(code * 7919) % 10 ** 8:08d}0001"]
+    digits.append(_check_digit(digits, (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)))
+    digits.append(_check_digit(digits, (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)))
+    s = "".join(map(str, digits))
+    return f"{s[:2]}.{s[2:5]}.{s[5:8]}/{s[8:12]}-{s[12:]}"
+
+def phone_for(code, city):
+    return f"({CIDADES[city][3]}) 9{_mix(code) % 10 ** 8:08d}"
+
+def plate_for(driver_code):
+    """Placa única por motorista (base 36 do código, 8 caracteres)."""
+    chars, value = "", driver_code
+    while value:
+        value, digit = divmod(value, 36)
+        chars = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"[digit] + chars
+    return "S" + chars.rjust(7, "0")
+
+class SyntheticDataset:
+    """
+    Gera as linhas de cada tabela em lotes. Os identificadores começam após o maior valor já existente
+    em cada tabela (bases), e cada fase usa seu próprio gerador aleatório derivado da semente, então o
+    resultado não depende do tamanho do lote.
+    """
+
+    def __init__(self, plan, seed, end_date, days, bases):
+        self.plan = plan
+        self.seed = seed
+        self.end_date = end_date
+        self.days = days
+        self.bases = bases # {'endereco', 'pessoa', 'sede', 'rastreamento', 'produto'}: maior ID existente.
+        # Faixas de Codigo_Pessoa: clientes, motoristas, funcionários das sedes e um administrador.
+        self.first_client = bases["pessoa"] + 1
+        self.first_driver = self.first_client + plan.clientes
+        self.first_staff = self.first_driver + plan.motoristas
+        self.admin_code = self.first_staff + plan.sedes * len(STAFF_PER_SEDE)
+        self.people = self.admin_code - bases["pessoa"]
+        # Cidade (índice em CIDADES) do endereço de cada pessoa, usada no rastreamento dos destinatários.
+        self.city_of_person = array("H")
+        weights = [1 / (rank ** CITY_SKEW) for rank in range(1, len(CIDADES) + 1)]
+        self._city_cum_weights = [sum(weights[:i + 1]) for i in range(len(weights))]
+
+    def _rng(self, phase):
+        return random.Random(f"{self.seed}:{phase}")
+
+    def _address_id(self, person_code):
+        return self.bases["endereco"] + (person_code - self.bases["pessoa"]) # Um endereço por pessoa, na mesma ordem.
+
+    def _sede_address_id(self, sede_number):
+        return self.bases["endereco"] + self.people + sede_number
+
+    def addresses(self, batch_size):
+        """Endereços das pessoas e depois das sedes: lotes de [(tabela, colunas, linhas, identity)]."""
+        rng = self._rng("enderecos")
+        total = self.people + self.plan.sedes
+        columns = ("ID_Endereco", "CEP", "Estado", "Cidade", "Bairro", "Rua", "Numero", "Complemento", "Hash_Endereco")
+        for start in range(1, total + 1, batch_size):
+            rows = []
+            for n in range(start, min(total, start + batch_size - 1) + 1):
+                city = rng.choices(range(len(CIDADES)), cum_weights=self._city_cum_weights)[0]
+                estado, cidade, cep_prefix, _, bairros = CIDADES[city]
+                is_sede = n > self.people
+                if not is_sede:
+                    self.city_of_person.append(city)
+                # O complemento inclui o ID absoluto do endereço, garantindo hashes distintos (UQ_Endereco_Hash)
+                # também ao gerar de novo com a mesma semente sobre um banco já populado.
+                address_id = self.bases["endereco"] + n
+                complemento = f"Galpão {address_id}" if is_sede else f"Apto {address_id}"
+                address = addresses.clean_address(f"{cep_prefix}{rng.randint(0, 999_999):06d}", estado, cidade, rng.choice(bairros),
+                                                  rng.choice(RUAS), str(rng.randint(1, 4000)), complemento)
+                rows.append((address_id,) + address + (addresses.address_hash(*address),))
+            yield [("Endereco", columns, rows, True)]
+
+    def headquarters(self):
+        """Sedes (tipos 1, 2 e 3 do CHECK de Sede.Tipo) e um veículo por motorista."""
+        rng = self._rng("sedes")
+        sedes = [(self.bases["sede"] + k, rng.choices((1, 2, 3), weights=(50, 20, 30))[0], self._sede_address_id(k),
+                  f"(11) 3{rng.randint(0, 9_999_999):07d}") for k in range(1, self.plan.sedes + 1)]
+        vehicles = []
+        for code in range(self.first_driver, self.first_staff):
+            tipo, carga = rng.choices(VEICULOS, weights=PESOS_VEICULO)[0]
+            vehicles.append((plate_for(code), carga, tipo, "Disponivel" if rng.random() < 0.9 else "Indisponivel"))
+        yield [("Sede", ("ID_Sede", "Tipo", "ID_Endereco", "Telefone"), sedes, True),
+               ("Veiculo", ("Placa_Veiculo", "Carga_Suportada", "Tipo", "Status"), vehicles, False)]
+
+    def people_rows(self, batch_size, password_hash):
+        """Pessoas, com os registros de Cliente (PF/PJ) ou Funcionario (regras de cargo) e Usuario de cada uma."""
+        rng = self._rng("pessoas")
+        last = self.admin_code
+        for start in range(self.first_client, last + 1, batch_size):
+            people, clients, employees, users = [], [], [], []
+            for code in range(start, min(last, start + batch_size - 1) + 1):
+                city = self.city_of_person[code - self.first_client]
+                if code < self.first_driver: # Cliente: 80% PF, 20% PJ (CHK_Cliente_PF_PJ).
+                    if rng.random() < 0.8:
+                        name = person_name(code)
+                        birth = date(1950, 1, 1) + timedelta(days=rng.randint(0, 55 * 365))
+                        clients.append((code, "PF", cpf_for(code), birth, None, None))
+                    else:
+                        name = company_name(code)
+                        clients.append((code, "PJ", None, None, cnpj_for(code), name))
+                    login, user_type = f"cliente{code}", "Cliente"
+                else:
+                    name = person_name(code)
+                    if code < self.first_staff: # Motorista: com veículo e sem sede (CHK_Funcionario_Cargo).
+                        cargo, departamento, plate, sede = "Motorista", "Entregas", plate_for(code), None
+                    elif code < self.admin_code: # Funcionário de sede: com sede e sem veículo.
+                        k, position = divmod(code - self.first_staff, len(STAFF_PER_SEDE))
+                        (cargo, departamento), plate, sede = STAFF_PER_SEDE[position], None, self.bases["sede"] + k + 1
+                    else:
+                        cargo, departamento, plate, sede = "Admin", "Administrativo", None, None
+                    employees.append((code, cpf_for(code), departamento, cargo, plate, sede))
+                    login, user_type = f"{cargo.split()[0].lower()}{code}", cargo
+                email = f"{login}@exemplo.com.br"
+                people.append((code, name, f"{_mix(code) % 10 ** 9:09d}", phone_for(code, city), email, self._address_id(code)))
+                users.append((login, password_hash, code, user_type))
+            yield [
+                ("Pessoa", ("Codigo_Pessoa", "Nome", "RG", "Telefone", "Email", "ID_Endereco"), people, True),
+                ("Cliente", ("Codigo_Pessoa", "Tipo_Cliente", "CPF", "Data_Nascimento", "CNPJ", "Nome_Empresa"), clients, False),
+                ("Funcionario", ("Codigo_Funcionario", "CPF", "Departamento", "Cargo", "Placa_Veiculo", "ID_Sede"), employees, False),
+                ("Usuario", ("Login", "Senha_Hash", "Codigo_Pessoa", "Tipo_Usuario"), users, False),
+            ]
+
+    def _status(self, rng, age):
+        """Status coerente com a idade do produto (dias desde a chegada ao CD)."""
+        if age > 10:
+            return rng.choices(("Entregue", "Falha na Entrega", "Cancelado"), weights=(92, 3, 5))[0]
+        if age >= 3:
+            return rng.choices(("Entregue", "Em Transito", "Aguardando Coleta", "Falha na Entrega"), weights=(50, 30, 17, 3))[0]
+        return rng.choices(("Em Processamento", "Aguardando Coleta", "Em Transito"), weights=(50, 35, 15))[0]
+
+    def products(self, batch_size):
+        """Dados_Rastreamento, Produto_A_Ser_Entregue e Carregamento, no mesmo lote (ordem das FKs)."""
+        rng = self._rng("produtos")
+        clients, drivers = self.plan.clientes, self.plan.motoristas
+        product_types, type_weights = zip(*TIPOS_PRODUTO)
+        for start in range(1, self.plan.produtos + 1, batch_size):
+            tracking, products, loads = [], [], []
+            for n in range(start, min(self.plan.produtos, start + batch_size - 1) + 1):
+                product_id, tracking_id = self.bases["produto"] + n, self.bases["rastreamento"] + n
+                sender = self.first_client + min(clients - 1, int(clients * rng.random() ** SENDER_SKEW))
+                recipient = self.first_client + rng.randrange(clients)
+                if recipient == sender:
+                    recipient = self.first_client + (recipient - self.first_client + 1) % clients
+                city = self.city_of_person[recipient - self.first_client]
+                tracking.append((tracking_id, f"SYN{product_id:012d}", person_name(recipient), cpf_for(recipient),
+                                 self._address_id(recipient), CIDADES[city][1], CIDADES[city][0], phone_for(recipient, city)))
+
+                age = rng.randrange(self.days)
+                arrival = self.end_date - timedelta(days=age)
+                expected = arrival + timedelta(days=rng.randint(2, 10))
+                status = self._status(rng, age)
+                delivered = None
+                if status == "Entregue":
+                    delivered = min(self.end_date, max(arrival + timedelta(days=1), expected + timedelta(days=round(rng.gauss(0, 2)))))
+                driver = None if status in ("Em Processamento", "Cancelado") else self.first_driver + rng.randrange(drivers)
+                sede = None if status in ("Em Processamento", "Cancelado") else self.bases["sede"] + rng.randint(1, self.plan.sedes)
+                weight = round(min(500.0, max(0.1, rng.lognormvariate(0.7, 1.0))), 2)
+                products.append((product_id, weight, status, arrival, expected, delivered,
+                                 rng.choices(product_types, weights=type_weights)[0], sender, recipient, driver, tracking_id, sede))
+                if status in ("Em Transito", "Entregue", "Falha na Entrega"):
+                    loaded_at = datetime.combine(arrival + timedelta(days=1), datetime.min.time()) + timedelta(minutes=rng.randint(360, 1080))
+                    loads.append((plate_for(driver), product_id, loaded_at))
+            yield [
+                ("Dados_Rastreamento", ("ID_Rastreamento", "Codigo_Rastreamento", "Nome_Destinatario", "CPF_Destinatario",
+                                        "ID_Endereco", "Cidade", "Estado", "Telefone_Destinatario"), tracking, True),
+                ("Produto_A_Ser_Entregue", ("ID_Produto", "Peso", "Status_Entrega", "Data_Chegada_CD", "Data_Prevista_Entrega",
+                                            "Data_Entrega_Realizada", "Tipo_Produto", "ID_Remetente", "ID_Destinatario",
+                                            "Codigo_Funcionario_Motorista", "ID_Rastreamento", "ID_Sede_Recebimento"), products, True),
+                ("Carregamento", ("Placa_Veiculo", "ID_Produto", "Data_Carregamento"), loads, False),
+            ]
+
+# ----------------------- Gravação -----------------------
+
+# Tabelas com triggers de resumo (sql/resumos_operacionais.sql), desligados durante a carga.
+_TRIGGER_TABLES = ("Produto_A_Ser_Entregue", "Dados_Rastreamento", "Carregamento")
+
+def load_bases(conn):
+    """Maior identificador existente em cada tabela com IDENTITY (os dados gerados começam depois dele)."""
+    rows = db_connection.execute_query(conn, """
+    SELECT (SELECT ISNULL(MAX(ID_Endereco), 0) FROM Endereco), (SELECT ISNULL(MAX(Codigo_Pessoa), 0) FROM Pessoa),
+           (SELECT ISNULL(MAX(ID_Sede), 0) FROM Sede), (SELECT ISNULL(MAX(ID_Rastreamento), 0) FROM Dados_Rastreamento),
+           (SELECT ISNULL(MAX(ID_Produto), 0) FROM Produto_A_Ser_Entregue);
+    """, fetch_results=True)
+    if not rows:
+        return None
+    return dict(zip(("endereco", "pessoa", "sede", "rastreamento", "produto"), rows[0]))
+
+def _write_batch(conn, tables):
+    """Grava as linhas de cada tabela do lote (na ordem das FKs) em uma transação. Retorna as contagens por tabela."""
+    cursor = conn.cursor()
+    cursor.fast_executemany = True # Envia cada tabela do lote em poucas idas ao servidor.
+    try:
+        for table, columns, rows, identity in tables:
+            if not rows:
+                continue
+            if identity: # Identificadores explícitos: as FKs do lote são conhecidas sem consultar o banco.
+                cursor.execute(f"SET IDENTITY_INSERT {table} ON;")
+            cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))});", rows)
+            if identity:
+                cursor.execute(f"SET IDENTITY_INSERT {table} OFF;")
+        conn.commit()
+        return {table: len(rows) for table, _, rows, _ in tables}
+    except pyodbc.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def _set_triggers(conn, enabled):
+    action = "ENABLE" if enabled else "DISABLE"
+    db_connection.execute_transaction(conn, [(f"ALTER TABLE {table} {action} TRIGGER ALL;", None) for table in _TRIGGER_TABLES])
+
+def generate(conn, products, seed=42, batch_size=BATCH_SIZE, days=365, end_date=None, password=DEFAULT_PASSWORD):
+    """
+    Gera e grava um conjunto de dados sintético com a escala de plan_for(products).
+
+    Os triggers de resumo ficam desligados durante a carga; ao final, os resumos são recalculados com
+    sp_Recalcular_Resumos (se existir). A mesma semente, escala e data final geram os mesmos dados.
+
+    Returns:
+        dict: Quantidade de linhas gravadas por tabela.
+    """
+    plan = plan_for(products)
+    bases = load_bases(conn)
+    if bases is None:
+        raise RuntimeError("Não foi possível ler os identificadores atuais do banco.")
+    dataset = SyntheticDataset(plan, seed, end_date or date.today(), days, bases)
+    # Todas as contas compartilham um hash (o KDF é propositalmente caro; milhões de hashes levariam horas).
+    password_hash = passwords.hash_password(password)
+    logging.info("Gerando dados sintéticos: %s (semente %s).", plan, seed)
+
+    totals = {}
+    phases = [("Endereços", dataset.addresses(batch_size)), ("Sedes e veículos", dataset.headquarters()),
+              ("Pessoas e usuários", dataset.people_rows(batch_size, password_hash)), ("Produtos", dataset.products(batch_size))]
+    _set_triggers(conn, False)
+    try:
+        for name, batches in phases:
+            start, phase_rows = time.perf_counter(), 0
+            for tables in batches:
+                for table, count in _write_batch(conn, tables).items():
+                    totals[table] = totals.get(table, 0) + count
+                    phase_rows += count
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {phase_rows} linhas em {elapsed:.1f}s ({phase_rows / max(elapsed, 1e-9):,.0f} linhas/s)")
+    finally:
+        _set_triggers(conn, True)
+    db_connection.execute_query(conn, "IF OBJECT_ID('sp_Recalcular_Resumos') IS NOT NULL EXEC sp_Recalcular_Resumos;")
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera e carrega dados sintéticos em escala no banco configurado.")
+    parser.add_argument("--produtos", type=int, default=10_000, help="Quantidade de produtos (10 mil a 50 milhões).")
+    parser.add_argument("--seed", type=int, default=42, help="Semente (mesma semente e parâmetros geram os mesmos dados).")
+    parser.add_argument("--lote", type=int, default=BATCH_SIZE, help="Linhas por transação.")
+    parser.add_argument("--dias", type=int, default=365, help="Período coberto pelas datas de chegada ao CD.")
+    parser.add_argument("--data-final", type=date.fromisoformat, default=None, help="Última data de chegada (AAAA-MM-DD). Padrão: hoje.")
+    parser.add_argument("--senha", default=DEFAULT_PASSWORD, help="Senha de todos os usuários gerados.")
+    args = parser.parse_args(argv)
+
+    conexao_db = db_connection.conectar_banco()
+    if not conexao_db:
+        return 1
+    try:
+        totals = generate(conexao_db, args.produtos, args.seed, args.lote, args.dias, args.data_final, args.senha)
+    except pyodbc.Error as e:
+        print(f"Erro ao carregar os dados sintéticos: {e}")
+        return 1
+    finally:
+        db_connection.desconectar_banco(conexao_db)
+    for table, count in totals.items():
+        print(f"{table}: {count}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,138 @@
 import os
+import time
 import pyodbc
 import logging
 from dotenv import load_dotenv
+import metrics # Registro de métricas (chamadas, duração e erros do banco).
+import log_pipeline # Logging em fila (JSON, amostragem, escrita fora da thread que registra).
 
 # Carrega as variáveis do arquivo config.env para o ambiente
 load_dotenv('config.env')
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configuração de logging (LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_QUEUE_SIZE e LOG_SAMPLING; ver log_pipeline.py)
+log_pipeline.configure()
+logger = logging.getLogger("db_connection") # Logger próprio: permite amostrar o log de cada consulta (LOG_SAMPLING=db_connection=N).
 
 SERVER = os.getenv('DB_SERVER')
 DATABASE = os.getenv('DB_DATABASE')
 USERNAME = os.getenv('DB_USERNAME')
 PASSWORD = os.getenv('DB_PASSWORD')
 
+# Observadores de consultas (perfilamento, métricas, detector de N+1). Cada observador é chamado com
+# (evento, sql, segundos), onde evento é 'execute' (execute/executemany) ou 'fetch' (leitura de linhas).
+_query_observers = []
+
+def add_query_observer(observer):
+    """Registra uma função chamada a cada execução e leitura feita pelas conexões de conectar_banco()."""
+    _query_observers.append(observer)
+
+def remove_query_observer(observer):
+    if observer in _query_observers:
+        _query_observers.remove(observer)
+
+def _notify(event, sql, seconds):
+    for observer in _query_observers:
+        observer(event, sql, seconds)
+
+# Valores das métricas de chamadas resolvidos uma vez (evita a busca pelos rótulos a cada consulta).
+_CALL_METRICS = {event: (metrics.DB_CALLS.labels(event), metrics.DB_CALL_SECONDS.labels(event)) for event in ("execute", "fetch")}
+
+def _record_call_metrics(event, sql, seconds):
+    calls, duration = _CALL_METRICS[event]
+    calls.inc()
+    duration.observe(seconds)
+
+add_query_observer(_record_call_metrics)
+
+def _sqlstate(error):
+    """SQLSTATE de um pyodbc.Error (primeiro argumento da exceção), usado como rótulo nas métricas de erro."""
+    return str(error.args[0]) if error.args else "desconhecido"
+
+def _count_error(error, operation="consulta"):
+    metrics.DB_ERRORS.labels(operation, _sqlstate(error)).inc()
+
+class ObservedCursor:
+    """
+    Cursor pyodbc que informa aos observadores o SQL e o tempo de cada execução e leitura.
+    Sem observadores registrados, as chamadas vão direto ao cursor original.
+    """
+    __slots__ = ("_cursor", "_sql")
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_sql", None) # SQL da última execução (associado às leituras seguintes).
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value): # Ex: cursor.fast_executemany = True vai para o cursor original.
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+    def _timed(self, event, sql, method, *args):
+        if not _query_observers:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            _notify(event, sql, time.perf_counter() - start)
+
+    def execute(self, sql, *params):
+        object.__setattr__(self, "_sql", sql)
+        self._timed("execute", sql, self._cursor.execute, sql, *params)
+        return self
+
+    def executemany(self, sql, params):
+        object.__setattr__(self, "_sql", sql)
+        self._timed("execute", sql, self._cursor.executemany, sql, params)
+
+    def fetchone(self):
+        return self._timed("fetch", self._sql, self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed("fetch", self._sql, self._cursor.fetchall)
+
+    def fetchmany(self, *size):
+        return self._timed("fetch", self._sql, self._cursor.fetchmany, *size)
+
+    def nextset(self):
+        return self._timed("fetch", self._sql, self._cursor.nextset)
+
+class ObservedConnection:
+    """Conexão pyodbc cujos cursores são ObservedCursor. Os demais atributos e métodos são os da conexão original."""
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value): # Ex: conn.autocommit = True.
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def cursor(self):
+        return ObservedCursor(self._conn.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
 def criar_string_conexao():
     """Cria a string de conexão para o banco de dados SQL Server."""
     driver = "{ODBC Driver 18 for SQL Server}" # Certifique-se de que este driver está instalado
@@ -22,22 +141,24 @@ def criar_string_conexao():
 def conectar_banco():
     """Estabelece uma conexão com o banco de dados e retorna o objeto de conexão."""
     connection_string = criar_string_conexao()
-    logging.info(f"Tentando conectar com: SERVER={SERVER}, DATABASE={DATABASE}, UID={USERNAME}")
+    logger.info("Tentando conectar com: SERVER=%s, DATABASE=%s, UID=%s", SERVER, DATABASE, USERNAME)
     try:
         conn = pyodbc.connect(connection_string)
-        logging.info("Conexão bem-sucedida!")
-        return conn
+        logger.info("Conexão bem-sucedida!")
+        metrics.DB_CONNECTIONS.inc()
+        return ObservedConnection(conn) # Permite perfilamento/métricas das consultas (add_query_observer).
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
-        logging.error(f"Erro ao conectar ao banco de dados: {sqlstate}")
-        logging.error(ex)
+        _count_error(ex, "conectar") # 08001 (servidor), 28000 (credenciais), IM002 (driver), entre outros.
+        logger.error("Erro ao conectar ao banco de dados: %s", sqlstate)
+        logger.error(ex)
         if '08001' in str(sqlstate):
-            logging.error("Verifique se o nome do servidor está correto e se o servidor SQL está acessível.")
+            logger.error("Verifique se o nome do servidor está correto e se o servidor SQL está acessível.")
         elif '28000' in str(sqlstate):
-            logging.error("Verifique se o nome de usuário e a senha estão corretos.")
+            logger.error("Verifique se o nome de usuário e a senha estão corretos.")
         elif 'IM002' in str(sqlstate):
-            logging.error("Erro: Driver ODBC não encontrado. Verifique se 'ODBC Driver 18 for SQL Server' está instalado.")
-            logging.error("Você pode precisar instalar o driver ODBC para SQL Server da Microsoft.")
+            logger.error("Erro: Driver ODBC não encontrado. Verifique se 'ODBC Driver 18 for SQL Server' está instalado.")
+            logger.error("Você pode precisar instalar o driver ODBC para SQL Server da Microsoft.")
         return None
 
 def desconectar_banco(conexao):
@@ -45,9 +166,11 @@ def desconectar_banco(conexao):
     if conexao:
         try:
             conexao.close()
-            logging.info("Conexão fechada com sucesso.")
+            metrics.DB_CONNECTIONS.dec()
+            logger.info("Conexão fechada com sucesso.")
         except pyodbc.Error as e:
-            logging.error(f"Erro ao fechar a conexão: {e}")
+            _count_error(e, "desconectar")
+            logger.error("Erro ao fechar a conexão: %s", e)
 
 def execute_query(conn, sql, params=None, fetch_results=False):
     """
@@ -63,7 +186,7 @@ def execute_query(conn, sql, params=None, fetch_results=False):
         list or None: Lista de tuplas com os resultados se fetch_results for True, caso contrário None.
     """
     if not conn:
-        logging.error("Conexão com o banco de dados não está ativa.")
+        logger.error("Conexão com o banco de dados não está ativa.")
         return None
 
     try:
@@ -78,16 +201,57 @@ def execute_query(conn, sql, params=None, fetch_results=False):
             return results
         else:
             conn.commit() # Confirma as alterações para INSERT, UPDATE, DELETE
-            logging.info(f"Consulta executada com sucesso: {sql[:100]}...")
+            logger.info("Consulta executada com sucesso: %.100s...", sql)
             return True
     except pyodbc.Error as e:
+        _count_error(e)
         conn.rollback() # Reverte as alterações em caso de erro
-        logging.error(f"Erro ao executar a consulta SQL: {e}")
+        logger.error("Erro ao executar a consulta SQL: %s", e)
         return None
     finally:
         if cursor:
             cursor.close()
 
+def iterate_query(conn, sql, params=None, batch_size=500):
+    """
+    Executa um SELECT e produz as linhas sob demanda, buscando `batch_size` por vez no cursor
+    (ex: para exibir uma listagem grande página por página sem carregar tudo na memória).
+
+    O cursor fica aberto enquanto o gerador estiver em uso e é fechado ao esgotá-lo ou chamar close().
+    Em caso de erro, registra no log e encerra a iteração.
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        sql (str): A consulta SELECT.
+        params (tuple, optional): Parâmetros para a consulta. Defaults to None.
+        batch_size (int): Linhas buscadas por ida ao servidor.
+
+    Yields:
+        pyodbc.Row: As linhas do resultado, na ordem da consulta.
+    """
+    if not conn:
+        logger.error("Conexão com o banco de dados não está ativa.")
+        return
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(sql, params)
+        else:
+            cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    except pyodbc.Error as e:
+        _count_error(e)
+        logger.error("Erro ao executar a consulta SQL: %s", e)
+    finally:
+        if cursor:
+            cursor.close()
+
 def execute_insert_and_get_last_id(conn, insert_sql, params=None):
     """
     Executa uma consulta INSERT e retorna o ID da última linha inserida
@@ -102,7 +266,7 @@ def execute_insert_and_get_last_id(conn, insert_sql, params=None):
         int or None: O ID da última linha inserida se bem-sucedido, caso contrário None.
     """
     if not conn:
-        logging.error("Conexão com o banco de dados não está ativa para inserir e obter ID.")
+        logger.error("Conexão com o banco de dados não está ativa para inserir e obter ID.")
         return None
 
     try:
@@ -125,15 +289,90 @@ def execute_insert_and_get_last_id(conn, insert_sql, params=None):
         if result and result[0] is not None:
             new_id = int(result[0])
             conn.commit() # Comita a transação APENAS se o ID foi recuperado com sucesso
-            logging.info(f"INSERT bem-sucedido e ID gerado (@@IDENTITY): {new_id}")
+            logger.info("INSERT bem-sucedido e ID gerado (@@IDENTITY): %s", new_id)
             return new_id
         else:
             conn.rollback() # Reverte se não conseguiu o ID (indicando problema no INSERT ou recuperação)
-            logging.warning("INSERT bem-sucedido, mas @@IDENTITY retornou NULL ou não foi possível recuperar. Revertendo transação.")
+            logger.warning("INSERT bem-sucedido, mas @@IDENTITY retornou NULL ou não foi possível recuperar. Revertendo transação.")
             return None
     except pyodbc.Error as e:
+        _count_error(e)
         conn.rollback() # Reverte em caso de erro
-        logging.error(f"Erro ao executar INSERT e obter ID: {e}")
+        logger.error("Erro ao executar INSERT e obter ID: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+
+def execute_and_fetch(conn, sql, params=None):
+    """
+    Executa uma instrução que altera dados e também retorna linhas (ex: INSERT com OUTPUT INSERTED,
+    ou um lote "INSERT ... WHERE NOT EXISTS; SELECT ..."), confirmando a transação.
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        sql (str): A string da consulta SQL.
+        params (tuple, optional): Parâmetros para a consulta. Defaults to None.
+
+    Returns:
+        list or None: Lista de tuplas com as linhas retornadas, ou None em caso de erro.
+    """
+    if not conn:
+        logger.error("Conexão com o banco de dados não está ativa.")
+        return None
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(sql, params)
+        else:
+            cursor.execute(sql)
+        results = cursor.fetchall()
+        conn.commit() # Confirma as alterações somente após ler o resultado.
+        return results
+    except pyodbc.Error as e:
+        _count_error(e)
+        conn.rollback() # Reverte as alterações em caso de erro.
+        logger.error("Erro ao executar a consulta SQL: %s", e)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+
+def execute_transaction(conn, statements):
+    """
+    Executa várias instruções SQL em uma única transação (um único commit).
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        statements (list): Lista de tuplas (sql, params) executadas na ordem informada.
+
+    Returns:
+        list or None: Número de linhas afetadas por cada instrução se todas forem bem-sucedidas,
+                      caso contrário None (nesse caso nada é gravado, a transação é revertida).
+    """
+    if not conn:
+        logger.error("Conexão com o banco de dados não está ativa para executar a transação.")
+        return None
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        rowcounts = []
+        for sql, params in statements:
+            if params:
+                cursor.execute(sql, params)
+            else:
+                cursor.execute(sql)
+            rowcounts.append(cursor.rowcount)
+        conn.commit() # Confirma todas as instruções de uma só vez.
+        logger.info("Transação executada com sucesso (%d instruções).", len(statements))
+        return rowcounts
+    except pyodbc.Error as e:
+        _count_error(e)
+        conn.rollback() # Reverte todas as instruções da transação.
+        logger.error("Erro ao executar a transação: %s", e)
         return None
     finally:
         if cursor:
@@ -144,12 +383,12 @@ if __name__ == "__main__":
     try:
         conexao_db = conectar_banco()
         if conexao_db:
-            logging.info("Conexão de teste bem-sucedida. Desconectando...")
+            logger.info("Conexão de teste bem-sucedida. Desconectando...")
         else:
-            logging.error("Falha na conexão de teste.")
+            logger.error("Falha na conexão de teste.")
     except Exception as e:
-        logging.error(f"Ocorreu um erro inesperado no programa principal: {e}")
+        logger.error("Ocorreu um erro inesperado no programa principal: %s", e)
     finally:
         if conexao_db:
             desconectar_banco(conexao_db)
-    logging.info("Script de conexão finalizado.")
+    logger.info("Script de conexão finalizado.")
@@ -0,0 +1,49 @@
+from collections import namedtuple
+import db_connection # Funções de acesso ao banco de dados.
+
+# Status que retiram o produto da fila do motorista.
+FINAL_STATUSES = ('Entregue', 'Cancelado')
+# Status que o motorista pode registrar (marcações do diário offline, ver driver_sync.py).
+DELIVERED = 'Entregue'
+FAILED = 'Falha na Entrega'
+DRIVER_STATUSES = (DELIVERED, FAILED)
+
+WorkItem = namedtuple("WorkItem", [
+    "id_produto", "codigo_rastreamento", "destinatario", "telefone", "endereco", "cidade", "estado", "cep",
+    "status", "tipo_produto", "peso", "versao",
+])
+
+# Produto atribuído ao motorista: diretamente (Codigo_Funcionario_Motorista) ou carregado no veículo dele.
+# Usado tanto na leitura da fila quanto no envio, para que o motorista só altere produtos que são seus.
+ASSIGNED_TO_DRIVER_SQL = """
+(P.Codigo_Funcionario_Motorista = ?
+ OR P.ID_Produto IN (SELECT C.ID_Produto FROM Carregamento C
+                     WHERE C.Placa_Veiculo = (SELECT F.Placa_Veiculo FROM Funcionario F WHERE F.Codigo_Funcionario = ?)))
+"""
+
+def load_work_queue(conn, driver_code):
+    """
+    Carrega, em uma única consulta, os produtos pendentes atribuídos ao motorista, em ordem de rota.
+
+    Não há roteirização no sistema; a ordem de rota é aproximada agrupando por estado e cidade e
+    ordenando por CEP, rua e número do endereço de entrega.
+
+    Returns:
+        list or None: Lista de WorkItem, ou None em caso de erro.
+    """
+    sql = f"""
+    SELECT P.ID_Produto, DR.Codigo_Rastreamento, DR.Nome_Destinatario, DR.Telefone_Destinatario,
+           CONCAT(E.Rua, ', ', E.Numero, CASE WHEN E.Complemento IS NULL THEN '' ELSE ' - ' + E.Complemento END, ' - ', E.Bairro),
+           DR.Cidade, DR.Estado, E.CEP, P.Status_Entrega, P.Tipo_Produto, P.Peso,
+           CAST(P.Versao_Linha AS BIGINT) -- Versão da linha, usada na detecção de conflitos da sincronização offline.
+    FROM Produto_A_Ser_Entregue P
+    INNER JOIN Dados_Rastreamento DR ON DR.ID_Rastreamento = P.ID_Rastreamento
+    INNER JOIN Endereco E ON E.ID_Endereco = DR.ID_Endereco
+    WHERE P.Status_Entrega NOT IN ({', '.join('?' * len(FINAL_STATUSES))})
+      AND {ASSIGNED_TO_DRIVER_SQL}
+    ORDER BY DR.Estado, DR.Cidade, E.CEP, E.Rua, E.Numero, P.ID_Produto;
+    """
+    rows = db_connection.execute_query(conn, sql, FINAL_STATUSES + (driver_code, driver_code), fetch_results=True)
+    if rows is None:
+        return None
+    return [WorkItem(*row) for row in rows]
@@ -0,0 +1,316 @@
+import logging
+import os
+import sqlite3
+import time
+import uuid
+import pyodbc
+import driver_queue # Fila de entregas do motorista (consulta e status permitidos).
+import proof_of_delivery # Comprovantes de entrega (arquivos locais endereçados por hash).
+
+# Pasta dos arquivos locais do motorista (um arquivo SQLite por motorista).
+OFFLINE_DIR = os.getenv("DRIVER_OFFLINE_DIR", os.path.join("data", "offline"))
+# Registros enviados por transação na sincronização.
+SYNC_BATCH_SIZE = 500
+
+# Resultados da sincronização de cada registro do diário.
+APPLIED = "aplicado" # Status gravado no servidor (ou o servidor já tinha esse status).
+CONFLICT = "conflito" # O produto foi alterado no servidor depois que a fila foi baixada.
+NOT_ASSIGNED = "nao_atribuido" # O produto não existe mais ou não está atribuído ao motorista.
+SUPERSEDED = "substituido" # Marcação local substituída por outra mais recente do mesmo produto (não enviada).
+
+# Situação dos comprovantes no armazenamento local (coluna enviado).
+PROOF_PENDING, PROOF_SENT, PROOF_REJECTED = 0, 1, 2 # Recusado: produto inexistente ou não atribuído ao motorista.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifesto (
+    posicao INTEGER NOT NULL,
+    id_produto INTEGER PRIMARY KEY,
+    codigo_rastreamento TEXT, destinatario TEXT, telefone TEXT, endereco TEXT,
+    cidade TEXT, estado TEXT, cep TEXT, status TEXT, tipo_produto TEXT, peso REAL,
+    versao INTEGER
+);
+-- Diário somente de inserção: cada marcação do motorista vira uma linha com chave de idempotência.
+CREATE TABLE IF NOT EXISTS diario (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave TEXT NOT NULL UNIQUE,
+    id_produto INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    versao_base INTEGER,
+    criado_em REAL NOT NULL
+);
+-- Resultado da sincronização de cada registro do diário (ausente = pendente).
+CREATE TABLE IF NOT EXISTS diario_sincronizado (
+    chave TEXT PRIMARY KEY,
+    resultado TEXT NOT NULL,
+    sincronizado_em REAL NOT NULL
+);
+-- Comprovantes de entrega guardados no repositório local; os metadados vão ao servidor na sincronização.
+CREATE TABLE IF NOT EXISTS comprovante (
+    id_produto INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    tipo_midia TEXT,
+    nome_original TEXT,
+    enviado INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_produto, hash)
+);
+CREATE TABLE IF NOT EXISTS controle (
+    nome TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+# Aplicação de um lote no servidor. O lote chega na tabela temporária #Lote_Sincronizacao;
+# chaves já processadas devolvem o resultado gravado anteriormente (reenvio seguro).
+_SYNC_SQL = f"""
+SET NOCOUNT ON;
+SELECT L.Chave, L.ID_Produto, L.Status,
+       CASE
+           WHEN S.Chave_Idempotencia IS NOT NULL THEN S.Resultado
+           -- CASE em vez de NOT: com Codigo_Funcionario_Motorista NULL o predicado é UNKNOWN, e NOT UNKNOWN não é verdadeiro.
+           WHEN P.ID_Produto IS NULL OR CASE WHEN {driver_queue.ASSIGNED_TO_DRIVER_SQL} THEN 1 ELSE 0 END = 0 THEN '{NOT_ASSIGNED}'
+           WHEN P.Status_Entrega = L.Status THEN '{APPLIED}'
+           WHEN P.Status_Entrega IN ({', '.join('?' * len(driver_queue.FINAL_STATUSES))})
+             OR (L.Versao_Base IS NOT NULL AND CAST(P.Versao_Linha AS BIGINT) <> L.Versao_Base) THEN '{CONFLICT}'
+           ELSE 'aplicar'
+       END AS Resultado,
+       CASE WHEN S.Chave_Idempotencia IS NULL THEN 1 ELSE 0 END AS Novo
+INTO #Resultado_Sincronizacao
+FROM #Lote_Sincronizacao L
+LEFT JOIN Sincronizacao_Motorista S ON S.Chave_Idempotencia = L.Chave
+LEFT JOIN Produto_A_Ser_Entregue P WITH (UPDLOCK) ON P.ID_Produto = L.ID_Produto;
+
+UPDATE P SET P.Status_Entrega = R.Status
+FROM Produto_A_Ser_Entregue P
+INNER JOIN #Resultado_Sincronizacao R ON R.ID_Produto = P.ID_Produto
+WHERE R.Resultado = 'aplicar';
+
+UPDATE #Resultado_Sincronizacao SET Resultado = '{APPLIED}' WHERE Resultado = 'aplicar';
+
+INSERT INTO Sincronizacao_Motorista (Chave_Idempotencia, ID_Produto, Codigo_Funcionario, Status, Resultado)
+SELECT Chave, ID_Produto, ?, Status, Resultado FROM #Resultado_Sincronizacao WHERE Novo = 1;
+
+SELECT Chave, Resultado FROM #Resultado_Sincronizacao;
+"""
+
+class OfflineStore:
+    """
+    Armazenamento local (SQLite) do motorista: manifesto de entregas e diário de marcações.
+
+    As marcações (mark, pending, len) são gravadas em disco imediatamente e sobrevivem a quedas de
+    conexão ou do programa; sync() as envia ao servidor em lote.
+    """
+
+    def __init__(self, driver_code, path=None):
+        self.driver_code = driver_code
+        self.path = path or os.path.join(OFFLINE_DIR, f"motorista_{driver_code}.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL;") # Gravações com log de escrita antecipada.
+        self._db.execute("PRAGMA synchronous=NORMAL;")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("""
+            SELECT COUNT(*) FROM diario D
+            WHERE NOT EXISTS (SELECT 1 FROM diario_sincronizado S WHERE S.chave = D.chave)
+        """).fetchone()[0]
+
+    def save_manifest(self, items):
+        """Substitui o manifesto local pela fila baixada do servidor (lista de driver_queue.WorkItem)."""
+        with self._db:
+            self._db.execute("DELETE FROM manifesto;")
+            self._db.executemany("INSERT INTO manifesto VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+                                 [(position,) + tuple(item[:10]) + (float(item.peso), item.versao)
+                                  for position, item in enumerate(items, 1)])
+            self._db.execute("INSERT OR REPLACE INTO controle VALUES ('manifesto_baixado_em', ?);", (str(time.time()),))
+
+    def manifest(self):
+        """Retorna o manifesto local em ordem de rota (lista de driver_queue.WorkItem)."""
+        rows = self._db.execute("""
+            SELECT id_produto, codigo_rastreamento, destinatario, telefone, endereco, cidade, estado, cep,
+                   status, tipo_produto, peso, versao
+            FROM manifesto ORDER BY posicao;
+        """).fetchall()
+        return [driver_queue.WorkItem(*row) for row in rows]
+
+    def manifest_downloaded_at(self):
+        """Instante (epoch) do último download do manifesto, ou None."""
+        row = self._db.execute("SELECT valor FROM controle WHERE nome = 'manifesto_baixado_em';").fetchone()
+        return float(row[0]) if row else None
+
+    def mark(self, product_ids, status):
+        """Acrescenta uma marcação ao diário para cada produto (gravada em disco antes de retornar)."""
+        if status not in driver_queue.DRIVER_STATUSES:
+            raise ValueError(f"Status não permitido para o motorista: {status}")
+        now = time.time()
+        versions = dict(self._db.execute("SELECT id_produto, versao FROM manifesto;").fetchall())
+        with self._db:
+            self._db.executemany("INSERT INTO diario (chave, id_produto, status, versao_base, criado_em) VALUES (?, ?, ?, ?, ?);",
+                                 [(str(uuid.uuid4()), product_id, status, versions.get(product_id), now) for product_id in product_ids])
+
+    def _pending_entries(self):
+        return self._db.execute("""
+            SELECT D.chave, D.id_produto, D.status, D.versao_base FROM diario D
+            WHERE NOT EXISTS (SELECT 1 FROM diario_sincronizado S WHERE S.chave = D.chave)
+            ORDER BY D.seq;
+        """).fetchall()
+
+    def pending(self):
+        """Marcações ainda não sincronizadas como lista de (ID_Produto, status), a mais recente de cada produto."""
+        latest = {}
+        for _, product_id, status, _ in self._pending_entries():
+            latest.pop(product_id, None) # Mantém a ordem da última marcação.
+            latest[product_id] = status
+        return list(latest.items())
+
+    def discard_pending(self):
+        """Descarta as marcações pendentes (registradas como substituídas; o diário não é apagado)."""
+        now = time.time()
+        with self._db:
+            self._db.executemany("INSERT INTO diario_sincronizado VALUES (?, ?, ?);",
+                                 [(key, SUPERSEDED, now) for key, _, _, _ in self._pending_entries()])
+
+    def clear(self):
+        self.discard_pending()
+
+    def record_results(self, results):
+        """Grava o resultado da sincronização de cada chave: lista de (chave, resultado)."""
+        now = time.time()
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO diario_sincronizado VALUES (?, ?, ?);",
+                                 [(key, result, now) for key, result in results])
+
+    def add_proof(self, product_id, path, kind):
+        """
+        Guarda um comprovante no repositório local (proof_of_delivery.store_blob) e o registra para envio.
+
+        Returns:
+            str: O hash do conteúdo.
+        """
+        if kind not in proof_of_delivery.KINDS:
+            raise ValueError(f"Tipo de comprovante inválido: {kind}")
+        content_hash, size = proof_of_delivery.store_blob(path)
+        name, media_type = proof_of_delivery.describe_file(path)
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO comprovante (id_produto, hash, tipo, tamanho, tipo_midia, nome_original) VALUES (?, ?, ?, ?, ?, ?);",
+                             (product_id, content_hash, kind, size, media_type, name))
+        return content_hash
+
+    def pending_proofs(self):
+        """Comprovantes ainda não enviados: (ID_Produto, Tipo, Hash, Tamanho, Tipo_Midia, Nome_Original)."""
+        return self._db.execute("""
+            SELECT id_produto, tipo, hash, tamanho, tipo_midia, nome_original FROM comprovante WHERE enviado = 0;
+        """).fetchall()
+
+    def mark_proofs_sent(self, proofs, state=PROOF_SENT):
+        """Marca os comprovantes como enviados (ou recusados, com state=PROOF_REJECTED; o arquivo continua guardado)."""
+        with self._db:
+            self._db.executemany("UPDATE comprovante SET enviado = ? WHERE id_produto = ? AND hash = ?;",
+                                 [(state, proof[0], proof[2]) for proof in proofs])
+
+    def last_conflicts(self, limit=50):
+        """Marcações recusadas na sincronização (conflito ou produto não atribuído), das mais recentes para as mais antigas."""
+        return self._db.execute("""
+            SELECT D.id_produto, D.status, S.resultado FROM diario D
+            JOIN diario_sincronizado S ON S.chave = D.chave
+            WHERE S.resultado IN (?, ?)
+            ORDER BY S.sincronizado_em DESC, D.seq DESC LIMIT ?;
+        """, (CONFLICT, NOT_ASSIGNED, limit)).fetchall()
+
+def download_manifest(conn, store):
+    """Baixa a fila do motorista do servidor para o armazenamento local. Retorna a quantidade de itens, ou None."""
+    items = driver_queue.load_work_queue(conn, store.driver_code)
+    if items is None:
+        return None
+    store.save_manifest(items)
+    return len(items)
+
+def _send_batch(conn, driver_code, batch):
+    """Envia um lote (chave, ID_Produto, status, versão base) em uma transação. Retorna [(chave, resultado)] ou None."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        IF OBJECT_ID('tempdb..#Lote_Sincronizacao') IS NOT NULL DROP TABLE #Lote_Sincronizacao;
+        IF OBJECT_ID('tempdb..#Resultado_Sincronizacao') IS NOT NULL DROP TABLE #Resultado_Sincronizacao;
+        CREATE TABLE #Lote_Sincronizacao (Chave CHAR(36) PRIMARY KEY, ID_Produto INT NOT NULL, Status VARCHAR(50) NOT NULL, Versao_Base BIGINT NULL);
+        """)
+        cursor.fast_executemany = True # O lote inteiro vai ao servidor em poucas idas.
+        cursor.executemany("INSERT INTO #Lote_Sincronizacao (Chave, ID_Produto, Status, Versao_Base) VALUES (?, ?, ?, ?);", batch)
+        params = (driver_code, driver_code) + driver_queue.FINAL_STATUSES + (driver_code,)
+        cursor.execute(_SYNC_SQL, params)
+        results = [(row[0], row[1]) for row in cursor.fetchall()]
+        conn.commit()
+        return results
+    except pyodbc.Error as e:
+        conn.rollback()
+        logging.error(f"Erro ao sincronizar o lote do motorista {driver_code}: {e}")
+        return None
+    finally:
+        cursor.close()
+
+def sync(conn, store, batch_size=SYNC_BATCH_SIZE):
+    """
+    Reenvia ao servidor as marcações pendentes do diário local e os metadados dos comprovantes de
+    entrega registrados offline, e atualiza o manifesto.
+
+    Para cada produto é enviada apenas a marcação mais recente (as anteriores ficam como 'substituido').
+    Cada lote é aplicado em uma transação; a chave de idempotência de cada marcação é registrada em
+    Sincronizacao_Motorista, de modo que reenviar um lote já aplicado (ex: a resposta se perdeu) não o
+    aplica de novo. Marcações sobre produtos alterados no servidor depois do download do manifesto são
+    recusadas como conflito.
+
+    Returns:
+        dict or None: Contagem por resultado (ex: {'aplicado': 40, 'conflito': 1}), ou None se algum
+                      lote falhou (os lotes já confirmados ficam registrados; o restante continua pendente).
+    """
+    entries = store._pending_entries()
+    latest = {} # ID_Produto -> registro mais recente
+    superseded = []
+    for entry in entries:
+        previous = latest.get(entry[1])
+        if previous:
+            superseded.append((previous[0], SUPERSEDED))
+        latest[entry[1]] = entry
+    # A versão base é a do manifesto quando o produto foi marcado pela primeira vez nesta rodada.
+    first_version = {}
+    for entry in entries:
+        first_version.setdefault(entry[1], entry[3])
+    to_send = [(key, product_id, status, first_version[product_id]) for key, product_id, status, _ in latest.values()]
+
+    counts = {}
+    if superseded:
+        store.record_results(superseded)
+        counts[SUPERSEDED] = len(superseded)
+    for start in range(0, len(to_send), batch_size):
+        results = _send_batch(conn, store.driver_code, to_send[start:start + batch_size])
+        if results is None:
+            return None
+        store.record_results(results)
+        for _, result in results:
+            counts[result] = counts.get(result, 0) + 1
+
+    proofs = store.pending_proofs()
+    for start in range(0, len(proofs), batch_size):
+        batch = proofs[start:start + batch_size]
+        # Reenvio seguro: comprovantes já registrados para o produto (mesmo hash) são ignorados pelo servidor.
+        accepted = proof_of_delivery.save_metadata(conn, batch, store.driver_code, driver_only=True)
+        if accepted is None:
+            return None
+        sent = [proof for proof in batch if (proof[0], proof[2]) in accepted]
+        rejected = [proof for proof in batch if (proof[0], proof[2]) not in accepted]
+        store.mark_proofs_sent(sent)
+        if rejected: # Ficam no aparelho como recusados, para não serem reenviados a cada sincronização.
+            store.mark_proofs_sent(rejected, PROOF_REJECTED)
+            logging.warning("Motorista %s: %d comprovante(s) recusado(s) (produto não atribuído): %s", store.driver_code,
+                            len(rejected), ", ".join(str(proof[0]) for proof in rejected[:20]))
+        counts["comprovantes"] = counts.get("comprovantes", 0) + len(sent)
+        if rejected:
+            counts["comprovantes_recusados"] = counts.get("comprovantes_recusados", 0) + len(rejected)
+
+    download_manifest(conn, store) # O manifesto passa a refletir o estado do servidor.
+    return counts
@@ -0,0 +1,195 @@
+import atexit
+import collections
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import metrics # Contador de registros descartados com a fila cheia.
+
+# Configuração lida em configure() (depois que db_connection carrega o config.env):
+#   LOG_LEVEL      nível mínimo registrado (DEBUG, INFO, WARNING, ERROR; padrão INFO).
+#   LOG_FORMAT     "json" (um objeto por linha) ou "texto" (o formato legível de antes); padrão: texto
+#                  quando o stderr é um terminal interativo, json caso contrário (ex: redirecionado para arquivo).
+#   LOG_FILE       arquivo de log opcional, além do stderr. Enquanto o modo tela cheia (tui.py) está
+#                  ativo, o stderr fica em pausa e só o arquivo recebe os registros na hora.
+#   LOG_QUEUE_SIZE capacidade da fila entre quem registra e a thread que escreve (padrão 10000);
+#                  com a fila cheia, o registro é descartado e contado.
+#   LOG_SAMPLING   amostragem por logger das mensagens abaixo de WARNING: "db_connection=10,addresses=5"
+#                  mantém 1 a cada N.
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Registros do console guardados durante a pausa (os mais antigos são descartados além disso).
+PAUSED_BACKLOG = 1000
+
+DROPPED = metrics.counter("srl_log_dropped_total", "Registros de log descartados por fila cheia.")
+SAMPLED_OUT = metrics.counter("srl_log_sampled_out_total", "Registros de log omitidos pela amostragem.", ("logger",))
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha: instante (UTC), nível, logger, mensagem, thread e, se houver, a exceção."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(), # A mensagem só é montada aqui, na thread do listener.
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Mantém 1 a cada N registros abaixo de WARNING dos loggers configurados (e dos seus filhos).
+    Avisos e erros passam sempre. A contagem é por logger e determinística (sem sorteio).
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates # {nome do logger: N}
+        self._counts = {name: 0 for name in rates}
+
+    def _rule(self, name):
+        while name:
+            if name in self.rates:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rule = self._rule(record.name)
+        if rule is None or self.rates[rule] <= 1:
+            return True
+        self._counts[rule] += 1
+        if self._counts[rule] % self.rates[rule] == 1:
+            return True
+        SAMPLED_OUT.labels(rule).inc()
+        return False
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler que não bloqueia nem formata: o registro vai para a fila como está (a mensagem é montada
+    pelo listener) e, com a fila cheia, é descartado e contado em srl_log_dropped_total.
+    """
+
+    def prepare(self, record):
+        # O QueueHandler padrão formata a mensagem aqui, na thread de quem registrou; a formatação fica para o listener.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED.inc()
+
+class ConsoleHandler(logging.StreamHandler):
+    """
+    Handler do stderr que pode ser pausado (ex: enquanto o curses desenha a tela): durante a pausa os
+    registros são guardados (até PAUSED_BACKLOG) e escritos ao retomar.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self._held = None # deque com os registros guardados durante a pausa; None fora dela.
+
+    def emit(self, record):
+        if self._held is not None:
+            self._held.append(record)
+        else:
+            super().emit(record)
+
+    def pause(self):
+        with self.lock:
+            if self._held is None:
+                self._held = collections.deque(maxlen=PAUSED_BACKLOG)
+
+    def resume(self):
+        with self.lock:
+            held, self._held = self._held, None
+            for record in held or ():
+                super().emit(record)
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel) # Na parada, espera espaço na fila em vez de falhar com ela cheia.
+
+def parse_sampling(text):
+    """Converte "logger=N,outro=M" em {logger: N}. Entradas inválidas são ignoradas."""
+    rates = {}
+    for item in text.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip().isdigit() and int(rate) > 0:
+            rates[name.strip()] = int(rate)
+    return rates
+
+_listener = None
+_console = None # ConsoleHandler do stderr (pausado pelo modo tela cheia).
+
+def configure(level=None, log_format=None, log_file=None, queue_size=None, sampling=None):
+    """
+    Substitui os handlers do logger raiz por um QueueHandler limitado. A escrita (stderr e arquivo
+    opcional) acontece em uma thread própria (QueueListener), fora do caminho de quem registra.
+    Argumentos omitidos vêm das variáveis de ambiente. Chamadas repetidas não fazem nada.
+    """
+    global _listener, _console
+    if _listener is not None:
+        return
+    level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+    invalid_level = not isinstance(logging.getLevelName(level), int)
+    if invalid_level: # Nível desconhecido: não impede a aplicação de iniciar.
+        invalid_level, level = level, "INFO"
+    log_format = log_format or os.getenv("LOG_FORMAT") or ("texto" if sys.stderr.isatty() else "json")
+    log_format = log_format.lower()
+    log_file = log_file or os.getenv("LOG_FILE")
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    sampling = os.getenv("LOG_SAMPLING", "") if sampling is None else sampling
+    formatter = JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    _console = ConsoleHandler(sys.stderr)
+    handlers = [_console]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = BoundedQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sampling(sampling)))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+    if invalid_level:
+        logging.warning("LOG_LEVEL inválido (%s); usando INFO.", invalid_level)
+
+def pause_console():
+    """Suspende a escrita no stderr (o arquivo de log continua); os registros aparecem em resume_console()."""
+    if _console is not None:
+        _console.pause()
+
+def resume_console():
+    """Retoma a escrita no stderr, escrevendo antes os registros guardados durante a pausa."""
+    if _console is not None:
+        _console.resume()
+
+def shutdown():
+    """Esvazia a fila e para a thread de escrita (chamado automaticamente ao sair)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    resume_console() # Registros guardados durante uma pausa não se perdem na saída.
+
+def dropped_count():
+    """Quantidade de registros descartados por fila cheia desde o início do processo."""
+    return DROPPED.labels().value
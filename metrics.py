@@ -0,0 +1,279 @@
+import atexit
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Exportação opcional das métricas no formato de texto do Prometheus (ver start_from_env()).
+HTTP_PORT_ENV_VAR = "METRICS_PORT" # Ex: 9464 -> http://127.0.0.1:9464/metrics
+TEXTFILE_ENV_VAR = "METRICS_TEXTFILE" # Ex: /var/lib/node_exporter/textfile/srl.prom (coletor textfile do node_exporter)
+TEXTFILE_INTERVAL_ENV_VAR = "METRICS_TEXTFILE_INTERVAL_SECONDS" # Padrão: 15
+
+# Limites padrão (segundos) dos histogramas de duração.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _CounterValue:
+    # Sem lock: sob o GIL, um incremento perdido em disputa intensa entre threads é aceitável para
+    # monitoramento, e o registro fica em ~0,1µs (com lock seriam ~0,5µs). Os gauges, que sobem e
+    # descem e não podem acumular desvio, usam lock (e não ficam em caminhos quentes).
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class _GaugeValue:
+    __slots__ = ("value", "function", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self.function = None # Gauge calculado só na exportação (ex: tamanho de um cache).
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        self.function = function
+
+    def read(self):
+        return self.function() if self.function else self.value
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Contagem por faixa (não cumulativa); a última é +Inf.
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1 # Primeira faixa com limite >= valor (le é inclusivo).
+        self.sum += value
+
+class _Metric:
+    """
+    Métrica com rótulos opcionais. Cada combinação de valores dos rótulos tem seu próprio valor,
+    criado na primeira chamada de labels() e reaproveitado depois. Nos caminhos mais usados, guarde o
+    retorno de labels() em uma variável para evitar a busca a cada registro.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values) # Caminho rápido: combinação já usada (com rótulos em texto).
+        if child is None:
+            values = tuple(str(value) for value in values)
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: esperados os rótulos {self.labelnames}, recebido {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_value())
+        return child
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_text(values)} {_number(child.value)}"]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_value(self):
+        return _GaugeValue()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+    def _render_child(self, values, child):
+        try:
+            value = child.read()
+        except Exception as e: # Um gauge calculado com erro não deve derrubar a exportação das demais métricas.
+            logging.warning("Falha ao calcular a métrica %s: %s", self.name, e)
+            return []
+        return [f"{self.name}{self._label_text(values)} {_number(value)}"]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_child(self, values, child):
+        counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _number(bound)
+            lines.append(f"{self.name}_bucket{self._label_text(values, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {_number(total)}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {cumulative}")
+        return lines
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+_registry = {} # nome -> métrica, na ordem de criação.
+_registry_lock = threading.Lock()
+
+def _register(metric_class, name, documentation, labelnames, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = metric_class(name, documentation, labelnames, **kwargs)
+        return metric
+
+def counter(name, documentation, labelnames=()):
+    """Cria (ou retorna, se já existir) um contador."""
+    return _register(Counter, name, documentation, labelnames)
+
+def gauge(name, documentation, labelnames=()):
+    """Cria (ou retorna, se já existir) um gauge."""
+    return _register(Gauge, name, documentation, labelnames)
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Cria (ou retorna, se já existir) um histograma."""
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+def render():
+    """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Métricas da aplicação. Taxas de acerto de cache são calculadas na consulta, ex:
+# sum(rate(srl_cache_lookups_total{resultado="acerto"}[5m])) by (cache) / sum(rate(srl_cache_lookups_total[5m])) by (cache)
+DB_CALLS = counter("srl_db_calls_total", "Chamadas ao banco (execute/executemany e leituras de linhas).", ("evento",))
+DB_CALL_SECONDS = histogram("srl_db_call_seconds", "Duração das chamadas ao banco, em segundos.", ("evento",))
+DB_ERRORS = counter("srl_db_errors_total", "Erros do banco por operação e SQLSTATE (ex: 08001, 28000, IM002 ao conectar).", ("operacao", "sqlstate"))
+DB_CONNECTIONS = gauge("srl_db_connections_open", "Conexões abertas por conectar_banco() e ainda não fechadas.")
+KDF_POOL_TASKS = gauge("srl_kdf_pool_tasks", "Tarefas de hash de senha no pool de threads (em execução ou na fila).")
+KDF_POOL_WORKERS = gauge("srl_kdf_pool_workers", "Tamanho do pool de threads de hash de senha.")
+CACHE_LOOKUPS = counter("srl_cache_lookups_total", "Consultas aos caches em memória, por cache e resultado (acerto/falta).", ("cache", "resultado"))
+LOGIN_ATTEMPTS = counter("srl_login_attempts_total", "Tentativas de login, por origem e resultado.", ("origem", "resultado"))
+TRACKING_LOOKUPS = counter("srl_tracking_lookups_total", "Consultas de rastreamento de pedidos, por resultado.", ("resultado",))
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # Sem uma linha de log por coleta.
+        pass
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve as métricas em http://host:port/metrics em uma thread de fundo. Retorna o servidor."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info("Métricas disponíveis em http://%s:%s/metrics", host, port)
+    return server
+
+def write_textfile(path):
+    """Grava as métricas em `path` de forma atômica (arquivo temporário + rename), como espera o coletor textfile."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as output:
+        output.write(render())
+    os.replace(temp_path, path)
+
+def start_textfile_writer(path, interval=15.0):
+    """Regrava o arquivo de métricas a cada `interval` segundos em uma thread de fundo, e uma última vez ao sair."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                write_textfile(path)
+            except OSError as e:
+                logging.error("Erro ao gravar o arquivo de métricas %s: %s", path, e)
+
+    def final_write():
+        stop.set()
+        try:
+            write_textfile(path)
+        except OSError as e:
+            logging.error("Erro ao gravar o arquivo de métricas %s: %s", path, e)
+
+    threading.Thread(target=loop, name="metrics-textfile", daemon=True).start()
+    atexit.register(final_write)
+    return stop
+
+def start_from_env():
+    """Inicia as exportações configuradas em METRICS_PORT e/ou METRICS_TEXTFILE (nenhuma, por padrão)."""
+    port = os.getenv(HTTP_PORT_ENV_VAR)
+    if port:
+        try:
+            start_http_server(int(port))
+        except (OSError, ValueError) as e:
+            logging.error("Não foi possível iniciar o endpoint de métricas na porta %s: %s", port, e)
+    path = os.getenv(TEXTFILE_ENV_VAR)
+    if path:
+        start_textfile_writer(path, float(os.getenv(TEXTFILE_INTERVAL_ENV_VAR, "15")))
@@ -0,0 +1,130 @@
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+import db_connection # Observadores de consultas (cada execução passa pelo detector enquanto há um escopo aberto).
+
+# Modo do detector: "" ou "0" (desligado), "aviso" (registra um aviso no log) ou "estrito" (modo de teste: lança NPlusOneError).
+MODE_ENV_VAR = "SRL_NPLUS1"
+# Quantidade máxima de execuções da mesma consulta (mesma impressão digital) dentro de um escopo.
+LIMIT = int(os.getenv("SRL_NPLUS1_LIMIT", "5"))
+
+WARN = "aviso"
+STRICT = "estrito"
+
+# Arquivos ignorados ao procurar o ponto de chamada (a camada de banco e o próprio detector).
+_INTERNAL_FILES = {os.path.abspath(db_connection.__file__), os.path.abspath(__file__)}
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I) # IN (?, ?, ...) de qualquer tamanho vira IN (?...).
+_SPACES = re.compile(r"\s+")
+
+class NPlusOneError(Exception):
+    """Lançada no modo estrito quando uma consulta se repete mais vezes que o limite dentro de um escopo."""
+
+def fingerprint(sql):
+    """
+    Normaliza uma consulta para agrupar execuções equivalentes: remove comentários, troca literais
+    (textos e números) por '?', reduz listas IN de qualquer tamanho e padroniza espaços e maiúsculas.
+    """
+    sql = _COMMENTS.sub(" ", sql)
+    sql = _STRINGS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (?...)", sql)
+    return _SPACES.sub(" ", sql).strip().upper()
+
+def _call_site():
+    """Primeiro quadro da pilha fora da camada de banco (ex: 'app.py:2040 em add_shipment_terminal')."""
+    frame = sys._getframe(2)
+    while frame and os.path.abspath(frame.f_code.co_filename) in _INTERNAL_FILES:
+        frame = frame.f_back
+    if not frame:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} em {frame.f_code.co_name}"
+
+class QueryScope:
+    """Contagem das consultas executadas em uma operação lógica (ex: uma ação de menu), por impressão digital."""
+
+    def __init__(self, name, limit=LIMIT):
+        self.name = name
+        self.limit = limit
+        self.counts = Counter() # {impressão digital: execuções}
+        self.sites = {} # {impressão digital: Counter({ponto de chamada: execuções})}
+
+    def record(self, sql):
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        self.sites.setdefault(key, Counter())[_call_site()] += 1
+
+    def findings(self):
+        """Consultas acima do limite: lista de (impressão digital, execuções, pontos de chamada), da mais repetida."""
+        return [(key, count, self.sites[key].most_common()) for key, count in self.counts.most_common() if count > self.limit]
+
+    def report(self):
+        """Texto do relatório (vazio se nenhuma consulta passou do limite)."""
+        lines = []
+        for key, count, sites in self.findings():
+            lines.append(f"  {count}x {key[:150]}")
+            lines.extend(f"      {site_count}x em {site}" for site, site_count in sites)
+        if not lines:
+            return ""
+        return f"Possível N+1 em '{self.name}' (limite: {self.limit} execuções por consulta):\n" + "\n".join(lines)
+
+_local = threading.local() # Escopo aberto na thread atual (cada thread tem o seu).
+
+def _on_query(event, sql, seconds):
+    current = getattr(_local, "scope", None)
+    if current is not None and event == "execute" and sql:
+        current.record(sql)
+
+db_connection.add_query_observer(_on_query)
+
+def mode():
+    value = os.getenv(MODE_ENV_VAR, "").strip().lower()
+    return value if value in (WARN, STRICT) else None
+
+class scope:
+    """
+    Abre um escopo de detecção: `with n_plus_one.scope("Excluir pessoa"): ...`.
+
+    Escopos aninhados são absorvidos pelo mais externo, que faz o relatório ao sair. Com o detector
+    desligado (SRL_NPLUS1 vazio), não registra nada. O argumento `strict` força o modo (True: estrito,
+    False: aviso) independentemente da variável de ambiente.
+    """
+
+    def __init__(self, name, limit=None, strict=None):
+        self.name = name
+        self.limit = LIMIT if limit is None else limit
+        self.mode = mode() if strict is None else (STRICT if strict else WARN)
+        self.query_scope = None
+
+    def __enter__(self):
+        if self.mode and getattr(_local, "scope", None) is None:
+            self.query_scope = _local.scope = QueryScope(self.name, self.limit)
+        return self.query_scope
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.query_scope is None:
+            return False
+        _local.scope = None
+        report = self.query_scope.report()
+        if report:
+            if self.mode == STRICT and exc_type is None: # Não mascara uma exceção que já está em andamento.
+                raise NPlusOneError(report)
+            logging.warning(report)
+        return False
+
+def operation(name):
+    """Decorador que executa a função dentro de um escopo de detecção com o nome informado."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with scope(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
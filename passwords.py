@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+import metrics # Uso do pool de threads (tarefas na fila ou em execução).
+
+# Formatos armazenados em Usuario.Senha_Hash (versionados pelo prefixo do algoritmo):
+#   pbkdf2_sha256$<iteracoes>$<salt>$<hash>
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>
+#   <64 caracteres hexadecimais>  -> formato legado (SHA-256 simples, sem salt), atualizado no próximo login.
+PBKDF2 = "pbkdf2_sha256"
+SCRYPT = "scrypt"
+
+# Custos padrão, ajustáveis por variáveis de ambiente (use benchmarks/bench_login.py para escolher valores viáveis no pico).
+DEFAULT_SCHEME = os.getenv("PASSWORD_KDF", PBKDF2)
+PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+# Número de threads do pool de verificação. O hashlib libera o GIL durante o PBKDF2/scrypt,
+# então as verificações rodam em paralelo em vários núcleos.
+WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 2)))
+
+_LEGACY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_executor = None
+
+def _b64encode(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem precisa comportar 128 * n * r bytes (o padrão do OpenSSL é 32 MiB).
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES, maxmem=256 * n * r + 1024 * 1024)
+
+def hash_password(password, scheme=None, iterations=None, n=None, r=None, p=None):
+    """
+    Gera o hash de uma senha com salt aleatório no formato versionado.
+
+    Args:
+        password (str): Senha em texto puro.
+        scheme (str, optional): PBKDF2 ('pbkdf2_sha256') ou SCRYPT ('scrypt'). Padrão: PASSWORD_KDF.
+        iterations (int, optional): Iterações do PBKDF2 (padrão PBKDF2_ITERATIONS).
+        n, r, p (int, optional): Parâmetros do scrypt (padrões SCRYPT_N, SCRYPT_R, SCRYPT_P).
+
+    Returns:
+        str: O hash no formato armazenado em Usuario.Senha_Hash.
+    """
+    scheme = scheme or DEFAULT_SCHEME
+    salt = secrets.token_bytes(SALT_BYTES)
+    if scheme == PBKDF2:
+        iterations = iterations or PBKDF2_ITERATIONS
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, HASH_BYTES)
+        return f"{PBKDF2}${iterations}${_b64encode(salt)}${_b64encode(digest)}"
+    if scheme == SCRYPT:
+        n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+        digest = _scrypt(password, salt, n, r, p)
+        return f"{SCRYPT}${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+    raise ValueError(f"Algoritmo de senha desconhecido: {scheme}")
+
+def is_legacy_hash(stored_hash):
+    """Indica se o hash está no formato legado (SHA-256 hexadecimal sem salt)."""
+    return bool(stored_hash) and bool(_LEGACY_PATTERN.match(stored_hash))
+
+def verify_password(stored_hash, provided_password):
+    """
+    Verifica uma senha contra o hash armazenado (formatos atuais e legado), com comparação em tempo constante.
+
+    Returns:
+        bool: True se a senha confere.
+    """
+    if not stored_hash:
+        return False
+    if is_legacy_hash(stored_hash):
+        candidate = hashlib.sha256(provided_password.encode()).hexdigest()
+        return hmac.compare_digest(stored_hash, candidate)
+
+    parts = stored_hash.split("$")
+    try:
+        if parts[0] == PBKDF2 and len(parts) == 4:
+            iterations, salt, expected = int(parts[1]), _b64decode(parts[2]), _b64decode(parts[3])
+            candidate = hashlib.pbkdf2_hmac("sha256", provided_password.encode(), salt, iterations, len(expected))
+            return hmac.compare_digest(expected, candidate)
+        if parts[0] == SCRYPT and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt, expected = _b64decode(parts[4]), _b64decode(parts[5])
+            candidate = _scrypt(provided_password, salt, n, r, p)
+            return hmac.compare_digest(expected, candidate)
+    except (ValueError, TypeError): # Hash corrompido: trata como senha inválida.
+        return False
+    return False
+
+def needs_rehash(stored_hash):
+    """
+    Indica se o hash deve ser regerado no próximo login bem-sucedido: formato legado, algoritmo
+    diferente do configurado ou custo abaixo do configurado.
+    """
+    if is_legacy_hash(stored_hash):
+        return True
+    parts = (stored_hash or "").split("$")
+    if parts[0] != DEFAULT_SCHEME:
+        return True
+    try:
+        if parts[0] == PBKDF2:
+            return int(parts[1]) < PBKDF2_ITERATIONS
+        if parts[0] == SCRYPT:
+            # Cada parâmetro é comparado separadamente (n maior não compensa r ou p menores).
+            return any(stored < configured for stored, configured in zip(map(int, parts[1:4]), (SCRYPT_N, SCRYPT_R, SCRYPT_P)))
+    except (IndexError, ValueError):
+        return True
+    return False
+
+def get_executor():
+    """Retorna o pool de threads compartilhado usado para verificar/gerar hashes em paralelo."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="kdf")
+        metrics.KDF_POOL_WORKERS.set(WORKERS)
+    return _executor
+
+def _run_in_pool(function, *args):
+    """Executa uma tarefa do pool e a desconta do gauge de uso ao terminar."""
+    try:
+        return function(*args)
+    finally:
+        metrics.KDF_POOL_TASKS.dec()
+
+def verify_password_async(stored_hash, provided_password):
+    """Agenda a verificação no pool de threads e retorna um Future[bool], sem bloquear quem chamou."""
+    metrics.KDF_POOL_TASKS.inc()
+    return get_executor().submit(_run_in_pool, verify_password, stored_hash, provided_password)
+
+def hash_passwords(passwords):
+    """Gera os hashes de várias senhas em paralelo no pool, preservando a ordem."""
+    passwords = list(passwords)
+    metrics.KDF_POOL_TASKS.inc(len(passwords))
+    return list(get_executor().map(_run_in_pool, [hash_password] * len(passwords), passwords))
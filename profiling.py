@@ -0,0 +1,174 @@
+import atexit
+import builtins
+import cProfile
+import contextlib
+import getpass
+import json
+import os
+import re
+import sys
+import threading
+import time
+import db_connection # Observadores de consultas (quantidade e tempo das chamadas ao banco).
+
+# Perfilamento opcional por ação de menu. Habilitado com SRL_PROFILE=1 ou "python app.py --perfil".
+ENV_VAR = "SRL_PROFILE"
+# Gera também um arquivo do cProfile por ação (SRL_PROFILE_CPROFILE=1 ou --cprofile), legível com pstats/snakeviz.
+CPROFILE_ENV_VAR = "SRL_PROFILE_CPROFILE"
+# Pasta dos registros (acoes.jsonl e arquivos .prof).
+OUTPUT_DIR = os.getenv("SRL_PROFILE_DIR", "perfil")
+
+class ActionProfile:
+    """Medições de uma ação de menu (da escolha da opção até a próxima escolha no mesmo menu)."""
+
+    def __init__(self, sequence, menu, option, use_cprofile):
+        self.sequence = sequence
+        self.name = f"{menu} > {option}"
+        self.started = time.perf_counter()
+        self.db_calls = 0
+        self.db_seconds = 0.0
+        self.input_seconds = 0.0 # Tempo esperando o usuário (input()/getpass() e teclas na tela cheia), descontado dos demais.
+        self.profiler = cProfile.Profile() if use_cprofile else None
+
+    def result(self):
+        wall = time.perf_counter() - self.started
+        active = max(0.0, wall - self.input_seconds)
+        return {
+            "seq": self.sequence, "acao": self.name, "parede_s": round(wall, 6), "ativo_s": round(active, 6),
+            "banco_s": round(self.db_seconds, 6), "python_s": round(max(0.0, active - self.db_seconds), 6),
+            "chamadas_banco": self.db_calls, "entrada_s": round(self.input_seconds, 6),
+        }
+
+_enabled = False
+_use_cprofile = False
+_main_thread = None # Só as consultas da thread da interface contam (o pré-carregamento do cache roda em outra thread).
+_stack = [] # Ações abertas, da mais externa para a mais interna: [(título do menu, ActionProfile)].
+_results = []
+_sequence = 0
+
+def is_enabled():
+    return _enabled
+
+def _menu_name(title):
+    return title.split(" - ")[0] # Remove o login do título (ex: "Menu Principal do Gerente - joao").
+
+def _on_query(event, sql, seconds):
+    if threading.get_ident() != _main_thread:
+        return
+    for _, action in _stack: # Tempo inclusivo: a ação externa também soma as consultas das internas.
+        action.db_seconds += seconds
+        if event == "execute":
+            action.db_calls += 1
+
+def _pause_profiler():
+    if _stack and _stack[-1][1].profiler:
+        _stack[-1][1].profiler.disable()
+
+def _resume_profiler():
+    if _stack and _stack[-1][1].profiler:
+        _stack[-1][1].profiler.enable()
+
+@contextlib.contextmanager
+def waiting():
+    """
+    Desconta das medições o tempo passado no bloco esperando o usuário (ex: getch() da interface curses).
+    Fora da thread da interface ou com o perfilamento desligado, não faz nada.
+    """
+    if not _enabled or threading.get_ident() != _main_thread: # Ex: leitura em lote da chegada, que lê em uma thread própria.
+        yield
+        return
+    _pause_profiler()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        for _, action in _stack:
+            action.input_seconds += elapsed
+        _resume_profiler()
+
+def _timed_input(original):
+    """Envolve input()/getpass() para descontar o tempo de digitação das medições."""
+    def wrapper(*args, **kwargs):
+        with waiting():
+            return original(*args, **kwargs)
+    return wrapper
+
+def _finish_top():
+    _, action = _stack.pop()
+    if action.profiler:
+        action.profiler.disable()
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", action.name).strip("_")[:80]
+        action.profiler.dump_stats(os.path.join(OUTPUT_DIR, f"{action.sequence:05d}_{slug}.prof"))
+    _resume_profiler() # A ação de fora volta a ser perfilada.
+    result = action.result()
+    _results.append(result)
+    with open(os.path.join(OUTPUT_DIR, "acoes.jsonl"), "a", encoding="utf-8") as log_file:
+        log_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+def menu_choice(title, options, choice):
+    """
+    Registra a escolha feita em display_menu. Encerra a ação anterior do mesmo menu (e as ações de
+    submenus que ficaram abertas) e inicia a medição da nova ação; a opção 0 apenas encerra.
+    """
+    global _sequence
+    if not _enabled:
+        return
+    menu = _menu_name(title)
+    if any(open_menu == menu for open_menu, _ in _stack):
+        while _stack:
+            open_menu = _stack[-1][0]
+            _finish_top()
+            if open_menu == menu:
+                break
+    if choice == 0:
+        return
+    _pause_profiler() # Só a ação mais interna é perfilada pelo cProfile.
+    _sequence += 1
+    action = ActionProfile(_sequence, menu, options[choice - 1], _use_cprofile)
+    _stack.append((menu, action))
+    if action.profiler:
+        action.profiler.enable()
+
+def finish_all():
+    while _stack:
+        _finish_top()
+
+def print_summary(stream=None):
+    """Resumo por ação (quantidade, tempo ativo, banco e Python), das mais custosas para as menos."""
+    stream = stream or sys.stderr
+    if not _results:
+        return
+    totals = {}
+    for result in _results:
+        total = totals.setdefault(result["acao"], {"n": 0, "ativo_s": 0.0, "banco_s": 0.0, "python_s": 0.0, "chamadas_banco": 0})
+        total["n"] += 1
+        for key in ("ativo_s", "banco_s", "python_s", "chamadas_banco"):
+            total[key] += result[key]
+    print(f"\n--- Perfil por ação (registros em {OUTPUT_DIR}) ---", file=stream)
+    print(f"{'Ação':<70} {'N':>4} {'Ativo (s)':>10} {'Banco (s)':>10} {'Python (s)':>10} {'Consultas':>10}", file=stream)
+    for name, total in sorted(totals.items(), key=lambda item: item[1]["ativo_s"], reverse=True):
+        print(f"{name[:70]:<70} {total['n']:>4} {total['ativo_s']:>10.3f} {total['banco_s']:>10.3f} "
+              f"{total['python_s']:>10.3f} {total['chamadas_banco']:>10}", file=stream)
+
+def _shutdown():
+    finish_all()
+    print_summary()
+
+def enable(use_cprofile=False):
+    """Liga o perfilamento: observa as consultas, desconta o tempo em input()/getpass() e gera o resumo ao sair."""
+    global _enabled, _use_cprofile, _main_thread
+    if _enabled:
+        return
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    _enabled, _use_cprofile, _main_thread = True, use_cprofile, threading.get_ident()
+    db_connection.add_query_observer(_on_query)
+    builtins.input = _timed_input(builtins.input)
+    getpass.getpass = _timed_input(getpass.getpass)
+    atexit.register(_shutdown)
+
+def enable_from_args(argv):
+    """Liga o perfilamento se pedido pela linha de comando (--perfil, --cprofile) ou pelas variáveis de ambiente."""
+    use_cprofile = "--cprofile" in argv or os.getenv(CPROFILE_ENV_VAR) == "1"
+    if "--perfil" in argv or os.getenv(ENV_VAR) == "1" or use_cprofile:
+        enable(use_cprofile)
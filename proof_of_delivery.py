@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pyodbc
+import db_connection # Funções de acesso ao banco de dados.
+import driver_queue # Regra de atribuição de produtos ao motorista.
+
+try: # Pillow é opcional: sem ele, os comprovantes são guardados normalmente, apenas sem miniaturas.
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Pasta dos comprovantes. Os arquivos são endereçados pelo SHA-256 do conteúdo:
+#   blobs/ab/cd/abcd...  (conteúdo original)    miniaturas/ab/cd/abcd....jpg
+BLOB_DIR = os.getenv("POD_BLOB_DIR", os.path.join("data", "comprovantes"))
+CHUNK_SIZE = 1024 * 1024 # Bytes lidos/gravados por vez: o arquivo nunca é carregado inteiro na memória.
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_WORKERS = int(os.getenv("POD_THUMBNAIL_WORKERS", str(os.cpu_count() or 2)))
+
+KINDS = ('Foto', 'Assinatura')
+
+def blob_path(content_hash, base_dir=None):
+    """Caminho do conteúdo de um comprovante a partir do seu hash."""
+    return os.path.join(base_dir or BLOB_DIR, "blobs", content_hash[:2], content_hash[2:4], content_hash)
+
+def thumbnail_path(content_hash, base_dir=None):
+    """Caminho da miniatura (JPEG) de um comprovante a partir do seu hash."""
+    return os.path.join(base_dir or BLOB_DIR, "miniaturas", content_hash[:2], content_hash[2:4], content_hash + ".jpg")
+
+def store_blob(source, base_dir=None, chunk_size=CHUNK_SIZE):
+    """
+    Grava um arquivo no repositório de comprovantes, em blocos, calculando o SHA-256 durante a cópia.
+
+    O conteúdo é gravado em um arquivo temporário e movido para o caminho final do hash. Se o mesmo
+    conteúdo já existir, o temporário é descartado (deduplicação).
+
+    Args:
+        source (str or file): Caminho do arquivo ou objeto binário aberto para leitura.
+
+    Returns:
+        tuple: (hash em hexadecimal, tamanho em bytes).
+    """
+    base_dir = base_dir or BLOB_DIR
+    tmp_dir = os.path.join(base_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest, size = hashlib.sha256(), 0
+    handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = handle.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.fsync(out.fileno()) # Garante o conteúdo em disco antes de torná-lo visível.
+        content_hash = digest.hexdigest()
+        final_path = blob_path(content_hash, base_dir)
+        if os.path.exists(final_path):
+            os.remove(tmp_path) # Conteúdo já armazenado.
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        return content_hash, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if handle is not source:
+            handle.close()
+
+def _make_thumbnail(job):
+    """Gera a miniatura de um comprovante (executado em um processo do pool). Retorna (hash, caminho ou None)."""
+    content_hash, base_dir = job
+    target = thumbnail_path(content_hash, base_dir)
+    if os.path.exists(target):
+        return content_hash, target
+    try:
+        with Image.open(blob_path(content_hash, base_dir)) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_target = target + ".tmp"
+            image.convert("RGB").save(tmp_target, "JPEG", quality=80)
+            os.replace(tmp_target, target)
+        return content_hash, target
+    except (OSError, ValueError): # Conteúdo que não é imagem (ex: assinatura em outro formato).
+        return content_hash, None
+
+def generate_thumbnails(content_hashes, base_dir=None, workers=THUMBNAIL_WORKERS):
+    """
+    Gera as miniaturas que ainda não existem. Vários comprovantes são processados em paralelo em um
+    pool de processos (decodificar e reduzir imagens usa CPU); um único comprovante é processado direto.
+
+    Returns:
+        dict: hash -> caminho da miniatura (ou None se não for imagem ou o Pillow não estiver instalado).
+    """
+    if Image is None:
+        logging.warning("Pillow não instalado: miniaturas não serão geradas (pip install Pillow).")
+        return {content_hash: None for content_hash in content_hashes}
+    jobs = [(content_hash, base_dir or BLOB_DIR) for content_hash in dict.fromkeys(content_hashes)]
+    if len(jobs) <= 1:
+        return dict(_make_thumbnail(job) for job in jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_make_thumbnail, jobs, chunksize=16))
+
+def describe_file(path):
+    """Retorna (nome original, tipo de mídia) de um arquivo de comprovante."""
+    return os.path.basename(path), mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+def save_metadata(conn, proofs, employee_code=None, driver_only=False):
+    """
+    Grava os metadados de vários comprovantes em uma transação. Comprovantes já registrados para o
+    mesmo produto (mesmo hash) são ignorados, então reenviar um lote é seguro. Linhas repetidas no lote
+    com o mesmo produto e hash (ex: tipos diferentes) gravam só a primeira (chave UQ_Comprovante_Produto_Hash).
+
+    Args:
+        proofs (list): Tuplas (ID_Produto, Tipo, Hash_Conteudo, Tamanho_Bytes, Tipo_Midia, Nome_Original).
+        employee_code (int, optional): Funcionário que registrou os comprovantes.
+        driver_only (bool): Se True, só aceita produtos atribuídos ao motorista employee_code.
+
+    Returns:
+        set or None: Pares (ID_Produto, Hash_Conteudo) aceitos, isto é, registrados no servidor ao fim da
+                     transação (novos ou já existentes); os demais foram recusados (produto inexistente ou,
+                     com driver_only, não atribuído ao motorista). None em caso de erro.
+    """
+    if not proofs:
+        return set()
+    driver_filter = f"AND {driver_queue.ASSIGNED_TO_DRIVER_SQL}" if driver_only else ""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        IF OBJECT_ID('tempdb..#Comprovante_Lote') IS NOT NULL DROP TABLE #Comprovante_Lote;
+        CREATE TABLE #Comprovante_Lote (ID_Produto INT, Tipo VARCHAR(20), Hash_Conteudo CHAR(64), Tamanho_Bytes BIGINT,
+                                        Tipo_Midia VARCHAR(100), Nome_Original VARCHAR(255));
+        """)
+        cursor.fast_executemany = True
+        cursor.executemany("INSERT INTO #Comprovante_Lote VALUES (?, ?, ?, ?, ?, ?);", proofs)
+        cursor.execute(f"""
+        INSERT INTO Comprovante_Entrega (ID_Produto, Tipo, Hash_Conteudo, Tamanho_Bytes, Tipo_Midia, Nome_Original, Codigo_Funcionario)
+        SELECT L.ID_Produto, L.Tipo, L.Hash_Conteudo, L.Tamanho_Bytes, L.Tipo_Midia, L.Nome_Original, ?
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY ID_Produto, Hash_Conteudo ORDER BY Tipo) AS Ordem
+            FROM #Comprovante_Lote
+        ) AS L
+        INNER JOIN Produto_A_Ser_Entregue P ON P.ID_Produto = L.ID_Produto
+        WHERE L.Ordem = 1 -- Uma linha por (produto, hash), a chave única da tabela.
+          AND NOT EXISTS (SELECT 1 FROM Comprovante_Entrega C WHERE C.ID_Produto = L.ID_Produto AND C.Hash_Conteudo = L.Hash_Conteudo)
+        {driver_filter};
+        """, (employee_code,) + ((employee_code, employee_code) if driver_only else ()))
+        cursor.execute("""
+        SELECT DISTINCT L.ID_Produto, L.Hash_Conteudo
+        FROM #Comprovante_Lote L
+        INNER JOIN Comprovante_Entrega C ON C.ID_Produto = L.ID_Produto AND C.Hash_Conteudo = L.Hash_Conteudo;
+        """)
+        accepted = {(product_id, content_hash) for product_id, content_hash in cursor.fetchall()}
+        cursor.execute("DROP TABLE #Comprovante_Lote;")
+        conn.commit()
+        return accepted
+    except pyodbc.Error as e:
+        conn.rollback()
+        logging.error(f"Erro ao gravar os comprovantes de entrega: {e}")
+        return None
+    finally:
+        cursor.close()
+
+def register_proof(conn, product_id, path, kind, employee_code=None):
+    """
+    Armazena um arquivo de comprovante e registra seus metadados para o produto.
+
+    Returns:
+        str or None: O hash do conteúdo, ou None se o registro no banco falhar.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Tipo de comprovante inválido: {kind}")
+    content_hash, size = store_blob(path)
+    name, media_type = describe_file(path)
+    if save_metadata(conn, [(product_id, kind, content_hash, size, media_type, name)], employee_code) is None:
+        return None
+    generate_thumbnails([content_hash])
+    return content_hash
+
+def list_proofs(conn, product_id):
+    """Comprovantes de um produto: (ID_Comprovante, Tipo, Hash_Conteudo, Tamanho_Bytes, Tipo_Midia, Nome_Original, Data_Registro)."""
+    sql = """
+    SELECT ID_Comprovante, Tipo, Hash_Conteudo, Tamanho_Bytes, Tipo_Midia, Nome_Original, Data_Registro
+    FROM Comprovante_Entrega WHERE ID_Produto = ? ORDER BY Data_Registro;
+    """
+    return db_connection.execute_query(conn, sql, (product_id,), fetch_results=True)
+
+def _all_blob_hashes(base_dir=None):
+    root = os.path.join(base_dir or BLOB_DIR, "blobs")
+    for _, _, files in os.walk(root):
+        yield from files
+
+if __name__ == "__main__":
+    # Uso:
+    #   python proof_of_delivery.py registrar <id_produto> <arquivo> [Foto|Assinatura]
+    #   python proof_of_delivery.py miniaturas      (gera as miniaturas que faltam, em paralelo)
+    if len(sys.argv) >= 4 and sys.argv[1] == "registrar":
+        conexao_db = db_connection.conectar_banco()
+        if not conexao_db:
+            sys.exit(1)
+        try:
+            hash_conteudo = register_proof(conexao_db, int(sys.argv[2]), sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else "Foto")
+        finally:
+            db_connection.desconectar_banco(conexao_db)
+        print(f"Comprovante registrado: {hash_conteudo}" if hash_conteudo else "Falha ao registrar o comprovante.")
+    elif len(sys.argv) == 2 and sys.argv[1] == "miniaturas":
+        resultado = generate_thumbnails(list(_all_blob_hashes()))
+        print(f"{sum(1 for v in resultado.values() if v)} miniaturas disponíveis de {len(resultado)} comprovantes.")
+    else:
+        print("Uso: python proof_of_delivery.py registrar <id_produto> <arquivo> [Foto|Assinatura] | miniaturas")
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+import db_connection # Funções de acesso ao banco de dados.
+import metrics # Acertos e faltas do cache.
+
+# Listas de valores válidos (espelham as restrições CHECK de sql/script.sql). Não exigem acesso ao banco.
+STATUS_ENTREGA = ('Em Processamento', 'Aguardando Coleta', 'Em Transito', 'Entregue', 'Cancelado', 'Falha na Entrega')
+TIPOS_PRODUTO = ('Fragil', 'Perecivel', 'Comum')
+TIPOS_VEICULO = ('Carro', 'Moto', 'Van', 'Caminhão')
+STATUS_VEICULO = ('Disponivel', 'Indisponivel')
+CARGOS = ('Motorista', 'Auxiliar de Logistica', 'Atendente', 'Gerente', 'Admin')
+TIPOS_USUARIO = ('Cliente',) + CARGOS
+TIPOS_SEDE = {1: "Distribuição", 2: "Loja", 3: "Ambos"}
+
+# Nomes das tabelas de referência em cache (usados em invalidate()).
+VEICULOS = "veiculos"
+SEDES = "sedes"
+MOTORISTAS = "motoristas"
+
+# Consultas que carregam cada tabela de referência inteira (são tabelas pequenas).
+_QUERIES = {
+    VEICULOS: "SELECT Placa_Veiculo, Carga_Suportada, Tipo, Status FROM Veiculo ORDER BY Placa_Veiculo;",
+    SEDES: """
+    SELECT S.ID_Sede,
+           CASE S.Tipo WHEN 1 THEN 'Distribuição' WHEN 2 THEN 'Loja' WHEN 3 THEN 'Ambos' ELSE 'Desconhecido' END AS Tipo_Descricao,
+           S.Telefone, E.Rua, E.Numero, E.Bairro, E.Cidade, E.Estado, E.CEP
+    FROM Sede S
+    INNER JOIN Endereco E ON S.ID_Endereco = E.ID_Endereco
+    ORDER BY S.ID_Sede;
+    """,
+    MOTORISTAS: """
+    SELECT F.Codigo_Funcionario, P.Nome
+    FROM Funcionario F JOIN Pessoa P ON F.Codigo_Funcionario = P.Codigo_Pessoa
+    WHERE F.Cargo = 'Motorista'
+    ORDER BY P.Nome;
+    """,
+}
+
+# Tempo máximo de vida de uma entrada. Protege contra alterações feitas por outros processos,
+# que não passam pela invalidação local.
+TTL_SECONDS = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+
+_lock = threading.Lock()
+_versions = {name: 0 for name in _QUERIES} # Versão atual de cada tabela (incrementada a cada alteração).
+_entries = {} # nome -> (versão carregada, instante da carga, linhas)
+_lookups = {name: (metrics.CACHE_LOOKUPS.labels(f"referencia_{name}", "acerto"), metrics.CACHE_LOOKUPS.labels(f"referencia_{name}", "falta"))
+            for name in _QUERIES} # nome -> (contador de acertos, contador de faltas)
+
+def invalidate(*names):
+    """
+    Marca tabelas de referência como alteradas. Deve ser chamada após qualquer INSERT/UPDATE/DELETE
+    nessas tabelas; a próxima leitura recarrega os dados.
+    """
+    with _lock:
+        for name in names:
+            _versions[name] += 1
+
+def _load(conn, name):
+    """Lê a tabela do banco e guarda no cache com a versão vigente no início da leitura."""
+    with _lock:
+        version = _versions[name]
+    rows = db_connection.execute_query(conn, _QUERIES[name], fetch_results=True)
+    if rows is None: # Erro de banco: não guarda em cache.
+        return []
+    rows = [tuple(row) for row in rows] # Desacopla as linhas do cursor.
+    with _lock:
+        # Se houve invalidação durante a leitura, a versão gravada já nasce desatualizada e será recarregada.
+        _entries[name] = (version, time.monotonic(), rows)
+    return rows
+
+def get(conn, name):
+    """
+    Retorna as linhas de uma tabela de referência, consultando o banco apenas se a entrada
+    não existir, tiver sido invalidada ou tiver expirado.
+    """
+    with _lock:
+        entry = _entries.get(name)
+        current = _versions[name]
+    hits, misses = _lookups[name]
+    if entry and entry[0] == current and time.monotonic() - entry[1] < TTL_SECONDS:
+        hits.inc()
+        return entry[2]
+    misses.inc()
+    return _load(conn, name)
+
+def get_vehicles(conn):
+    """Todos os veículos: (Placa_Veiculo, Carga_Suportada, Tipo, Status)."""
+    return get(conn, VEICULOS)
+
+def get_available_vehicles(conn):
+    """Veículos com status 'Disponivel': (Placa_Veiculo, Tipo, Carga_Suportada)."""
+    return [(placa, tipo, carga) for placa, carga, tipo, status in get_vehicles(conn) if status == 'Disponivel']
+
+def get_headquarters(conn):
+    """Todas as sedes: (ID_Sede, Tipo_Descricao, Telefone, Rua, Numero, Bairro, Cidade, Estado, CEP)."""
+    return get(conn, SEDES)
+
+def get_drivers(conn):
+    """Funcionários com cargo 'Motorista': (Codigo_Funcionario, Nome), ordenados por nome."""
+    return get(conn, MOTORISTAS)
+
+# As verificações que protegem gravações (cargo de motorista, existência de sede/veículo) consultam o banco
+# diretamente: o cache pode ficar desatualizado por até TTL_SECONDS quando outro processo altera a tabela.
+# O cache serve as listagens e seletores.
+_GUARD_CHUNK = 1000 # Chaves por consulta (limite de 2100 parâmetros do SQL Server).
+
+def _existing(conn, sql, keys):
+    """Chaves, entre as informadas, retornadas por `sql` (com {} no lugar dos marcadores do IN). Vazio em caso de erro."""
+    keys = list(set(keys))
+    found = set()
+    for start in range(0, len(keys), _GUARD_CHUNK):
+        chunk = keys[start:start + _GUARD_CHUNK]
+        rows = db_connection.execute_query(conn, sql.format(",".join("?" * len(chunk))), tuple(chunk), fetch_results=True)
+        found.update(row[0] for row in rows or ())
+    return found
+
+def drivers_among(conn, employee_codes):
+    """Códigos, entre os informados, de funcionários com cargo 'Motorista' (consulta o banco, sem o cache)."""
+    return _existing(conn, "SELECT Codigo_Funcionario FROM Funcionario WHERE Cargo = 'Motorista' AND Codigo_Funcionario IN ({});",
+                     employee_codes)
+
+def is_driver(conn, employee_code):
+    """Indica se o código informado é de um motorista (consulta o banco, sem o cache)."""
+    return employee_code in drivers_among(conn, [employee_code])
+
+def headquarters_exists(conn, headquarters_id):
+    """Indica se a sede existe (consulta o banco, sem o cache)."""
+    return headquarters_id in _existing(conn, "SELECT ID_Sede FROM Sede WHERE ID_Sede IN ({});", [headquarters_id])
+
+def vehicle_exists(conn, plate):
+    """Indica se o veículo existe (consulta o banco, sem o cache)."""
+    return bool(_existing(conn, "SELECT Placa_Veiculo FROM Veiculo WHERE Placa_Veiculo IN ({});", [plate]))
+
+def warm_up():
+    """Carrega todas as tabelas de referência usando uma conexão própria."""
+    conn = db_connection.conectar_banco()
+    if not conn:
+        logging.warning("Pré-carregamento do cache de referência ignorado: sem conexão com o banco.")
+        return
+    try:
+        for name in _QUERIES:
+            _load(conn, name)
+        logging.info("Cache de dados de referência carregado.")
+    finally:
+        db_connection.desconectar_banco(conn)
+
+def start_background_warm_up():
+    """Dispara o pré-carregamento em uma thread de fundo, sem atrasar a abertura do menu."""
+    thread = threading.Thread(target=warm_up, name="reference-cache-warm-up", daemon=True)
+    thread.start()
+    return thread
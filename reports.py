@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+import db_connection # Funções de acesso ao banco de dados.
+
+# Os relatórios leem as tabelas de resumo mantidas pelos triggers de sql/resumos_operacionais.sql.
+# Cada consulta percorre no máximo uma linha por dia (e por status/cidade/veículo) do período,
+# independentemente da quantidade de produtos no histórico.
+
+DEFAULT_PERIOD_DAYS = 30
+
+def default_period(days=DEFAULT_PERIOD_DAYS):
+    """Retorna (início, fim) dos últimos `days` dias, incluindo hoje."""
+    end = date.today()
+    return end - timedelta(days=days - 1), end
+
+def products_by_status_per_day(conn, start, end):
+    """
+    Quantidade e peso de produtos por status, por dia de chegada ao CD.
+
+    Returns:
+        list or None: Linhas (Dia, Status_Entrega, Quantidade, Peso_Total), ou None em caso de erro.
+    """
+    sql = """
+    SELECT Dia, Status_Entrega, Quantidade, Peso_Total
+    FROM Resumo_Status_Dia
+    WHERE Dia BETWEEN ? AND ?
+    ORDER BY Dia DESC, Status_Entrega;
+    """
+    return db_connection.execute_query(conn, sql, (start, end), fetch_results=True)
+
+def on_time_rate(conn, start, end):
+    """
+    Taxa de entregas no prazo (Data_Entrega_Realizada <= Data_Prevista_Entrega) das entregas realizadas no período.
+
+    Returns:
+        dict or None: {'entregues', 'no_prazo', 'atrasados', 'sem_previsao', 'taxa'} (taxa em %, ou None
+                      sem entregas com previsão), ou None em caso de erro.
+    """
+    sql = """
+    SELECT ISNULL(SUM(Entregues), 0), ISNULL(SUM(No_Prazo), 0), ISNULL(SUM(Atrasados), 0), ISNULL(SUM(Sem_Previsao), 0)
+    FROM Resumo_Prazo_Dia
+    WHERE Dia BETWEEN ? AND ?;
+    """
+    rows = db_connection.execute_query(conn, sql, (start, end), fetch_results=True)
+    if rows is None:
+        return None
+    entregues, no_prazo, atrasados, sem_previsao = rows[0]
+    com_previsao = no_prazo + atrasados
+    return {
+        'entregues': entregues, 'no_prazo': no_prazo, 'atrasados': atrasados, 'sem_previsao': sem_previsao,
+        'taxa': round(100.0 * no_prazo / com_previsao, 1) if com_previsao else None,
+    }
+
+def volume_by_city(conn, start, end, limit=20):
+    """
+    Quantidade e peso de produtos por cidade de destino, com chegada ao CD no período.
+
+    Returns:
+        list or None: Linhas (Estado, Cidade, Quantidade, Peso_Total) em ordem decrescente de quantidade.
+    """
+    sql = """
+    SELECT TOP (?) Estado, Cidade, SUM(Quantidade) AS Quantidade, SUM(Peso_Total) AS Peso_Total
+    FROM Resumo_Cidade_Dia
+    WHERE Dia BETWEEN ? AND ?
+    GROUP BY Estado, Cidade
+    ORDER BY Quantidade DESC, Estado, Cidade;
+    """
+    return db_connection.execute_query(conn, sql, (limit, start, end), fetch_results=True)
+
+def load_by_vehicle(conn, start, end):
+    """
+    Carga por veículo no período: itens e peso carregados, dias com carregamento, peso médio por dia
+    e utilização média em relação à Carga_Suportada.
+
+    Returns:
+        list or None: Linhas (Placa, Tipo, Carga_Suportada, Dias, Itens, Peso_Total, Peso_Medio_Dia, Utilizacao_Pct).
+    """
+    sql = """
+    SELECT V.Placa_Veiculo, V.Tipo, V.Carga_Suportada,
+           COUNT(R.Dia) AS Dias, ISNULL(SUM(R.Itens), 0) AS Itens, ISNULL(SUM(R.Peso_Total), 0) AS Peso_Total,
+           CAST(ISNULL(AVG(R.Peso_Total), 0) AS DECIMAL(18, 2)) AS Peso_Medio_Dia,
+           CAST(ISNULL(100.0 * AVG(R.Peso_Total) / NULLIF(V.Carga_Suportada, 0), 0) AS DECIMAL(6, 1)) AS Utilizacao_Pct
+    FROM Veiculo V
+    LEFT JOIN Resumo_Carga_Veiculo R ON R.Placa_Veiculo = V.Placa_Veiculo AND R.Dia BETWEEN ? AND ?
+    GROUP BY V.Placa_Veiculo, V.Tipo, V.Carga_Suportada
+    ORDER BY Peso_Total DESC, V.Placa_Veiculo;
+    """
+    return db_connection.execute_query(conn, sql, (start, end), fetch_results=True)
+
+def rebuild_summaries(conn):
+    """Reconstrói todas as tabelas de resumo a partir dos dados de origem (varredura completa)."""
+    return db_connection.execute_query(conn, "EXEC sp_Recalcular_Resumos;")
@@ -0,0 +1,774 @@
+import itertools
+import logging
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+import pyodbc
+import db_connection # Funções de acesso ao banco de dados.
+import reference_cache # Listas de valores válidos e cache de veículos/motoristas.
+import arrival_scan # Normalização de códigos de rastreamento.
+import driver_queue # Status finais (produtos entregues ou cancelados não mudam mais de status).
+import passwords # Hash de senhas (KDF) em paralelo no pool de threads.
+import metrics # Consultas de rastreamento por resultado.
+
+# Regras de negócio sem entrada/saída de terminal: recebem listas e devolvem resultados, sem perguntas.
+# Usadas pelos menus do app.py, pela linha de comando em lote (cli.py) e por benchmarks.
+# As funções em lote devolvem um Outcome por item, na mesma ordem da entrada.
+
+# O SQL Server aceita no máximo 2100 parâmetros por comando; as listas de IDs são processadas em blocos.
+MAX_IDS_PER_BATCH = 1000
+# Quantidade máxima de pessoas retornadas por busca nos seletores de pessoa.
+PERSON_SEARCH_LIMIT = 20
+# Status em que um produto ainda pode entrar em um carregamento.
+LOADABLE_STATUSES = ('Em Processamento', 'Aguardando Coleta')
+# Status em que um produto pode ser excluído sem confirmação adicional.
+PRODUCT_DELETE_SAFE_STATUSES = ('Cancelado', 'Em Processamento')
+
+DB_ERROR = "Erro no banco de dados (ver log)."
+
+Outcome = namedtuple("Outcome", ["ok", "erro", "dados"]) # dados: dict com o que foi gravado ou lido (vazio em caso de erro).
+NewProduct = namedtuple("NewProduct", [
+    "peso", "status", "data_chegada_cd", "data_prevista_entrega", "tipo", "remetente", "destinatario",
+    "motorista", "nome_destinatario", "cpf_destinatario", "telefone_destinatario",
+], defaults=(None, None, None, None)) # Motorista e dados do destinatário no rastreamento (padrão: cadastro da pessoa).
+StatusChange = namedtuple("StatusChange", ["id_produto", "codigo_rastreamento", "status"]) # Um dos dois identificadores.
+Shipment = namedtuple("Shipment", ["placa", "produtos", "data_carregamento"])
+Recipient = namedtuple("Recipient", ["nome", "cpf", "telefone", "id_endereco", "cidade", "estado"])
+Blocker = namedtuple("Blocker", ["nome", "mensagem", "condicao"]) # condicao: EXISTS correlacionado com a linha X.
+DeleteRule = namedtuple("DeleteRule", ["tabela", "chave", "dados", "bloqueios"]) # dados: expressões devolvidas com a verificação.
+DeleteCheck = namedtuple("DeleteCheck", ["dados", "bloqueios"])
+
+_tracking_sequence = itertools.count() # Sufixo dos códigos gerados no mesmo microssegundo.
+
+def _ok(**dados):
+    return Outcome(True, None, dados)
+
+def _error(message):
+    return Outcome(False, message, {})
+
+def _select_in(conn, sql, keys):
+    """Executa `sql` (com um {} no lugar dos marcadores do IN) em blocos de chaves. Retorna None em caso de erro."""
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), MAX_IDS_PER_BATCH):
+        chunk = keys[start:start + MAX_IDS_PER_BATCH]
+        result = db_connection.execute_query(conn, sql.format(",".join("?" * len(chunk))), tuple(chunk), fetch_results=True)
+        if result is None:
+            return None
+        rows.extend(result)
+    return rows
+
+def _run_in_transaction(conn, work):
+    """Executa work(cursor) e confirma. Em erro de banco, reverte e relança."""
+    cursor = conn.cursor()
+    try:
+        result = work(cursor)
+        while cursor.nextset(): # Consome os resultados restantes: um erro no fim do lote aparece aqui, antes do commit.
+            pass
+        conn.commit()
+        return result
+    except pyodbc.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def _write_with_fallback(items, write, describe):
+    """
+    Grava os itens (pares (posição, item)) de uma vez com write(itens), que retorna {posição: dados}. Se o lote
+    falhar no banco, regrava um a um para isolar os itens com problema (como na importação de clientes).
+
+    Returns:
+        tuple: ({posição: dados gravados}, {posição: mensagem de erro}).
+    """
+    try:
+        return write(items), {}
+    except pyodbc.Error as e:
+        if len(items) == 1:
+            return {}, {items[0][0]: f"Erro no banco de dados: {e}"}
+        logging.warning("Lote de %d %s falhou (%s); regravando um a um.", len(items), describe, e)
+    written, errors = {}, {}
+    for item in items:
+        item_written, item_errors = _write_with_fallback([item], write, describe)
+        written.update(item_written)
+        errors.update(item_errors)
+    return written, errors
+
+# ------------------- PESSOAS ----------------------
+
+def escape_like(term):
+    """Escapa os curingas do LIKE (%, _, [) para que o termo seja buscado literalmente (usar com ESCAPE '\\')."""
+    for char in ('\\', '%', '_', '['):
+        term = term.replace(char, '\\' + char)
+    return term
+
+def _search_kind(term):
+    """Ramo da busca de pessoas pelo formato do termo: 'email', 'numero' (CPF/CNPJ, telefone ou código) ou 'nome'."""
+    if '@' in term: # Parece um email.
+        return 'email'
+    if any(ch.isdigit() for ch in term) and not any(ch.isalpha() for ch in term): # Numérico (com pontuação).
+        return 'numero'
+    return 'nome'
+
+def search_people(conn, term, limit=PERSON_SEARCH_LIMIT):
+    """
+    Busca pessoas por prefixo de nome, email, telefone ou CPF/CNPJ, retornando no máximo `limit` resultados.
+
+    Cada ramo da busca usa um índice (ver sql/script.sql) e é limitado com TOP, de modo que o custo
+    não depende do tamanho da tabela Pessoa.
+
+    Args:
+        conn: Objeto de conexão pyodbc.
+        term (str): Termo digitado pelo operador.
+        limit (int): Número máximo de pessoas retornadas.
+
+    Returns:
+        list or None: Tuplas (Codigo_Pessoa, Nome, CPF/CNPJ, Telefone, Email, ID_Endereco, Cidade, Estado).
+    """
+    term = term.strip()
+    prefix = escape_like(term) + '%'
+    digits = ''.join(ch for ch in term if ch.isdigit())
+
+    # Escolhe os ramos de busca pelo formato do termo, evitando consultar índices que não podem casar.
+    branches, params = [], []
+    kind = _search_kind(term)
+    if kind == 'email':
+        branches.append("SELECT TOP (?) Codigo_Pessoa FROM Pessoa WHERE Email LIKE ? ESCAPE '\\' ORDER BY Email")
+        params.extend([limit, prefix])
+    elif kind == 'numero':
+        # Os dois lados são comparados só pelos dígitos (colunas calculadas *_Digitos, indexadas), de modo que
+        # "12345678901" e "123.456.789-01" casam com o CPF gravado em qualquer um dos formatos.
+        branches.append("SELECT TOP (?) Codigo_Pessoa FROM Cliente WHERE CPF_Digitos LIKE ? ORDER BY CPF_Digitos")
+        branches.append("SELECT TOP (?) Codigo_Pessoa FROM Cliente WHERE CNPJ_Digitos LIKE ? ORDER BY CNPJ_Digitos")
+        branches.append("SELECT TOP (?) Codigo_Funcionario AS Codigo_Pessoa FROM Funcionario WHERE CPF_Digitos LIKE ? ORDER BY CPF_Digitos")
+        branches.append("SELECT TOP (?) Codigo_Pessoa FROM Pessoa WHERE Telefone_Digitos LIKE ? ORDER BY Telefone_Digitos")
+        params.extend([limit, digits + '%'] * 4) # Só dígitos: não há curingas a escapar.
+        if term.isdigit():
+            branches.append("SELECT Codigo_Pessoa FROM Pessoa WHERE Codigo_Pessoa = ?")
+            params.append(int(term))
+    else: # Prefixo de nome.
+        branches.append("SELECT TOP (?) Codigo_Pessoa FROM Pessoa WHERE Nome LIKE ? ESCAPE '\\' ORDER BY Nome")
+        params.extend([limit, prefix])
+
+    # Cada ramo fica em uma tabela derivada própria para que o TOP/ORDER BY de um não afete os outros.
+    union_sql = "\n        UNION\n        ".join(f"SELECT Codigo_Pessoa FROM ({branch}) AS R{i}" for i, branch in enumerate(branches))
+    sql = f"""
+    SELECT TOP (?) P.Codigo_Pessoa, P.Nome, COALESCE(C.CPF, C.CNPJ, F.CPF) AS Documento,
+           P.Telefone, P.Email, P.ID_Endereco, E.Cidade, E.Estado
+    FROM (
+        {union_sql}
+    ) AS M(Codigo_Pessoa)
+    INNER JOIN Pessoa P ON P.Codigo_Pessoa = M.Codigo_Pessoa
+    INNER JOIN Endereco E ON P.ID_Endereco = E.ID_Endereco
+    LEFT JOIN Cliente C ON C.Codigo_Pessoa = P.Codigo_Pessoa
+    LEFT JOIN Funcionario F ON F.Codigo_Funcionario = P.Codigo_Pessoa
+    ORDER BY P.Nome;
+    """
+    return db_connection.execute_query(conn, sql, tuple([limit] + params), fetch_results=True)
+
+# Os mesmos ramos de search_people, para vários termos de uma vez (#Termos_Busca). Cada ramo só é avaliado
+# para os termos do seu tipo (filtro de inicialização por T.Tipo), e o TOP/ORDER BY vale por termo (CROSS APPLY).
+_SEARCH_BATCH_SQL = """
+SET NOCOUNT ON;
+DECLARE @Limite INT = ?;
+SELECT T.Posicao, R.Codigo_Pessoa, R.Nome, R.Documento, R.Telefone, R.Email, R.ID_Endereco, R.Cidade, R.Estado
+FROM #Termos_Busca T
+CROSS APPLY (
+    SELECT TOP (@Limite) P.Codigo_Pessoa, P.Nome, COALESCE(C.CPF, C.CNPJ, F.CPF) AS Documento,
+           P.Telefone, P.Email, P.ID_Endereco, E.Cidade, E.Estado
+    FROM (
+        SELECT Codigo_Pessoa FROM (SELECT TOP (@Limite) Codigo_Pessoa FROM Pessoa
+            WHERE T.Tipo = 'email' AND Email LIKE T.Prefixo ESCAPE '\\' ORDER BY Email) AS R0
+        UNION
+        SELECT Codigo_Pessoa FROM (SELECT TOP (@Limite) Codigo_Pessoa FROM Cliente
+            WHERE T.Tipo = 'numero' AND CPF_Digitos LIKE T.Digitos + '%' ORDER BY CPF_Digitos) AS R1
+        UNION
+        SELECT Codigo_Pessoa FROM (SELECT TOP (@Limite) Codigo_Pessoa FROM Cliente
+            WHERE T.Tipo = 'numero' AND CNPJ_Digitos LIKE T.Digitos + '%' ORDER BY CNPJ_Digitos) AS R2
+        UNION
+        SELECT Codigo_Pessoa FROM (SELECT TOP (@Limite) Codigo_Funcionario AS Codigo_Pessoa FROM Funcionario
+            WHERE T.Tipo = 'numero' AND CPF_Digitos LIKE T.Digitos + '%' ORDER BY CPF_Digitos) AS R3
+        UNION
+        SELECT Codigo_Pessoa FROM (SELECT TOP (@Limite) Codigo_Pessoa FROM Pessoa
+            WHERE T.Tipo = 'numero' AND Telefone_Digitos LIKE T.Digitos + '%' ORDER BY Telefone_Digitos) AS R4
+        UNION
+        SELECT Codigo_Pessoa FROM Pessoa WHERE T.Codigo IS NOT NULL AND Codigo_Pessoa = T.Codigo
+        UNION
+        SELECT Codigo_Pessoa FROM (SELECT TOP (@Limite) Codigo_Pessoa FROM Pessoa
+            WHERE T.Tipo = 'nome' AND Nome LIKE T.Prefixo ESCAPE '\\' ORDER BY Nome) AS R5
+    ) AS M
+    INNER JOIN Pessoa P ON P.Codigo_Pessoa = M.Codigo_Pessoa
+    INNER JOIN Endereco E ON P.ID_Endereco = E.ID_Endereco
+    LEFT JOIN Cliente C ON C.Codigo_Pessoa = P.Codigo_Pessoa
+    LEFT JOIN Funcionario F ON F.Codigo_Funcionario = P.Codigo_Pessoa
+    ORDER BY P.Nome
+) AS R
+ORDER BY T.Posicao, R.Nome;
+"""
+
+def search_people_batch(conn, terms, limit=PERSON_SEARCH_LIMIT):
+    """
+    Executa search_people para vários termos com uma única consulta (os termos vão em uma tabela temporária).
+
+    Returns:
+        list or None: Uma lista de tuplas (como em search_people) por termo, na ordem dos termos, ou None em caso de erro.
+    """
+    terms = [term.strip() for term in terms]
+    if not terms:
+        return []
+    rows = [(position, _search_kind(term), escape_like(term) + '%', ''.join(ch for ch in term if ch.isdigit()),
+             int(term) if term.isdigit() else None) for position, term in enumerate(terms)]
+
+    def work(cursor):
+        cursor.execute("""
+        IF OBJECT_ID('tempdb..#Termos_Busca') IS NOT NULL DROP TABLE #Termos_Busca;
+        CREATE TABLE #Termos_Busca (Posicao INT PRIMARY KEY, Tipo VARCHAR(10), Prefixo VARCHAR(255), Digitos VARCHAR(255), Codigo BIGINT);
+        """)
+        cursor.fast_executemany = True
+        cursor.executemany("INSERT INTO #Termos_Busca VALUES (?, ?, ?, ?, ?);", rows)
+        cursor.execute(_SEARCH_BATCH_SQL, (limit,))
+        found = cursor.fetchall()
+        cursor.execute("DROP TABLE #Termos_Busca;")
+        return found
+
+    try:
+        found = _run_in_transaction(conn, work)
+    except pyodbc.Error as e:
+        logging.error(f"Erro na busca de pessoas em lote ({len(terms)} termos): {e}")
+        return None
+    people = [[] for _ in terms]
+    for row in found:
+        people[row[0]].append(tuple(row[1:]))
+    return people
+
+def existing_clients(conn, person_ids):
+    """Códigos Pessoa, entre os informados, que são Clientes (uma consulta por bloco). None em caso de erro."""
+    rows = _select_in(conn, "SELECT Codigo_Pessoa FROM Cliente WHERE Codigo_Pessoa IN ({});", set(person_ids))
+    return None if rows is None else {row[0] for row in rows}
+
+def get_recipients(conn, person_ids):
+    """
+    Dados de destinatário das Pessoas informadas (nome, CPF se for cliente, telefone e endereço principal).
+
+    Returns:
+        dict or None: {Codigo_Pessoa: Recipient} das pessoas existentes, ou None em caso de erro.
+    """
+    rows = _select_in(conn, """
+    SELECT P.Codigo_Pessoa, P.Nome, C.CPF, P.Telefone, P.ID_Endereco, E.Cidade, E.Estado
+    FROM Pessoa P
+    INNER JOIN Endereco E ON E.ID_Endereco = P.ID_Endereco
+    LEFT JOIN Cliente C ON C.Codigo_Pessoa = P.Codigo_Pessoa
+    WHERE P.Codigo_Pessoa IN ({});
+    """, set(person_ids))
+    return None if rows is None else {row[0]: Recipient(*row[1:]) for row in rows}
+
+# ------------------- CLIENTES ----------------------
+
+def client_type_errors(tipo, cpf, data_nascimento, cnpj, nome_empresa):
+    """
+    Regras de Pessoa Física/Jurídica (as mesmas da restrição CHK_Cliente_PF_PJ).
+
+    Args:
+        tipo (str): 'PF' ou 'PJ'.
+        data_nascimento: date, ou o texto informado quando não pôde ser convertido (inválido), ou None.
+
+    Returns:
+        list: Mensagens de erro (vazia se os campos estão coerentes com o tipo).
+    """
+    errors = []
+    if tipo == "PF":
+        if not cpf:
+            errors.append("Cliente PF exige CPF.")
+        if not isinstance(data_nascimento, date):
+            errors.append("Cliente PF exige Data de Nascimento válida (AAAA-MM-DD ou DD/MM/AAAA).")
+        if cnpj or nome_empresa:
+            errors.append("Cliente PF não pode ter CNPJ nem Nome da Empresa.")
+    elif tipo == "PJ":
+        if not cnpj:
+            errors.append("Cliente PJ exige CNPJ.")
+        if not nome_empresa:
+            errors.append("Cliente PJ exige Nome da Empresa.")
+        if cpf or data_nascimento:
+            errors.append("Cliente PJ não pode ter CPF nem Data de Nascimento.")
+    else:
+        errors.append("Tipo de cliente deve ser PF ou PJ.")
+    return errors
+
+def existing_logins(conn, logins):
+    """Logins, entre os informados, que já estão em uso (em minúsculas). None em caso de erro."""
+    rows = _select_in(conn, "SELECT Login FROM Usuario WHERE Login IN ({});", {login for login in logins if login})
+    return None if rows is None else {row[0].lower() for row in rows}
+
+def register_clients(conn, clients):
+    """
+    Cadastra clientes com endereço, pessoa e usuário (tipo Cliente), em uma transação por lote.
+
+    Usa a validação e a gravação set-based da importação de clientes (client_import.py). A unicidade é
+    verificada para o login; CPF/CNPJ repetidos só são recusados dentro do mesmo lote.
+
+    Args:
+        clients (list): Dicionários com os campos de client_import.COLUMNS (textos, como nas linhas do CSV).
+
+    Returns:
+        list: Um Outcome por cliente; dados = {'login'}.
+    """
+    import client_import # Importado aqui: client_import usa client_type_errors deste módulo.
+    rows = [{name: (str(value).strip() if value is not None else "") for name, value in client.items()} for client in clients]
+    logins = existing_logins(conn, [row.get("login") for row in rows])
+    if logins is None:
+        return [_error(DB_ERROR)] * len(rows)
+    results, valid = {}, []
+    cpfs, cnpjs = set(), set()
+    for position, row in enumerate(rows):
+        data, errors = client_import.validate_row(row, cpfs, cnpjs, logins)
+        if errors:
+            results[position] = _error("; ".join(errors))
+        else:
+            valid.append((position, data))
+
+    def write(items):
+        client_import.insert_batch(conn, items, passwords.hash_password)
+        return {position: data["login"] for position, data in items}
+
+    if valid:
+        written, errors = _write_with_fallback(valid, write, "clientes")
+        for position, login in written.items():
+            results[position] = _ok(login=login)
+        for position, message in errors.items():
+            results[position] = _error(message)
+    return [results[position] for position in range(len(rows))]
+
+# ------------------- PRODUTOS ----------------------
+
+def new_tracking_code():
+    """Código de rastreamento (SRL + data/hora), com sufixo para códigos gerados em sequência no mesmo processo."""
+    return f"SRL{datetime.now().strftime('%Y%m%d%H%M%S%f')}{next(_tracking_sequence) % 10000:04d}"
+
+_INSERT_PRODUCTS_SQL = """
+SET NOCOUNT ON;
+DECLARE @Rastreamentos TABLE (Posicao INT PRIMARY KEY, ID_Rastreamento INT);
+DECLARE @Produtos TABLE (Posicao INT PRIMARY KEY, ID_Produto INT);
+
+-- MERGE com condição sempre falsa insere todas as linhas e devolve (posição, identidade gerada).
+-- OUTPUT ... INTO porque as tabelas têm triggers (OUTPUT direto para o cliente não é permitido).
+MERGE INTO Dados_Rastreamento AS T
+USING #Lote_Produto AS S ON 1 = 0
+WHEN NOT MATCHED THEN
+    INSERT (Codigo_Rastreamento, Nome_Destinatario, CPF_Destinatario, ID_Endereco, Cidade, Estado, Telefone_Destinatario)
+    VALUES (S.Codigo_Rastreamento, S.Nome_Destinatario, S.CPF_Destinatario, S.ID_Endereco, S.Cidade, S.Estado, S.Telefone_Destinatario)
+OUTPUT S.Posicao, INSERTED.ID_Rastreamento INTO @Rastreamentos;
+
+MERGE INTO Produto_A_Ser_Entregue AS T
+USING (SELECT L.*, R.ID_Rastreamento FROM #Lote_Produto L INNER JOIN @Rastreamentos R ON R.Posicao = L.Posicao) AS S ON 1 = 0
+WHEN NOT MATCHED THEN
+    INSERT (Peso, Status_Entrega, Data_Chegada_CD, Data_Prevista_Entrega, Tipo_Produto, ID_Remetente, ID_Destinatario,
+            Codigo_Funcionario_Motorista, ID_Rastreamento)
+    VALUES (S.Peso, S.Status_Entrega, S.Data_Chegada_CD, S.Data_Prevista_Entrega, S.Tipo_Produto, S.ID_Remetente, S.ID_Destinatario,
+            S.Codigo_Funcionario_Motorista, S.ID_Rastreamento)
+OUTPUT S.Posicao, INSERTED.ID_Produto INTO @Produtos;
+
+SELECT Posicao, ID_Produto FROM @Produtos;
+"""
+
+def _insert_products(conn, items):
+    """Grava rastreamentos e produtos em uma transação (tabela temporária + dois MERGE). Retorna {posição: ID_Produto}."""
+    def work(cursor):
+        cursor.execute("""
+        IF OBJECT_ID('tempdb..#Lote_Produto') IS NOT NULL DROP TABLE #Lote_Produto;
+        CREATE TABLE #Lote_Produto (
+            Posicao INT PRIMARY KEY, Codigo_Rastreamento VARCHAR(50), Nome_Destinatario VARCHAR(255), CPF_Destinatario VARCHAR(14),
+            ID_Endereco INT, Cidade VARCHAR(100), Estado VARCHAR(50), Telefone_Destinatario VARCHAR(20),
+            Peso DECIMAL(10, 2), Status_Entrega VARCHAR(50), Data_Chegada_CD DATE, Data_Prevista_Entrega DATE,
+            Tipo_Produto VARCHAR(50), ID_Remetente INT, ID_Destinatario INT, Codigo_Funcionario_Motorista INT);
+        """)
+        cursor.fast_executemany = True # O lote vai ao servidor em poucas idas.
+        cursor.executemany("INSERT INTO #Lote_Produto VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);", [
+            (position, code, p.nome_destinatario, p.cpf_destinatario, r.id_endereco, r.cidade, r.estado, p.telefone_destinatario,
+             p.peso, p.status, p.data_chegada_cd, p.data_prevista_entrega, p.tipo, p.remetente, p.destinatario, p.motorista)
+            for position, (p, r, code) in items])
+        cursor.execute(_INSERT_PRODUCTS_SQL)
+        written = {position: product_id for position, product_id in cursor.fetchall()}
+        cursor.execute("DROP TABLE #Lote_Produto;")
+        return written
+    return _run_in_transaction(conn, work)
+
+def product_errors(product, drivers):
+    """Regras de um produto que não dependem de outros registros do banco. `drivers`: motoristas válidos do lote."""
+    errors = []
+    if product.peso is None or Decimal(str(product.peso)) <= 0:
+        errors.append("Peso deve ser maior que zero.")
+    if product.status not in reference_cache.STATUS_ENTREGA:
+        errors.append(f"Status inválido: {product.status}")
+    if product.tipo not in reference_cache.TIPOS_PRODUTO:
+        errors.append(f"Tipo de produto inválido: {product.tipo}")
+    if not isinstance(product.data_chegada_cd, date):
+        errors.append("Data de chegada no CD é obrigatória.")
+    if product.motorista is not None and product.motorista not in drivers:
+        errors.append("Motorista inválido.")
+    return errors
+
+def add_products(conn, products):
+    """
+    Cadastra produtos e seus dados de rastreamento. O remetente deve ser Cliente e o destinatário uma Pessoa
+    existente; o rastreamento usa o endereço principal do destinatário e, se não informados, o nome, CPF
+    e telefone do cadastro dele. Remetentes, destinatários e motoristas do lote são buscados em uma consulta cada.
+
+    Args:
+        products (list): Lista de NewProduct.
+
+    Returns:
+        list: Um Outcome por produto; dados = {'id_produto', 'codigo_rastreamento'}.
+    """
+    senders = existing_clients(conn, [p.remetente for p in products])
+    recipients = get_recipients(conn, [p.destinatario for p in products]) if senders is not None else None
+    if recipients is None:
+        return [_error(DB_ERROR)] * len(products)
+    drivers = reference_cache.drivers_among(conn, [p.motorista for p in products if p.motorista is not None])
+
+    results, to_insert = {}, []
+    for position, product in enumerate(products):
+        errors = product_errors(product, drivers)
+        if errors:
+            results[position] = _error("; ".join(errors))
+        elif product.remetente not in senders:
+            results[position] = _error("Remetente não encontrado como Cliente.")
+        elif product.destinatario not in recipients:
+            results[position] = _error("Destinatário (Pessoa) não encontrado.")
+        else:
+            recipient = recipients[product.destinatario]
+            product = product._replace(nome_destinatario=product.nome_destinatario or recipient.nome,
+                                       cpf_destinatario=product.cpf_destinatario or recipient.cpf,
+                                       telefone_destinatario=product.telefone_destinatario or recipient.telefone)
+            to_insert.append((position, (product, recipient, new_tracking_code())))
+
+    if to_insert:
+        written, errors = _write_with_fallback(to_insert, lambda items: _insert_products(conn, items), "produtos")
+        codes = {position: code for position, (_, _, code) in to_insert}
+        for position, product_id in written.items():
+            results[position] = _ok(id_produto=product_id, codigo_rastreamento=codes[position])
+        for position, message in errors.items():
+            results[position] = _error(message)
+    return [results[position] for position in range(len(products))]
+
+_FINAL_IN = ", ".join("?" * len(driver_queue.FINAL_STATUSES))
+# Status_Final: primeiro status final da sequência de cada alteração (o atual do produto ou o de uma alteração
+# anterior do mesmo produto no lote). Alterações que sairiam desse status são recusadas e não entram no UPDATE.
+_UPDATE_STATUS_SQL = f"""
+SET NOCOUNT ON;
+UPDATE L SET L.ID_Produto = P.ID_Produto
+FROM #Lote_Status L
+INNER JOIN Dados_Rastreamento DR ON DR.Codigo_Rastreamento = L.Codigo_Rastreamento
+INNER JOIN Produto_A_Ser_Entregue P ON P.ID_Rastreamento = DR.ID_Rastreamento
+WHERE L.ID_Produto IS NULL;
+
+UPDATE L SET L.Status_Anterior = P.Status_Entrega, L.Status_Final = COALESCE(
+    CASE WHEN P.Status_Entrega IN ({_FINAL_IN}) THEN P.Status_Entrega END,
+    (SELECT TOP 1 A.Status FROM #Lote_Status A
+     WHERE A.ID_Produto = L.ID_Produto AND A.Posicao < L.Posicao AND A.Status IN ({_FINAL_IN})
+     ORDER BY A.Posicao))
+FROM #Lote_Status L
+INNER JOIN Produto_A_Ser_Entregue P WITH (UPDLOCK) ON P.ID_Produto = L.ID_Produto;
+
+-- Com o mesmo produto repetido no lote, vale a última alteração aceita.
+UPDATE P SET P.Status_Entrega = L.Status
+FROM Produto_A_Ser_Entregue P
+INNER JOIN (
+    SELECT ID_Produto, MAX(Posicao) AS Posicao FROM #Lote_Status
+    WHERE Status_Final IS NULL OR Status = Status_Final
+    GROUP BY ID_Produto
+) U ON U.ID_Produto = P.ID_Produto
+INNER JOIN #Lote_Status L ON L.Posicao = U.Posicao;
+
+-- Resultado por último: um erro no UPDATE acima é lançado antes de qualquer linha ser lida.
+SELECT Posicao, ID_Produto, Status_Anterior, Status_Final FROM #Lote_Status WHERE Status_Anterior IS NOT NULL;
+"""
+
+def update_product_statuses(conn, changes):
+    """
+    Altera o status de produtos identificados pelo ID ou pelo código de rastreamento, em uma transação.
+    Produtos em status final (Entregue/Cancelado) não mudam mais de status: a alteração é recusada com erro.
+
+    Args:
+        changes (list): Lista de StatusChange.
+
+    Returns:
+        list: Um Outcome por alteração; dados = {'id_produto', 'status', 'status_anterior'}.
+    """
+    results, valid = {}, []
+    for position, change in enumerate(changes):
+        if change.status not in reference_cache.STATUS_ENTREGA:
+            results[position] = _error(f"Status inválido: {change.status}")
+        elif change.id_produto is None and not change.codigo_rastreamento:
+            results[position] = _error("Informe o ID do produto ou o código de rastreamento.")
+        else:
+            code = arrival_scan.normalize_code(change.codigo_rastreamento) if change.codigo_rastreamento else None
+            valid.append((position, change._replace(codigo_rastreamento=code)))
+
+    def write(items):
+        def work(cursor):
+            cursor.execute("""
+            IF OBJECT_ID('tempdb..#Lote_Status') IS NOT NULL DROP TABLE #Lote_Status;
+            CREATE TABLE #Lote_Status (Posicao INT PRIMARY KEY, ID_Produto INT, Codigo_Rastreamento VARCHAR(50), Status VARCHAR(50), Status_Anterior VARCHAR(50), Status_Final VARCHAR(50));
+            """)
+            cursor.fast_executemany = True
+            cursor.executemany("INSERT INTO #Lote_Status (Posicao, ID_Produto, Codigo_Rastreamento, Status) VALUES (?, ?, ?, ?);",
+                               [(position, c.id_produto, c.codigo_rastreamento, c.status) for position, c in items])
+            cursor.execute(_UPDATE_STATUS_SQL, driver_queue.FINAL_STATUSES * 2)
+            written = {position: (product_id, previous, final) for position, product_id, previous, final in cursor.fetchall()}
+            cursor.execute("DROP TABLE #Lote_Status;")
+            return written
+        return _run_in_transaction(conn, work)
+
+    if valid:
+        written, errors = _write_with_fallback(valid, write, "alterações de status")
+        for position, change in valid:
+            if position in errors:
+                results[position] = _error(errors[position])
+            elif position in written:
+                product_id, previous, final = written[position]
+                if final is not None and change.status != final: # Recusada no SQL (não entrou no UPDATE).
+                    results[position] = _error(f"Produto {product_id} está com status final ({final}) e não pode mudar de status.")
+                else:
+                    results[position] = _ok(id_produto=product_id, status=change.status, status_anterior=previous)
+            else:
+                results[position] = _error("Produto não encontrado.")
+    return [results[position] for position in range(len(changes))]
+
+_TRACK_SQL = """
+SELECT DR.Codigo_Rastreamento, P.ID_Produto, P.Status_Entrega, P.Tipo_Produto, P.Peso,
+       P.Data_Chegada_CD, P.Data_Prevista_Entrega, P.Data_Entrega_Realizada,
+       REM.Nome, DR.Nome_Destinatario, DR.Cidade, DR.Estado, MOT.Nome, UC.Placa_Veiculo, UC.Data_Carregamento
+FROM Dados_Rastreamento DR
+INNER JOIN Produto_A_Ser_Entregue P ON P.ID_Rastreamento = DR.ID_Rastreamento
+INNER JOIN Pessoa REM ON REM.Codigo_Pessoa = P.ID_Remetente
+LEFT JOIN Pessoa MOT ON MOT.Codigo_Pessoa = P.Codigo_Funcionario_Motorista
+OUTER APPLY (
+    SELECT TOP 1 C.Placa_Veiculo, C.Data_Carregamento FROM Carregamento C
+    WHERE C.ID_Produto = P.ID_Produto ORDER BY C.Data_Carregamento DESC
+) AS UC
+WHERE DR.Codigo_Rastreamento IN ({});
+"""
+_TRACK_FIELDS = ("id_produto", "status", "tipo", "peso", "data_chegada_cd", "data_prevista_entrega", "data_entrega",
+                 "remetente", "destinatario", "cidade", "estado", "motorista", "placa_veiculo", "data_carregamento")
+
+def track(conn, codes):
+    """
+    Rastreia vários códigos com uma consulta por bloco (visão interna: sem a restrição ao cliente do menu do Cliente).
+
+    Returns:
+        list: Um Outcome por código; dados = {'codigo_rastreamento', 'id_produto', 'status', ...}.
+    """
+    codes = [arrival_scan.normalize_code(code) for code in codes]
+    rows = _select_in(conn, _TRACK_SQL, set(codes))
+    if rows is None:
+        metrics.TRACKING_LOOKUPS.labels("erro").inc(len(codes))
+        return [_error(DB_ERROR)] * len(codes)
+    found = {row[0]: dict(zip(_TRACK_FIELDS, row[1:])) for row in rows}
+    results = []
+    for code in codes:
+        if code in found:
+            results.append(_ok(codigo_rastreamento=code, **found[code]))
+        else:
+            results.append(_error(f"Código de rastreamento não encontrado: {code}"))
+        metrics.TRACKING_LOOKUPS.labels("encontrado" if code in found else "nao_encontrado").inc()
+    return results
+
+# ------------------- CARREGAMENTOS ----------------------
+
+def fits_in_vehicle(capacity, loaded_weight, weight):
+    """Indica se um produto de `weight` kg cabe no veículo que já leva `loaded_weight` kg (carga máxima `capacity`)."""
+    return Decimal(str(loaded_weight)) + Decimal(str(weight)) <= Decimal(str(capacity))
+
+def create_shipments(conn, shipments):
+    """
+    Registra carregamentos (um veículo, uma data e uma lista de produtos cada). Regras: veículo existente,
+    produtos existentes, sem repetição e com status em LOADABLE_STATUSES, e peso total dentro da carga
+    suportada do veículo. Pesos e status de todos os produtos do lote vêm de uma consulta por bloco.
+
+    Args:
+        shipments (list): Lista de Shipment (data_carregamento None = agora).
+
+    Returns:
+        list: Um Outcome por carregamento; dados = {'placa', 'data_carregamento', 'produtos', 'peso_total'}.
+    """
+    # Veículos lidos do banco (não do cache): a capacidade protege a gravação.
+    vehicle_rows = _select_in(conn, "SELECT Placa_Veiculo, Carga_Suportada FROM Veiculo WHERE Placa_Veiculo IN ({});",
+                              {s.placa.upper() for s in shipments})
+    rows = _select_in(conn, "SELECT ID_Produto, Peso, Status_Entrega FROM Produto_A_Ser_Entregue WHERE ID_Produto IN ({});",
+                      {product_id for s in shipments for product_id in s.produtos}) if vehicle_rows is not None else None
+    if rows is None:
+        return [_error(DB_ERROR)] * len(shipments)
+    vehicles = {plate: capacity for plate, capacity in vehicle_rows}
+    products = {row[0]: (row[1], row[2]) for row in rows}
+
+    results, to_insert = {}, []
+    for position, shipment in enumerate(shipments):
+        shipment = shipment._replace(placa=shipment.placa.upper(),
+                                     data_carregamento=shipment.data_carregamento or datetime.now().replace(microsecond=0))
+        missing = [product_id for product_id in shipment.produtos if product_id not in products]
+        unavailable = [product_id for product_id in shipment.produtos
+                       if product_id in products and products[product_id][1] not in LOADABLE_STATUSES]
+        total_weight = sum((products[product_id][0] for product_id in shipment.produtos if product_id in products), Decimal(0))
+        capacity = vehicles.get(shipment.placa)
+        if capacity is None:
+            results[position] = _error("Veículo não encontrado.")
+        elif not shipment.produtos:
+            results[position] = _error("Nenhum produto informado.")
+        elif len(set(shipment.produtos)) != len(shipment.produtos):
+            results[position] = _error("Produto repetido no carregamento.")
+        elif missing:
+            results[position] = _error(f"Produtos não encontrados: {missing}")
+        elif unavailable:
+            results[position] = _error(f"Produtos indisponíveis para carregamento: {unavailable}")
+        elif not fits_in_vehicle(capacity, 0, total_weight):
+            results[position] = _error(f"Peso total ({total_weight}kg) excede a carga suportada do veículo ({capacity}kg).")
+        else:
+            to_insert.append((position, (shipment, total_weight)))
+
+    def write(items):
+        def work(cursor):
+            cursor.fast_executemany = True
+            # A constraint UQ_Carregamento impede o mesmo produto duas vezes no mesmo veículo e data.
+            cursor.executemany("INSERT INTO Carregamento (Placa_Veiculo, ID_Produto, Data_Carregamento) VALUES (?, ?, ?);",
+                               [(s.placa, product_id, s.data_carregamento) for _, (s, _) in items for product_id in s.produtos])
+            return {position: True for position, _ in items}
+        return _run_in_transaction(conn, work)
+
+    if to_insert:
+        written, errors = _write_with_fallback(to_insert, write, "carregamentos")
+        for position, (shipment, total_weight) in to_insert:
+            if position in written:
+                results[position] = _ok(placa=shipment.placa, data_carregamento=shipment.data_carregamento,
+                                        produtos=len(shipment.produtos), peso_total=total_weight)
+            else:
+                results[position] = _error(errors[position])
+    return [results[position] for position in range(len(shipments))]
+
+# ------------------- EXCLUSÕES ----------------------
+
+# Dependências que impedem a exclusão, por entidade. As condições são correlacionadas com a linha X da tabela.
+DELETE_RULES = {
+    "pessoa": DeleteRule("Pessoa", "Codigo_Pessoa", ["X.ID_Endereco"], [
+        Blocker("Usuario", "Pessoa possui um usuário.", "EXISTS (SELECT 1 FROM Usuario U WHERE U.Codigo_Pessoa = X.Codigo_Pessoa)"),
+        Blocker("Cliente", "Pessoa é um cliente.", "EXISTS (SELECT 1 FROM Cliente C WHERE C.Codigo_Pessoa = X.Codigo_Pessoa)"),
+        Blocker("Funcionario", "Pessoa é um funcionário.", "EXISTS (SELECT 1 FROM Funcionario F WHERE F.Codigo_Funcionario = X.Codigo_Pessoa)"), # Codigo_Funcionario = Codigo_Pessoa
+        Blocker("Produto (Remetente)", "Pessoa é remetente de produtos.", "EXISTS (SELECT 1 FROM Produto_A_Ser_Entregue PR WHERE PR.ID_Remetente = X.Codigo_Pessoa)"),
+        Blocker("Produto (Destinatário)", "Pessoa é destinatária de produtos.", "EXISTS (SELECT 1 FROM Produto_A_Ser_Entregue PD WHERE PD.ID_Destinatario = X.Codigo_Pessoa)"),
+    ]),
+    "cliente": DeleteRule("Cliente", "Codigo_Pessoa", ["(SELECT P.Nome FROM Pessoa P WHERE P.Codigo_Pessoa = X.Codigo_Pessoa)"], [
+        Blocker("Produto", "Cliente está associado a produtos. Não pode ser deletado.",
+                "EXISTS (SELECT 1 FROM Produto_A_Ser_Entregue PR WHERE PR.ID_Remetente = X.Codigo_Pessoa OR PR.ID_Destinatario = X.Codigo_Pessoa)"),
+        Blocker("Usuario", "Cliente possui um usuário associado. Delete o usuário primeiro ou altere seu tipo.",
+                "EXISTS (SELECT 1 FROM Usuario U WHERE U.Codigo_Pessoa = X.Codigo_Pessoa AND U.Tipo_Usuario = 'Cliente')"),
+    ]),
+    "funcionario": DeleteRule("Funcionario", "Codigo_Funcionario", ["(SELECT P.Nome FROM Pessoa P WHERE P.Codigo_Pessoa = X.Codigo_Funcionario)"], [
+        Blocker("Produto (Motorista)", "Funcionário é motorista de produtos. Não pode ser deletado.",
+                "EXISTS (SELECT 1 FROM Produto_A_Ser_Entregue PR WHERE PR.Codigo_Funcionario_Motorista = X.Codigo_Funcionario)"),
+        Blocker("Usuario", "Funcionário possui um usuário associado. Delete o usuário primeiro ou altere seu tipo.",
+                "EXISTS (SELECT 1 FROM Usuario U WHERE U.Codigo_Pessoa = X.Codigo_Funcionario AND U.Tipo_Usuario != 'Cliente')"),
+    ]),
+    "veiculo": DeleteRule("Veiculo", "Placa_Veiculo", [], [
+        Blocker("Funcionario", "Veículo está associado a um funcionário (Motorista). Desvincule-o primeiro.",
+                "EXISTS (SELECT 1 FROM Funcionario F WHERE F.Placa_Veiculo = X.Placa_Veiculo)"),
+        Blocker("Carregamento", "Veículo possui carregamentos associados. Não pode ser deletado.",
+                "EXISTS (SELECT 1 FROM Carregamento C WHERE C.Placa_Veiculo = X.Placa_Veiculo)"),
+    ]),
+    "sede": DeleteRule("Sede", "ID_Sede", ["X.ID_Endereco"], [
+        Blocker("Funcionario", "Sede está associada a funcionários. Desvincule-os primeiro.",
+                "EXISTS (SELECT 1 FROM Funcionario F WHERE F.ID_Sede = X.ID_Sede)"),
+    ]),
+    "produto": DeleteRule("Produto_A_Ser_Entregue", "ID_Produto", ["X.ID_Rastreamento", "X.Status_Entrega"], [
+        Blocker("Carregamento", "Produto está associado a um carregamento. Remova-o do carregamento primeiro.",
+                "EXISTS (SELECT 1 FROM Carregamento C WHERE C.ID_Produto = X.ID_Produto)"),
+    ]),
+    "rastreamento": DeleteRule("Dados_Rastreamento", "ID_Rastreamento", [], [
+        Blocker("Produto", "Estes dados de rastreamento estão vinculados a um produto. Delete o produto associado primeiro "
+                "(isso também deleta os dados de rastreamento).",
+                "EXISTS (SELECT 1 FROM Produto_A_Ser_Entregue P WHERE P.ID_Rastreamento = X.ID_Rastreamento)"),
+    ]),
+}
+
+def check_deletes(conn, entity, keys):
+    """
+    Verifica, com uma consulta por bloco de chaves, as dependências que impedem a exclusão dos registros.
+
+    Args:
+        entity (str): Chave de DELETE_RULES (ex: 'pessoa', 'produto', 'veiculo').
+        keys (list): Chaves primárias a verificar.
+
+    Returns:
+        dict or None: {chave: DeleteCheck(dados, bloqueios)} apenas para os registros existentes, onde
+                      `dados` são os valores de rule.dados e `bloqueios` a lista de Blocker que se aplicam;
+                      None em caso de erro na consulta.
+    """
+    rule = DELETE_RULES[entity]
+    columns = [f"X.{rule.chave}"] + rule.dados + [f"CASE WHEN {blocker.condicao} THEN 1 ELSE 0 END" for blocker in rule.bloqueios]
+    sql = f"SELECT {', '.join(columns)} FROM {rule.tabela} X WHERE X.{rule.chave} IN ({{}});"
+    rows = _select_in(conn, sql, list(dict.fromkeys(keys)))
+    if rows is None: # Erro na consulta (uma lista vazia significa apenas que nenhum registro foi encontrado).
+        return None
+    extra = len(rule.dados)
+    return {row[0]: DeleteCheck(tuple(row[1:1 + extra]), [blocker for blocker, flag in zip(rule.bloqueios, row[1 + extra:]) if flag])
+            for row in rows}
+
+def delete_people_and_orphan_addresses(conn, person_ids, address_ids):
+    """
+    Deleta as Pessoas e, na mesma transação, os Endereços que ficarem sem uso.
+
+    Um Endereço só é removido se não for referenciado por outra Pessoa, Sede ou Dados_Rastreamento.
+
+    Returns:
+        tuple or None: (pessoas deletadas, endereços deletados), ou None se a transação falhar.
+    """
+    person_placeholders = ",".join("?" * len(person_ids))
+    address_ids = list(set(address_ids))
+    address_placeholders = ",".join("?" * len(address_ids))
+    statements = [
+        (f"DELETE FROM Pessoa WHERE Codigo_Pessoa IN ({person_placeholders});", tuple(person_ids)),
+        (f"""
+        DELETE FROM Endereco
+        WHERE ID_Endereco IN ({address_placeholders})
+          AND NOT EXISTS (SELECT 1 FROM Pessoa P WHERE P.ID_Endereco = Endereco.ID_Endereco)
+          AND NOT EXISTS (SELECT 1 FROM Sede S WHERE S.ID_Endereco = Endereco.ID_Endereco)
+          AND NOT EXISTS (SELECT 1 FROM Dados_Rastreamento DR WHERE DR.ID_Endereco = Endereco.ID_Endereco);
+        """, tuple(address_ids))
+    ]
+    rowcounts = db_connection.execute_transaction(conn, statements)
+    if rowcounts is None:
+        return None
+    return rowcounts[0], rowcounts[1]
+
+def delete_products(conn, product_ids, force=False):
+    """
+    Deleta produtos e seus Dados de Rastreamento (uma transação por bloco). Produtos em carregamentos
+    não são deletados; com status fora de PRODUCT_DELETE_SAFE_STATUSES, só com `force`.
+
+    Returns:
+        list: Um Outcome por produto; dados = {'id_produto'}.
+    """
+    checks = check_deletes(conn, "produto", product_ids)
+    if checks is None:
+        return [_error(DB_ERROR)] * len(product_ids)
+    results, deletable = {}, {}
+    for product_id in product_ids:
+        check = checks.get(product_id)
+        if check is None:
+            results[product_id] = _error("Produto não encontrado.")
+        elif check.bloqueios:
+            results[product_id] = _error(check.bloqueios[0].mensagem)
+        elif check.dados[1] not in PRODUCT_DELETE_SAFE_STATUSES and not force:
+            results[product_id] = _error(f"Produto com status '{check.dados[1]}'; a exclusão exige confirmação.")
+        else:
+            deletable[product_id] = check.dados[0]
+
+    items = list(deletable.items())
+    for start in range(0, len(items), MAX_IDS_PER_BATCH):
+        block = items[start:start + MAX_IDS_PER_BATCH]
+        placeholders = ",".join("?" * len(block))
+        rowcounts = db_connection.execute_transaction(conn, [
+            (f"DELETE FROM Produto_A_Ser_Entregue WHERE ID_Produto IN ({placeholders});", tuple(product_id for product_id, _ in block)),
+            (f"DELETE FROM Dados_Rastreamento WHERE ID_Rastreamento IN ({placeholders});", tuple(tracking_id for _, tracking_id in block)),
+        ])
+        for product_id, _ in block:
+            results[product_id] = _ok(id_produto=product_id) if rowcounts is not None else _error(DB_ERROR)
+    return [results[product_id] for product_id in product_ids]
@@ -0,0 +1,245 @@
+import base64
+import getpass
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+import db_connection # Funções de acesso ao banco de dados.
+import passwords # Verificação de senha (KDF).
+import metrics # Acertos do cache de perfis e tentativas de login.
+
+# Tempo de vida padrão de um token de sessão e capacidade do armazenamento em memória.
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(8 * 3600)))
+SESSION_STORE_SIZE = int(os.getenv("SESSION_STORE_SIZE", "10000"))
+# Por quanto tempo o perfil (tipo/Codigo_Pessoa) de um login fica em cache antes de ser relido do banco.
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+# Variável de ambiente de onde scripts leem o token (ex: export SRL_SESSION_TOKEN=$(python sessions.py login)).
+TOKEN_ENV_VAR = "SRL_SESSION_TOKEN"
+
+# credential_version: Usuario.Versao_Credencial na emissão do token (a troca de senha invalida os tokens anteriores).
+Session = namedtuple("Session", ["session_id", "login", "user_type", "person_code", "credential_version", "expires_at"])
+
+def _load_secret():
+    secret = os.getenv("SESSION_SECRET")
+    if secret:
+        return secret.encode()
+    # Sem segredo configurado, os tokens só valem enquanto este processo estiver rodando.
+    logging.warning("SESSION_SECRET não configurado: usando um segredo aleatório (tokens não sobrevivem a reinícios).")
+    return secrets.token_bytes(32)
+
+_SECRET = _load_secret()
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(payload_b64):
+    return _b64encode(hmac.new(_SECRET, payload_b64.encode("ascii"), hashlib.sha256).digest())
+
+class LRUStore:
+    """Dicionário limitado, seguro para threads, que descarta o item menos usado recentemente quando cheio."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key) # Marca como usado recentemente.
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False) # Descarta o menos usado recentemente.
+
+    def pop(self, key):
+        with self._lock:
+            return self._items.pop(key, None)
+
+    def values(self):
+        with self._lock:
+            return list(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+_sessions = LRUStore(SESSION_STORE_SIZE) # session_id -> Session
+_revoked = LRUStore(SESSION_STORE_SIZE) # session_id -> instante de expiração (tokens encerrados antes do prazo)
+_profiles = LRUStore(SESSION_STORE_SIZE) # login -> (instante da leitura, (tipo, Codigo_Pessoa, Versao_Credencial) ou None)
+_PROFILE_HITS = metrics.CACHE_LOOKUPS.labels("perfil_usuario", "acerto")
+_PROFILE_MISSES = metrics.CACHE_LOOKUPS.labels("perfil_usuario", "falta")
+_SESSION_HITS = metrics.CACHE_LOOKUPS.labels("sessao", "acerto")
+_SESSION_MISSES = metrics.CACHE_LOOKUPS.labels("sessao", "falta")
+
+def get_user_profile(conn, login):
+    """
+    Retorna (Tipo_Usuario, Codigo_Pessoa, Versao_Credencial) de um login, com cache em memória por PROFILE_CACHE_TTL_SECONDS.
+
+    Returns:
+        tuple or None: O perfil, ou None se o login não existir.
+    """
+    cached = _profiles.get(login)
+    if cached and time.time() - cached[0] < PROFILE_CACHE_TTL_SECONDS:
+        _PROFILE_HITS.inc()
+        return cached[1]
+    _PROFILE_MISSES.inc()
+    rows = db_connection.execute_query(conn, "SELECT Tipo_Usuario, Codigo_Pessoa, Versao_Credencial FROM Usuario WHERE Login = ?", (login,), fetch_results=True)
+    if rows is None: # Erro de banco: não guarda em cache.
+        return None
+    profile = tuple(rows[0]) if rows else None
+    _profiles.put(login, (time.time(), profile))
+    return profile
+
+def invalidate_user_profile(login):
+    """Remove o perfil de um login do cache (usar após alterar o tipo, a pessoa ou a senha de um usuário)."""
+    _profiles.pop(login)
+
+def create_session(login, user_type, person_code, credential_version, ttl=SESSION_TTL_SECONDS):
+    """
+    Cria uma sessão para um usuário já autenticado e retorna o token assinado.
+
+    O token carrega login, tipo, Codigo_Pessoa, versão da credencial e expiração, assinados com HMAC-SHA256
+    (SESSION_SECRET), de modo que pode ser validado sem acessar o banco nem recalcular o KDF da senha.
+    """
+    session = Session(secrets.token_hex(16), login, user_type, person_code, credential_version, int(time.time()) + ttl)
+    payload = _b64encode(json.dumps(session._asdict(), separators=(",", ":")).encode("utf-8"))
+    _sessions.put(session.session_id, session)
+    return f"{payload}.{_sign(payload)}"
+
+def authenticate(conn, login, password, ttl=SESSION_TTL_SECONDS):
+    """
+    Autentica login e senha (uma consulta + KDF) e cria uma sessão.
+
+    Returns:
+        str or None: O token da sessão, ou None se as credenciais forem inválidas.
+    """
+    rows = db_connection.execute_query(conn, "SELECT Senha_Hash, Tipo_Usuario, Codigo_Pessoa, Versao_Credencial FROM Usuario WHERE Login = ?",
+                                       (login,), fetch_results=True)
+    if not rows or not passwords.verify_password(rows[0][0], password):
+        metrics.LOGIN_ATTEMPTS.labels("api", "usuario_inexistente" if not rows else "senha_invalida").inc()
+        return None
+    metrics.LOGIN_ATTEMPTS.labels("api", "sucesso").inc()
+    stored_hash, user_type, person_code, credential_version = rows[0]
+    if passwords.needs_rehash(stored_hash): # Mesmo comportamento do login pelo terminal.
+        db_connection.execute_query(conn, "UPDATE Usuario SET Senha_Hash = ? WHERE Login = ? AND Senha_Hash = ?",
+                                    (passwords.hash_password(password), login, stored_hash))
+    _profiles.put(login, (time.time(), (user_type, person_code, credential_version)))
+    return create_session(login, user_type, person_code, credential_version, ttl)
+
+def decode_token(token):
+    """
+    Confere a assinatura, a expiração e o encerramento de um token, sem consultar o banco nem o
+    armazenamento de sessões (útil sem conexão, ex: modo offline do motorista).
+
+    Returns:
+        Session or None: A sessão descrita no token, ou None se for inválido, expirado ou encerrado.
+    """
+    try:
+        payload, signature = token.split(".")
+    except (AttributeError, ValueError):
+        return None
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        session = Session(**json.loads(_b64decode(payload)))
+    except (ValueError, TypeError):
+        return None
+    if session.expires_at < time.time() or _revoked.get(session.session_id):
+        return None
+    return session
+
+def validate_token(token, conn=None):
+    """
+    Valida um token de sessão.
+
+    Tokens presentes no armazenamento em memória são aceitos sem nenhuma consulta. Um token com assinatura
+    válida mas ausente do armazenamento (descartado pelo LRU, ou emitido por outro processo) é aceito após
+    conferir o perfil no cache de perfis, se uma conexão for informada: um token emitido antes de uma troca
+    de senha (Versao_Credencial diferente) é recusado.
+
+    Returns:
+        Session or None: A sessão, ou None se o token for inválido, expirado ou encerrado.
+    """
+    session = decode_token(token)
+    if session is None:
+        return None
+    if _sessions.get(session.session_id):
+        _SESSION_HITS.inc()
+        return session
+    _SESSION_MISSES.inc()
+    if conn is None:
+        return None
+    # Confere se o usuário ainda existe com o mesmo tipo, pessoa e versão da credencial antes de readmitir a sessão.
+    if get_user_profile(conn, session.login) != (session.user_type, session.person_code, session.credential_version):
+        return None
+    _sessions.put(session.session_id, session)
+    return session
+
+def require_session(token, conn=None, allowed_types=None):
+    """
+    Valida o token e, opcionalmente, o tipo de usuário. Para uso em scripts e serviços.
+
+    Raises:
+        PermissionError: Se o token for inválido/expirado ou o tipo de usuário não for permitido.
+    """
+    session = validate_token(token, conn)
+    if session is None:
+        raise PermissionError("Sessão inválida ou expirada. Faça login novamente.")
+    if allowed_types and session.user_type not in allowed_types:
+        raise PermissionError(f"Usuário do tipo '{session.user_type}' não tem permissão para esta operação.")
+    return session
+
+def revoke_token(token):
+    """Encerra a sessão (logout). O token deixa de ser aceito mesmo antes da expiração."""
+    session = validate_token(token)
+    if session:
+        _sessions.pop(session.session_id)
+        _revoked.put(session.session_id, session.expires_at)
+
+def revoke_user_sessions(login):
+    """Encerra todas as sessões de um login neste processo e descarta o perfil em cache (ex: usuário deletado, senha trocada)."""
+    for session in _sessions.values():
+        if session.login == login:
+            _sessions.pop(session.session_id)
+            _revoked.put(session.session_id, session.expires_at)
+    invalidate_user_profile(login)
+
+def token_from_env():
+    """Lê o token de sessão da variável de ambiente SRL_SESSION_TOKEN (ou None)."""
+    return os.getenv(TOKEN_ENV_VAR)
+
+if __name__ == "__main__":
+    # Uso: export SRL_SESSION_TOKEN=$(python sessions.py login)
+    # Requer SESSION_SECRET configurado para que o token seja aceito por outros processos.
+    if len(sys.argv) < 2 or sys.argv[1] != "login":
+        print("Uso: python sessions.py login", file=sys.stderr)
+        sys.exit(1)
+    conexao_db = db_connection.conectar_banco()
+    if not conexao_db:
+        sys.exit(1)
+    try:
+        sys.stderr.write("Login: ") # Prompts no stderr: o stdout leva só o token (ex: $(python sessions.py login)).
+        sys.stderr.flush()
+        usuario = sys.stdin.readline().strip()
+        senha = getpass.getpass("Senha: ", stream=sys.stderr)
+        token = authenticate(conexao_db, usuario, senha)
+    finally:
+        db_connection.desconectar_banco(conexao_db)
+    if not token:
+        print("Usuário ou senha inválidos.", file=sys.stderr)
+        sys.exit(1)
+    print(token)
@@ -0,0 +1,42 @@
+-- Migração para bancos criados antes da busca de pessoas por dígitos.
+-- Adiciona as colunas calculadas (persistidas) com telefone, CPF e CNPJ sem pontuação e os índices usados
+-- por services.search_people, para que "12345678901" encontre um CPF gravado como "123.456.789-01".
+
+IF COL_LENGTH('Pessoa', 'Telefone_Digitos') IS NULL
+BEGIN
+    ALTER TABLE Pessoa ADD Telefone_Digitos AS REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(Telefone, '(', ''), ')', ''), ' ', ''), '-', ''), '.', '') PERSISTED;
+    PRINT 'Coluna Pessoa.Telefone_Digitos adicionada.';
+END;
+GO
+
+IF COL_LENGTH('Cliente', 'CPF_Digitos') IS NULL
+BEGIN
+    ALTER TABLE Cliente ADD CPF_Digitos AS REPLACE(REPLACE(REPLACE(CPF, '.', ''), '-', ''), '/', '') PERSISTED,
+                            CNPJ_Digitos AS REPLACE(REPLACE(REPLACE(CNPJ, '.', ''), '-', ''), '/', '') PERSISTED;
+    PRINT 'Colunas Cliente.CPF_Digitos e Cliente.CNPJ_Digitos adicionadas.';
+END;
+GO
+
+IF COL_LENGTH('Funcionario', 'CPF_Digitos') IS NULL
+BEGIN
+    ALTER TABLE Funcionario ADD CPF_Digitos AS REPLACE(REPLACE(REPLACE(CPF, '.', ''), '-', ''), '/', '') PERSISTED;
+    PRINT 'Coluna Funcionario.CPF_Digitos adicionada.';
+END;
+GO
+
+-- Os índices por prefixo da coluna original deixam de ser usados pela busca.
+DROP INDEX IF EXISTS IX_Pessoa_Telefone ON Pessoa;
+DROP INDEX IF EXISTS IX_Cliente_CPF ON Cliente;
+DROP INDEX IF EXISTS IX_Cliente_CNPJ ON Cliente;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Pessoa_Telefone_Digitos' AND object_id = OBJECT_ID('Pessoa'))
+    CREATE INDEX IX_Pessoa_Telefone_Digitos ON Pessoa (Telefone_Digitos);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Cliente_CPF_Digitos' AND object_id = OBJECT_ID('Cliente'))
+    CREATE INDEX IX_Cliente_CPF_Digitos ON Cliente (CPF_Digitos);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Cliente_CNPJ_Digitos' AND object_id = OBJECT_ID('Cliente'))
+    CREATE INDEX IX_Cliente_CNPJ_Digitos ON Cliente (CNPJ_Digitos);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Funcionario_CPF_Digitos' AND object_id = OBJECT_ID('Funcionario'))
+    CREATE INDEX IX_Funcionario_CPF_Digitos ON Funcionario (CPF_Digitos);
+PRINT 'Índices de busca por dígitos criados.';
+GO
@@ -0,0 +1,16 @@
+-- Migração para bancos existentes: sede que registrou a chegada do produto (leitura em lote, arrival_scan.py).
+
+IF COL_LENGTH('Produto_A_Ser_Entregue', 'ID_Sede_Recebimento') IS NULL
+BEGIN
+    ALTER TABLE Produto_A_Ser_Entregue ADD ID_Sede_Recebimento INT NULL;
+    PRINT 'Coluna Produto_A_Ser_Entregue.ID_Sede_Recebimento adicionada.';
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.foreign_keys WHERE name = 'FK_Produto_Sede_Recebimento')
+BEGIN
+    ALTER TABLE Produto_A_Ser_Entregue ADD CONSTRAINT FK_Produto_Sede_Recebimento
+        FOREIGN KEY (ID_Sede_Recebimento) REFERENCES Sede(ID_Sede) ON DELETE SET NULL;
+    PRINT 'Chave estrangeira FK_Produto_Sede_Recebimento criada.';
+END;
+GO
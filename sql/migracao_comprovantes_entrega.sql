@@ -0,0 +1,21 @@
+-- Migração para bancos existentes: metadados dos comprovantes de entrega (proof_of_delivery.py).
+-- Os arquivos ficam no repositório local (POD_BLOB_DIR); aqui fica apenas a referência pelo hash do conteúdo.
+
+IF OBJECT_ID('Comprovante_Entrega') IS NULL
+BEGIN
+    CREATE TABLE Comprovante_Entrega (
+        ID_Comprovante INT PRIMARY KEY IDENTITY(1,1),
+        ID_Produto INT NOT NULL,
+        Tipo VARCHAR(20) NOT NULL CHECK (Tipo IN ('Foto', 'Assinatura')),
+        Hash_Conteudo CHAR(64) NOT NULL,
+        Tamanho_Bytes BIGINT NOT NULL,
+        Tipo_Midia VARCHAR(100),
+        Nome_Original VARCHAR(255),
+        Codigo_Funcionario INT,
+        Data_Registro DATETIME2 NOT NULL DEFAULT SYSDATETIME(),
+        CONSTRAINT UQ_Comprovante_Produto_Hash UNIQUE (ID_Produto, Hash_Conteudo),
+        FOREIGN KEY (ID_Produto) REFERENCES Produto_A_Ser_Entregue(ID_Produto) ON DELETE CASCADE
+    );
+    PRINT 'Tabela Comprovante_Entrega criada.';
+END;
+GO
@@ -0,0 +1,18 @@
+-- Migração para bancos criados antes da deduplicação de endereços.
+-- Adiciona a coluna Hash_Endereco e o índice único filtrado usados por addresses.get_or_create_address.
+-- Depois de executar este script, rode "python addresses.py" para calcular os hashes dos endereços
+-- existentes e fundir as duplicatas (as referências de Pessoa, Sede e Dados_Rastreamento são redirecionadas).
+
+IF COL_LENGTH('Endereco', 'Hash_Endereco') IS NULL
+BEGIN
+    ALTER TABLE Endereco ADD Hash_Endereco CHAR(64) NULL;
+    PRINT 'Coluna Endereco.Hash_Endereco adicionada.';
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UQ_Endereco_Hash' AND object_id = OBJECT_ID('Endereco'))
+BEGIN
+    CREATE UNIQUE INDEX UQ_Endereco_Hash ON Endereco (Hash_Endereco) WHERE Hash_Endereco IS NOT NULL;
+    PRINT 'Índice UQ_Endereco_Hash criado.';
+END;
+GO
@@ -0,0 +1,20 @@
+-- Migração para bancos criados antes da exportação incremental (data_export.py --incremental).
+-- Adiciona as colunas ROWVERSION usadas como marca d'água e os índices que localizam as linhas alteradas.
+
+IF COL_LENGTH('Produto_A_Ser_Entregue', 'Versao_Linha') IS NULL
+    ALTER TABLE Produto_A_Ser_Entregue ADD Versao_Linha ROWVERSION;
+IF COL_LENGTH('Dados_Rastreamento', 'Versao_Linha') IS NULL
+    ALTER TABLE Dados_Rastreamento ADD Versao_Linha ROWVERSION;
+IF COL_LENGTH('Carregamento', 'Versao_Linha') IS NULL
+    ALTER TABLE Carregamento ADD Versao_Linha ROWVERSION;
+PRINT 'Colunas Versao_Linha verificadas.';
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Produto_Versao' AND object_id = OBJECT_ID('Produto_A_Ser_Entregue'))
+    CREATE INDEX IX_Produto_Versao ON Produto_A_Ser_Entregue (Versao_Linha);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Dados_Rastreamento_Versao' AND object_id = OBJECT_ID('Dados_Rastreamento'))
+    CREATE INDEX IX_Dados_Rastreamento_Versao ON Dados_Rastreamento (Versao_Linha);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Carregamento_Versao' AND object_id = OBJECT_ID('Carregamento'))
+    CREATE INDEX IX_Carregamento_Versao ON Carregamento (Versao_Linha) INCLUDE (ID_Produto);
+PRINT 'Índices de exportação incremental verificados.';
+GO
@@ -0,0 +1,8 @@
+-- Migração para bancos existentes: índice usado pela fila de entregas do motorista (driver_queue.py).
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Produto_Motorista' AND object_id = OBJECT_ID('Produto_A_Ser_Entregue'))
+BEGIN
+    CREATE INDEX IX_Produto_Motorista ON Produto_A_Ser_Entregue (Codigo_Funcionario_Motorista) INCLUDE (Status_Entrega);
+    PRINT 'Índice IX_Produto_Motorista criado.';
+END;
+GO
@@ -0,0 +1,16 @@
+-- Migração para bancos existentes: tabela de idempotência da sincronização offline do motorista (driver_sync.py).
+-- Requer a coluna Produto_A_Ser_Entregue.Versao_Linha (sql/migracao_exportacao.sql), usada na detecção de conflitos.
+
+IF OBJECT_ID('Sincronizacao_Motorista') IS NULL
+BEGIN
+    CREATE TABLE Sincronizacao_Motorista (
+        Chave_Idempotencia CHAR(36) PRIMARY KEY,
+        ID_Produto INT NOT NULL,
+        Codigo_Funcionario INT NOT NULL,
+        Status VARCHAR(50) NOT NULL,
+        Resultado VARCHAR(20) NOT NULL,
+        Data_Recebimento DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+    );
+    PRINT 'Tabela Sincronizacao_Motorista criada.';
+END;
+GO
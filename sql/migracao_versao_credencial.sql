@@ -0,0 +1,10 @@
+-- Migração para bancos criados antes do versionamento das credenciais.
+-- Adiciona Usuario.Versao_Credencial, gravada nos tokens de sessão (sessions.py) e incrementada a cada troca
+-- de senha: tokens emitidos antes da troca são recusados por qualquer processo que consulte o perfil no banco.
+
+IF COL_LENGTH('Usuario', 'Versao_Credencial') IS NULL
+BEGIN
+    ALTER TABLE Usuario ADD Versao_Credencial INT NOT NULL CONSTRAINT DF_Usuario_Versao_Credencial DEFAULT 1;
+    PRINT 'Coluna Usuario.Versao_Credencial adicionada.';
+END;
+GO
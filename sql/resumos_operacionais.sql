@@ -0,0 +1,226 @@
+-- Tabelas de resumo dos relatórios do Gerente (reports.py / menu_gerente).
+-- Os resumos são mantidos de forma incremental por triggers: cada INSERT/UPDATE/DELETE em
+-- Produto_A_Ser_Entregue, Dados_Rastreamento e Carregamento aplica apenas a diferença (+1/-1, +peso/-peso)
+-- nas linhas de resumo afetadas, de modo que os relatórios leem poucas linhas em vez de agregar o histórico.
+--
+-- Pode ser executado em bancos novos (após sql/script.sql) ou existentes; é idempotente.
+-- Ao final, sp_Recalcular_Resumos preenche os resumos a partir dos dados já cadastrados
+-- (também pode ser executado a qualquer momento para reconstruí-los).
+
+-- Data em que o produto foi efetivamente entregue (preenchida pelo trigger quando o status passa a 'Entregue').
+IF COL_LENGTH('Produto_A_Ser_Entregue', 'Data_Entrega_Realizada') IS NULL
+BEGIN
+    ALTER TABLE Produto_A_Ser_Entregue ADD Data_Entrega_Realizada DATE NULL;
+    PRINT 'Coluna Produto_A_Ser_Entregue.Data_Entrega_Realizada adicionada.';
+END;
+GO
+
+-- Produtos por status, por dia de chegada ao CD.
+IF OBJECT_ID('Resumo_Status_Dia') IS NULL
+CREATE TABLE Resumo_Status_Dia (
+    Dia DATE NOT NULL, -- Data_Chegada_CD
+    Status_Entrega VARCHAR(50) NOT NULL,
+    Quantidade INT NOT NULL,
+    Peso_Total DECIMAL(18, 2) NOT NULL,
+    CONSTRAINT PK_Resumo_Status_Dia PRIMARY KEY (Dia, Status_Entrega)
+);
+
+-- Entregas realizadas por dia, separadas em no prazo / atrasadas / sem data prevista.
+IF OBJECT_ID('Resumo_Prazo_Dia') IS NULL
+CREATE TABLE Resumo_Prazo_Dia (
+    Dia DATE NOT NULL PRIMARY KEY, -- Data_Entrega_Realizada
+    Entregues INT NOT NULL,
+    No_Prazo INT NOT NULL,
+    Atrasados INT NOT NULL,
+    Sem_Previsao INT NOT NULL
+);
+
+-- Volume por cidade de destino (Dados_Rastreamento), por dia de chegada ao CD.
+IF OBJECT_ID('Resumo_Cidade_Dia') IS NULL
+CREATE TABLE Resumo_Cidade_Dia (
+    Dia DATE NOT NULL, -- Data_Chegada_CD
+    Estado VARCHAR(50) NOT NULL,
+    Cidade VARCHAR(100) NOT NULL,
+    Quantidade INT NOT NULL,
+    Peso_Total DECIMAL(18, 2) NOT NULL,
+    CONSTRAINT PK_Resumo_Cidade_Dia PRIMARY KEY (Dia, Estado, Cidade)
+);
+
+-- Carga por veículo, por dia de carregamento.
+IF OBJECT_ID('Resumo_Carga_Veiculo') IS NULL
+CREATE TABLE Resumo_Carga_Veiculo (
+    Dia DATE NOT NULL, -- CAST(Data_Carregamento AS DATE)
+    Placa_Veiculo VARCHAR(10) NOT NULL,
+    Itens INT NOT NULL,
+    Peso_Total DECIMAL(18, 2) NOT NULL,
+    CONSTRAINT PK_Resumo_Carga_Veiculo PRIMARY KEY (Dia, Placa_Veiculo)
+);
+GO
+
+CREATE OR ALTER TRIGGER TR_Produto_Resumos ON Produto_A_Ser_Entregue
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    -- O UPDATE de Data_Entrega_Realizada abaixo não deve reaplicar os resumos (caso RECURSIVE_TRIGGERS esteja ligado).
+    IF TRIGGER_NESTLEVEL(@@PROCID) > 1 RETURN;
+    IF NOT EXISTS (SELECT 1 FROM inserted) AND NOT EXISTS (SELECT 1 FROM deleted) RETURN;
+
+    -- 1. Registra a data de entrega quando o status passa a 'Entregue' (e a limpa se o status deixar de ser).
+    UPDATE P
+    SET Data_Entrega_Realizada = CASE WHEN P.Status_Entrega = 'Entregue' THEN CAST(GETDATE() AS DATE) END
+    FROM Produto_A_Ser_Entregue P
+    JOIN inserted i ON i.ID_Produto = P.ID_Produto
+    WHERE (i.Status_Entrega = 'Entregue' AND i.Data_Entrega_Realizada IS NULL)
+       OR (i.Status_Entrega <> 'Entregue' AND i.Data_Entrega_Realizada IS NOT NULL);
+
+    -- 2. Diferença a aplicar: linhas antigas com sinal -1 e linhas novas (já com a data de entrega) com sinal +1.
+    DECLARE @Delta TABLE (
+        ID_Produto INT, Sinal INT, Status_Entrega VARCHAR(50), Data_Chegada_CD DATE,
+        Data_Prevista_Entrega DATE, Data_Entrega_Realizada DATE, Peso DECIMAL(10, 2), ID_Rastreamento INT
+    );
+    INSERT INTO @Delta
+    SELECT ID_Produto, -1, Status_Entrega, Data_Chegada_CD, Data_Prevista_Entrega, Data_Entrega_Realizada, Peso, ID_Rastreamento
+    FROM deleted;
+    INSERT INTO @Delta
+    SELECT P.ID_Produto, 1, P.Status_Entrega, P.Data_Chegada_CD, P.Data_Prevista_Entrega, P.Data_Entrega_Realizada, P.Peso, P.ID_Rastreamento
+    FROM Produto_A_Ser_Entregue P JOIN inserted i ON i.ID_Produto = P.ID_Produto;
+
+    MERGE Resumo_Status_Dia WITH (HOLDLOCK) AS T
+    USING (
+        SELECT Data_Chegada_CD AS Dia, Status_Entrega, SUM(Sinal) AS Quantidade, SUM(Sinal * Peso) AS Peso_Total
+        FROM @Delta GROUP BY Data_Chegada_CD, Status_Entrega
+        HAVING SUM(Sinal) <> 0 OR SUM(Sinal * Peso) <> 0
+    ) AS S ON T.Dia = S.Dia AND T.Status_Entrega = S.Status_Entrega
+    WHEN MATCHED AND T.Quantidade + S.Quantidade = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET Quantidade = T.Quantidade + S.Quantidade, Peso_Total = T.Peso_Total + S.Peso_Total
+    WHEN NOT MATCHED THEN INSERT (Dia, Status_Entrega, Quantidade, Peso_Total) VALUES (S.Dia, S.Status_Entrega, S.Quantidade, S.Peso_Total);
+
+    MERGE Resumo_Prazo_Dia WITH (HOLDLOCK) AS T
+    USING (
+        SELECT Data_Entrega_Realizada AS Dia,
+               SUM(Sinal) AS Entregues,
+               SUM(CASE WHEN Data_Entrega_Realizada <= Data_Prevista_Entrega THEN Sinal ELSE 0 END) AS No_Prazo,
+               SUM(CASE WHEN Data_Entrega_Realizada > Data_Prevista_Entrega THEN Sinal ELSE 0 END) AS Atrasados,
+               SUM(CASE WHEN Data_Prevista_Entrega IS NULL THEN Sinal ELSE 0 END) AS Sem_Previsao
+        FROM @Delta WHERE Data_Entrega_Realizada IS NOT NULL
+        GROUP BY Data_Entrega_Realizada
+    ) AS S ON T.Dia = S.Dia
+    WHEN MATCHED AND T.Entregues + S.Entregues = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET Entregues = T.Entregues + S.Entregues, No_Prazo = T.No_Prazo + S.No_Prazo,
+                                 Atrasados = T.Atrasados + S.Atrasados, Sem_Previsao = T.Sem_Previsao + S.Sem_Previsao
+    WHEN NOT MATCHED THEN INSERT (Dia, Entregues, No_Prazo, Atrasados, Sem_Previsao)
+                          VALUES (S.Dia, S.Entregues, S.No_Prazo, S.Atrasados, S.Sem_Previsao);
+
+    MERGE Resumo_Cidade_Dia WITH (HOLDLOCK) AS T
+    USING (
+        SELECT D.Data_Chegada_CD AS Dia, DR.Estado, DR.Cidade, SUM(D.Sinal) AS Quantidade, SUM(D.Sinal * D.Peso) AS Peso_Total
+        FROM @Delta D JOIN Dados_Rastreamento DR ON DR.ID_Rastreamento = D.ID_Rastreamento
+        GROUP BY D.Data_Chegada_CD, DR.Estado, DR.Cidade
+        HAVING SUM(D.Sinal) <> 0 OR SUM(D.Sinal * D.Peso) <> 0
+    ) AS S ON T.Dia = S.Dia AND T.Estado = S.Estado AND T.Cidade = S.Cidade
+    WHEN MATCHED AND T.Quantidade + S.Quantidade = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET Quantidade = T.Quantidade + S.Quantidade, Peso_Total = T.Peso_Total + S.Peso_Total
+    WHEN NOT MATCHED THEN INSERT (Dia, Estado, Cidade, Quantidade, Peso_Total) VALUES (S.Dia, S.Estado, S.Cidade, S.Quantidade, S.Peso_Total);
+
+    -- Alteração de peso de um produto já carregado: ajusta o peso dos carregamentos (a quantidade de itens não muda).
+    MERGE Resumo_Carga_Veiculo WITH (HOLDLOCK) AS T
+    USING (
+        SELECT CAST(C.Data_Carregamento AS DATE) AS Dia, C.Placa_Veiculo, SUM(D.Sinal * D.Peso) AS Peso_Total
+        FROM @Delta D JOIN Carregamento C ON C.ID_Produto = D.ID_Produto
+        GROUP BY CAST(C.Data_Carregamento AS DATE), C.Placa_Veiculo
+        HAVING SUM(D.Sinal * D.Peso) <> 0
+    ) AS S ON T.Dia = S.Dia AND T.Placa_Veiculo = S.Placa_Veiculo
+    WHEN MATCHED THEN UPDATE SET Peso_Total = T.Peso_Total + S.Peso_Total;
+END;
+GO
+
+-- Mudança de cidade/estado de destino: move a contagem dos produtos afetados entre as cidades.
+CREATE OR ALTER TRIGGER TR_Dados_Rastreamento_Resumos ON Dados_Rastreamento
+AFTER UPDATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    IF NOT (UPDATE(Cidade) OR UPDATE(Estado)) RETURN;
+
+    MERGE Resumo_Cidade_Dia WITH (HOLDLOCK) AS T
+    USING (
+        SELECT P.Data_Chegada_CD AS Dia, X.Estado, X.Cidade, SUM(X.Sinal) AS Quantidade, SUM(X.Sinal * P.Peso) AS Peso_Total
+        FROM (
+            SELECT ID_Rastreamento, Estado, Cidade, -1 AS Sinal FROM deleted
+            UNION ALL
+            SELECT ID_Rastreamento, Estado, Cidade, 1 FROM inserted
+        ) AS X
+        JOIN Produto_A_Ser_Entregue P ON P.ID_Rastreamento = X.ID_Rastreamento
+        GROUP BY P.Data_Chegada_CD, X.Estado, X.Cidade
+        HAVING SUM(X.Sinal) <> 0
+    ) AS S ON T.Dia = S.Dia AND T.Estado = S.Estado AND T.Cidade = S.Cidade
+    WHEN MATCHED AND T.Quantidade + S.Quantidade = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET Quantidade = T.Quantidade + S.Quantidade, Peso_Total = T.Peso_Total + S.Peso_Total
+    WHEN NOT MATCHED THEN INSERT (Dia, Estado, Cidade, Quantidade, Peso_Total) VALUES (S.Dia, S.Estado, S.Cidade, S.Quantidade, S.Peso_Total);
+END;
+GO
+
+CREATE OR ALTER TRIGGER TR_Carregamento_Resumos ON Carregamento
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    MERGE Resumo_Carga_Veiculo WITH (HOLDLOCK) AS T
+    USING (
+        SELECT CAST(X.Data_Carregamento AS DATE) AS Dia, X.Placa_Veiculo, SUM(X.Sinal) AS Itens, SUM(X.Sinal * P.Peso) AS Peso_Total
+        FROM (
+            SELECT ID_Produto, Placa_Veiculo, Data_Carregamento, -1 AS Sinal FROM deleted
+            UNION ALL
+            SELECT ID_Produto, Placa_Veiculo, Data_Carregamento, 1 FROM inserted
+        ) AS X
+        JOIN Produto_A_Ser_Entregue P ON P.ID_Produto = X.ID_Produto
+        GROUP BY CAST(X.Data_Carregamento AS DATE), X.Placa_Veiculo
+        HAVING SUM(X.Sinal) <> 0
+    ) AS S ON T.Dia = S.Dia AND T.Placa_Veiculo = S.Placa_Veiculo
+    WHEN MATCHED AND T.Itens + S.Itens = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET Itens = T.Itens + S.Itens, Peso_Total = T.Peso_Total + S.Peso_Total
+    WHEN NOT MATCHED THEN INSERT (Dia, Placa_Veiculo, Itens, Peso_Total) VALUES (S.Dia, S.Placa_Veiculo, S.Itens, S.Peso_Total);
+END;
+GO
+
+-- Reconstrói todos os resumos a partir das tabelas de origem (varredura completa; uso eventual).
+CREATE OR ALTER PROCEDURE sp_Recalcular_Resumos
+AS
+BEGIN
+    SET NOCOUNT ON;
+    BEGIN TRANSACTION;
+
+    DELETE FROM Resumo_Status_Dia;
+    INSERT INTO Resumo_Status_Dia (Dia, Status_Entrega, Quantidade, Peso_Total)
+    SELECT Data_Chegada_CD, Status_Entrega, COUNT(*), SUM(Peso)
+    FROM Produto_A_Ser_Entregue GROUP BY Data_Chegada_CD, Status_Entrega;
+
+    DELETE FROM Resumo_Prazo_Dia;
+    INSERT INTO Resumo_Prazo_Dia (Dia, Entregues, No_Prazo, Atrasados, Sem_Previsao)
+    SELECT Data_Entrega_Realizada, COUNT(*),
+           SUM(CASE WHEN Data_Entrega_Realizada <= Data_Prevista_Entrega THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Data_Entrega_Realizada > Data_Prevista_Entrega THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Data_Prevista_Entrega IS NULL THEN 1 ELSE 0 END)
+    FROM Produto_A_Ser_Entregue WHERE Data_Entrega_Realizada IS NOT NULL GROUP BY Data_Entrega_Realizada;
+
+    DELETE FROM Resumo_Cidade_Dia;
+    INSERT INTO Resumo_Cidade_Dia (Dia, Estado, Cidade, Quantidade, Peso_Total)
+    SELECT P.Data_Chegada_CD, DR.Estado, DR.Cidade, COUNT(*), SUM(P.Peso)
+    FROM Produto_A_Ser_Entregue P JOIN Dados_Rastreamento DR ON DR.ID_Rastreamento = P.ID_Rastreamento
+    GROUP BY P.Data_Chegada_CD, DR.Estado, DR.Cidade;
+
+    DELETE FROM Resumo_Carga_Veiculo;
+    INSERT INTO Resumo_Carga_Veiculo (Dia, Placa_Veiculo, Itens, Peso_Total)
+    SELECT CAST(C.Data_Carregamento AS DATE), C.Placa_Veiculo, COUNT(*), SUM(P.Peso)
+    FROM Carregamento C JOIN Produto_A_Ser_Entregue P ON P.ID_Produto = C.ID_Produto
+    GROUP BY CAST(C.Data_Carregamento AS DATE), C.Placa_Veiculo;
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+-- Produtos já entregues antes desta migração não têm Data_Entrega_Realizada e ficam fora do indicador de prazo.
+EXEC sp_Recalcular_Resumos;
+PRINT 'Resumos operacionais criados e preenchidos.';
+GO
@@ -21,6 +21,12 @@ PRINT 'Todas as chaves estrangeiras existentes foram removidas.';
 
 -- PASSO 2: Remover tabelas existentes (todos os dados serão apagados!)
 -- A ordem aqui se torna menos crítica após a remoção das FKs.
+DROP TABLE IF EXISTS Resumo_Status_Dia; -- Tabelas de resumo (sql/resumos_operacionais.sql)
+DROP TABLE IF EXISTS Resumo_Prazo_Dia;
+DROP TABLE IF EXISTS Resumo_Cidade_Dia;
+DROP TABLE IF EXISTS Resumo_Carga_Veiculo;
+DROP TABLE IF EXISTS Sincronizacao_Motorista;
+DROP TABLE IF EXISTS Comprovante_Entrega;
 DROP TABLE IF EXISTS Carregamento;
 DROP TABLE IF EXISTS Produto_A_Ser_Entregue;
 DROP TABLE IF EXISTS Usuario;
@@ -44,8 +50,14 @@ CREATE TABLE Endereco (
     Bairro VARCHAR(100) NOT NULL,
     Rua VARCHAR(200) NOT NULL,
     Numero VARCHAR(20) NOT NULL,
-    Complemento VARCHAR(200)
+    Complemento VARCHAR(200),
+    -- SHA-256 do endereço normalizado (sem acentos, minúsculas, espaços colapsados, CEP só com dígitos).
+    -- Calculado pela aplicação (addresses.address_hash) para reutilizar endereços idênticos.
+    -- Pode ser NULL em endereços antigos até que o job "python addresses.py" seja executado.
+    Hash_Endereco CHAR(64) NULL
 );
+-- Índice único filtrado: garante um único registro por endereço normalizado, ignorando os ainda sem hash.
+CREATE UNIQUE INDEX UQ_Endereco_Hash ON Endereco (Hash_Endereco) WHERE Hash_Endereco IS NOT NULL;
 PRINT 'Tabela Endereco criada.';
 
 -- Tabela Sede (depende de Endereco)
@@ -66,6 +78,7 @@ CREATE TABLE Pessoa (
     Telefone VARCHAR(20),
     Email VARCHAR(255),
     ID_Endereco INT NOT NULL, -- Endereço principal da pessoa
+    Telefone_Digitos AS REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(Telefone, '(', ''), ')', ''), ' ', ''), '-', ''), '.', '') PERSISTED, -- Telefone sem pontuação (busca por dígitos)
     FOREIGN KEY (ID_Endereco) REFERENCES Endereco(ID_Endereco)
 );
 PRINT 'Tabela Pessoa criada.';
@@ -78,6 +91,8 @@ CREATE TABLE Cliente (
     Data_Nascimento DATE, -- Para Pessoa Física
     CNPJ VARCHAR(18), -- Para Pessoa Jurídica
     Nome_Empresa VARCHAR(255), -- Para Pessoa Jurídica
+    CPF_Digitos AS REPLACE(REPLACE(REPLACE(CPF, '.', ''), '-', ''), '/', '') PERSISTED, -- Documentos sem pontuação (busca por dígitos)
+    CNPJ_Digitos AS REPLACE(REPLACE(REPLACE(CNPJ, '.', ''), '-', ''), '/', '') PERSISTED,
     -- Restrições para garantir que os campos corretos sejam preenchidos
     CONSTRAINT CHK_Cliente_PF_PJ CHECK (
         (Tipo_Cliente = 'PF' AND CPF IS NOT NULL AND Data_Nascimento IS NOT NULL AND CNPJ IS NULL AND Nome_Empresa IS NULL) OR
@@ -100,6 +115,7 @@ PRINT 'Tabela Veiculo criada.';
 CREATE TABLE Funcionario (
     Codigo_Funcionario INT PRIMARY KEY, -- PK e FK para Pessoa
     CPF VARCHAR(14) UNIQUE NOT NULL, -- CPF é único para funcionário
+    CPF_Digitos AS REPLACE(REPLACE(REPLACE(CPF, '.', ''), '-', ''), '/', '') PERSISTED, -- CPF sem pontuação (busca por dígitos)
     Departamento VARCHAR(50) NOT NULL, -- Ex: 'Entregas', 'Atendimento'
     Cargo VARCHAR(50) NOT NULL CHECK (Cargo IN ('Motorista', 'Auxiliar de Logistica', 'Atendente', 'Gerente', 'Admin')), -- Adicionado 'Admin' para tipo de usuário
     Placa_Veiculo VARCHAR(10), -- Para Motorista (FK para Veiculo)
@@ -127,6 +143,7 @@ CREATE TABLE Dados_Rastreamento (
     Cidade VARCHAR(100) NOT NULL,
     Estado VARCHAR(50) NOT NULL,
     Telefone_Destinatario VARCHAR(20),
+    Versao_Linha ROWVERSION, -- Marca d'água da exportação incremental (data_export.py)
     FOREIGN KEY (ID_Endereco) REFERENCES Endereco(ID_Endereco)
 );
 PRINT 'Tabela Dados_Rastreamento criada.';
@@ -138,15 +155,19 @@ CREATE TABLE Produto_A_Ser_Entregue (
     Status_Entrega VARCHAR(50) NOT NULL, -- Ex: 'Em Processamento', 'Em Transito', 'Entregue', 'Cancelado'
     Data_Chegada_CD DATE NOT NULL,
     Data_Prevista_Entrega DATE,
+    Data_Entrega_Realizada DATE, -- Preenchida pelo trigger TR_Produto_Resumos quando o status passa a 'Entregue'
     Tipo_Produto VARCHAR(50) NOT NULL CHECK (Tipo_Produto IN ('Fragil', 'Perecivel', 'Comum')),
     ID_Remetente INT NOT NULL, -- FK para Pessoa (quem enviou)
     ID_Destinatario INT NOT NULL, -- FK para Pessoa (quem vai receber)
     Codigo_Funcionario_Motorista INT, -- FK para Funcionario (Motorista)
     ID_Rastreamento INT UNIQUE NOT NULL, -- FK para Dados_Rastreamento
+    ID_Sede_Recebimento INT, -- FK para Sede que registrou a chegada do produto (arrival_scan.py)
+    Versao_Linha ROWVERSION, -- Marca d'água da exportação incremental (data_export.py)
     FOREIGN KEY (ID_Remetente) REFERENCES Pessoa(Codigo_Pessoa),
     FOREIGN KEY (ID_Destinatario) REFERENCES Pessoa(Codigo_Pessoa),
     FOREIGN KEY (Codigo_Funcionario_Motorista) REFERENCES Funcionario(Codigo_Funcionario),
-    FOREIGN KEY (ID_Rastreamento) REFERENCES Dados_Rastreamento(ID_Rastreamento)
+    FOREIGN KEY (ID_Rastreamento) REFERENCES Dados_Rastreamento(ID_Rastreamento),
+    FOREIGN KEY (ID_Sede_Recebimento) REFERENCES Sede(ID_Sede) ON DELETE SET NULL
 );
 PRINT 'Tabela Produto_A_Ser_Entregue criada.';
 
@@ -156,6 +177,7 @@ CREATE TABLE Carregamento (
     Placa_Veiculo VARCHAR(10) NOT NULL, -- FK para Veiculo
     ID_Produto INT NOT NULL, -- FK para Produto_A_Ser_Entregue
     Data_Carregamento DATETIME NOT NULL DEFAULT GETDATE(),
+    Versao_Linha ROWVERSION, -- Marca d'água da exportação incremental (data_export.py)
     FOREIGN KEY (Placa_Veiculo) REFERENCES Veiculo(Placa_Veiculo),
     FOREIGN KEY (ID_Produto) REFERENCES Produto_A_Ser_Entregue(ID_Produto),
     CONSTRAINT UQ_Carregamento UNIQUE (Placa_Veiculo, ID_Produto, Data_Carregamento) -- Evita carregamentos duplicados exatos
@@ -168,8 +190,60 @@ CREATE TABLE Usuario (
     Senha_Hash VARCHAR(255) NOT NULL, -- Para armazenar o hash da senha
     Codigo_Pessoa INT UNIQUE NOT NULL, -- FK para Pessoa (um usuário está associado a uma pessoa)
     Tipo_Usuario VARCHAR(50) NOT NULL CHECK (Tipo_Usuario IN ('Cliente', 'Motorista', 'Auxiliar de Logistica', 'Atendente', 'Gerente', 'Admin')), -- Define o tipo de acesso
+    Versao_Credencial INT NOT NULL DEFAULT 1, -- Incrementada a cada troca de senha (tokens de sessão anteriores deixam de valer)
     FOREIGN KEY (Codigo_Pessoa) REFERENCES Pessoa(Codigo_Pessoa)
 );
 PRINT 'Tabela Usuario criada.';
 
+-- Tabela Sincronizacao_Motorista (marcações recebidas do modo offline do motorista, driver_sync.py)
+-- A chave de idempotência gerada no aparelho garante que um lote reenviado não seja aplicado duas vezes.
+CREATE TABLE Sincronizacao_Motorista (
+    Chave_Idempotencia CHAR(36) PRIMARY KEY,
+    ID_Produto INT NOT NULL,
+    Codigo_Funcionario INT NOT NULL,
+    Status VARCHAR(50) NOT NULL,
+    Resultado VARCHAR(20) NOT NULL, -- 'aplicado', 'conflito' ou 'nao_atribuido'
+    Data_Recebimento DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+);
+PRINT 'Tabela Sincronizacao_Motorista criada.';
+
+-- Tabela Comprovante_Entrega (metadados das fotos e assinaturas de entrega, proof_of_delivery.py)
+-- O conteúdo fica no repositório local de arquivos, endereçado pelo SHA-256 (Hash_Conteudo); o banco guarda apenas a referência.
+CREATE TABLE Comprovante_Entrega (
+    ID_Comprovante INT PRIMARY KEY IDENTITY(1,1),
+    ID_Produto INT NOT NULL,
+    Tipo VARCHAR(20) NOT NULL CHECK (Tipo IN ('Foto', 'Assinatura')),
+    Hash_Conteudo CHAR(64) NOT NULL,
+    Tamanho_Bytes BIGINT NOT NULL,
+    Tipo_Midia VARCHAR(100),
+    Nome_Original VARCHAR(255),
+    Codigo_Funcionario INT, -- Funcionário (motorista) que registrou o comprovante
+    Data_Registro DATETIME2 NOT NULL DEFAULT SYSDATETIME(),
+    CONSTRAINT UQ_Comprovante_Produto_Hash UNIQUE (ID_Produto, Hash_Conteudo), -- Também atende a busca por produto.
+    FOREIGN KEY (ID_Produto) REFERENCES Produto_A_Ser_Entregue(ID_Produto) ON DELETE CASCADE
+);
+PRINT 'Tabela Comprovante_Entrega criada.';
+
+-- PASSO 4: Índices de apoio às buscas incrementais de pessoas (seletores de remetente/destinatário).
+-- Cada índice atende a um ramo da busca por prefixo (LIKE 'termo%') usada em app.search_people.
+CREATE INDEX IX_Pessoa_Nome ON Pessoa (Nome) INCLUDE (Telefone, Email, ID_Endereco);
+CREATE INDEX IX_Pessoa_Email ON Pessoa (Email);
+-- Telefone e documentos são buscados pelos dígitos (colunas calculadas), casando valores com ou sem pontuação.
+CREATE INDEX IX_Pessoa_Telefone_Digitos ON Pessoa (Telefone_Digitos);
+CREATE INDEX IX_Cliente_CPF_Digitos ON Cliente (CPF_Digitos);
+CREATE INDEX IX_Cliente_CNPJ_Digitos ON Cliente (CNPJ_Digitos);
+CREATE INDEX IX_Funcionario_CPF_Digitos ON Funcionario (CPF_Digitos);
+PRINT 'Índices de busca de pessoas criados.';
+
+-- PASSO 5: Índices da exportação incremental (busca das linhas alteradas desde a última marca d'água).
+CREATE INDEX IX_Produto_Versao ON Produto_A_Ser_Entregue (Versao_Linha);
+CREATE INDEX IX_Dados_Rastreamento_Versao ON Dados_Rastreamento (Versao_Linha);
+CREATE INDEX IX_Carregamento_Versao ON Carregamento (Versao_Linha) INCLUDE (ID_Produto);
+PRINT 'Índices de exportação incremental criados.';
+
+-- PASSO 6: Índice da fila de entregas do motorista (driver_queue.load_work_queue).
+CREATE INDEX IX_Produto_Motorista ON Produto_A_Ser_Entregue (Codigo_Funcionario_Motorista) INCLUDE (Status_Entrega);
+PRINT 'Índice da fila do motorista criado.';
+
 PRINT 'Script de criação de tabelas concluído com sucesso.';
+PRINT 'Execute em seguida sql/resumos_operacionais.sql para criar os resumos dos relatórios do Gerente.';
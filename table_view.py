@@ -0,0 +1,107 @@
+import itertools
+import shutil
+import sys
+
+# Linhas acumuladas antes de cada escrita no terminal (uma escrita por bloco, em vez de um print por linha).
+WRITE_CHUNK_ROWS = 2000
+# Linhas reservadas para cabeçalho e prompt ao calcular o tamanho da página pela altura do terminal.
+_PAGE_MARGIN = 4
+
+_pager = None # Paginador alternativo (ex: o visualizador em tela cheia de tui.py), chamado como _pager(table, rows).
+
+def set_pager(function):
+    """Substitui o paginador de linha usado por page() (None restaura o padrão)."""
+    global _pager
+    _pager = function
+
+class Table:
+    """
+    Formato de uma tabela de texto com colunas de largura fixa.
+
+    O formato das linhas é montado uma única vez. Cada valor é cortado para caber na sua coluna (largura - 1,
+    mantendo um espaço até a próxima), então um texto longo não desalinha as colunas seguintes.
+    """
+
+    def __init__(self, headers, col_widths):
+        self.headers = headers
+        self.col_widths = col_widths
+        self.width = sum(col_widths)
+        # "{:<w.p}" alinha à esquerda em w caracteres e corta em p: a formatação e o corte numa só chamada.
+        self._format = "".join(f"{{:<{w}.{max(w - 1, 1)}}}" for w in col_widths).format
+        self.header = f"{self._format(*headers)}\n{'-' * self.width}"
+
+    def format_row(self, row):
+        """Linha formatada (None vira texto vazio)."""
+        return self._format(*["" if value is None else str(value) for value in row])
+
+def _write_rows(table, rows, out):
+    """Escreve as linhas em blocos de WRITE_CHUNK_ROWS. Retorna a quantidade escrita."""
+    total = 0
+    while True:
+        chunk = [table.format_row(row) for row in itertools.islice(rows, WRITE_CHUNK_ROWS)]
+        if not chunk:
+            return total
+        out.write("\n".join(chunk) + "\n")
+        total += len(chunk)
+
+def print_table(table, rows, out=None):
+    """
+    Escreve o cabeçalho e todas as linhas, com a saída agrupada em blocos.
+    Nada é escrito se não houver linhas. Retorna a quantidade de linhas.
+    """
+    out = out or sys.stdout
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    out.write(table.header + "\n")
+    return _write_rows(table, itertools.chain([first], rows), out)
+
+def page_size_for_terminal():
+    return max(5, shutil.get_terminal_size().lines - _PAGE_MARGIN)
+
+def page(table, rows, page_size=None, out=None, read_key=input):
+    """
+    Exibe as linhas página por página, lendo da origem só o necessário para a página atual (use com
+    db_connection.iterate_query para buscar as linhas do cursor conforme o usuário avança).
+
+    Fora de um terminal interativo (saída redirecionada), escreve tudo de uma vez como print_table.
+    Ao sair antes do fim, a origem é encerrada (close()), o que libera o cursor.
+
+    Args:
+        table (Table): Formato da tabela.
+        rows (iterable): Linhas a exibir (lista, gerador ou cursor).
+        page_size (int, optional): Linhas por página (padrão: altura do terminal).
+        read_key (callable): Função que lê a resposta do prompt (padrão: input).
+
+    Returns:
+        int: Quantidade de linhas exibidas (0 se a origem estava vazia).
+    """
+    if _pager:
+        return _pager(table, rows)
+    out = out or sys.stdout
+    if not out.isatty():
+        return print_table(table, rows, out)
+    page_size = page_size or page_size_for_terminal()
+    source = iter(rows)
+    shown = 0
+    try:
+        lookahead = next(source, None) # Uma linha à frente, para saber se ainda há outra página.
+        while lookahead is not None:
+            rows_in_page = [lookahead] + list(itertools.islice(source, page_size - 1))
+            lookahead = next(source, None)
+            out.write(table.header + "\n" + "\n".join(table.format_row(row) for row in rows_in_page) + "\n")
+            shown += len(rows_in_page)
+            if lookahead is None:
+                break
+            answer = read_key(f"-- Linhas {shown - len(rows_in_page) + 1}-{shown} -- [Enter] próxima página, [t] todas, [q] sair: ").strip().lower()
+            if answer == "q":
+                break
+            if answer == "t": # O restante de uma vez, em blocos.
+                shown += _write_rows(table, itertools.chain([lookahead], source), out)
+                break
+    finally:
+        close = getattr(rows, "close", None)
+        if close:
+            close()
+    return shown
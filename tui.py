@@ -0,0 +1,284 @@
+import locale
+import os
+import threading
+import log_pipeline # Pausa dos logs no stderr enquanto o curses desenha a tela.
+import profiling # Tempo esperando teclas descontado do perfil por ação.
+import table_view # Tabelas de texto (o visualizador em tela cheia substitui o paginador de linha).
+
+try:
+    import curses # No Windows, requer o pacote windows-curses.
+except ImportError:
+    curses = None
+
+# Modo de interface: "python app.py --tui" ou SRL_UI=tui. Sem curses disponível (ex: Windows sem
+# windows-curses) ou fora de um terminal, a aplicação continua no modo de linha.
+UI_ENV_VAR = "SRL_UI"
+# Linhas pedidas ao carregador além da área visível (a busca no banco anda um pouco à frente da rolagem).
+READ_AHEAD_SCREENS = 3
+# Intervalo (ms) entre atualizações da linha de status enquanto não há tecla (animação de carregamento).
+TICK_MS = 100
+
+_SPINNER = "|/-\\"
+_screen = None # Tela do curses enquanto o modo tela cheia estiver ligado.
+_in_curses = False # False enquanto um fluxo roda no modo de linha (input/print) entre dois menus.
+
+def is_active():
+    return _screen is not None
+
+def requested(argv):
+    """Indica se o modo tela cheia foi pedido (--tui ou SRL_UI=tui) e pode ser usado neste terminal."""
+    wanted = "--tui" in argv or os.getenv(UI_ENV_VAR, "").lower() == "tui"
+    if wanted and curses is None:
+        print("Modo tela cheia indisponível: módulo curses não encontrado (no Windows: pip install windows-curses).")
+        return False
+    return wanted and os.isatty(0) and os.isatty(1)
+
+def run(main, *args):
+    """
+    Executa `main` com o modo tela cheia ligado. Menus e listagens são desenhados pelo curses; os
+    fluxos com perguntas (input) rodam no modo de linha entre um menu e outro, como antes.
+    O terminal é restaurado ao sair, inclusive em caso de erro.
+    """
+    global _screen
+    locale.setlocale(locale.LC_ALL, "") # Acentos corretos no curses.
+
+    def body(screen):
+        global _screen
+        _screen = screen
+        curses.curs_set(0)
+        curses.use_default_colors()
+        screen.keypad(True)
+        table_view.set_pager(view_table)
+        _leave() # Começa no modo de linha (mensagens de conexão, etc.); o primeiro menu liga a tela cheia.
+        try:
+            return main(*args)
+        finally:
+            table_view.set_pager(None)
+            _screen = None
+
+    try:
+        return curses.wrapper(body)
+    finally:
+        _screen = None
+        log_pipeline.resume_console()
+
+def _enter():
+    """Volta ao modo tela cheia após um fluxo de linha. A tela é redesenhada por inteiro uma vez."""
+    global _in_curses
+    if not _in_curses:
+        log_pipeline.pause_console() # Logs escritos no stderr agora corromperiam a tela (ficam guardados até _leave).
+        curses.reset_prog_mode()
+        curses.curs_set(0)
+        _screen.clearok(True) # O terminal tem o texto do modo de linha: o próximo refresh repinta tudo.
+        _in_curses = True
+
+def _leave():
+    """Passa para o modo de linha (print/input normais) preservando o estado do curses."""
+    global _in_curses
+    curses.def_prog_mode()
+    curses.endwin()
+    _in_curses = False
+    log_pipeline.resume_console()
+
+def _put(row, col, text, attr=0):
+    """Escreve uma linha cortada na largura da tela (o curses falha ao escrever na última coluna)."""
+    height, width = _screen.getmaxyx()
+    if 0 <= row < height and col < width - 1:
+        try:
+            _screen.addnstr(row, col, text, width - 1 - col, attr)
+            _screen.clrtoeol()
+        except curses.error:
+            pass
+
+def menu(title, options, exit_label=None):
+    """
+    Menu em tela cheia: setas (ou j/k) movem a seleção e Enter escolhe; números escolhem direto;
+    q/Esc equivale à opção 0 quando `exit_label` é informado.
+
+    Ao mover a seleção, só as duas linhas afetadas são reescritas.
+
+    Returns:
+        int: A opção escolhida (1..len(options)), ou 0 para sair/voltar.
+    """
+    _enter()
+    entries = list(enumerate(options, 1)) + ([(0, exit_label)] if exit_label else [])
+    selected = 0
+    typed = "" # Dígitos digitados (menus com 10 ou mais opções).
+    top = 2
+
+    def draw_entry(index):
+        number, label = entries[index]
+        _put(top + index, 2, f"{number}. {label}", curses.A_REVERSE if index == selected else 0)
+
+    def draw_all():
+        _screen.erase()
+        _put(0, 0, f"--- {title} ---", curses.A_BOLD)
+        for index in range(len(entries)):
+            draw_entry(index)
+        draw_status()
+
+    def draw_status():
+        help_text = "↑/↓ mover  Enter escolher  0-9 número" + ("  q voltar" if exit_label else "")
+        _put(_screen.getmaxyx()[0] - 1, 0, f"{help_text}   {typed}", curses.A_DIM)
+
+    draw_all()
+    while True:
+        _screen.refresh()
+        with profiling.waiting(): # Tempo de escolha do usuário, como em input().
+            key = _screen.getch()
+        previous = selected
+        if key in (curses.KEY_UP, ord("k")):
+            selected = (selected - 1) % len(entries)
+        elif key in (curses.KEY_DOWN, ord("j")):
+            selected = (selected + 1) % len(entries)
+        elif key in (curses.KEY_HOME, curses.KEY_PPAGE):
+            selected = 0
+        elif key in (curses.KEY_END, curses.KEY_NPAGE):
+            selected = len(entries) - 1
+        elif key in (curses.KEY_ENTER, 10, 13):
+            choice = int(typed) if typed else entries[selected][0]
+            if typed and not (0 <= choice <= len(options)) or (choice == 0 and not exit_label):
+                typed = ""
+                draw_status()
+                continue
+            break
+        elif exit_label and key in (27, ord("q")):
+            choice = 0
+            break
+        elif ord("0") <= key <= ord("9"):
+            typed += chr(key)
+            if len(options) < 10: # Um dígito basta: escolhe na hora.
+                choice = int(typed)
+                if choice <= len(options) and (choice or exit_label):
+                    break
+                typed = ""
+            draw_status()
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            typed = typed[:-1]
+            draw_status()
+        elif key == curses.KEY_RESIZE:
+            draw_all()
+        if selected != previous: # Redesenho incremental: só a linha que perdeu e a que ganhou a seleção.
+            draw_entry(previous)
+            draw_entry(selected)
+    _leave() # O fluxo escolhido roda no modo de linha.
+    return choice
+
+class _Loader(threading.Thread):
+    """
+    Lê as linhas da origem (ex: db_connection.iterate_query) em segundo plano, até a quantidade pedida
+    pela tela, para que a interface continue respondendo enquanto a consulta roda.
+    """
+
+    def __init__(self, rows, wanted):
+        super().__init__(name="tui-loader", daemon=True)
+        self.source = rows
+        self.rows = []
+        self.wanted = wanted
+        self.done = False
+        self.error = None
+        self._cancelled = False
+        self._condition = threading.Condition()
+
+    def run(self):
+        try:
+            for row in self.source:
+                with self._condition:
+                    self.rows.append(row)
+                    while len(self.rows) >= self.wanted and not self._cancelled: # Espera a rolagem pedir mais.
+                        self._condition.wait()
+                    if self._cancelled:
+                        break
+        except Exception as e: # Exibido na linha de status; a aplicação continua.
+            self.error = e
+        finally:
+            close = getattr(self.source, "close", None)
+            if close:
+                close() # Libera o cursor.
+            self.done = True
+
+    def request(self, count):
+        with self._condition:
+            if count > self.wanted:
+                self.wanted = count
+                self._condition.notify()
+
+    def cancel(self):
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify()
+
+def view_table(table, rows):
+    """
+    Visualizador de tabela em tela cheia (substitui table_view.page enquanto o modo estiver ligado).
+
+    A consulta roda em uma thread; as linhas aparecem conforme chegam. Setas/PgUp/PgDn/Home/End rolam,
+    ←/→ deslocam colunas largas e q/Esc volta. Só as linhas da área visível são desenhadas.
+
+    Returns:
+        int: Quantidade de linhas carregadas (0 se a origem estava vazia).
+    """
+    _enter()
+    height, width = _screen.getmaxyx()
+    visible = max(1, height - 3)
+    loader = _Loader(rows, visible * READ_AHEAD_SCREENS)
+    loader.start()
+    header, divider = table.header.split("\n")
+    top = left = tick = 0
+    drawn = None # (topo, deslocamento, linhas visíveis já desenhadas): evita redesenhar sem mudança.
+    _screen.erase()
+    _screen.timeout(TICK_MS)
+    try:
+        while True:
+            loaded, done = len(loader.rows), loader.done
+            if done and not loaded:
+                return 0
+            state = (top, left, min(loaded, top + visible) - top, height, width)
+            if state != drawn:
+                _put(0, 0, header[left:], curses.A_BOLD)
+                _put(1, 0, divider[left:])
+                for line in range(visible):
+                    index = top + line
+                    _put(2 + line, 0, table.format_row(loader.rows[index])[left:] if index < loaded else "")
+                drawn = state
+            tick += 1
+            status = "erro ao carregar: %s" % loader.error if loader.error else \
+                f"{loaded} linhas" if done else f"{_SPINNER[tick % len(_SPINNER)]} carregando... {loaded} linhas"
+            _put(height - 1, 0, f"Linhas {min(top + 1, loaded)}-{min(top + visible, loaded)} | {status} | "
+                                "↑↓ PgUp PgDn Home End ←→  q voltar", curses.A_REVERSE)
+            _screen.refresh()
+
+            with profiling.waiting():
+                key = _screen.getch()
+            last_top = max(0, loaded - visible)
+            if key in (ord("q"), 27):
+                break
+            elif key in (curses.KEY_DOWN, ord("j")):
+                top = min(top + 1, last_top)
+            elif key in (curses.KEY_UP, ord("k")):
+                top = max(top - 1, 0)
+            elif key in (curses.KEY_NPAGE, ord(" ")):
+                top = min(top + visible, last_top)
+            elif key == curses.KEY_PPAGE:
+                top = max(top - visible, 0)
+            elif key == curses.KEY_HOME:
+                top = 0
+            elif key == curses.KEY_END:
+                loader.request(float("inf")) # Fim da lista: carrega o restante.
+                top = last_top
+            elif key == curses.KEY_RIGHT:
+                left = min(left + 10, max(0, table.width - width + 1))
+            elif key == curses.KEY_LEFT:
+                left = max(left - 10, 0)
+            elif key == curses.KEY_RESIZE:
+                height, width = _screen.getmaxyx()
+                visible = max(1, height - 3)
+                _screen.erase()
+                drawn = None
+            loader.request(top + visible * READ_AHEAD_SCREENS)
+        return len(loader.rows)
+    finally:
+        _screen.timeout(-1)
+        loader.cancel()
+        loader.join() # A conexão só volta a ser usada depois que o carregador liberar o cursor.
+        _leave()